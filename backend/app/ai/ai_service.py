@@ -7,6 +7,7 @@ from app.config import settings
 # Import service functions for direct calls
 from app.services.class_service import search_classes, fetch_all_workshops, fetch_all_classes
 from app.services.mentor_service import search_mentors, fetch_all_mentors, fetch_mentor_by_id
+from app.services.projections import CLASS_VIEWS, MENTOR_VIEWS
 from app.services.user_service import get_user_by_id
 # Import correct booking and message functions
 from app.services.booking_service import get_bookings_by_student
@@ -17,6 +18,9 @@ from app.models.class_models import ClassSearchQuery
 from app.models.mentor_models import MentorSearchQuery
 from app.models.search_models import UnifiedSearchQuery
 from app.services.search_service import unified_search
+import logging
+
+logger = logging.getLogger(__name__)
 
 MODEL_ID = "gemini-2.5-flash" # @param ["gemini-2.5-flash-lite-preview-06-17", "gemini-2.5-flash", "gemini-2.5-pro"] {"allow-input":true, isTemplate: true}
 
@@ -507,7 +511,7 @@ def get_subjects_with_metadata():
         subjects_ref = db.collection('subjects')
         subjects_data = []
         
-        print("Fetching subjects metadata for AI enhancement...")
+        logger.debug("Fetching subjects metadata for AI enhancement")
         
         for doc in subjects_ref.stream():
             subject_data = doc.to_dict()
@@ -526,11 +530,11 @@ def get_subjects_with_metadata():
             if metadata['subject'] and (metadata['synonyms'] or metadata['keywords']):
                 subjects_data.append(metadata)
         
-        print(f"Loaded {len(subjects_data)} subjects with metadata for AI enhancement")
+        logger.debug("Loaded %s subjects with metadata for AI enhancement", len(subjects_data))
         return subjects_data
         
     except Exception as e:
-        print(f"Error fetching subjects metadata: {str(e)}")
+        logger.warning("Error fetching subjects metadata: %s", e)
         return []
 
 def enhance_query_with_metadata(user_query, subjects_metadata):
@@ -543,7 +547,7 @@ def enhance_query_with_metadata(user_query, subjects_metadata):
         matched_subjects = []
         expanded_terms = set([user_query])  # Start with original query
         
-        print(f"Enhancing query '{user_query}' with metadata...")
+        logger.debug("Enhancing query with metadata", extra={"query": user_query})
         
         for subject in subjects_metadata:
             subject_matched = False
@@ -574,7 +578,7 @@ def enhance_query_with_metadata(user_query, subjects_metadata):
         # Remove duplicates and convert to list
         expanded_terms = list(expanded_terms)
         
-        print(f"Query enhancement result: {len(matched_subjects)} subjects matched, {len(expanded_terms)} expanded terms")
+        logger.debug("Query enhancement result: %s subjects matched, %s expanded terms", len(matched_subjects), len(expanded_terms))
         
         return {
             'original_query': user_query,
@@ -584,7 +588,7 @@ def enhance_query_with_metadata(user_query, subjects_metadata):
         }
         
     except Exception as e:
-        print(f"Error enhancing query with metadata: {str(e)}")
+        logger.warning("Error enhancing query with metadata: %s", e)
         return {
             'original_query': user_query,
             'expanded_terms': [user_query],
@@ -597,7 +601,7 @@ def make_direct_service_call(service_type, **kwargs):
     Make direct service calls instead of HTTP requests to avoid deadlock.
     This replaces the make_api_request function with direct function calls.
     """
-    print(f"Making direct service call: {service_type} with params: {kwargs}")
+    logger.debug("Making direct service call: %s", service_type, extra={"params": kwargs})
     
     try:
         if service_type == "classes":
@@ -606,9 +610,9 @@ def make_direct_service_call(service_type, **kwargs):
                 # Get workshops only
                 page = kwargs.get("page", 1)
                 page_size = kwargs.get("pageSize", 20)
-                classes, total = fetch_all_workshops(page, page_size)
+                classes, total = fetch_all_workshops(page, page_size, CLASS_VIEWS["ai"])
                 return {
-                    "classes": [class_item.dict() for class_item in classes],
+                    "classes": [class_item.dict(exclude_unset=True) for class_item in classes],
                     "total": total,
                     "page": page,
                     "pageSize": page_size
@@ -616,9 +620,9 @@ def make_direct_service_call(service_type, **kwargs):
             else:
                 # Use search_classes for filtered results
                 search_query = ClassSearchQuery(**kwargs)
-                classes, total = search_classes(search_query)
+                classes, total = search_classes(search_query, CLASS_VIEWS["ai"])
                 return {
-                    "classes": [class_item.dict() for class_item in classes],
+                    "classes": [class_item.dict(exclude_unset=True) for class_item in classes],
                     "total": total,
                     "page": kwargs.get("page", 1),
                     "pageSize": kwargs.get("pageSize", 20)
@@ -633,9 +637,9 @@ def make_direct_service_call(service_type, **kwargs):
             else:
                 # Use search_mentors for filtered results
                 search_query = MentorSearchQuery(**kwargs)
-                mentors, total = search_mentors(search_query)
+                mentors, total = search_mentors(search_query, MENTOR_VIEWS["ai"])
                 return {
-                    "mentors": [mentor.dict() for mentor in mentors],
+                    "mentors": [mentor.dict(exclude_unset=True) for mentor in mentors],
                     "total": total,
                     "page": kwargs.get("page", 1),
                     "pageSize": kwargs.get("pageSize", 20)
@@ -711,7 +715,7 @@ def make_direct_service_call(service_type, **kwargs):
                                     'tradition': getattr(subject, 'tradition_or_school', '')
                                 })
             except Exception as e:
-                print(f"Error detecting cultural query: {e}")
+                logger.warning("Error detecting cultural query: %s", e)
                 # Fallback to result-based detection
             
             # Count cultural results in the response
@@ -749,7 +753,7 @@ def make_direct_service_call(service_type, **kwargs):
             return {"error": f"Unknown service type: {service_type}"}
             
     except Exception as e:
-        print(f"Service call failed: {str(e)}")
+        logger.error("Service call failed: %s", e)
         return {"error": f"Service call failed: {str(e)}"}
 
 def generate_ai_response(user_message, is_authenticated=False, user_context=None, conversation_history=None, context=None):
@@ -776,7 +780,7 @@ def generate_ai_response(user_message, is_authenticated=False, user_context=None
     
     if is_search_query:
         try:
-            print(f"Detected search query, enhancing with metadata: {user_message}")
+            logger.debug("Detected search query, enhancing with metadata", extra={"query": user_message})
             subjects_metadata = get_subjects_with_metadata()
             
             if subjects_metadata:
@@ -801,10 +805,10 @@ def generate_ai_response(user_message, is_authenticated=False, user_context=None
                         enhanced_message += f"\n- Matched subjects: {[s['subject'] for s in enhancement['matched_subjects']]}"
                         enhanced_message += f"\n- Suggested terms: {enhancement['expanded_terms']}"
                 
-                print(f"Enhanced query with {len(subjects_metadata)} subjects metadata")
+                logger.debug("Enhanced query with %s subjects metadata", len(subjects_metadata))
         
         except Exception as e:
-            print(f"Error in metadata enhancement: {str(e)}")
+            logger.warning("Error in metadata enhancement: %s", e)
             # Continue without enhancement if there's an error
     
     # Build conversation context
@@ -839,7 +843,7 @@ def generate_ai_response(user_message, is_authenticated=False, user_context=None
         """
         Get the destination that the user wants to go to
         """
-        print(f"Destination: {destination}")
+        logger.debug("Destination: %s", destination)
         return destination
     
     get_destination = {
@@ -1021,12 +1025,12 @@ def generate_ai_response(user_message, is_authenticated=False, user_context=None
                 
                 # Check if there's a function call in any part
                 function_call_part = None
-                print(f"DEBUG: Checking for function calls in {len(response.candidates[0].content.parts)} parts")
+                logger.debug("Checking for function calls in %s parts", len(response.candidates[0].content.parts))
                 for i, part in enumerate(response.candidates[0].content.parts):
-                    print(f"DEBUG: Part {i}: has function_call: {hasattr(part, 'function_call')}")
+                    logger.debug("Part %s: has function_call: %s", i, hasattr(part, 'function_call'))
                     if hasattr(part, 'function_call') and part.function_call:
                         function_call_part = part.function_call
-                        print(f"DEBUG: Found function call: {function_call_part}")
+                        logger.debug("Found function call: %s", function_call_part)
                         break
                 
                 if function_call_part:
@@ -1063,7 +1067,7 @@ def generate_ai_response(user_message, is_authenticated=False, user_context=None
                             api_response.candidates[0].content.parts):
                             ai_response = api_response.candidates[0].content.parts[0].text
                         else:
-                            print(f"ERROR: API response parsing failed. Response: {api_response}")
+                            logger.error("API response parsing failed", extra={"response": api_response})
                             ai_response = "I had trouble processing that request. Let me try a different approach."
                             
                     else:
@@ -1079,7 +1083,7 @@ def generate_ai_response(user_message, is_authenticated=False, user_context=None
                     else:
                         ai_response = "I couldn't generate a proper response."
         except Exception as e:
-            print(f"Error in response parsing: {e}")
+            logger.error("Error in response parsing: %s", e)
             # Try to extract text safely from response, otherwise use fallback
             try:
                 if (response and 
@@ -10,10 +10,14 @@ class Settings:
     FIRESTORE_LOCATION: str = os.getenv("FIRESTORE_LOCATION", "europe-west2")
     ENV: str = os.getenv("ENVIRONMENT", "development")
     PORT: int = int(os.getenv("PORT", 8080))
+    UPLOADS_DIR: str = os.getenv("UPLOADS_DIR", "uploads")
+    # Local state such as the durable email queue (not committed)
+    DATA_DIR: str = os.getenv("DATA_DIR", "data")
     
     # Stripe Configuration (already configured in Secret Manager for production)
     stripe_secret_key: str = os.getenv("STRIPE_SECRET_KEY", "sk_test_...")
     stripe_publishable_key: str = os.getenv("STRIPE_PUBLISHABLE_KEY", "pk_test_...")
+    stripe_webhook_secret: str = os.getenv("STRIPE_WEBHOOK_SECRET", "")
     
     # Frontend URL for Stripe redirects (localhost for now, update via env var later)
     frontend_url: str = os.getenv("FRONTEND_URL", "http://localhost:3000")
@@ -0,0 +1,162 @@
+"""
+Application logging setup.
+
+- Records go through a bounded in-memory queue (QueueHandler) and are written
+  by a background QueueListener thread, so request threads never block on
+  stdout. If the queue is full the record is dropped and counted instead of
+  stalling the request.
+- LOG_FORMAT=json (default) writes one JSON object per line with the fields
+  Cloud Logging understands (severity, message, logger, timestamp) plus any
+  `extra={...}` fields; LOG_FORMAT=text keeps the plain format for local runs.
+- LOG_LEVEL sets the root level; LOG_LEVELS sets per-logger levels, e.g.
+  LOG_LEVELS="app.services.class_service=DEBUG,httpx=WARNING".
+- Records below INFO are sampled: LOG_DEBUG_SAMPLE_RATE (default 1.0) with
+  per-logger overrides in LOG_SAMPLE_RATES="app.ai.ai_service=0.1". A call
+  can override its own rate with extra={"sample_rate": 0.01}.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+DEFAULT_QUEUE_SIZE = 10000
+
+# Attributes every LogRecord has - anything else came from `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+
+def _parse_mapping(value: str) -> Dict[str, str]:
+    """'a=1,b.c=2' -> {'a': '1', 'b.c': '2'}"""
+    mapping = {}
+    for item in (value or "").split(","):
+        if "=" in item:
+            name, setting = item.split("=", 1)
+            mapping[name.strip()] = setting.strip()
+    return mapping
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with severity, logger, message and extra fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "severity": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and key not in ("sample_rate", "exc_text"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of sub-INFO records; INFO and above always pass"""
+
+    def __init__(self, default_rate: float = 1.0, rates: Optional[Dict[str, float]] = None):
+        super().__init__()
+        self.default_rate = default_rate
+        # Longest prefix first so "app.services.class_service" beats "app.services"
+        self.rates = sorted((rates or {}).items(), key=lambda item: len(item[0]), reverse=True)
+
+    def rate_for(self, logger_name: str) -> float:
+        for prefix, rate in self.rates:
+            if logger_name == prefix or logger_name.startswith(prefix + "."):
+                return rate
+        return self.default_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.INFO:
+            return True
+        rate = getattr(record, "sample_rate", None)
+        if rate is None:
+            rate = self.rate_for(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of blocking"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._lock_dropped = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message and traceback on the calling thread (args may be
+        # mutated later) but skip the base class's full format() and record copy
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock_dropped:
+                self.dropped += 1
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[NonBlockingQueueHandler] = None
+
+
+def configure_logging(stream=None) -> NonBlockingQueueHandler:
+    """Install the queue handler on the root logger (idempotent)"""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        return _queue_handler
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    if os.getenv("LOG_FORMAT", "json").lower() == "text":
+        output.setFormatter(logging.Formatter("%(levelname)s:%(name)s:%(message)s"))
+    else:
+        output.setFormatter(JsonFormatter())
+
+    log_queue: queue.Queue = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", DEFAULT_QUEUE_SIZE)))
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(SamplingFilter(
+        float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0")),
+        {name: float(rate) for name, rate in _parse_mapping(os.getenv("LOG_SAMPLE_RATES", "")).items()},
+    ))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    for name, level in _parse_mapping(os.getenv("LOG_LEVELS", "")).items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    _queue_handler = handler
+    atexit.register(shutdown_logging)
+    return handler
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread"""
+    global _listener, _queue_handler
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
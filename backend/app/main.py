@@ -1,4 +1,5 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import mentors
 from app.routers import classes
@@ -13,23 +14,35 @@ from app.routers import firebase_auth
 from app.routers import user_onboarding
 from app.routers import messages
 from app.routers import young_learners
+from app.routers import dashboard
+from app.routers import home
 from app.ai import ai_router
-from fastapi.staticfiles import StaticFiles  
+from app.services.image_upload_service import ImmutableStaticFiles, shutdown_thumbnail_pool
+from app.services.email_service import start_email_workers, stop_email_workers
+from app.services.stripe_webhook_service import replay_pending_events, shutdown_event_pool
+from app.services.instrumentation import PerformanceMiddleware, render_prometheus
+from app.services.compression import CompressionMiddleware
+from app.services.document_loader import DocumentLoaderMiddleware
+from app.services.response_cache import ResponseCacheMiddleware, start_catalog_version_sync, stop_catalog_version_sync
+from app.services.homepage_service import start_homepage_refresh, stop_homepage_refresh
+from app.config import settings
+from app.logging_config import configure_logging, shutdown_logging
 import os
 import logging
 import firebase_admin
 from firebase_admin import credentials
 import json
 
-# Set up a loggers
-logging.basicConfig(level=logging.INFO)
+# Structured JSON logs written from a background thread (see app/logging_config.py)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="Roots & Wings API",
     description="FastAPI backend for Roots & Wings on GCP",
     version="0.1.0",
-    redirect_slashes=False  # Disable auto trailing slash redirects
+    redirect_slashes=False,  # Disable auto trailing slash redirects
+    default_response_class=ORJSONResponse
 )
 
 # --- Firebase Initialization ---
@@ -102,6 +115,17 @@ def initialize_firebase():
 # Initialize Firebase Admin SDK at startup
 initialize_firebase()
 
+# Request-scoped identity map: services share document reads and batch them into get_all
+app.add_middleware(DocumentLoaderMiddleware)
+
+# Brotli/gzip above COMPRESSION_MIN_SIZE. Innermost, so the response cache stores
+# compressed bodies and keys them (and their ETags) by content coding.
+app.add_middleware(CompressionMiddleware)
+
+# ETags / conditional GET and server-side caching for catalog reads. Added before
+# CORS so cached responses never carry another origin's CORS headers.
+app.add_middleware(ResponseCacheMiddleware)
+
 # Configure CORS for frontend integrations
 app.add_middleware(
     CORSMiddleware,
@@ -121,6 +145,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency histograms, Firestore read counters and Server-Timing headers
+app.add_middleware(PerformanceMiddleware)
+
 # Include modular routes
 app.include_router(firebase_auth.router)
 app.include_router(user_onboarding.router)
@@ -135,16 +162,56 @@ app.include_router(reviews.router)
 app.include_router(metadata.router)
 app.include_router(messages.router)
 app.include_router(young_learners.router)
+app.include_router(dashboard.router)
+app.include_router(home.router)
 app.include_router(ai_router.router, prefix="/ai", tags=["ai"])
 
 # Create uploads directory if it does not exist
-uploads_dir = "uploads"
-if not os.path.exists(uploads_dir):
-    os.makedirs(uploads_dir)
-    os.makedirs(os.path.join(uploads_dir, "profile-images"))
+os.makedirs(os.path.join(settings.UPLOADS_DIR, "profile-images"), exist_ok=True)
+
+# Mount static files for serving uploaded images. File names carry a content hash,
+# so they are served with long-lived immutable cache headers.
+app.mount("/uploads", ImmutableStaticFiles(directory=settings.UPLOADS_DIR), name="uploads")
+
+@app.on_event("startup")
+def start_background_workers():
+    start_email_workers()
+    start_catalog_version_sync()
+    start_homepage_refresh()
+    try:
+        replay_pending_events()
+    except Exception as e:
+        logger.warning(f"Could not replay pending Stripe events: {str(e)}")
+
+@app.on_event("shutdown")
+def finish_thumbnail_jobs():
+    shutdown_thumbnail_pool()
+
+@app.on_event("shutdown")
+def finish_email_jobs():
+    stop_email_workers()
+
+@app.on_event("shutdown")
+def finish_stripe_events():
+    shutdown_event_pool()
+
+@app.on_event("shutdown")
+def stop_homepage_snapshots():
+    stop_homepage_refresh()
+
+@app.on_event("shutdown")
+def stop_catalog_sync():
+    stop_catalog_version_sync()
+
+@app.on_event("shutdown")
+def flush_logs():
+    # Registered last so records from the other shutdown hooks are written
+    shutdown_logging()
 
-# Mount static files for serving uploaded images
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
 
 @app.get("/health")
 def health_check():
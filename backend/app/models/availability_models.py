@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field, validator
 from typing import List, Optional
 from datetime import date
+from app.models.mentor_models import Mentor
 
 class TimeRange(BaseModel):
     startTime: str = Field(..., description="Start time in HH:MM format (24-hour)")
@@ -96,3 +97,49 @@ class AvailabilityRequest(BaseModel):
 class AvailabilityResponse(BaseModel):
     availability: MentorAvailability
 
+
+# Availability-aware mentor search
+class AvailabilitySearchQuery(BaseModel):
+    subject: Optional[str] = Field(None, description="Subject ID or category the mentor teaches")
+    category: Optional[str] = None
+    city: Optional[str] = None
+    teachingMode: Optional[str] = None
+    day: Optional[str] = Field(None, description="Only this weekday within the date range")
+    startTime: Optional[str] = Field(None, description="Window start (HH:MM, mentor's timezone)")
+    endTime: Optional[str] = Field(None, description="Window end (HH:MM, mentor's timezone)")
+    dateFrom: Optional[str] = Field(None, description="YYYY-MM-DD, defaults to today")
+    dateTo: Optional[str] = Field(None, description="YYYY-MM-DD, defaults to dateFrom + 6 days")
+    durationMinutes: int = Field(60, ge=15, le=480)
+    slotsPerMentor: int = Field(3, ge=1, le=20)
+    page: int = Field(1, ge=1)
+    pageSize: int = Field(20, ge=1, le=100)
+
+    @validator('day')
+    def validate_day(cls, v):
+        return DayAvailability.validate_day(v) if v else v
+
+    @validator('startTime', 'endTime')
+    def validate_time(cls, v):
+        return TimeRange.validate_time_format(v) if v else v
+
+    @validator('dateFrom', 'dateTo')
+    def validate_date(cls, v):
+        return DateRange.validate_date_format(v)
+
+class AvailableSlot(BaseModel):
+    date: str
+    day: str
+    startTime: str
+    endTime: str
+
+class AvailabilitySearchResult(BaseModel):
+    mentor: Mentor
+    timezone: str
+    slots: List[AvailableSlot]
+
+class AvailabilitySearchResponse(BaseModel):
+    results: List[AvailabilitySearchResult]
+    total: int
+    page: int
+    pageSize: int
+    totalPages: int
@@ -0,0 +1,8 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+# Ids per batchGet request; larger lists are rejected with 422
+MAX_BATCH_IDS = 300
+
+class BatchGetRequest(BaseModel):
+    ids: List[str] = Field(min_length=1, max_length=MAX_BATCH_IDS)
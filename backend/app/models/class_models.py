@@ -147,6 +147,7 @@ class ClassListResponse(BaseModel):
     page: int
     pageSize: int
     totalPages: int
+    nextCursor: Optional[str] = None  # Pass back as ?cursor= for the next page
 
 class FeaturedClassResponse(BaseModel):
     featured: List[ClassItem]
@@ -185,3 +186,4 @@ class ClassSearchQuery(BaseModel):
     sortOrder: Optional[str] = Field("desc", description="Sort order: asc or desc")
     page: int = Field(1, ge=1, description="Page number")
     pageSize: int = Field(20, ge=1, le=100, description="Items per page")
+    cursor: Optional[str] = Field(None, description="nextCursor from the previous page (replaces page)")
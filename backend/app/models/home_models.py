@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import List
+
+from app.models.class_models import ClassItem
+from app.models.mentor_models import Mentor
+from app.models.review_models import TestimonialResponse
+
+class HomepageResponse(BaseModel):
+    """Everything the homepage renders on load, served from one precomputed snapshot"""
+    featuredClasses: List[ClassItem]
+    featuredMentors: List[Mentor]
+    upcomingWorkshops: List[ClassItem]
+    testimonials: List[TestimonialResponse]
+    generatedAt: str
@@ -167,6 +167,7 @@ class MentorListResponse(BaseModel):
     page: int
     pageSize: int
     totalPages: int
+    nextCursor: Optional[str] = None  # Pass back as ?cursor= for the next page
 
 class FeaturedMentorsResponse(BaseModel):
     featured: List[Mentor]
@@ -187,7 +188,9 @@ class MentorSearchQuery(BaseModel):
     maxRate: Optional[float] = Field(None, ge=0, description="Maximum hourly rate")
     isVerified: Optional[bool] = Field(None, description="Filter by verification status")
     acceptingStudents: Optional[bool] = Field(None, description="Filter by accepting new students status")
+    availableNow: Optional[bool] = Field(None, description="Only mentors inside their weekly availability right now")
     sortBy: Optional[str] = Field("avgRating", description="Sort field: avgRating, totalReviews, oneOnOneRate, createdAt")
     sortOrder: Optional[str] = Field("desc", description="Sort order: asc or desc")
     page: int = Field(1, ge=1, description="Page number")
-    pageSize: int = Field(20, ge=1, le=100, description="Items per page")
\ No newline at end of file
+    pageSize: int = Field(20, ge=1, le=100, description="Items per page")
+    cursor: Optional[str] = Field(None, description="nextCursor from the previous page (replaces page)")
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 from app.models.mentor_models import Mentor
 from app.models.class_models import ClassItem
 
@@ -50,4 +50,6 @@ class UnifiedSearchResponse(BaseModel):
     pageSize: int
     totalPages: int
     query: str
-    filters: dict
\ No newline at end of file
+    filters: dict
+    nextCursor: Optional[str] = None  # Pass back as ?cursor= for the next page
+    debug: Optional[Dict[str, Any]] = None  # Per-stage timings, only with ?debug=true
\ No newline at end of file
@@ -1,18 +1,78 @@
 from fastapi import APIRouter, HTTPException, Query
 from typing import Optional
+from pydantic import ValidationError
 from app.models.availability_models import (
-    MentorAvailability, AvailabilityRequest, AvailabilityResponse
+    MentorAvailability, AvailabilityRequest, AvailabilityResponse,
+    AvailabilitySearchQuery, AvailabilitySearchResponse
 )
 from app.services.availability_service import AvailabilityService
+from app.services.availability_search_service import search_available_mentors
 
 router = APIRouter(prefix="/availability", tags=["Availability"])
 availability_service = AvailabilityService()
 
+@router.get("/search", response_model=AvailabilitySearchResponse)
+def search_availability(
+    subject: Optional[str] = Query(None, description="Subject ID or category, e.g. sitar"),
+    category: Optional[str] = Query(None),
+    city: Optional[str] = Query(None),
+    teachingMode: Optional[str] = Query(None, description="online / in-person"),
+    day: Optional[str] = Query(None, description="Only this weekday, e.g. Saturday"),
+    startTime: Optional[str] = Query(None, description="Window start HH:MM, e.g. 08:00"),
+    endTime: Optional[str] = Query(None, description="Window end HH:MM, e.g. 12:00"),
+    dateFrom: Optional[str] = Query(None, description="YYYY-MM-DD (default today)"),
+    dateTo: Optional[str] = Query(None, description="YYYY-MM-DD (default dateFrom + 6 days, at most 28 days)"),
+    durationMinutes: int = Query(60, ge=15, le=480),
+    slotsPerMentor: int = Query(3, ge=1, le=20),
+    page: int = Query(1, ge=1),
+    pageSize: int = Query(20, ge=1, le=100)
+):
+    """
+    Mentors free in a time window, ranked by rating, with their earliest open slots.
+    
+    Example - "sitar mentor free Saturday morning":
+    GET /availability/search?subject=sitar&day=Saturday&startTime=08:00&endTime=12:00
+    
+    Response:
+    {
+      "results": [
+        {
+          "mentor": {...},
+          "timezone": "Europe/London",
+          "slots": [{"date": "2025-09-06", "day": "Saturday", "startTime": "09:00", "endTime": "10:00"}]
+        }
+      ],
+      "total": 1, "page": 1, "pageSize": 20, "totalPages": 1
+    }
+    
+    Times are in each mentor's timezone; pending and confirmed one-on-one bookings are excluded.
+    """
+    try:
+        query = AvailabilitySearchQuery(
+            subject=subject, category=category, city=city, teachingMode=teachingMode, day=day,
+            startTime=startTime, endTime=endTime, dateFrom=dateFrom, dateTo=dateTo,
+            durationMinutes=durationMinutes, slotsPerMentor=slotsPerMentor, page=page, pageSize=pageSize
+        )
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    results, total = search_available_mentors(query)
+    return {
+        "results": results,
+        "total": total,
+        "page": page,
+        "pageSize": pageSize,
+        "totalPages": (total + pageSize - 1) // pageSize
+    }
+
 @router.get("/mentors/{mentor_id}")
 def get_availability(
     mentor_id: str,
     list_all: bool = Query(False, description="Get all mentors with availability (ignores mentor_id)"),
-    day: Optional[str] = Query(None, description="Filter by specific day when list_all=true")
+    day: Optional[str] = Query(None, description="Filter by specific day when list_all=true"),
+    start_time: Optional[str] = Query(None, description="With day and end_time: only mentors free for the whole range (HH:MM)"),
+    end_time: Optional[str] = Query(None, description="With day and start_time: end of the range (HH:MM)"),
+    available_now: bool = Query(False, description="With list_all=true: only mentors available at this moment"),
+    next_slot_minutes: Optional[int] = Query(None, ge=15, le=1440, description="Include the next free slot of this length")
 ):
     """
     Universal availability getter - supports single mentor or list all mentors.
@@ -21,6 +81,9 @@ def get_availability(
     - GET /availability/mentors/user026 - Get specific mentor availability
     - GET /availability/mentors/any?list_all=true - Get all mentors with availability
     - GET /availability/mentors/any?list_all=true&day=Monday - Get mentors available on Monday
+    - GET /availability/mentors/any?list_all=true&day=Tuesday&start_time=18:00&end_time=20:00 - Free for that range
+    - GET /availability/mentors/any?list_all=true&available_now=true - Available right now
+    - GET /availability/mentors/user026?next_slot_minutes=60 - Adds "nextFreeSlot" (mentor's local time)
     
     Single mentor response:
     {
@@ -48,7 +111,10 @@ def get_availability(
     """
     if list_all:
         # Get list of mentors with availability
-        mentor_ids = availability_service.get_mentors_with_availability(day)
+        if available_now:
+            mentor_ids = availability_service.get_mentors_available_now()
+        else:
+            mentor_ids = availability_service.get_mentors_with_availability(day, start_time, end_time)
         return {
             "mentorIds": mentor_ids,
             "total": len(mentor_ids),
@@ -61,6 +127,9 @@ def get_availability(
         if not availability:
             raise HTTPException(status_code=404, detail="No availability set for this mentor")
         
+        if next_slot_minutes:
+            next_slot = availability_service.get_next_free_slot(mentor_id, next_slot_minutes)
+            return {"availability": availability, "nextFreeSlot": next_slot.isoformat() if next_slot else None}
         return {"availability": availability}
 
 @router.put("/mentors/{mentor_id}")
@@ -2,12 +2,17 @@ from fastapi import APIRouter, HTTPException, Query
 from typing import List
 from app.models.class_models import ClassItem, ClassListResponse, FeaturedClassResponse, WorkshopListResponse, ClassSearchQuery
 from app.services.class_service import (
-    search_classes, fetch_all_classes, fetch_all_workshops, fetch_featured_classes,
-    fetch_upcoming_workshops, fetch_class_by_id, get_class_categories, get_class_subjects,
-    create_class, update_class_flexible
+    search_classes_page, workshop_query, fetch_all_classes, fetch_featured_classes,
+    fetch_upcoming_workshops_page, fetch_class_by_id, get_class_categories, get_class_subjects,
+    create_class, update_class_flexible, fetch_classes_by_ids
 )
+from app.models.batch_models import BatchGetRequest
+from app.services.batch_get import batch_get
 from app.services.mentor_service import fetch_mentor_by_id
 from app.services.firestore import db
+from app.services.response_cache import bump_catalog_version
+from app.services.serialization import list_response
+from app.services.projections import CLASS_REQUIRED, CLASS_VIEWS, view_fields, view_include
 import uuid
 from datetime import datetime
 
@@ -45,7 +50,10 @@ def get_classes(
     sortBy: str = Query("createdAt", description="Sort field - USED BY: Admin dashboard chronological sorting, discovery page sorting"),
     sortOrder: str = Query("desc", description="Sort order - USED BY: Most recent first in admin, various discovery sorts"),
     page: int = Query(1, ge=1, description="Page number - USED BY: Admin dashboard pagination, discovery pagination"),
-    pageSize: int = Query(20, ge=1, le=100, description="Items per page - USED BY: Admin lists (50/100), Discovery (20), Homepage (3)")
+    pageSize: int = Query(20, ge=1, le=100, description="Items per page - USED BY: Admin lists (50/100), Discovery (20), Homepage (3)"),
+    cursor: str = Query(None, description="nextCursor from the previous page (replaces page) - USED BY: Discovery infinite scroll"),
+    fields: str = Query(None, description="Comma-separated class fields to return (e.g. 'title,schedule,mentorName') - USED BY: Homepage cards"),
+    view: str = Query(None, description="Field set to read and return: card (discovery/homepage), admin, ai or detail (default, whole class)")
 ):
     """
     Primary classes endpoint used across multiple frontend pages with different parameter combinations.
@@ -82,23 +90,35 @@ def get_classes(
     - Admin interface: Status fields + basic info + business metrics
     - Mentor dashboard: Management-focused fields + scheduling info
     - Homepage: Minimal fields for featured showcase cards
+    
+    SPARSE FIELDSETS:
+    - ?fields=title,schedule,mentorName returns only those fields per class (classId is always included);
+      dotted paths such as pricing.subtotal select nested fields
+    - ?view=card|admin|ai returns a predefined field set (see app/services/projections.py)
+    - Only the returned fields (plus what filters and sorting need) are read from Firestore
+    
+    PAGINATION:
+    - Each response carries nextCursor (null on the last page); ?cursor={nextCursor} returns the next
+      page reading about pageSize documents however deep it is, while ?page=N skips the earlier pages
     """
+    projection = view_fields(CLASS_VIEWS, view, fields, CLASS_REQUIRED)
+    fields = view_include(CLASS_VIEWS, view, fields)
     
     # Handle featured classes
     if featured is True:
-        classes = fetch_featured_classes(pageSize if pageSize <= 20 else 6)
-        return {
+        classes = fetch_featured_classes(pageSize if pageSize <= 20 else 6, projection)
+        return list_response(ClassListResponse, {
             "classes": classes,
             "total": len(classes),
             "page": 1,
             "pageSize": len(classes),
             "totalPages": 1
-        }
+        }, "classes", fields, always=["classId"])
     
     # Handle workshops with upcoming filter
     if type == "workshop":
         if upcoming is True:
-            workshops, total = fetch_upcoming_workshops(page, pageSize)
+            workshops, total, next_cursor = fetch_upcoming_workshops_page(page, pageSize, projection, cursor)
         else:
             # Check if there are any additional filters beyond just type=workshop
             has_additional_filters = any([
@@ -109,7 +129,7 @@ def get_classes(
             ])
             
             if has_additional_filters:
-                # Use search_classes for filtered workshops
+                # Filtered workshops
                 search_query = ClassSearchQuery(
                     q=q,
                     type=type,
@@ -133,21 +153,23 @@ def get_classes(
                     sortBy=sortBy,
                     sortOrder=sortOrder,
                     page=page,
-                    pageSize=pageSize
+                    pageSize=pageSize,
+                    cursor=cursor
                 )
-                workshops, total = search_classes(search_query)
             else:
-                # Use fetch_all_workshops for unfiltered workshops
-                workshops, total = fetch_all_workshops(page, pageSize)
+                # Unfiltered workshops, newest first
+                search_query = workshop_query(page, pageSize, cursor=cursor)
+            workshops, total, next_cursor = search_classes_page(search_query, projection)
         
         total_pages = (total + pageSize - 1) // pageSize
-        return {
+        return list_response(ClassListResponse, {
             "classes": workshops,
             "total": total,
             "page": page,
             "pageSize": pageSize,
-            "totalPages": total_pages
-        }
+            "totalPages": total_pages,
+            "nextCursor": next_cursor
+        }, "classes", fields, always=["classId"])
     
     # Handle search/filter or get all classes
     search_query = ClassSearchQuery(
@@ -173,19 +195,34 @@ def get_classes(
         sortBy=sortBy,
         sortOrder=sortOrder,
         page=page,
-        pageSize=pageSize
+        pageSize=pageSize,
+        cursor=cursor
     )
     
-    classes, total = search_classes(search_query)
+    classes, total, next_cursor = search_classes_page(search_query, projection)
     total_pages = (total + pageSize - 1) // pageSize
     
-    return {
+    return list_response(ClassListResponse, {
         "classes": classes,
         "total": total,
         "page": page,
         "pageSize": pageSize,
-        "totalPages": total_pages
-    }
+        "totalPages": total_pages,
+        "nextCursor": next_cursor
+    }, "classes", fields, always=["classId"])
+
+@router.post(":batchGet")
+def batch_get_class_details(request: BatchGetRequest):
+    """
+    Get up to 300 classes by ID in one call - same class fields as GET /classes/{classId}.
+    
+    FRONTEND USAGE PATTERNS:
+    - Bookings lists: POST /classes:batchGet {"ids": [classId, ...]} for every row on the page
+    
+    RESPONSE: results[i] answers ids[i] with {"id", "class"} or {"id", "error": {"code", "message"}}
+    (400 invalid id, 404 not found); found / total count the batch
+    """
+    return batch_get(request.ids, fetch_classes_by_ids, "class", "Class not found")
 
 @router.get("/{class_id}")
 def get_class_by_id(class_id: str):
@@ -433,6 +470,7 @@ def create_one_on_one_class(request: dict):
         # Save to Firestore
         doc_ref = db.collection('classes').document(class_id)
         doc_ref.set(class_data)
+        bump_catalog_version("classes")
         
         return {
             "message": f"One-on-one class created successfully with {total_sessions} session{'s' if total_sessions > 1 else ''}",
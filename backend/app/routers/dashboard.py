@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends
+from app.services.auth_service import get_current_user
+from app.services.dashboard_service import get_dashboard, mark_messages_read, rebuild_dashboard
+
+router = APIRouter(
+    prefix="/dashboard",
+    tags=["Dashboard"]
+)
+
+@router.get("")
+def get_my_dashboard(current_user_uid: str = Depends(get_current_user)):
+    """
+    Get the signed-in user's dashboard in a single read.
+    
+    FRONTEND USAGE PATTERNS:
+    - Student Dashboard: student.upcoming, student.counts, messages.unread
+    - Mentor Dashboard: mentor.upcoming, mentor.counts, mentor.earnings,
+      mentor.rating and mentor.latestReviews
+      
+    Replaces the separate /bookings, /classes?mentorId=, /reviews and
+    /messages/user/{id} calls the dashboards used to make on load.
+    """
+    return get_dashboard(current_user_uid)
+
+@router.post("/messages/read")
+def mark_my_messages_read(current_user_uid: str = Depends(get_current_user)):
+    """Reset the unread message counter (call when the user opens their inbox)"""
+    mark_messages_read(current_user_uid)
+    return {"message": "Messages marked as read", "unread": 0}
+
+@router.post("/rebuild")
+def rebuild_my_dashboard(current_user_uid: str = Depends(get_current_user)):
+    """Recompute the dashboard from bookings and reviews (repairs any drift)"""
+    rebuild_dashboard(current_user_uid)
+    return get_dashboard(current_user_uid)
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Request, Response
+from app.services.homepage_service import get_homepage_snapshot
+from app.services.response_cache import etag_matches
+
+router = APIRouter(
+    prefix="/home",
+    tags=["Home"]
+)
+
+# Snapshots are rebuilt within HOME_POLL_SECONDS of a catalog write
+HOME_CACHE_CONTROL = "public, max-age=60, stale-while-revalidate=300"
+
+@router.get("")
+def get_home(request: Request):
+    """
+    Get the homepage in a single request, served from a precomputed snapshot.
+    
+    FRONTEND USAGE:
+    - featuredClasses, featuredMentors, upcomingWorkshops, testimonials
+    - Send the ETag back as If-None-Match; an unchanged snapshot returns 304
+    
+    Replaces the /classes?featured=true, /mentors?featured=true,
+    /classes?type=workshop&upcoming=true and /reviews?type=testimonials
+    calls the homepage used to make on load.
+    """
+    snapshot = get_homepage_snapshot()
+    # Weak: CompressionMiddleware changes the bytes but not the content
+    headers = {"ETag": f"W/{snapshot.etag}", "Cache-Control": HOME_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
@@ -1,12 +1,18 @@
 from fastapi import APIRouter, Query, Depends
-from typing import List
+from typing import List, Optional
 from app.models.mentor_models import MentorListResponse, FeaturedMentorsResponse, MentorResponse, MentorSearchQuery, Mentor
 from app.services.mentor_service import (
-    search_mentors, fetch_all_mentors, fetch_featured_mentors, 
-    fetch_mentor_by_id, get_mentor_categories, get_mentor_cities, update_mentor_flexible
+    search_mentors_page, fetch_all_mentors, fetch_featured_mentors, 
+    fetch_mentor_by_id, get_mentor_categories, get_mentor_cities, update_mentor_flexible,
+    fetch_mentors_by_ids
 )
+from app.models.batch_models import BatchGetRequest
+from app.services.batch_get import batch_get
+from app.services.mentor_profile_service import get_mentor_profile
 from app.services.class_service import get_classes_by_mentor_id
 from app.models.class_models import MentorClassesResponse
+from app.services.serialization import list_response
+from app.services.projections import MENTOR_REQUIRED, MENTOR_VIEWS, MENTOR_WHOLE, view_fields, view_include
 
 router = APIRouter(
     prefix="/mentors",
@@ -30,11 +36,15 @@ def get_mentors(
     maxRate: float = Query(None, ge=0, description="Maximum hourly rate filter - USED BY: Directory price range slider"),
     isVerified: bool = Query(None, description="Filter by verification status - USED BY: Admin dashboard mentor filtering"),
     acceptingStudents: bool = Query(None, description="Filter by accepting students - USED BY: Directory availability filter"),
+    availableNow: bool = Query(None, description="Only mentors available at this moment (weekly availability, mentor's timezone)"),
     # Pagination & Sorting
     sortBy: str = Query("avgRating", description="Sort field - USED BY: Directory sort dropdown (avgRating, price-low, price-high, newest)"),
     sortOrder: str = Query("desc", description="Sort order: asc or desc - USED BY: Directory sort implementation"),
     page: int = Query(1, ge=1, description="Page number - USED BY: Directory pagination component"),
-    pageSize: int = Query(20, ge=1, le=100, description="Items per page - USED BY: Directory pagination (20), Homepage featured (6)")
+    pageSize: int = Query(20, ge=1, le=100, description="Items per page - USED BY: Directory pagination (20), Homepage featured (6)"),
+    cursor: str = Query(None, description="nextCursor from the previous page (replaces page) - USED BY: Directory infinite scroll"),
+    fields: str = Query(None, description="Comma-separated mentor fields to return (e.g. 'displayName,photoURL,stats.avgRating') - USED BY: Homepage cards"),
+    view: str = Query(None, description="Field set to read and return: card (directory/homepage), admin, ai or detail (default, whole profile)")
 ):
     """
     Primary mentors endpoint used across multiple frontend pages with different parameter combinations.
@@ -63,18 +73,29 @@ def get_mentors(
     - Directory cards: Core display fields + pricing + stats
     - Admin interface: Status fields + core info + performance metrics  
     - Homepage: Minimal display fields for featured showcase
+    
+    SPARSE FIELDSETS:
+    - ?fields=displayName,headline,stats.avgRating returns only those fields per mentor (uid is always included)
+    - ?view=card|admin|ai returns a predefined field set (see app/services/projections.py)
+    - Only the returned fields (plus what filters and sorting need) are read from Firestore
+    
+    PAGINATION:
+    - Each response carries nextCursor (null on the last page); ?cursor={nextCursor} returns the next
+      page reading about pageSize documents however deep it is, while ?page=N skips the earlier pages
     """
+    projection = view_fields(MENTOR_VIEWS, view, fields, MENTOR_REQUIRED, MENTOR_WHOLE)
+    fields = view_include(MENTOR_VIEWS, view, fields)
     
     # Handle featured mentors
     if featured is True:
         mentors = fetch_featured_mentors(pageSize if pageSize <= 20 else 6)
-        return {
+        return list_response(MentorListResponse, {
             "mentors": mentors,
             "total": len(mentors),
             "page": 1,
             "pageSize": len(mentors),
             "totalPages": 1
-        }
+        }, "mentors", fields, always=["uid"])
     
     # Handle search/filter (if any parameters provided) or get all
     search_query = MentorSearchQuery(
@@ -90,22 +111,38 @@ def get_mentors(
         maxRate=maxRate,
         isVerified=isVerified,
         acceptingStudents=acceptingStudents,
+        availableNow=availableNow,
         sortBy=sortBy,
         sortOrder=sortOrder,
         page=page,
-        pageSize=pageSize
+        pageSize=pageSize,
+        cursor=cursor
     )
     
-    mentors, total = search_mentors(search_query)
+    mentors, total, next_cursor = search_mentors_page(search_query, projection)
     total_pages = (total + pageSize - 1) // pageSize
     
-    return {
+    return list_response(MentorListResponse, {
         "mentors": mentors,
         "total": total,
         "page": page,
         "pageSize": pageSize,
-        "totalPages": total_pages
-    }
+        "totalPages": total_pages,
+        "nextCursor": next_cursor
+    }, "mentors", fields, always=["uid"])
+
+@router.post(":batchGet")
+def batch_get_mentor_profiles(request: BatchGetRequest):
+    """
+    Get up to 300 mentors by ID in one call - same mentor fields as GET /mentors/{mentorId}.
+    
+    FRONTEND USAGE PATTERNS:
+    - Bookings and saved-mentor lists: POST /mentors:batchGet {"ids": [mentorId, ...]}
+    
+    RESPONSE: results[i] answers ids[i] with {"id", "mentor"} or {"id", "error": {"code", "message"}}
+    (400 invalid id, 404 not found); found / total count the batch
+    """
+    return batch_get(request.ids, fetch_mentors_by_ids, "mentor", "Mentor not found")
 
 @router.get("/{mentor_id}")
 @router.get("/{mentor_id}/")
@@ -147,6 +184,30 @@ def get_mentor_by_id(
     
     return response
 
+@router.get("/{mentor_id}/profile")
+def get_mentor_profile_page(
+    mentor_id: str,
+    reviewsLimit: int = Query(10, ge=1, le=50, description="Reviews per page, newest first"),
+    reviewsCursor: Optional[str] = Query(None, description="reviews.nextCursor from the previous page"),
+    slots: int = Query(5, ge=0, le=20, description="Next open one-on-one slots to include"),
+    slotMinutes: int = Query(60, ge=15, le=480, description="Length of those slots")
+):
+    """
+    Get everything the mentor profile page shows in one request.
+    
+    FRONTEND USAGE PATTERNS:
+    - Mentor Detail Page: GET /mentors/{mentorId}/profile
+      Replaces GET /mentors/{mentorId}?include_classes=true, GET /reviews?type=mentor&id=,
+      GET /availability/mentors/{mentorId} and the next-slot lookup
+    - More reviews: GET /mentors/{mentorId}/profile?reviewsCursor={reviews.nextCursor}
+    
+    RESPONSE:
+    - mentor, classes, availability (null if not set)
+    - reviews: reviews (newest first), nextCursor, avgRating, total
+    - nextSlots: durationMinutes, timezone, slots [{date, day, startTime, endTime}] in the mentor's timezone
+    """
+    return get_mentor_profile(mentor_id, reviewsLimit, reviewsCursor, slots, slotMinutes)
+
 @router.put("/{mentor_id}")
 @router.put("/{mentor_id}/")
 def update_mentor_profile(mentor_id: str, update_data: dict):
@@ -4,8 +4,11 @@ Metadata endpoints for subjects, categories, and regions
 from fastapi import APIRouter, Query
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
+import logging
 from app.services.firestore import db
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(
     prefix="/metadata",
     tags=["Metadata"]
@@ -63,39 +66,9 @@ def get_subjects(
     
     Returns subjects with synonyms, related subjects, and search boost for ranking.
     """
-    try:
-        subjects_ref = db.collection('subjects')
-        
-        # Apply filters
-        if category:
-            subjects_ref = subjects_ref.where('category', '==', category)
-        
-        if region:
-            subjects_ref = subjects_ref.where('region', '==', region)
-        
-        # Get documents
-        subjects_docs = subjects_ref.stream()
-        
-        subjects_list = []
-        for doc in subjects_docs:
-            subject_data = doc.to_dict()
-            subjects_list.append(Subject(**subject_data))
-        
-        # Sort by searchBoost (higher boost = more popular/important)
-        subjects_list.sort(key=lambda x: x.searchBoost, reverse=True)
-        
-        # Apply limit if specified
-        if limit:
-            subjects_list = subjects_list[:limit]
-        
-        return SubjectsResponse(
-            subjects=subjects_list,
-            count=len(subjects_list)
-        )
-        
-    except Exception as e:
-        print(f"Error fetching subjects: {str(e)}")
-        return SubjectsResponse(subjects=[], count=0)
+    # Service imports this module's models, so it is imported here
+    from app.services.metadata_service import get_subjects_service
+    return get_subjects_service(category, region, limit)
 
 @router.get("/subjects/search", response_model=SubjectsResponse)
 def search_subjects(
@@ -159,7 +132,7 @@ def search_subjects(
         )
         
     except Exception as e:
-        print(f"Error searching subjects: {str(e)}")
+        logger.error("Error searching subjects: %s", e)
         return SubjectsResponse(subjects=[], count=0)
 
 @router.get("/categories", response_model=CategoriesResponse)
@@ -197,7 +170,7 @@ def get_categories():
         )
         
     except Exception as e:
-        print(f"Error fetching categories: {str(e)}")
+        logger.error("Error fetching categories: %s", e)
         return CategoriesResponse(categories=[], count=0)
 
 @router.get("/regions", response_model=RegionsResponse)
@@ -227,7 +200,7 @@ def get_regions():
         )
         
     except Exception as e:
-        print(f"Error fetching regions: {str(e)}")
+        logger.error("Error fetching regions: %s", e)
         return RegionsResponse(regions=[], count=0)
 
 @router.get("/subjects/{subject_id}")
@@ -247,5 +220,5 @@ def get_subject_details(subject_id: str):
         return {"subject": Subject(**subject_data)}
         
     except Exception as e:
-        print(f"Error fetching subject details: {str(e)}")
+        logger.error("Error fetching subject details: %s", e)
         return {"error": "Failed to fetch subject details"}
\ No newline at end of file
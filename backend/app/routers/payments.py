@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Header, Request
 import stripe
 from datetime import datetime
 
@@ -7,7 +7,9 @@ from app.models.payment_models import (
 )
 from pydantic import BaseModel
 from typing import Optional
-from app.services.payment_service import payment_service
+from starlette.concurrency import run_in_threadpool
+from app.services.payment_service import payment_service, idempotency_key_for
+from app.services.stripe_webhook_service import ingest_event, booking_id_for_checkout_session
 
 router = APIRouter(
     prefix="/payments",
@@ -15,16 +17,33 @@ router = APIRouter(
 )
 
 @router.post("/create-intent", response_model=PaymentIntentResponse)
-def create_payment_intent(payment_request: PaymentIntent):
+def create_payment_intent(
+    payment_request: PaymentIntent,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
     """
     Create a Stripe payment intent for a booking.
     
     This generates a client secret that the frontend can use with Stripe.js
     to collect payment information securely.
+    Retrying the same request (or reusing an Idempotency-Key header) returns the
+    same intent instead of creating a second one.
     
     **Test Mode**: This uses Stripe's test environment with test API keys.
     """
-    return payment_service.create_payment_intent(payment_request)
+    return payment_service.create_payment_intent(payment_request, idempotency_key)
+
+@router.post("/webhook")
+async def stripe_webhook(request: Request, stripe_signature: Optional[str] = Header(None, alias="Stripe-Signature")):
+    """
+    Stripe webhook endpoint.
+    
+    Verifies the signature, records the event once (keyed by Stripe event id) and
+    returns immediately. Payment and booking updates are applied by a background worker,
+    so redelivered or replayed events are safe.
+    """
+    payload = await request.body()
+    return await run_in_threadpool(ingest_event, payload, stripe_signature)
 
 @router.get("/test-cards")
 def get_test_cards():
@@ -56,11 +75,16 @@ class CheckoutSessionRequest(BaseModel):
     youngLearnerName: Optional[str] = None
 
 @router.post("/create-checkout-session")
-def create_checkout_session(request: CheckoutSessionRequest):
+def create_checkout_session(
+    request: CheckoutSessionRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
     """
     Create a Stripe Checkout Session for booking payment.
     Redirects user to Stripe's hosted checkout page.
     No booking is created until payment succeeds.
+    Repeated submissions within the same hour (or with the same Idempotency-Key
+    header) return the same session.
     """
     try:
         from app.config import settings
@@ -83,6 +107,12 @@ def create_checkout_session(request: CheckoutSessionRequest):
         if not mentor_data:
             raise HTTPException(status_code=404, detail="Mentor not found")
         
+        key = idempotency_key_for(
+            "checkout",
+            {**request.dict(), "window": datetime.utcnow().strftime("%Y%m%d%H")},
+            idempotency_key
+        )
+        
         # Create Stripe checkout session
         checkout_session = stripe.checkout.Session.create(
             payment_method_types=["card"],
@@ -109,7 +139,8 @@ def create_checkout_session(request: CheckoutSessionRequest):
                 "personalGoals": request.personalGoals or "",
                 "parentId": request.parentId or "",
                 "youngLearnerName": request.youngLearnerName or "",
-            }
+            },
+            idempotency_key=key
         )
         
         return {
@@ -157,6 +188,7 @@ def payment_success(session_id: str):
     try:
         from app.config import settings
         from app.services.booking_service import create_booking_flexible
+        from app.services.firestore import db
         
         # Set Stripe API key
         stripe.api_key = settings.stripe_secret_key
@@ -170,23 +202,32 @@ def payment_success(session_id: str):
         # Extract metadata
         metadata = session.metadata
         
-        # Create the booking now that payment is confirmed
-        booking_data = {
-            "studentId": metadata["studentId"],
-            "classId": metadata["classId"], 
-            "mentorId": metadata["mentorId"],
-            "bookingStatus": "confirmed",
-            "paymentStatus": "paid",
-            "stripeSessionId": session_id,
-            "amount": float(metadata["amount"]),
-            "currency": metadata["currency"],
-            "personalGoals": metadata.get("personalGoals") or None,
-            "parentId": metadata.get("parentId") or None,
-            "youngLearnerName": metadata.get("youngLearnerName") or None,
-            "confirmedAt": datetime.now().isoformat(),
-        }
-        
-        booking = create_booking_flexible(booking_data)
+        # The checkout.session.completed webhook may already have created this booking (or may
+        # create it while this request runs - create_booking_flexible then returns the webhook's)
+        booking_id = booking_id_for_checkout_session(session_id)
+        existing_booking = db.collection("bookings").document(booking_id).get()
+        
+        if existing_booking.exists:
+            booking = {**existing_booking.to_dict(), "bookingId": booking_id}
+        else:
+            # Create the booking now that payment is confirmed
+            booking_data = {
+                "bookingId": booking_id,
+                "studentId": metadata["studentId"],
+                "classId": metadata["classId"], 
+                "mentorId": metadata["mentorId"],
+                "bookingStatus": "confirmed",
+                "paymentStatus": "paid",
+                "stripeSessionId": session_id,
+                "amount": float(metadata["amount"]),
+                "currency": metadata["currency"],
+                "personalGoals": metadata.get("personalGoals") or None,
+                "parentId": metadata.get("parentId") or None,
+                "youngLearnerName": metadata.get("youngLearnerName") or None,
+                "confirmedAt": datetime.now().isoformat(),
+            }
+            
+            booking = create_booking_flexible(booking_data)
         
         return {
             "success": True,
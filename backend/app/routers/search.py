@@ -3,6 +3,7 @@ from typing import Optional, List
 from app.models.class_models import ClassItem
 from app.models.search_models import UnifiedSearchQuery, UnifiedSearchResponse
 from app.services.search_service import search_classes_with_filters, unified_search
+from app.services.serialization import list_response
 
 router = APIRouter(prefix="/search", tags=["Search"])
 
@@ -22,7 +23,10 @@ def unified_search_endpoint(
     sortBy: str = Query("relevance", description="Sort by: relevance, rating, price, date"),
     sortOrder: str = Query("desc", description="Sort order: asc or desc"),
     page: int = Query(1, ge=1, description="Page number"),
-    pageSize: int = Query(20, ge=1, le=100, description="Items per page")
+    pageSize: int = Query(20, ge=1, le=100, description="Items per page"),
+    fields: str = Query(None, description="Comma-separated result fields to return, e.g. 'title,rating,price' or 'data.schedule'"),
+    debug: bool = Query(False, description="Include per-stage search timings in the response"),
+    cursor: str = Query(None, description="nextCursor from a previous page (replaces the other filters and page)")
 ):
     """
     Unified search across mentors and classes with intelligent ranking.
@@ -41,7 +45,12 @@ def unified_search_endpoint(
     
     Results are sorted by relevance by default, but can be sorted by rating,
     price, or date. Each result includes standardized fields plus the full
-    original data object.
+    original data object. Pass `fields=` to return only some result fields
+    (type and id are always included) and skip the full data object.
+    Each response carries `nextCursor`; pass it back as `cursor` to get the
+    next page from the same ranking without ranking again.
+    `debug=true` adds per-stage timings (mentor/class retrieval, filtering,
+    merge) under `debug`.
     """
     try:
         search_query = UnifiedSearchQuery(
@@ -62,36 +71,41 @@ def unified_search_endpoint(
             pageSize=pageSize
         )
         
-        results, stats = unified_search(search_query)
+        results, stats = unified_search(search_query, cursor)
         
         total_pages = (stats["total"] + pageSize - 1) // pageSize
         
-        # Create filter summary
+        # Create filter summary (from the cursor's query when paging by cursor)
+        effective = stats["query"]
         active_filters = {}
-        if q: active_filters["q"] = q
-        if type: active_filters["type"] = type
-        if category: active_filters["category"] = category
-        if ageGroup: active_filters["ageGroup"] = ageGroup
-        if format: active_filters["format"] = format
-        if city: active_filters["city"] = city
-        if country: active_filters["country"] = country
-        if minRating: active_filters["minRating"] = minRating
-        if maxPrice: active_filters["maxPrice"] = maxPrice
-        if isOnline is not None: active_filters["isOnline"] = isOnline
-        if isVerified is not None: active_filters["isVerified"] = isVerified
+        if effective.q: active_filters["q"] = effective.q
+        if effective.type: active_filters["type"] = effective.type
+        if effective.category: active_filters["category"] = effective.category
+        if effective.ageGroup: active_filters["ageGroup"] = effective.ageGroup
+        if effective.format: active_filters["format"] = effective.format
+        if effective.city: active_filters["city"] = effective.city
+        if effective.country: active_filters["country"] = effective.country
+        if effective.minRating: active_filters["minRating"] = effective.minRating
+        if effective.maxPrice: active_filters["maxPrice"] = effective.maxPrice
+        if effective.isOnline is not None: active_filters["isOnline"] = effective.isOnline
+        if effective.isVerified is not None: active_filters["isVerified"] = effective.isVerified
         
-        return UnifiedSearchResponse(
+        return list_response(UnifiedSearchResponse, dict(
             results=results,
             total=stats["total"],
             mentorCount=stats["mentorCount"],
             classCount=stats["classCount"],
-            page=page,
+            page=stats["page"],
             pageSize=pageSize,
             totalPages=total_pages,
-            query=q or "",
-            filters=active_filters
-        )
+            query=effective.q or "",
+            filters=active_filters,
+            nextCursor=stats["nextCursor"],
+            debug={"stages": stats["stages"]} if debug else None
+        ), "results", fields, always=["type", "id"], exclude=() if debug else ("debug",))
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
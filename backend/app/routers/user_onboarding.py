@@ -6,6 +6,7 @@ from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any, Union
 from datetime import datetime
 from app.services.firestore import db
+from app.services.response_cache import bump_catalog_version
 
 router = APIRouter(
     prefix="/user-onboarding",
@@ -281,6 +282,7 @@ def complete_mentor_onboarding(data: MentorOnboarding):
         
         # Save mentor profile
         db.collection('mentors').document(data.userId).set(mentor_profile)
+        bump_catalog_version("mentors")
         
         return {
             "message": "Mentor onboarding completed successfully",
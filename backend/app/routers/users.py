@@ -3,13 +3,15 @@ from typing import Optional, Dict, Any
 import os
 import uuid
 import json
-from pathlib import Path
 from datetime import datetime
 from app.services.user_service import (
     create_user, get_user_by_id, get_user_flexible, update_user_flexible, 
-    get_all_users, delete_user
+    get_all_users, delete_user, get_users_flexible
 )
+from app.models.batch_models import BatchGetRequest
+from app.services.batch_get import batch_get
 from app.services.firestore import db
+from app.services.image_upload_service import save_profile_image, schedule_thumbnail_update
 
 router = APIRouter(
     prefix="/users",
@@ -98,6 +100,19 @@ def create_user(user_data: Dict[str, Any]):
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to create user: {str(e)}")
 
+@router.post(":batchGet")
+def batch_get_users(request: BatchGetRequest):
+    """
+    Get up to 300 users by ID in one call - core user data, as GET /users/{uid}?include_profiles=false.
+    
+    FRONTEND USAGE PATTERNS:
+    - Messaging and bookings lists: POST /users:batchGet {"ids": [uid, ...]} for names and photos
+    
+    RESPONSE: results[i] answers ids[i] with {"id", "user"} or {"id", "error": {"code", "message"}}
+    (400 invalid id, 404 not found); found / total count the batch
+    """
+    return batch_get(request.ids, get_users_flexible, "user", "User not found")
+
 @router.get("/{user_id}")
 def get_user(
     user_id: str,
@@ -257,32 +272,13 @@ async def update_user(
                 raise HTTPException(status_code=400, detail="Invalid JSON in request body")
         
         
-        # Handle file upload
+        # Handle file upload - streamed to storage with the size limit enforced per chunk
         image_url = None
         if file:
-            # Validate file
-            allowed_types = ["image/jpeg", "image/png", "image/gif"]
-            if file.content_type not in allowed_types:
-                raise HTTPException(status_code=400, detail="Invalid file type. Only JPG, PNG, and GIF allowed")
-            
-            max_size = 5 * 1024 * 1024  # 5MB
-            if file.size and file.size > max_size:
-                raise HTTPException(status_code=400, detail="File too large. Maximum size is 5MB")
-            
-            # Save file
-            upload_dir = Path("uploads/profile-images")
-            upload_dir.mkdir(parents=True, exist_ok=True)
-            
-            file_extension = Path(file.filename).suffix.lower()
-            unique_filename = f"{user_id}_{uuid.uuid4().hex[:8]}{file_extension}"
-            file_path = upload_dir / unique_filename
-            
-            with open(file_path, "wb") as buffer:
-                content = file.file.read()
-                buffer.write(content)
-            
-            image_url = f"/uploads/profile-images/{unique_filename}"
+            uploaded_image = await save_profile_image(user_id, file)
+            image_url = uploaded_image["url"]
             update_data["photoURL"] = image_url
+            update_data["photoThumbnails"] = uploaded_image["thumbnails"]
         
         # Handle profile-specific updates
         if profile_type:
@@ -345,6 +341,9 @@ async def update_user(
                 except Exception as e:
                     raise e
             
+            if file:
+                schedule_thumbnail_update(uploaded_image, collection_mapping[profile_type], user_id)
+            
             # Get updated profile
             updated_profile = doc_ref.get().to_dict()
             return {"user": user, "profile": updated_profile, "profile_type": profile_type}
@@ -361,7 +360,9 @@ async def update_user(
         
         response = {"user": user}
         if image_url:
+            schedule_thumbnail_update(uploaded_image, "users", user_id)
             response["imageUrl"] = image_url
+            response["thumbnails"] = update_data["photoThumbnails"]
         
         return response
         
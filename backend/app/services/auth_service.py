@@ -16,11 +16,9 @@ class AuthService:
         Verify Firebase ID token and return decoded token
         """
         try:
-            logger.info(f"AuthService.verify_token - Verifying token, length: {len(token)}")
-            logger.info(f"AuthService.verify_token - Token preview: {token[:50]}...")
-            
+            # Never log token contents - a preview of a bearer token is still a credential leak
             decoded_token = auth.verify_id_token(token)
-            logger.info(f"AuthService.verify_token - Success! UID: {decoded_token.get('uid')}")
+            logger.debug("AuthService.verify_token - verified", extra={"uid": decoded_token.get("uid")})
             return decoded_token
         except auth.InvalidIdTokenError as e:
             logger.error(f"AuthService.verify_token - Invalid token: {str(e)}")
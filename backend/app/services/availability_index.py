@@ -0,0 +1,301 @@
+"""
+Compiled weekly availability.
+
+Each mentor's `availability` (days with HH:MM time ranges) is compiled once
+into a single 7 x 96 bit integer: bit `day * 96 + slot` is set when the
+mentor is available in that quarter hour (Monday = day 0). Ranges that do
+not fall on quarter hours are shrunk to the quarter hours they fully cover,
+and requested slots are widened to the quarter hours they touch, so a
+bitmap answer is never more permissive than the stored ranges.
+
+With that, "is this slot free" is one AND, "who is free Tuesday 18:00-20:00"
+is one AND per mentor, and "next free slot" is a few shifts.
+
+The index of all active mentors is held in memory and loaded on first use.
+set_mentor_availability updates it in place and bumps the `availability`
+catalog version, which makes other instances reload within one catalog
+poll (AVAILABILITY_INDEX_TTL bounds staleness for writes that bypass it).
+Reloads after the first run on a background thread; requests keep reading
+the previous index meanwhile.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from app.services.firestore import db
+from app.services.response_cache import bump_catalog_version, catalog_versions
+
+logger = logging.getLogger(__name__)
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+WEEK_SLOTS = SLOTS_PER_DAY * 7
+DEFAULT_TIMEZONE = "Europe/London"
+INDEX_TTL = float(os.getenv("AVAILABILITY_INDEX_TTL", "600"))
+
+# ---------- Bitmaps ----------
+
+def time_to_slot(value: str, round_up: bool = False) -> int:
+    """Quarter-hour index of an HH:MM time ("24:00" is the end of the day); ValueError if malformed"""
+    try:
+        hours, minutes = (int(part) for part in value.split(":"))
+    except (AttributeError, TypeError, ValueError):
+        raise ValueError(f"Invalid time '{value}', expected HH:MM")
+    total = hours * 60 + minutes
+    if not 0 <= minutes < 60 or not 0 <= total <= 24 * 60:
+        raise ValueError(f"Invalid time '{value}', expected HH:MM")
+    slot, remainder = divmod(total, SLOT_MINUTES)
+    return min(slot + (1 if round_up and remainder else 0), SLOTS_PER_DAY)
+
+def slot_to_time(slot: int) -> str:
+    return f"{slot * SLOT_MINUTES // 60:02d}:{slot * SLOT_MINUTES % 60:02d}"
+
+def normalize_day(day: str) -> str:
+    """Day name as stored ("monday" -> "Monday"); ValueError for anything else"""
+    name = day.strip().capitalize() if isinstance(day, str) else day
+    if name not in DAYS:
+        raise ValueError(f"Invalid day '{day}', expected one of {', '.join(DAYS)}")
+    return name
+
+def day_index(day: str) -> int:
+    return DAYS.index(normalize_day(day))
+
+def range_bits(day: int, start_slot: int, end_slot: int) -> int:
+    if end_slot <= start_slot:
+        return 0
+    return ((1 << (end_slot - start_slot)) - 1) << (day * SLOTS_PER_DAY + start_slot)
+
+def request_bits(day: str, start_time: str, end_time: str) -> int:
+    """Every quarter hour a requested slot touches"""
+    return range_bits(day_index(day), time_to_slot(start_time), time_to_slot(end_time, round_up=True))
+
+def compile_week(availability: Iterable[Dict[str, Any]]) -> int:
+    """Bitmap of the quarter hours fully covered by a stored `availability` list"""
+    week = 0
+    for day_availability in availability:
+        if day_availability.get("day") not in DAYS:
+            continue
+        day = day_index(day_availability["day"])
+        for time_range in day_availability.get("timeRanges", []):
+            try:
+                week |= range_bits(day, time_to_slot(time_range["startTime"], round_up=True),
+                                   time_to_slot(time_range["endTime"]))
+            except (KeyError, ValueError, AttributeError):
+                continue
+    return week
+
+def day_bits(week: int, day: int) -> int:
+    return (week >> (day * SLOTS_PER_DAY)) & ((1 << SLOTS_PER_DAY) - 1)
+
+def ranges_for_day(week: int, day: int) -> List[Tuple[str, str]]:
+    """Contiguous free ranges of one day as (HH:MM, HH:MM) pairs"""
+    bits, ranges, slot = day_bits(week, day), [], 0
+    while bits:
+        skip = (bits & -bits).bit_length() - 1
+        slot, bits = slot + skip, bits >> skip
+        run = (~bits & (bits + 1)).bit_length() - 1  # Length of the run of ones at the bottom
+        ranges.append((slot_to_time(slot), slot_to_time(slot + run)))
+        slot, bits = slot + run, bits >> run
+    return ranges
+
+def time_range_bits(start_time: str, end_time: str) -> int:
+    """Quarter hours a time range touches, as bits of a single day"""
+    return range_bits(0, time_to_slot(start_time), time_to_slot(end_time, round_up=True))
+
+def _day_run_starts(bits: int, slots: int) -> int:
+    """Bits of one day where `slots` consecutive free quarter hours start"""
+    for _ in range(slots - 1):
+        bits &= bits >> 1
+    return bits & range_bits(0, 0, SLOTS_PER_DAY - slots + 1)
+
+def _run_starts(week: int, slots: int) -> int:
+    """Bits where `slots` consecutive free quarter hours start without crossing midnight"""
+    runs = week
+    for _ in range(slots - 1):
+        runs &= runs >> 1
+    valid_starts = 0
+    for day in range(7):
+        valid_starts |= range_bits(day, 0, SLOTS_PER_DAY - slots + 1)
+    return runs & valid_starts
+
+# ---------- Compiled mentor availability ----------
+
+class CompiledAvailability(NamedTuple):
+    mentor_id: str
+    week: int
+    timezone: str = DEFAULT_TIMEZONE
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+
+    @classmethod
+    def from_document(cls, mentor_id: str, data: Dict[str, Any]) -> "CompiledAvailability":
+        date_range = data.get("dateRange") or {}
+        return cls(mentor_id, compile_week(data.get("availability") or []),
+                   data.get("timezone") or DEFAULT_TIMEZONE, date_range.get("startDate"), date_range.get("endDate"))
+
+    def active_on(self, on: date) -> bool:
+        iso = on.isoformat()
+        return (not self.start_date or iso >= self.start_date) and (not self.end_date or iso <= self.end_date)
+
+    def is_free(self, day: str, start_time: str, end_time: str) -> bool:
+        bits = request_bits(day, start_time, end_time)
+        return bool(bits) and self.week & bits == bits
+
+    def local_now(self, now: Optional[datetime] = None) -> datetime:
+        try:
+            zone = ZoneInfo(self.timezone)
+        except (ZoneInfoNotFoundError, ValueError):
+            zone = ZoneInfo(DEFAULT_TIMEZONE)
+        return (now or datetime.now(zone)).astimezone(zone)
+
+    def open_slots(self, on: date, duration_minutes: int = 60, window: Optional[int] = None, busy: int = 0,
+                   not_before: Optional[int] = None, limit: int = 3) -> List[Tuple[str, str]]:
+        """
+        Earliest non-overlapping free slots on a date as (HH:MM, HH:MM) pairs.
+
+        `window` and `busy` are single-day bitmaps (see time_range_bits);
+        `not_before` is the first quarter hour that may start a slot.
+        """
+        slots = -(-duration_minutes // SLOT_MINUTES)
+        if not self.active_on(on) or not 0 < slots <= SLOTS_PER_DAY:
+            return []
+        free = day_bits(self.week, on.weekday()) & ~busy
+        if window is not None:
+            free &= window
+        if not_before:
+            free &= ~((1 << not_before) - 1)
+        starts, found = _day_run_starts(free, slots), []
+        while starts and len(found) < limit:
+            start = (starts & -starts).bit_length() - 1
+            found.append((slot_to_time(start), slot_to_time(start + slots)))
+            starts &= ~((1 << (start + slots)) - 1)  # Next slot starts after this one ends
+        return found
+
+    def next_free_slot(self, after: Optional[datetime] = None, duration_minutes: int = 60) -> Optional[datetime]:
+        """Start of the first free slot of this length at or after `after` (mentor local time)"""
+        slots = -(-duration_minutes // SLOT_MINUTES)
+        starts = _run_starts(self.week, slots) if 0 < slots <= SLOTS_PER_DAY else 0
+        if not starts:
+            return None
+        local = self.local_now(after)
+        if self.start_date and local.date().isoformat() < self.start_date:
+            local = datetime.combine(date.fromisoformat(self.start_date), datetime.min.time(), local.tzinfo)
+        week_start = (local - timedelta(days=local.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+        position = -(-int((local - week_start).total_seconds()) // (SLOT_MINUTES * 60))  # Next quarter hour
+        later = starts >> position
+        if later:
+            offset = position + (later & -later).bit_length() - 1
+        else:
+            offset = WEEK_SLOTS + (starts & -starts).bit_length() - 1  # Wrap to next week
+        result = week_start + timedelta(minutes=offset * SLOT_MINUTES)
+        if self.end_date and result.date().isoformat() > self.end_date:
+            return None
+        return result
+
+# ---------- Index ----------
+
+class AvailabilityIndex:
+    """In-memory compiled availability of all active mentors"""
+
+    def __init__(self, ttl: float = INDEX_TTL):
+        self.ttl = ttl
+        self._entries: Dict[str, CompiledAvailability] = {}
+        self._version: Optional[Tuple[int, ...]] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()  # Guards the fields above; never held during a read
+        self._load_lock = threading.Lock()  # One full scan at a time
+        self._refreshing = False
+
+    def _is_stale(self) -> bool:
+        return (self._version != catalog_versions.snapshot(("availability",))
+                or time.monotonic() - self._loaded_at > self.ttl)
+
+    def _load(self) -> None:
+        """Scan active availability and swap the result in"""
+        with self._load_lock:
+            if self._loaded_at and not self._is_stale():
+                return  # Reloaded by another caller while this one waited
+            version = catalog_versions.snapshot(("availability",))
+            entries = {}
+            for doc in db.collection("mentor_availability").where("isActive", "==", True).stream():
+                entries[doc.id] = CompiledAvailability.from_document(doc.id, doc.to_dict() or {})
+            with self._lock:
+                self._entries, self._version, self._loaded_at = entries, version, time.monotonic()
+        logger.debug("Loaded availability index with %s mentors", len(entries))
+
+    def _refresh(self) -> None:
+        try:
+            self._load()
+        except Exception as e:
+            logger.warning("Failed to reload availability index: %s", e)
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _current(self) -> Dict[str, CompiledAvailability]:
+        if not self._loaded_at:
+            self._load()  # Nothing to serve yet
+        elif self._is_stale():
+            with self._lock:
+                start, self._refreshing = not self._refreshing, True
+            if start:
+                threading.Thread(target=self._refresh, name="availability-index", daemon=True).start()
+        return self._entries
+
+    def get(self, mentor_id: str) -> Optional[CompiledAvailability]:
+        return self._current().get(mentor_id)
+
+    def put(self, mentor_id: str, data: Dict[str, Any]) -> CompiledAvailability:
+        """Recompile one mentor after a write and tell other instances to reload"""
+        compiled = CompiledAvailability.from_document(mentor_id, data)
+        self._current()
+        bump_catalog_version("availability")
+        with self._lock:
+            entries = dict(self._entries)  # Readers iterate the current dict without the lock
+            if data.get("isActive", True):
+                entries[mentor_id] = compiled
+            else:
+                entries.pop(mentor_id, None)
+            self._entries = entries
+            self._version = catalog_versions.snapshot(("availability",))
+        return compiled
+
+    def clear(self) -> None:
+        with self._load_lock, self._lock:
+            self._entries, self._version, self._loaded_at = {}, None, 0.0
+
+    def items(self) -> List[Tuple[str, CompiledAvailability]]:
+        return list(self._current().items())
+
+    def mentor_ids(self) -> List[str]:
+        return sorted(self._current())
+
+    def available_on(self, day: str) -> List[str]:
+        mask = range_bits(day_index(day), 0, SLOTS_PER_DAY)
+        return sorted(mentor_id for mentor_id, entry in self._current().items() if entry.week & mask)
+
+    def free_between(self, day: str, start_time: str, end_time: str) -> List[str]:
+        bits = request_bits(day, start_time, end_time)
+        return sorted(mentor_id for mentor_id, entry in self._current().items() if bits and entry.week & bits == bits)
+
+    def available_now(self, now: Optional[datetime] = None) -> List[str]:
+        """Mentors inside one of their availability ranges right now, in their own timezone"""
+        by_timezone: Dict[str, Tuple[int, date]] = {}
+        free = []
+        for mentor_id, entry in self._current().items():
+            if entry.timezone not in by_timezone:
+                local = entry.local_now(now)
+                slot = local.weekday() * SLOTS_PER_DAY + (local.hour * 60 + local.minute) // SLOT_MINUTES
+                by_timezone[entry.timezone] = (1 << slot, local.date())
+            bit, today = by_timezone[entry.timezone]
+            if entry.week & bit and entry.active_on(today):
+                free.append(mentor_id)
+        return sorted(free)
+
+
+availability_index = AvailabilityIndex()
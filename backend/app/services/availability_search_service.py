@@ -0,0 +1,152 @@
+"""
+Availability-aware mentor search ("sitar mentor free Saturday morning").
+
+One pass over in-memory data instead of a chain of per-mentor calls:
+
+1. The compiled availability index picks mentors with a long-enough free
+   run in the requested window on at least one date in range.
+2. Only those mentors are fetched (one batched get_all) and filtered by
+   subject / category / city / teaching mode.
+3. One range query on one_on_one_bookings.sessionDate covers every
+   candidate; pending and confirmed bookings are subtracted as bitmaps.
+4. Mentors are ranked by rating and returned with their earliest open slots.
+"""
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from app.models.availability_models import (
+    AvailabilitySearchQuery, AvailabilitySearchResult, AvailableSlot
+)
+from app.models.mentor_models import Mentor
+from app.services.availability_index import (
+    DAYS, CompiledAvailability, availability_index, time_range_bits, time_to_slot
+)
+from app.services.firestore import db
+from app.services.model_cache import validated
+
+logger = logging.getLogger(__name__)
+
+MAX_DAYS = 28
+ACTIVE_BOOKING_STATUSES = ("pending", "confirmed")
+
+def _dates(query: AvailabilitySearchQuery) -> List[date]:
+    start = date.fromisoformat(query.dateFrom) if query.dateFrom else date.today()
+    end = date.fromisoformat(query.dateTo) if query.dateTo else start + timedelta(days=6)
+    if end < start:
+        raise HTTPException(status_code=400, detail="dateTo must not be before dateFrom")
+    end = min(end, start + timedelta(days=MAX_DAYS - 1))
+    dates = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    return [d for d in dates if not query.day or DAYS[d.weekday()] == query.day]
+
+def _matches(mentor: Mentor, query: AvailabilitySearchQuery) -> bool:
+    if query.subject:
+        subject = query.subject.lower()
+        if subject not in [s.lower() for s in mentor.subjects or []] and subject != (mentor.category or "").lower():
+            return False
+    if query.category and (mentor.category or "").lower() != query.category.lower():
+        return False
+    if query.city and (mentor.city or "").lower() != query.city.lower():
+        return False
+    if query.teachingMode and query.teachingMode not in (mentor.teachingModes or []):
+        return False
+    return True
+
+def _fetch_mentors(mentor_ids: List[str]) -> Dict[str, Mentor]:
+    mentors = {}
+    refs = [db.collection("mentors").document(mentor_id) for mentor_id in mentor_ids]
+    for doc in db.get_all(refs):
+        if not doc.exists:
+            continue
+        data = doc.to_dict()
+        data["uid"] = doc.id
+        try:
+            mentors[doc.id] = validated(Mentor, doc, data)
+        except Exception as e:
+            logger.debug("Skipping mentor %s: %s", doc.id, e)
+    return mentors
+
+def _busy_bits(mentor_ids: set, dates: List[date]) -> Dict[Tuple[str, str], int]:
+    """Booked quarter hours per (mentorId, sessionDate) from a single range query"""
+    busy: Dict[Tuple[str, str], int] = {}
+    query = db.collection("one_on_one_bookings")
+    if len(mentor_ids) == 1:
+        # One mentor (profile page): only their bookings, on the mentorId + sessionDate index
+        query = query.where("mentorId", "==", next(iter(mentor_ids)))
+    query = (query.where("sessionDate", ">=", dates[0].isoformat())
+             .where("sessionDate", "<=", dates[-1].isoformat()))
+    for doc in query.stream():
+        booking = doc.to_dict()
+        if booking.get("mentorId") not in mentor_ids or booking.get("bookingStatus") not in ACTIVE_BOOKING_STATUSES:
+            continue
+        try:
+            bits = time_range_bits(booking["startTime"], booking["endTime"])
+        except (KeyError, ValueError, AttributeError):
+            continue
+        key = (booking["mentorId"], booking["sessionDate"])
+        busy[key] = busy.get(key, 0) | bits
+    return busy
+
+def _open_slots(entry: CompiledAvailability, dates: List[date], duration_minutes: int, window: Optional[int],
+                busy: Dict[Tuple[str, str], int], limit: int, now: Optional[datetime] = None) -> List[AvailableSlot]:
+    """Earliest open slots on these dates, skipping what is already past in the mentor's timezone"""
+    today = entry.local_now(now)
+    slots: List[AvailableSlot] = []
+    for d in dates:
+        if d < today.date():
+            continue
+        not_before = time_to_slot(today.strftime("%H:%M"), round_up=True) if d == today.date() else None
+        for start, end in entry.open_slots(d, duration_minutes, window, busy.get((entry.mentor_id, d.isoformat()), 0),
+                                           not_before, limit=limit - len(slots)):
+            slots.append(AvailableSlot(date=d.isoformat(), day=DAYS[d.weekday()], startTime=start, endTime=end))
+        if len(slots) >= limit:
+            break
+    return slots
+
+def next_open_slots(mentor_id: str, count: int = 5, duration_minutes: int = 60, days: int = 14,
+                    now: Optional[datetime] = None) -> List[AvailableSlot]:
+    """The mentor's next `count` bookable slots within `days` days (one bookings query)"""
+    entry = availability_index.get(mentor_id)
+    if entry is None:
+        return []
+    start = entry.local_now(now).date()
+    dates = [start + timedelta(days=i) for i in range(min(days, MAX_DAYS))]
+    return _open_slots(entry, dates, duration_minutes, None, _busy_bits({mentor_id}, dates), count, now)
+
+def search_available_mentors(query: AvailabilitySearchQuery,
+                             now: Optional[datetime] = None) -> Tuple[List[AvailabilitySearchResult], int]:
+    """Mentors matching the filters with open slots in the window, ranked by rating"""
+    dates = _dates(query)
+    if not dates:
+        return [], 0
+    window = time_range_bits(query.startTime or "00:00", query.endTime or "24:00")
+
+    # 1. Availability first - it is in memory and usually the most selective filter
+    candidates: Dict[str, CompiledAvailability] = {}
+    for mentor_id, entry in availability_index.items():
+        if any(entry.open_slots(d, query.durationMinutes, window, limit=1) for d in dates):
+            candidates[mentor_id] = entry
+    if not candidates:
+        return [], 0
+
+    # 2. Mentor filters
+    mentors = {uid: mentor for uid, mentor in _fetch_mentors(list(candidates)).items() if _matches(mentor, query)}
+    if not mentors:
+        return [], 0
+
+    # 3. Existing bookings, 4. open slots
+    busy = _busy_bits(set(mentors), dates)
+    results = []
+    for uid, mentor in mentors.items():
+        entry = candidates[uid]
+        slots = _open_slots(entry, dates, query.durationMinutes, window, busy, query.slotsPerMentor, now)
+        if slots:
+            results.append(AvailabilitySearchResult(mentor=mentor, timezone=entry.timezone, slots=slots))
+
+    results.sort(key=lambda r: (-(r.mentor.stats.avgRating if r.mentor.stats else 0),
+                                -(r.mentor.stats.totalReviews if r.mentor.stats else 0),
+                                r.slots[0].date, r.slots[0].startTime))
+    start = (query.page - 1) * query.pageSize
+    return results[start:start + query.pageSize], len(results)
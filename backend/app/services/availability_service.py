@@ -1,7 +1,8 @@
 from app.services.firestore import db
 from app.models.availability_models import MentorAvailability, AvailabilityRequest
+from app.services.availability_index import availability_index, day_index, normalize_day, ranges_for_day, time_to_slot
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from fastapi import HTTPException
 
 class AvailabilityService:
@@ -52,6 +53,7 @@ class AvailabilityService:
             
             # Save to Firestore
             self.collection.document(mentor_id).set(availability_data)
+            availability_index.put(mentor_id, availability_data)
             
             # Return the saved availability
             availability_data["mentorId"] = mentor_id
@@ -61,34 +63,44 @@ class AvailabilityService:
             raise HTTPException(status_code=500, detail=f"Failed to set availability: {str(e)}")
     
     
-    def get_mentors_with_availability(self, day: Optional[str] = None) -> list:
-        """Get list of mentor IDs who have active availability"""
+    def get_mentors_with_availability(self, day: Optional[str] = None, start_time: Optional[str] = None,
+                                      end_time: Optional[str] = None) -> list:
+        """Get list of mentor IDs who have active availability (on a day, or covering a time range that day)"""
         try:
-            query = self.collection.where("isActive", "==", True)
-            docs = list(query.stream())
-            
-            mentor_ids = []
-            for doc in docs:
-                data = doc.to_dict()
-                mentor_id = doc.id
-                
-                # If specific day requested, check if mentor has availability on that day
-                if day:
-                    has_day_availability = False
-                    for day_availability in data.get('availability', []):
-                        if (day_availability.get('day') == day and 
-                            len(day_availability.get('timeRanges', [])) > 0):
-                            has_day_availability = True
-                            break
-                    
-                    if has_day_availability:
-                        mentor_ids.append(mentor_id)
-                else:
-                    # No specific day filter, include all active mentors
-                    mentor_ids.append(mentor_id)
-            
-            return mentor_ids
+            if day:
+                day = normalize_day(day)
+            for value in filter(None, (start_time, end_time)):
+                time_to_slot(value)  # ValueError unless HH:MM
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        try:
+            if day and start_time and end_time:
+                return availability_index.free_between(day, start_time, end_time)
+            if day:
+                return availability_index.available_on(day)
+            return availability_index.mentor_ids()
             
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to get mentors with availability: {str(e)}")
     
+    def get_mentors_available_now(self) -> List[str]:
+        """Mentor IDs inside one of their weekly availability ranges at this moment"""
+        return availability_index.available_now()
+    
+    def check_slot_conflict(self, mentor_id: str, day: str, start_time: str, end_time: str) -> bool:
+        """True if the slot is not inside the mentor's weekly availability"""
+        compiled = availability_index.get(mentor_id)
+        return compiled is None or not compiled.is_free(day, start_time, end_time)
+    
+    def get_free_ranges(self, mentor_id: str, day: str) -> List[dict]:
+        """The mentor's free ranges on a weekday, merged into contiguous blocks"""
+        compiled = availability_index.get(mentor_id)
+        if compiled is None:
+            return []
+        return [{"startTime": start, "endTime": end} for start, end in ranges_for_day(compiled.week, day_index(day))]
+    
+    def get_next_free_slot(self, mentor_id: str, duration_minutes: int = 60,
+                           after: Optional[datetime] = None) -> Optional[datetime]:
+        """Start of the mentor's next free slot of this length, in the mentor's timezone"""
+        compiled = availability_index.get(mentor_id)
+        return compiled.next_free_slot(after, duration_minutes) if compiled else None
@@ -0,0 +1,39 @@
+"""
+Batch lookups for POST /classes:batchGet, /mentors:batchGet and /users:batchGet.
+
+Pages such as a bookings list used to call GET /classes/{id} and
+GET /mentors/{id} once per row, each with its own chain of reads. A batch
+lookup reads every id with one get_all through the request's document loader
+(repeated ids are read once, and documents another service already read in
+the request are not read again), then hydrates them with the same services
+and model cache the single-item routes use.
+
+Results come back in request order, one per id: the item under the resource
+key (`class`, `mentor`, `user`), or an `error` with a status code - 400 for
+ids that cannot name a document, 404 for missing (or unreadable) ones - so
+one bad id never fails the batch.
+"""
+from typing import Any, Callable, Dict, List, Optional
+
+
+def _valid_id(doc_id: str) -> bool:
+    return bool(doc_id) and "/" not in doc_id and doc_id not in (".", "..") and not doc_id.startswith("__")
+
+
+def batch_get(ids: List[str], fetch: Callable[[List[str]], List[Optional[Any]]],
+              key: str, not_found: str) -> Dict[str, Any]:
+    """Run `fetch` once for the valid ids and shape per-id results in request order"""
+    # Invalid ids are passed as "" so `fetch` stays aligned and never reads them
+    lookup = [doc_id if _valid_id(doc_id) else "" for doc_id in ids]
+    items = fetch(lookup)
+
+    results, found = [], 0
+    for doc_id, lookup_id, item in zip(ids, lookup, items):
+        if not lookup_id:
+            results.append({"id": doc_id, "error": {"code": 400, "message": "Invalid id"}})
+        elif item is None:
+            results.append({"id": doc_id, "error": {"code": 404, "message": not_found}})
+        else:
+            results.append({"id": doc_id, key: item})
+            found += 1
+    return {"results": results, "found": found, "total": len(ids)}
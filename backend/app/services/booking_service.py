@@ -1,4 +1,8 @@
 from app.services.firestore import db
+from app.services.dashboard_service import record_booking_change
+from app.services.model_cache import remember, validated
+from app.services.document_loader import get_document, prime_documents
+from app.services.document_writes import update_document
 from app.models.booking_models import (
     SimpleBooking, SimpleBookingRequest, SimpleBookingUpdate, 
     BookingStatus, PaymentStatus, SessionAttendance, SessionAttendanceRequest
@@ -6,6 +10,7 @@ from app.models.booking_models import (
 from datetime import datetime
 from typing import List, Optional, Dict, Tuple
 from fastapi import HTTPException
+from google.api_core.exceptions import AlreadyExists
 import uuid
 
 def create_simple_booking(booking_request: SimpleBookingRequest) -> SimpleBooking:
@@ -14,12 +19,14 @@ def create_simple_booking(booking_request: SimpleBookingRequest) -> SimpleBookin
         # Generate unique booking ID
         booking_id = f"booking_{uuid.uuid4().hex[:12]}"
         
-        # Get student and class information
-        student_doc = db.collection("users").document(booking_request.studentId).get()
+        # Get student and class information (one batched read)
+        prime_documents("users", booking_request.studentId)
+        prime_documents("classes", booking_request.classId)
+        student_doc = get_document("users", booking_request.studentId)
         if not student_doc.exists:
             raise HTTPException(status_code=404, detail="Student not found")
         
-        class_doc = db.collection("classes").document(booking_request.classId).get()
+        class_doc = get_document("classes", booking_request.classId)
         if not class_doc.exists:
             raise HTTPException(status_code=404, detail="Class not found")
         
@@ -47,10 +54,15 @@ def create_simple_booking(booking_request: SimpleBookingRequest) -> SimpleBookin
             "cancelledAt": None
         }
         
+        # Validate once here; reads of this version reuse the model
+        booking = SimpleBooking(**booking_data)
+        
         # Save to Firestore
-        db.collection("bookings").document(booking_id).set(booking_data)
+        booking_ref = db.collection("bookings").document(booking_id)
+        remember(booking, booking_ref, booking_ref.set(booking_data))
+        record_booking_change(None, booking_data)
         
-        return SimpleBooking(**booking_data)
+        return booking
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create booking: {str(e)}")
@@ -63,30 +75,26 @@ def get_simple_booking(booking_id: str) -> Optional[SimpleBooking]:
     
     data = doc.to_dict()
     data["bookingId"] = doc.id
-    return SimpleBooking(**data)
+    return validated(SimpleBooking, doc, data)
 
 def update_booking_flexible(booking_id: str, update_data: dict) -> dict:
     """Update booking status and basic fields"""
     try:
-        doc_ref = db.collection("bookings").document(booking_id)
-        doc = doc_ref.get()
-        
-        if not doc.exists:
-            raise HTTPException(status_code=404, detail="Booking not found")
-        
-        # Pure MongoDB flexibility - accept ANY fields frontend sends
-        flexible_update = update_data.copy()
-        flexible_update["updatedAt"] = datetime.now().isoformat()
+        def prepare(current: dict, changes: dict) -> dict:
+            changes["updatedAt"] = datetime.now().isoformat()
+            return changes
         
-        # Update Firestore with ANY fields
-        doc_ref.update(flexible_update)
+        # Update Firestore with ANY fields, written against the version the dashboard change is
+        # computed from (two racing status changes cannot both count against the same status)
+        before, data = update_document("bookings", booking_id, update_data, prepare, not_found="Booking not found")
         
         # Return updated booking as plain dict (no validation)
-        updated_doc = doc_ref.get()
-        data = updated_doc.to_dict()
         data["bookingId"] = booking_id
+        record_booking_change({**before, "bookingId": booking_id}, data)
         return data
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update booking: {str(e)}")
 
@@ -105,7 +113,7 @@ def get_bookings_by_student(student_id: str, page: int = 1, page_size: int = 20)
     for doc in docs:
         data = doc.to_dict()
         data["bookingId"] = doc.id
-        bookings.append(SimpleBooking(**data))
+        bookings.append(validated(SimpleBooking, doc, data))
     
     return bookings, total
 
@@ -124,7 +132,7 @@ def get_bookings_by_mentor(mentor_id: str, page: int = 1, page_size: int = 20) -
     for doc in docs:
         data = doc.to_dict()
         data["bookingId"] = doc.id
-        bookings.append(SimpleBooking(**data))
+        bookings.append(validated(SimpleBooking, doc, data))
     
     return bookings, total
 
@@ -143,7 +151,7 @@ def get_bookings_by_class(class_id: str, page: int = 1, page_size: int = 20) ->
     for doc in docs:
         data = doc.to_dict()
         data["bookingId"] = doc.id
-        bookings.append(SimpleBooking(**data))
+        bookings.append(validated(SimpleBooking, doc, data))
     
     return bookings, total
 
@@ -221,7 +229,7 @@ def get_all_bookings(limit: int = 100) -> List[SimpleBooking]:
             
             # Convert to SimpleBooking model
             try:
-                booking = SimpleBooking(**booking_data)
+                booking = validated(SimpleBooking, doc, booking_data)
                 bookings.append(booking)
             except Exception as e:
                 # Skip invalid bookings
@@ -241,16 +249,18 @@ def create_booking_flexible(booking_data: dict) -> dict:
         
         booking_id = booking_data["bookingId"]
         
-        # Get student and class information for required fields
+        # Get student and class information for required fields (one batched read)
+        prime_documents("users", booking_data.get("studentId"))
+        prime_documents("classes", booking_data.get("classId"))
         if "studentId" in booking_data:
-            student_doc = db.collection("users").document(booking_data["studentId"]).get()
+            student_doc = get_document("users", booking_data["studentId"])
             if student_doc.exists:
                 student_data = student_doc.to_dict()
                 if "studentName" not in booking_data:
                     booking_data["studentName"] = student_data.get("displayName", "Unknown Student")
         
         if "classId" in booking_data:
-            class_doc = db.collection("classes").document(booking_data["classId"]).get()
+            class_doc = get_document("classes", booking_data["classId"])
             if class_doc.exists:
                 class_data = class_doc.to_dict()
                 if "className" not in booking_data:
@@ -264,8 +274,14 @@ def create_booking_flexible(booking_data: dict) -> dict:
         if "bookedAt" not in booking_data:
             booking_data["bookedAt"] = datetime.now().isoformat()
         
-        # Save to Firestore with complete flexibility
-        db.collection("bookings").document(booking_id).set(booking_data)
+        # Save to Firestore with complete flexibility. create() fails if the id is taken - for a
+        # checkout booking that means the Stripe webhook created it first and updated the dashboards
+        booking_ref = db.collection("bookings").document(booking_id)
+        try:
+            booking_ref.create(booking_data)
+        except AlreadyExists:
+            return {**booking_ref.get().to_dict(), "bookingId": booking_id}
+        record_booking_change(None, booking_data)
         
         return booking_data
         
@@ -291,6 +307,6 @@ def get_bookings_by_parent(parent_id: str, young_learner_name: str = None, page:
     for doc in docs:
         data = doc.to_dict()
         data["bookingId"] = doc.id
-        bookings.append(SimpleBooking(**data))
+        bookings.append(validated(SimpleBooking, doc, data))
     
     return bookings, total
\ No newline at end of file
@@ -1,194 +1,198 @@
 from app.services.firestore import db
+from app.services.model_cache import validated
+from app.services.response_cache import bump_catalog_version
+from app.services.query_planner import (
+    ASCENDING, DESCENDING, InvalidCursor, Predicate, QuerySort, execute_page, execute_plan, field_is_dense,
+    field_values_within, get_path, plan_query, slice_page
+)
+from app.services.projections import merge_paths
+from app.services.single_flight import HOT_QUERY_TTL, single_flight
+from app.services.document_loader import get_document, get_documents, loader_scope, prime_documents
+from app.services.document_writes import apply_field_updates, update_document
 from app.models.class_models import ClassItem, ClassSearchQuery
 from datetime import date, datetime
-from typing import List, Dict, Tuple, Optional
+from typing import Callable, List, Dict, Tuple, Optional
 from fastapi import HTTPException
+import logging
 import uuid
 
-def search_classes(query: ClassSearchQuery) -> Tuple[List[ClassItem], int]:
+logger = logging.getLogger(__name__)
+
+# sortBy -> field path; only fields every class has (create_class stamps createdAt) can be ordered by Firestore
+SORT_FIELDS = {"createdAt": "createdAt", "startDate": "schedule.startDate", "price": "pricing.perSessionRate",
+               "rating": "mentorRating", "title": "title"}
+DENSE_SORT_FIELDS = {"createdAt"}
+
+# Class types shown in listings (one-on-one classes are private)
+LISTED_CLASS_TYPES = ["group", "batch", "workshop"]
+
+# Query fields -> document fields the Python-side checks below read (projected reads must include them)
+CHECK_FIELDS = {"city": ("city", "location"), "country": ("country", "location"), "hasAvailability": ("capacity",),
+                "isRecurring": ("isRecurring",), "maxPrice": ("pricing",), "mentorName": ("mentorName",),
+                "q": ("title", "description", "subject", "category")}
+
+def _listed_types() -> Predicate:
+    """
+    Every class type except one-on-one. While all classes have a known type
+    this is an `in` on the listed ones, which Firestore treats as an
+    equality, so listings can still be ordered by createdAt; a class of any
+    other type switches it back to `type != "one-on-one"` so it stays listed.
+    """
+    if field_values_within("classes", "type", LISTED_CLASS_TYPES + ["one-on-one"]):
+        return Predicate("type", "in", LISTED_CLASS_TYPES)
+    return Predicate("type", "!=", "one-on-one")
+
+def _class_predicates(query: ClassSearchQuery) -> Tuple[Optional[List[Predicate]], Optional[Callable[[str, Dict], bool]]]:
+    """Filters Firestore could evaluate, and a Python check for the ones it cannot (None if there are none)"""
+    predicates = []
+    
+    # One-on-one classes are excluded from all listings
+    if query.type == "one-on-one":
+        return None, None
+    if query.type:
+        predicates.append(Predicate("type", "==", query.type))
+    else:
+        predicates.append(_listed_types())
+    
+    for field in ("category", "level", "ageGroup", "format", "mentorId", "status"):
+        value = getattr(query, field)
+        if value:
+            predicates.append(Predicate(field, "==", value))
+    
+    if query.subject:
+        # Handle comma-separated subjects
+        subjects = [s.strip() for s in query.subject.split(',')]
+        if len(subjects) == 1:
+            predicates.append(Predicate("subject", "==", subjects[0]))
+        else:
+            predicates.append(Predicate("subject", "in", subjects))
+    
+    if query.isRecurring:
+        predicates.append(Predicate("isRecurring", "==", True))
+    if query.minRating:
+        predicates.append(Predicate("mentorRating", ">=", query.minRating))
+    if query.minPrice:
+        predicates.append(Predicate("pricing.perSessionRate", ">=", query.minPrice))
+    if query.startDateFrom:
+        predicates.append(Predicate("schedule.startDate", ">=", query.startDateFrom))
+    if query.startDateTo:
+        predicates.append(Predicate("schedule.startDate", "<=", query.startDateTo))
+    
+    checks = []
+    
+    # Location filters check both top-level fields and the nested location object
+    if query.city:
+        checks.append(lambda data: (data.get("city") or (data.get("location") or {}).get("city")) == query.city)
+    if query.country:
+        checks.append(lambda data: (data.get("country") or (data.get("location") or {}).get("country")) == query.country)
+    
+    if query.hasAvailability:
+        def has_spots(data):
+            capacity = data.get("capacity") or {}
+            return capacity.get("currentEnrollment", 0) < capacity.get("maxStudents", 0)
+        checks.append(has_spots)
+    
+    # A missing isRecurring counts as not recurring
+    if query.isRecurring is False:
+        checks.append(lambda data: not data.get("isRecurring", False))
+    
+    # A class without a price counts as free: it fails minPrice but passes maxPrice, so the
+    # maxPrice range only goes to Firestore while every class has pricing.perSessionRate
+    if query.maxPrice:
+        if field_is_dense("classes", "pricing.perSessionRate"):
+            predicates.append(Predicate("pricing.perSessionRate", "<=", query.maxPrice))
+        else:
+            checks.append(lambda data: (get_path(data, "pricing.perSessionRate") or 0) <= query.maxPrice)
+    
+    if query.mentorName:
+        checks.append(lambda data: query.mentorName.lower() in (data.get("mentorName") or "").lower())
+    
+    if query.q:
+        search_text = query.q.lower()
+        def text_match(data):
+            searchable_fields = [
+                data.get("title", ""),
+                data.get("description", ""),
+                data.get("subject", ""),
+                data.get("category", "")
+            ]
+            return search_text in " ".join(str(f or "") for f in searchable_fields).lower()
+        checks.append(text_match)
+    
+    python_filter = (lambda doc_id, data: all(check(data) for check in checks)) if checks else None
+    return predicates, python_filter
+
+def _class_item(doc, data: Dict, projection: Optional[Tuple[str, ...]] = None) -> ClassItem:
+    """ClassItem for a snapshot, cached per document version only when built from the snapshot alone"""
+    if data.get("mentorName"):
+        return validated(ClassItem, doc, clean_data(data), projection)
+    # clean_data looks the name up in mentors/users - it must not be cached with this snapshot
+    return ClassItem(**clean_data(data))
+
+def _class_items(docs, projection: Optional[Tuple[str, ...]] = None) -> List[ClassItem]:
+    classes = []
+    for doc in docs:
+        data = doc.to_dict()
+        data["classId"] = doc.id
+        try:
+            classes.append(_class_item(doc, data, projection))
+        except Exception:
+            # Skip invalid class data
+            continue
+    return classes
+
+def search_classes(query: ClassSearchQuery, projection: Optional[Tuple[str, ...]] = None,
+                   all_matches: bool = False) -> Tuple[List[ClassItem], int]:
     """
     Search classes with advanced filtering, sorting, and pagination.
     
-    IMPORTANT: This function uses multiple Firestore filters which may require
-    composite indexes. We'll implement this step-by-step to identify required indexes.
+    `projection` limits the fields read from Firestore (a view from
+    app/services/projections.py); None reads whole documents. `all_matches`
+    returns every match in order instead of one page, for callers that rank
+    them (page, pageSize and cursor are ignored).
+    
+    The query planner (app/services/query_planner.py) pushes as many filters,
+    the sort and the page window down to Firestore as the declared indexes in
+    firestore.indexes.json allow; only the rest is evaluated here. Note that
+    server-side ranges leave out classes missing the field (e.g. a start-date
+    filter skips classes without schedule.startDate). Price is the exception:
+    a class without pricing.perSessionRate counts as free, so it is still
+    returned under any maxPrice (and never for a minPrice).
     """
+    classes, total, _ = search_classes_page(query, projection, all_matches)
+    return classes, total
+
+def search_classes_page(query: ClassSearchQuery, projection: Optional[Tuple[str, ...]] = None,
+                        all_matches: bool = False) -> Tuple[List[ClassItem], int, Optional[str]]:
+    """search_classes plus the cursor for the next page (query.cursor continues from it instead of query.page)"""
+    page_size = None if all_matches else query.pageSize
+    cursor = None if all_matches else query.cursor
     try:
-        # Start with base query - exclude one-on-one classes from all listings
-        base_query = db.collection("classes").where("type", "!=", "one-on-one")
-        
-        # We'll apply filters very carefully to avoid composite index issues
-        # Start with the most basic filters first
-        filters = []
-        
-        # Single-field filters (usually don't need composite indexes)
-        if query.type:
-            filters.append(("type", "==", query.type))
-        
-        if query.category:
-            filters.append(("category", "==", query.category))
-            
-        if query.subject:
-            # Handle comma-separated subjects
-            subjects = [s.strip() for s in query.subject.split(',')]
-            if len(subjects) == 1:
-                filters.append(("subject", "==", subjects[0]))
-            else:
-                # Multiple subjects - use 'in' operator  
-                filters.append(("subject", "in", subjects))
-            
-        if query.level:
-            filters.append(("level", "==", query.level))
-            
-        if query.ageGroup:
-            filters.append(("ageGroup", "==", query.ageGroup))
-            
-        if query.format:
-            filters.append(("format", "==", query.format))
-            
-        if query.mentorId:
-            filters.append(("mentorId", "==", query.mentorId))
-            
-        if query.status:
-            filters.append(("status", "==", query.status))
-        
-        # Apply basic filters to query (one at a time to avoid composite index issues)
-        current_query = base_query
-        
-        # Apply safe filters to Firestore, complex ones to Python
-        firestore_filters = []
-        other_filters = []
-        
-        # These filters are safe for Firestore (single field, no composite index needed)
-        safe_firestore_fields = ["type", "category", "subject", "level", "ageGroup", "format", "mentorId", "status"]
+        predicates, python_filter = _class_predicates(query)
+        if predicates is None:
+            return [], 0, None
         
-        for filter_item in filters:
-            if filter_item[0] in safe_firestore_fields:
-                firestore_filters.append(filter_item)
-            else:
-                other_filters.append(filter_item)
+        direction = DESCENDING if query.sortOrder == "desc" else ASCENDING
+        sort = None
+        if query.sortBy in SORT_FIELDS:
+            sort = QuerySort(SORT_FIELDS[query.sortBy], direction, dense=query.sortBy in DENSE_SORT_FIELDS)
         
-        # Apply Firestore filters 
-        print(f"DEBUG: Applying Firestore filters: {firestore_filters}")
-        print(f"DEBUG: Python filters: {other_filters}")
-        for field, op, value in firestore_filters:
-            print(f"DEBUG: Adding Firestore filter - {field} {op} {value}")
-            current_query = current_query.where(field, op, value)
+        plan = plan_query("classes", predicates, sort, query.pageSize)
+        logger.debug("search_classes plan", extra={"plan": plan.describe()})
+        start_idx = 0 if all_matches else (query.page - 1) * query.pageSize
         
-        # Get all documents and do remaining filtering in Python
-        docs = list(current_query.stream())
+        select = None
+        if projection is not None:
+            select = merge_paths(projection, *(paths for name, paths in CHECK_FIELDS.items()
+                                               if getattr(query, name) is not None))
         
-        # Set remaining filters for Python processing
-        filters = other_filters
+        if plan.paginates_on_server and python_filter is None:
+            docs, total, next_cursor = execute_page(plan, start_idx, page_size, select=select,
+                                                    cursor=cursor)
+            return _class_items(docs, select), total, next_cursor
         
-        # Convert to class objects and apply remaining filters
-        classes = []
-        for doc in docs:
-            data = doc.to_dict()
-            data["classId"] = doc.id
-            
-            # Apply remaining filters in Python
-            should_include = True
-            
-            # Apply remaining filters in Python (filters that couldn't be applied in Firestore)
-            for field, op, value in filters:
-                field_value = data.get(field)
-                # Handle None values properly
-                if field_value is None:
-                    should_include = False
-                    break
-                if op == "==" and field_value != value:
-                    should_include = False
-                    break
-            
-            if not should_include:
-                continue
-            
-            # Apply location filters (check both top-level fields and nested location object)
-            if query.city:
-                class_city = data.get("city") or data.get("location", {}).get("city")
-                if class_city != query.city:
-                    continue
-                
-            if query.country:
-                class_country = data.get("country") or data.get("location", {}).get("country")
-                if class_country != query.country:
-                    continue
-            
-            # Apply rating filter
-            if query.minRating and data.get("mentorRating", 0) < query.minRating:
-                continue
-            
-            # Apply price filters
-            pricing = data.get("pricing", {})
-            per_session_rate = pricing.get("perSessionRate", 0)
-            
-            if query.minPrice and per_session_rate < query.minPrice:
-                continue
-                
-            if query.maxPrice and per_session_rate > query.maxPrice:
-                continue
-            
-            # Apply availability filter
-            if query.hasAvailability:
-                capacity = data.get("capacity", {})
-                current_enrollment = capacity.get("currentEnrollment", 0)
-                max_students = capacity.get("maxStudents", 0)
-                if current_enrollment >= max_students:
-                    continue
-            
-            # Apply date filters
-            schedule = data.get("schedule", {})
-            start_date_str = schedule.get("startDate")
-            
-            if start_date_str:
-                try:
-                    start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date()
-                    
-                    if query.startDateFrom:
-                        from_date = datetime.strptime(query.startDateFrom, "%Y-%m-%d").date()
-                        if start_date < from_date:
-                            continue
-                    
-                    if query.startDateTo:
-                        to_date = datetime.strptime(query.startDateTo, "%Y-%m-%d").date()
-                        if start_date > to_date:
-                            continue
-                            
-                except ValueError:
-                    # Skip classes with invalid dates
-                    continue
-            
-            # Apply recurring filter
-            if query.isRecurring is not None and data.get("isRecurring", False) != query.isRecurring:
-                continue
-            
-            # Apply mentor name filter
-            if query.mentorName:
-                mentor_name = data.get("mentorName", "").lower()
-                if query.mentorName.lower() not in mentor_name:
-                    continue
-            
-            # Apply text search
-            if query.q:
-                search_text = query.q.lower()
-                searchable_fields = [
-                    data.get("title", ""),
-                    data.get("description", ""),
-                    data.get("subject", ""),
-                    data.get("category", "")
-                ]
-                searchable_content = " ".join(searchable_fields).lower()
-                if search_text not in searchable_content:
-                    continue
-            
-            # Clean and create ClassItem
-            cleaned_data = clean_data(data)
-            try:
-                class_item = ClassItem(**cleaned_data)
-                classes.append(class_item)
-            except Exception as e:
-                # Skip invalid class data
-                continue
+        docs, _ = execute_plan(plan, python_filter=python_filter, select=select)
+        classes = _class_items(docs, select)
         
         # Sort classes
         if query.sortBy == "createdAt":
@@ -211,30 +215,45 @@ def search_classes(query: ClassSearchQuery) -> Tuple[List[ClassItem], int]:
         total = len(classes)
         
         # Apply pagination
-        start_idx = (query.page - 1) * query.pageSize
-        end_idx = start_idx + query.pageSize
-        paginated_classes = classes[start_idx:end_idx]
+        paginated_classes, next_cursor = slice_page(classes, [c.classId for c in classes], page_size,
+                                                    start_idx, cursor)
         
-        return paginated_classes, total
+        return paginated_classes, total, next_cursor
         
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to search classes: {str(e)}")
 
-def fetch_all_classes(page: int = 1, page_size: int = 20) -> Tuple[List[ClassItem], int]:
+def fetch_all_classes(page: int = 1, page_size: int = 20,
+                      projection: Optional[Tuple[str, ...]] = None) -> Tuple[List[ClassItem], int]:
     """Get all batch classes with pagination"""
     query = ClassSearchQuery(type="batch", page=page, pageSize=page_size, sortBy="createdAt")
-    return search_classes(query)
+    return search_classes(query, projection)
 
-def fetch_all_workshops(page: int = 1, page_size: int = 20) -> Tuple[List[ClassItem], int]:
+def workshop_query(page: int = 1, page_size: int = 20, upcoming: bool = False,
+                   cursor: Optional[str] = None) -> ClassSearchQuery:
+    """Query behind the workshop listings: newest first, or soonest first from today when upcoming"""
+    if upcoming:
+        return ClassSearchQuery(type="workshop", startDateFrom=date.today().isoformat(), page=page,
+                                pageSize=page_size, sortBy="startDate", cursor=cursor)
+    return ClassSearchQuery(type="workshop", page=page, pageSize=page_size, sortBy="createdAt", cursor=cursor)
+
+def fetch_all_workshops(page: int = 1, page_size: int = 20,
+                        projection: Optional[Tuple[str, ...]] = None) -> Tuple[List[ClassItem], int]:
     """Get all workshops with pagination"""
-    query = ClassSearchQuery(type="workshop", page=page, pageSize=page_size, sortBy="createdAt")
-    return search_classes(query)
+    return search_classes(workshop_query(page, page_size), projection)
 
-def fetch_featured_classes(limit: int = 6) -> List[ClassItem]:
+@single_flight(ttl=HOT_QUERY_TTL, dependencies=("classes", "mentors"))
+def fetch_featured_classes(limit: int = 6, projection: Optional[Tuple[str, ...]] = None) -> List[ClassItem]:
     """Get featured classes based on performance metrics"""
     try:
         # Exclude one-on-one classes and get batches only
-        docs = db.collection("classes").where("type", "==", "batch").stream()
+        query = db.collection("classes").where("type", "==", "batch")
+        if projection is not None:
+            projection = merge_paths(projection, ("mentorRating", "capacity"))  # Read by the score
+            query = query.select(projection)
+        docs = query.stream()
         class_scores = []
         
         for doc in docs:
@@ -251,9 +270,8 @@ def fetch_featured_classes(limit: int = 6) -> List[ClassItem]:
             
             score = mentor_rating * 2 + enrollment_rate * 1
             
-            cleaned_data = clean_data(data)
             try:
-                class_item = ClassItem(**cleaned_data)
+                class_item = _class_item(doc, data, projection)
                 class_scores.append((score, class_item))
             except Exception:
                 continue
@@ -265,23 +283,47 @@ def fetch_featured_classes(limit: int = 6) -> List[ClassItem]:
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch featured classes: {str(e)}")
 
-def fetch_upcoming_workshops(page: int = 1, page_size: int = 20) -> Tuple[List[ClassItem], int]:
+@single_flight(ttl=HOT_QUERY_TTL, dependencies=("classes", "mentors"))
+def fetch_upcoming_workshops_page(page: int = 1, page_size: int = 20, projection: Optional[Tuple[str, ...]] = None,
+                                  cursor: Optional[str] = None) -> Tuple[List[ClassItem], int, Optional[str]]:
+    """Get upcoming workshops with pagination, and the cursor for the next page"""
+    return search_classes_page(workshop_query(page, page_size, upcoming=True, cursor=cursor), projection)
+
+def fetch_upcoming_workshops(page: int = 1, page_size: int = 20,
+                             projection: Optional[Tuple[str, ...]] = None) -> Tuple[List[ClassItem], int]:
     """Get upcoming workshops with pagination"""
-    today = date.today()
-    query = ClassSearchQuery(
-        type="workshop", 
-        startDateFrom=today.isoformat(),
-        page=page, 
-        pageSize=page_size, 
-        sortBy="startDate"
-    )
-    return search_classes(query)
+    workshops, total, _ = fetch_upcoming_workshops_page(page, page_size, projection)
+    return workshops, total
+
+def _mentor_display_name(mentor_id: str) -> str:
+    """Name for classes saved without mentorName: mentor profile, then user record"""
+    try:
+        # First try the mentors collection (a missing profile falls through to the user record)
+        mentor_doc = get_document("mentors", mentor_id)
+        if mentor_doc.exists and (mentor_doc.to_dict() or {}).get("displayName"):
+            return mentor_doc.to_dict()["displayName"]
+        # Fallback: get displayName from users collection
+        user_doc = get_document("users", mentor_id)
+        if user_doc.exists:
+            user_data = user_doc.to_dict()
+            first_name = user_data.get("firstName", "")
+            last_name = user_data.get("lastName", "")
+            display_name = user_data.get("displayName", "")
+            
+            if display_name:
+                return display_name
+            elif first_name:
+                last_initial = last_name[0].upper() if last_name else ""
+                return f"{first_name} {last_initial}".strip()
+        return "Unknown Mentor"
+    except Exception as e:
+        logger.warning("Error fetching mentor name for %s: %s", mentor_id, e)
+        return "Unknown Mentor"
 
 def fetch_class_by_id(class_id: str):
     """Get class by ID"""
     try:
-        doc_ref = db.collection("classes").document(class_id)
-        doc = doc_ref.get()
+        doc = get_document("classes", class_id)
         if not doc.exists:
             return None
         
@@ -290,33 +332,10 @@ def fetch_class_by_id(class_id: str):
         
         # Ensure mentorName is set (required field for ClassItem validation)
         if not data.get("mentorName") and data.get("mentorId"):
-            try:
-                # First try to get from mentors collection
-                from app.services.mentor_service import fetch_mentor_by_id
-                mentor = fetch_mentor_by_id(data["mentorId"])
-                if mentor and hasattr(mentor, 'displayName') and mentor.displayName:
-                    data["mentorName"] = mentor.displayName
-                else:
-                    # Fallback: get displayName from users collection
-                    user_doc = db.collection("users").document(data["mentorId"]).get()
-                    if user_doc.exists:
-                        user_data = user_doc.to_dict()
-                        first_name = user_data.get("firstName", "")
-                        last_name = user_data.get("lastName", "")
-                        display_name = user_data.get("displayName", "")
-                        
-                        if display_name:
-                            data["mentorName"] = display_name
-                        elif first_name:
-                            last_initial = last_name[0].upper() if last_name else ""
-                            data["mentorName"] = f"{first_name} {last_initial}".strip()
-                        else:
-                            data["mentorName"] = "Unknown Mentor"
-                    else:
-                        data["mentorName"] = "Unknown Mentor"
-            except Exception as e:
-                print(f"Error fetching mentor name in fetch_class_by_id: {e}")
-                data["mentorName"] = "Unknown Mentor"
+            # Mentor and fallback user record come back in one read
+            prime_documents("mentors", data["mentorId"])
+            prime_documents("users", data["mentorId"])
+            data["mentorName"] = _mentor_display_name(data["mentorId"])
         elif not data.get("mentorName"):
             data["mentorName"] = "Unknown Mentor"
         
@@ -327,6 +346,27 @@ def fetch_class_by_id(class_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch class: {str(e)}")
 
+def fetch_classes_by_ids(class_ids: List[str]) -> List[Optional[ClassItem]]:
+    """
+    Classes in input order as GET /classes/{id} returns them (None for missing
+    or invalid documents): one get_all for the classes, one more for the
+    mentor names any of them lack.
+    """
+    with loader_scope():
+        docs = [doc if doc is not None and doc.exists else None for doc in get_documents("classes", class_ids)]
+        for doc in docs:
+            data = doc.to_dict() if doc is not None else {}
+            mentor_id = data.get("mentorId") if not data.get("mentorName") else None
+            if mentor_id:
+                # Mentor and fallback user record of every nameless class come back in one read
+                prime_documents("mentors", mentor_id)
+                prime_documents("users", mentor_id)
+        classes = []
+        for doc in docs:
+            items = _class_items([doc]) if doc is not None else []
+            classes.append(items[0] if items else None)
+        return classes
+
 def get_classes_by_mentor_id(mentor_id: str):
     """
     Fetches all approved classes (batch + workshops) created by a given mentor.
@@ -343,10 +383,9 @@ def get_classes_by_mentor_id(mentor_id: str):
         for doc in results:
             data = doc.to_dict()
             data["classId"] = doc.id
-            cleaned_data = clean_data(data)
             
             try:
-                class_item = ClassItem(**cleaned_data)
+                class_item = _class_item(doc, data)
                 classes.append(class_item)
             except Exception:
                 continue
@@ -360,7 +399,7 @@ def get_class_categories() -> List[str]:
     """Get list of all class categories"""
     try:
         # docs = db.collection("classes").where("status", "==", "approved").stream()  # COMMENTED OUT
-        docs = db.collection("classes").stream()  # NO STATUS FILTER for testing
+        docs = db.collection("classes").select(["category"]).stream()  # NO STATUS FILTER for testing
         categories = set()
         
         for doc in docs:
@@ -378,7 +417,7 @@ def get_class_subjects() -> List[str]:
     """Get list of all class subjects"""
     try:
         # docs = db.collection("classes").where("status", "==", "approved").stream()  # COMMENTED OUT
-        docs = db.collection("classes").stream()  # NO STATUS FILTER for testing
+        docs = db.collection("classes").select(["subject"]).stream()  # NO STATUS FILTER for testing
         subjects = set()
         
         for doc in docs:
@@ -421,36 +460,7 @@ def clean_data(data: Dict) -> Dict:
     
     # Ensure mentorName is set (required field for ClassItem validation)
     if not data.get("mentorName"):
-        if data.get("mentorId"):
-            try:
-                # First try to get from mentors collection
-                from app.services.mentor_service import fetch_mentor_by_id
-                mentor = fetch_mentor_by_id(data["mentorId"])
-                if mentor and hasattr(mentor, 'displayName') and mentor.displayName:
-                    data["mentorName"] = mentor.displayName
-                else:
-                    # Fallback: get displayName from users collection
-                    user_doc = db.collection("users").document(data["mentorId"]).get()
-                    if user_doc.exists:
-                        user_data = user_doc.to_dict()
-                        first_name = user_data.get("firstName", "")
-                        last_name = user_data.get("lastName", "")
-                        display_name = user_data.get("displayName", "")
-                        
-                        if display_name:
-                            data["mentorName"] = display_name
-                        elif first_name:
-                            last_initial = last_name[0].upper() if last_name else ""
-                            data["mentorName"] = f"{first_name} {last_initial}".strip()
-                        else:
-                            data["mentorName"] = "Unknown Mentor"
-                    else:
-                        data["mentorName"] = "Unknown Mentor"
-            except Exception as e:
-                print(f"Error fetching mentor name in clean_data: {e}")
-                data["mentorName"] = "Unknown Mentor"
-        else:
-            data["mentorName"] = "Unknown Mentor"
+        data["mentorName"] = _mentor_display_name(data["mentorId"]) if data.get("mentorId") else "Unknown Mentor"
     
     # Add subject-based class images if not present
     if not data.get("classImage"):
@@ -527,10 +537,21 @@ def clean_data(data: Dict) -> Dict:
 
 # ---------- Search Metadata Generation ----------
 
-def generate_search_metadata(class_data: Dict) -> Dict:
+# Bump when generate_search_metadata changes so the classes.search_metadata
+# migration (app/services/search_metadata_backfill.py) regenerates every class
+SEARCH_METADATA_VERSION = 1
+
+# Top-level class fields generate_search_metadata reads
+SEARCH_METADATA_FIELDS = {
+    "schedule", "pricing", "format", "level", "skillPrerequisites", "capacity", "type",
+    "title", "subject", "subjectId", "category", "description", "ageGroup",
+}
+
+def generate_search_metadata(class_data: Dict, subjects: Optional[Dict[str, Dict]] = None) -> Dict:
     """
     Auto-generate searchMetadata for enhanced search and AI integration.
     This metadata is used for intelligent search, filtering, and recommendations.
+    `subjects` (subject id -> subject doc) avoids a subject lookup per class in bulk jobs.
     """
     metadata = {}
     
@@ -619,7 +640,7 @@ def generate_search_metadata(class_data: Dict) -> Dict:
         metadata["keywords"] = keywords
         
         # Add cultural context if available
-        cultural_context = generate_cultural_context(class_data)
+        cultural_context = generate_cultural_context(class_data, subjects)
         if cultural_context:
             metadata.update(cultural_context)
         
@@ -627,7 +648,7 @@ def generate_search_metadata(class_data: Dict) -> Dict:
     
     except Exception as e:
         # Return basic metadata if generation fails
-        print(f"Warning: Failed to generate search metadata: {str(e)}")
+        logger.warning("Failed to generate search metadata: %s", e)
         return {
             "availableDays": [],
             "timeSlots": [],
@@ -652,7 +673,6 @@ def fetch_subject_from_database(subject_id: str) -> Optional[Dict]:
     Fetch subject data directly from subjects database using subjectId
     """
     try:
-        db = firestore.client()
         subjects_ref = db.collection("subjects").document(subject_id)
         subject_doc = subjects_ref.get()
         
@@ -661,7 +681,7 @@ def fetch_subject_from_database(subject_id: str) -> Optional[Dict]:
         return None
         
     except Exception as e:
-        print(f"Warning: Failed to fetch subject {subject_id} from database: {str(e)}")
+        logger.warning("Failed to fetch subject %s from database: %s", subject_id, e)
         return None
 
 def generate_class_keywords(class_data: Dict) -> List[str]:
@@ -712,7 +732,7 @@ def generate_class_keywords(class_data: Dict) -> List[str]:
     
     return keywords[:20]  # Limit to 20 keywords max
 
-def generate_cultural_context(class_data: Dict) -> Dict:
+def generate_cultural_context(class_data: Dict, subjects: Optional[Dict[str, Dict]] = None) -> Dict:
     """
     Generate cultural context by trying to match subject to cultural database.
     Returns cultural metadata or basic context for non-cultural subjects.
@@ -724,7 +744,10 @@ def generate_cultural_context(class_data: Dict) -> Dict:
     
     # Fetch cultural data directly from subjects database
     subject_id = class_data.get("subjectId", "")
-    cultural_match = fetch_subject_from_database(subject_id) if subject_id else None
+    if subjects is not None:
+        cultural_match = subjects.get(subject_id)
+    else:
+        cultural_match = fetch_subject_from_database(subject_id) if subject_id else None
     
     if cultural_match:
         # Found cultural match - use data directly from subjects database
@@ -798,6 +821,10 @@ def map_difficulty_level(level: str) -> str:
     }
     return level_mapping.get(level.lower(), "beginner")
 
+def affects_search_metadata(update_data: Dict) -> bool:
+    """True if an update touches a field searchMetadata is derived from (dotted paths included)"""
+    return any(key.split(".", 1)[0] in SEARCH_METADATA_FIELDS for key in update_data)
+
 # ---------- Class CRUD Operations ----------
 
 def create_class(class_data: Dict) -> str:
@@ -836,7 +863,7 @@ def create_class(class_data: Dict) -> str:
                     else:
                         class_data["mentorName"] = "Unknown Mentor"
             except Exception as e:
-                print(f"Error fetching mentor name: {e}")
+                logger.warning("Error fetching mentor name: %s", e)
                 class_data["mentorName"] = "Unknown Mentor"
         elif not class_data.get("mentorName"):
             class_data["mentorName"] = "Unknown Mentor"
@@ -850,6 +877,7 @@ def create_class(class_data: Dict) -> str:
         
         # Auto-generate searchMetadata
         class_data["searchMetadata"] = generate_search_metadata(class_data)
+        class_data["searchMetadataVersion"] = SEARCH_METADATA_VERSION
         
         # Initialize approval workflow for admin review
         class_data["approvalWorkflow"] = {
@@ -867,6 +895,7 @@ def create_class(class_data: Dict) -> str:
         # Save to Firestore
         doc_ref = db.collection("classes").document(class_id)
         doc_ref.set(class_data)
+        bump_catalog_version("classes")
         
         return class_id
     
@@ -875,19 +904,11 @@ def create_class(class_data: Dict) -> str:
 
 def update_class_flexible(class_id: str, update_data: dict) -> dict:
     """Pure MongoDB-style flexible class update - accept ANY fields"""
-    try:
-        doc_ref = db.collection("classes").document(class_id)
-        doc = doc_ref.get()
-        
-        if not doc.exists:
-            raise HTTPException(status_code=404, detail="Class not found")
-        
+    def prepare(current_data: Dict, flexible_update: Dict) -> Dict:
         # Pure flexibility - use whatever frontend sends
-        flexible_update = update_data.copy()
         flexible_update["updatedAt"] = datetime.now().isoformat()
         
         # If mentorId is being updated or mentorName is being cleared, fetch mentor name
-        current_data = doc.to_dict()
         if ("mentorId" in flexible_update and flexible_update["mentorId"]) or (flexible_update.get("mentorName") is None):
             mentor_id = flexible_update.get("mentorId", current_data.get("mentorId"))
             if mentor_id:
@@ -901,16 +922,22 @@ def update_class_flexible(class_id: str, update_data: dict) -> dict:
                 except:
                     flexible_update["mentorName"] = "Unknown Mentor"
         
-        # Update with ANY fields
-        doc_ref.update(flexible_update)
+        # Keep searchMetadata in step with the fields it is derived from
+        if affects_search_metadata(flexible_update) and "searchMetadata" not in flexible_update:
+            flexible_update["searchMetadata"] = generate_search_metadata(apply_field_updates(current_data, flexible_update))
+            flexible_update["searchMetadataVersion"] = SEARCH_METADATA_VERSION
+        return flexible_update
+    
+    try:
+        # Derived fields are written only against the version they were computed from
+        _, updated_data = update_document("classes", class_id, update_data, prepare, not_found="Class not found")
+        bump_catalog_version("classes")
         
         # Return updated class as clean data
-        updated_doc = doc_ref.get()
-        updated_data = updated_doc.to_dict()
         updated_data["classId"] = class_id
         return clean_data(updated_data)
     
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to update class: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to update class: {str(e)}")
@@ -0,0 +1,109 @@
+"""
+Response compression.
+
+Brotli is preferred when the client accepts it and the `brotli` package is
+installed, otherwise gzip. Only complete (non-streaming) responses of a
+compressible type and at least COMPRESSION_MIN_SIZE bytes are compressed;
+small bodies cost more to compress than they save.
+
+The middleware sits inside ResponseCacheMiddleware, so cached catalog
+responses are stored already compressed and ETags are made per encoding
+(see `negotiate_encoding`).
+"""
+import gzip
+import os
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional - gzip is used without it
+    brotli = None
+
+MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))  # Higher levels are too slow for per-request use
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the content coding this server would use for an Accept-Encoding header"""
+    accepted = set()
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(coding.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    """Compress complete responses with brotli or gzip above a size threshold"""
+
+    def __init__(self, app, minimum_size: int = MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers", []))
+        encoding = negotiate_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        state = {"start": None, "passthrough": False}
+
+        async def compressing_send(message):
+            if state["passthrough"]:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                # Hold the start message until the body length is known
+                state["start"] = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            start = state["start"]
+            body = message.get("body", b"")
+            response_headers = [(k.lower(), v) for k, v in start.get("headers", [])]
+            content_type = dict(response_headers).get(b"content-type", b"").decode("latin-1")
+            if (
+                message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or any(k == b"content-encoding" for k, _ in response_headers)
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            ):
+                # Streaming, small, already encoded or binary - send as is
+                state["passthrough"] = True
+                await send(start)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            vary = [v.decode("latin-1") for k, v in response_headers if k == b"vary"] + ["Accept-Encoding"]
+            response_headers = [(k, v) for k, v in response_headers if k not in (b"content-length", b"vary")]
+            response_headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(compressed)).encode()),
+                (b"vary", ", ".join(vary).encode("latin-1")),
+            ]
+            await send({**start, "headers": response_headers})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, compressing_send)
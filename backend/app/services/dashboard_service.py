@@ -0,0 +1,278 @@
+"""
+Dashboard read model.
+
+One precomputed document per user in the `dashboards` collection, kept up to
+date by the write paths (bookings, payments, messages, reviews) so the student
+and mentor dashboards are served with a single document read.
+
+Document layout:
+    student / mentor:
+        counts    - bookings per bookingStatus
+        upcoming  - map of bookingId -> summary for pending/confirmed bookings
+                    (sessions already past are left out when reading)
+    mentor.earnings.total    - sum of paid booking amounts
+    mentor.rating            - avg / total reviews
+    mentor.latestReviews     - newest reviews (capped)
+    messages.unread / messages.last
+
+Updates are incremental (Increment / DELETE_FIELD with merge) and best effort:
+a failed dashboard write is logged and never fails the primary write. Drift
+can be repaired with rebuild_dashboard().
+"""
+import logging
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from google.cloud import firestore
+
+from app.services.firestore import db
+
+logger = logging.getLogger(__name__)
+
+DASHBOARDS_COLLECTION = "dashboards"
+ACTIVE_BOOKING_STATUSES = ("pending", "confirmed")
+PAID_STATUSES = ("paid", "completed")
+LATEST_REVIEWS_LIMIT = 5
+
+BOOKING_SUMMARY_FIELDS = (
+    "bookingId", "bookingType", "classId", "className", "mentorId", "mentorName",
+    "studentId", "studentName", "youngLearnerName", "bookingStatus", "paymentStatus",
+    "sessionDate", "startTime", "endTime", "bookedAt", "confirmedAt",
+)
+
+def _dashboard_ref(user_id: str):
+    return db.collection(DASHBOARDS_COLLECTION).document(user_id)
+
+def _value(value: Any) -> Any:
+    """Plain value for enums stored on booking dicts"""
+    return getattr(value, "value", value)
+
+def _booking_amount(booking: Dict[str, Any]) -> float:
+    return float(booking.get("amount") or (booking.get("pricing") or {}).get("finalPrice") or 0)
+
+def _booking_summary(booking: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: _value(booking.get(field)) for field in BOOKING_SUMMARY_FIELDS if booking.get(field) is not None}
+
+def _booking_roles(booking: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """(user_id, role) pairs whose dashboards show this booking"""
+    roles = []
+    if booking.get("studentId"):
+        roles.append((booking["studentId"], "student"))
+    if booking.get("parentId") and booking.get("parentId") != booking.get("studentId"):
+        roles.append((booking["parentId"], "student"))
+    if booking.get("mentorId"):
+        roles.append((booking["mentorId"], "mentor"))
+    return roles
+
+# ---------- Write Events ----------
+
+def booking_change_writes(old: Optional[Dict[str, Any]], new: Dict[str, Any]) -> List[Tuple[Any, Dict[str, Any]]]:
+    """
+    Dashboard updates for a booking created (old=None) or changed (old -> new).
+    Returns (document reference, merge data) pairs so callers can apply them in
+    a batch or inside their own transaction.
+    """
+    new = {**(old or {}), **new}
+    booking_id = new.get("bookingId")
+    if not booking_id:
+        return []
+
+    old_status = _value((old or {}).get("bookingStatus"))
+    new_status = _value(new.get("bookingStatus")) or "pending"
+    was_paid = _value((old or {}).get("paymentStatus")) in PAID_STATUSES
+    is_paid = _value(new.get("paymentStatus")) in PAID_STATUSES
+
+    writes = []
+    for user_id, role in _booking_roles(new):
+        section: Dict[str, Any] = {}
+
+        counts = {}
+        if old_status != new_status:
+            counts[new_status] = firestore.Increment(1)
+            if old_status:
+                counts[old_status] = firestore.Increment(-1)
+        if old is None:
+            counts["total"] = firestore.Increment(1)
+        if counts:
+            section["counts"] = counts
+
+        if new_status in ACTIVE_BOOKING_STATUSES:
+            section["upcoming"] = {booking_id: _booking_summary(new)}
+        elif old_status in ACTIVE_BOOKING_STATUSES:
+            section["upcoming"] = {booking_id: firestore.DELETE_FIELD}
+
+        if role == "mentor" and was_paid != is_paid:
+            amount = _booking_amount(new)
+            section["earnings"] = {"total": firestore.Increment(amount if is_paid else -amount)}
+
+        if section:
+            writes.append((_dashboard_ref(user_id), {
+                "userId": user_id,
+                role: section,
+                "updatedAt": datetime.now().isoformat(),
+            }))
+    return writes
+
+def _apply(writes: List[Tuple[Any, Dict[str, Any]]], event: str) -> None:
+    if not writes:
+        return
+    try:
+        batch = db.batch()
+        for ref, data in writes:
+            batch.set(ref, data, merge=True)
+        batch.commit()
+    except Exception as e:
+        logger.warning(f"Failed to update dashboards for {event}: {str(e)}")
+
+def record_booking_change(old: Optional[Dict[str, Any]], new: Dict[str, Any]) -> None:
+    """Update the dashboards of everyone involved in a booking"""
+    _apply(booking_change_writes(old, new), f"booking {new.get('bookingId') or (old or {}).get('bookingId')}")
+
+def record_message(message: Dict[str, Any]) -> None:
+    """Bump unread counts for the recipients of a new message"""
+    sender_id = message.get("senderId")
+    recipients = {message.get(field) for field in ("studentId", "mentorId", "parentId")} - {None, sender_id}
+    last = {
+        "messageId": message.get("messageId"),
+        "senderId": sender_id,
+        "preview": (message.get("message") or "")[:120],
+        "sentAt": message.get("sentAt"),
+    }
+    writes = [(_dashboard_ref(user_id), {
+        "userId": user_id,
+        "messages": {"unread": firestore.Increment(1), "last": last},
+        "updatedAt": datetime.now().isoformat(),
+    }) for user_id in recipients]
+    if sender_id:
+        writes.append((_dashboard_ref(sender_id), {"userId": sender_id, "messages": {"last": last}}))
+    _apply(writes, f"message {message.get('messageId')}")
+
+def mark_messages_read(user_id: str) -> None:
+    try:
+        _dashboard_ref(user_id).set({"messages": {"unread": 0}}, merge=True)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to mark messages read: {str(e)}")
+
+@firestore.transactional
+def _update_mentor_reviews(transaction, ref, mentor_id: str, review: Optional[Dict[str, Any]],
+                           avg_rating: float, total_reviews: int, removed_review_id: Optional[str]) -> None:
+    # Read and write in one transaction so concurrent reviews do not drop each other from latestReviews
+    snapshot = ref.get(transaction=transaction)
+    latest = ((snapshot.to_dict() or {}).get("mentor") or {}).get("latestReviews", []) if snapshot.exists else []
+
+    drop = {removed_review_id, (review or {}).get("reviewId")} - {None}
+    latest = [r for r in latest if r.get("reviewId") not in drop]
+    if review:
+        latest.insert(0, {
+            "reviewId": review.get("reviewId"),
+            "classId": review.get("classId"),
+            "rating": review.get("rating"),
+            "review": review.get("review"),
+            "createdAt": review.get("updatedAt") or review.get("createdAt"),
+        })
+
+    transaction.set(ref, {
+        "userId": mentor_id,
+        "mentor": {
+            "rating": {"avg": avg_rating, "total": total_reviews},
+            "latestReviews": latest[:LATEST_REVIEWS_LIMIT],
+        },
+        "updatedAt": datetime.now().isoformat(),
+    }, merge=True)
+
+def record_review(mentor_id: str, review: Optional[Dict[str, Any]], avg_rating: float, total_reviews: int,
+                  removed_review_id: Optional[str] = None) -> None:
+    """Refresh a mentor's rating and latest reviews after a review is written or deleted"""
+    try:
+        _update_mentor_reviews(db.transaction(), _dashboard_ref(mentor_id), mentor_id, review,
+                               avg_rating, total_reviews, removed_review_id)
+    except Exception as e:
+        logger.warning(f"Failed to update dashboard reviews for mentor {mentor_id}: {str(e)}")
+
+# ---------- Reads ----------
+
+def _is_upcoming(booking: Dict[str, Any], today: str) -> bool:
+    # Bookings without a single session date (group classes) stay listed
+    return not booking.get("sessionDate") or str(booking["sessionDate"])[:10] >= today
+
+def _section_view(section: Dict[str, Any]) -> Dict[str, Any]:
+    today = date.today().isoformat()
+    upcoming = sorted(
+        (b for b in (section.get("upcoming") or {}).values() if _is_upcoming(b, today)),
+        key=lambda b: (str(b.get("sessionDate") or ""), str(b.get("bookedAt") or ""))
+    )
+    view = {
+        "counts": section.get("counts") or {},
+        "upcoming": upcoming,
+    }
+    for key in ("earnings", "rating", "latestReviews"):
+        if key in section:
+            view[key] = section[key]
+    return view
+
+def _to_view(user_id: str, doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "userId": user_id,
+        "student": _section_view(doc.get("student") or {}),
+        "mentor": _section_view(doc.get("mentor") or {}) if doc.get("mentor") else None,
+        "messages": {
+            "unread": max((doc.get("messages") or {}).get("unread", 0), 0),
+            "last": (doc.get("messages") or {}).get("last"),
+        },
+        "updatedAt": doc.get("updatedAt"),
+    }
+
+def get_dashboard(user_id: str) -> Dict[str, Any]:
+    """Dashboard for a user - one document read (built on first access)"""
+    try:
+        snapshot = _dashboard_ref(user_id).get()
+        if snapshot.exists:
+            return _to_view(user_id, snapshot.to_dict())
+        return _to_view(user_id, rebuild_dashboard(user_id))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch dashboard: {str(e)}")
+
+def rebuild_dashboard(user_id: str) -> Dict[str, Any]:
+    """Recompute a dashboard from source collections (first access or drift repair)"""
+    doc: Dict[str, Any] = {"userId": user_id}
+
+    # Same roles as _booking_roles: a parent's bookings count in their student section
+    bookings = db.collection("bookings")
+    for role, fields in (("student", ("studentId", "parentId")), ("mentor", ("mentorId",))):
+        docs = list({doc.id: doc for field in fields for doc in bookings.where(field, "==", user_id).stream()}.values())
+        if role == "mentor" and not docs:
+            continue
+        counts: Dict[str, int] = {"total": len(docs)}
+        upcoming, earnings = {}, 0.0
+        for booking_doc in docs:
+            booking = {**booking_doc.to_dict(), "bookingId": booking_doc.id}
+            status = _value(booking.get("bookingStatus")) or "pending"
+            counts[status] = counts.get(status, 0) + 1
+            if status in ACTIVE_BOOKING_STATUSES:
+                upcoming[booking_doc.id] = _booking_summary(booking)
+            if _value(booking.get("paymentStatus")) in PAID_STATUSES:
+                earnings += _booking_amount(booking)
+        doc[role] = {"counts": counts, "upcoming": upcoming}
+        if role == "mentor":
+            doc[role]["earnings"] = {"total": earnings}
+
+    if "mentor" in doc:
+        reviews = [r.to_dict() for r in db.collection("reviews").where("mentorId", "==", user_id).stream()]
+        reviews.sort(key=lambda r: r.get("createdAt") or "", reverse=True)
+        total = len(reviews)
+        doc["mentor"]["rating"] = {
+            "avg": round(sum(r.get("rating", 0) for r in reviews) / total, 2) if total else 0,
+            "total": total,
+        }
+        doc["mentor"]["latestReviews"] = [
+            {key: r.get(key) for key in ("reviewId", "classId", "rating", "review", "createdAt")}
+            for r in reviews[:LATEST_REVIEWS_LIMIT]
+        ]
+
+    doc["updatedAt"] = datetime.now().isoformat()
+    # Replace only the recomputed sections - message counters cannot be rebuilt from source data
+    _dashboard_ref(user_id).set(doc, merge=list(doc.keys()))
+    return doc
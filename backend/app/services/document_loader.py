@@ -0,0 +1,182 @@
+"""
+Request-scoped document loader (identity map + batching).
+
+One request often reads the same documents more than once, from different
+services (a booking reads the student and the class, the class page reads
+the mentor and then the mentor's user record, testimonials read a class,
+a mentor and a booking per row). Inside a loader scope:
+
+- `get_document(collection, id)` returns the snapshot already read in this
+  scope, if there is one (identity map);
+- `prime_documents(collection, *ids)` queues ids without reading them, and
+  the next read in the scope fetches everything queued in one `get_all`
+  (the "tick" ends when someone needs a document);
+- `get_documents(collection, ids)` reads a list in one `get_all`, in input
+  order, with repeated ids read once.
+
+DocumentLoaderMiddleware opens a scope per HTTP request; sync endpoints run
+with a copy of the request context, so every service sees the same loader.
+Background work opens its own scope with `loader_scope()` (the email worker
+uses one per batch). Outside a scope the helpers fall back to plain reads.
+
+Snapshots are shared within the scope - callers use `to_dict()`, which
+returns a copy. Writes made through `db` inside a scope should be followed
+by `forget_document` so later reads in the same request see them.
+"""
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.services.firestore import db
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[str, str]
+
+
+class _Batch:
+    """One get_all in progress; other threads needing its documents wait for it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+
+
+class DocumentLoader:
+    """Identity map of (collection, id) -> snapshot with queued batch reads"""
+
+    def __init__(self):
+        self.snapshots: Dict[Key, object] = {}
+        self.batches = 0  # get_all calls issued
+        self.hits = 0     # reads answered from the identity map
+        self._pending: Dict[Key, None] = {}  # Insertion-ordered set
+        self._in_flight: Dict[Key, _Batch] = {}
+        self._lock = threading.Lock()  # Guards the fields above; never held during a read
+
+    def prime(self, collection: str, ids: Iterable[str]) -> None:
+        with self._lock:
+            self._queue(collection, ids)
+
+    def load_many(self, collection: str, ids: Iterable[str]) -> List:
+        ids = list(ids)
+        with self._lock:
+            self.hits += sum(1 for doc_id in set(ids) if (collection, doc_id) in self.snapshots)
+            self._queue(collection, ids)
+            keys, self._pending = list(self._pending), {}
+            batch = _Batch() if keys else None
+            for key in keys:
+                self._in_flight[key] = batch
+            # Documents another thread is already reading
+            waiting = {self._in_flight[(collection, doc_id)] for doc_id in ids
+                       if (collection, doc_id) in self._in_flight} - {batch}
+        if batch is not None:
+            self._read(keys, batch)
+        for other in waiting:
+            other.done.wait()
+            if other.error is not None:
+                raise other.error
+        with self._lock:
+            return [self.snapshots.get((collection, doc_id)) for doc_id in ids]
+
+    def load(self, collection: str, doc_id: str):
+        return self.load_many(collection, [doc_id])[0]
+
+    def forget(self, collection: str, doc_id: str) -> None:
+        with self._lock:
+            self.snapshots.pop((collection, doc_id), None)
+
+    def _queue(self, collection: str, ids: Iterable[str]) -> None:
+        for doc_id in ids:
+            key = (collection, doc_id)
+            if doc_id and key not in self.snapshots and key not in self._in_flight:
+                self._pending[key] = None
+
+    def _read(self, keys: List[Key], batch: _Batch) -> None:
+        """Read `keys` in one get_all without holding the lock, then publish the snapshots"""
+        refs = {}
+        for collection, doc_id in keys:
+            ref = db.collection(collection).document(doc_id)
+            refs[ref.path] = (ref, (collection, doc_id))
+        try:
+            snapshots = list(db.get_all([ref for ref, _ in refs.values()]))
+        except BaseException as e:
+            batch.error = e
+            raise
+        finally:
+            with self._lock:
+                if batch.error is None:
+                    self.batches += 1
+                    for snapshot in snapshots:
+                        self.snapshots[refs[snapshot.reference.path][1]] = snapshot
+                for key in keys:
+                    self._in_flight.pop(key, None)
+            batch.done.set()
+        logger.debug("Loaded %s documents in one get_all", len(keys))
+
+
+_current_loader: ContextVar[Optional[DocumentLoader]] = ContextVar("document_loader", default=None)
+
+
+def current_loader() -> Optional[DocumentLoader]:
+    return _current_loader.get()
+
+
+@contextmanager
+def loader_scope():
+    """Use the active loader, or open one for the duration of the block"""
+    loader = _current_loader.get()
+    if loader is not None:
+        yield loader
+        return
+    loader = DocumentLoader()
+    token = _current_loader.set(loader)
+    try:
+        yield loader
+    finally:
+        _current_loader.reset(token)
+
+
+def get_document(collection: str, doc_id: str):
+    """Snapshot of collection/doc_id, read at most once per scope"""
+    loader = _current_loader.get()
+    if loader is None:
+        return db.collection(collection).document(doc_id).get()
+    return loader.load(collection, doc_id)
+
+
+def get_documents(collection: str, ids: Iterable[str]) -> List:
+    """Snapshots for ids in input order, in one get_all (None for empty ids)"""
+    with loader_scope() as loader:
+        return loader.load_many(collection, ids)
+
+
+def prime_documents(collection: str, *ids: str) -> None:
+    """Queue ids for the next batched read in this scope (no-op outside a scope)"""
+    loader = _current_loader.get()
+    if loader is not None:
+        loader.prime(collection, ids)
+
+
+def forget_document(collection: str, doc_id: str) -> None:
+    loader = _current_loader.get()
+    if loader is not None:
+        loader.forget(collection, doc_id)
+
+
+class DocumentLoaderMiddleware:
+    """Opens a DocumentLoader scope for each HTTP request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _current_loader.set(DocumentLoader())
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_loader.reset(token)
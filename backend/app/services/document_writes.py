@@ -0,0 +1,91 @@
+"""
+Single-document updates for the *_flexible endpoints.
+
+Each PUT used to read the document to check it existed, update it, and read
+it again to build the response - three serial round trips. `update_document`
+reads the document once (not at all if this request's DocumentLoader already
+holds it), writes the patch, and builds the response by applying the patch
+to the document it read.
+
+- Plain patches are written with update(), whose built-in exists
+  precondition turns a missing document into a 404.
+- Patches derived from the current document (`prepare` - a denormalised
+  mentorName, searchMetadata, a status transition with side effects) are
+  written only if the document is unchanged since it was read. If it
+  changed, the update is redone in a transaction that re-reads the document
+  and prepares the patch again.
+
+Firestore's commit does not return the document, so the one read is what an
+endpoint that echoes the whole record cannot avoid.
+"""
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from google.api_core.exceptions import FailedPrecondition, NotFound
+from google.cloud import firestore
+
+from app.services.document_loader import forget_document, get_document
+from app.services.firestore import db
+
+logger = logging.getLogger(__name__)
+
+Prepare = Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]]
+
+
+def apply_field_updates(data: Dict, update_data: Dict) -> Dict:
+    """Copy of `data` with Firestore-style updates applied ("pricing.perSessionRate" sets a nested field)"""
+    merged = dict(data)
+    for key, value in update_data.items():
+        parts = key.split(".")
+        target = merged
+        for part in parts[:-1]:
+            child = target.get(part)
+            target[part] = dict(child) if isinstance(child, dict) else {}
+            target = target[part]
+        target[parts[-1]] = value
+    return merged
+
+
+@firestore.transactional
+def _update_in_transaction(transaction, ref, changes: Dict[str, Any], prepare: Prepare,
+                           not_found: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    snapshot = ref.get(transaction=transaction)
+    if not snapshot.exists:
+        raise HTTPException(status_code=404, detail=not_found)
+    before = snapshot.to_dict()
+    patch = prepare(before, dict(changes))
+    transaction.update(ref, patch)
+    return before, patch
+
+
+def update_document(collection: str, doc_id: str, changes: Dict[str, Any], prepare: Optional[Prepare] = None,
+                    not_found: str = "Document not found") -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Apply `changes` to an existing document and return (before, after) as dicts.
+
+    `prepare(current, changes)` returns the patch to write when it depends on
+    the current document; it may run twice if the document changes under it.
+    """
+    ref = db.collection(collection).document(doc_id)
+    snapshot = get_document(collection, doc_id)
+    if not snapshot.exists:
+        raise HTTPException(status_code=404, detail=not_found)
+    before = snapshot.to_dict()
+
+    try:
+        if prepare is None:
+            patch = changes
+            ref.update(patch)
+        else:
+            patch = prepare(before, dict(changes))
+            ref.update(patch, option=db.write_option(last_update_time=snapshot.update_time))
+    except NotFound:
+        raise HTTPException(status_code=404, detail=not_found)
+    except FailedPrecondition:
+        logger.info("%s/%s changed since it was read; redoing the update in a transaction", collection, doc_id)
+        before, patch = _update_in_transaction(db.transaction(), ref, changes, prepare, not_found)
+    finally:
+        forget_document(collection, doc_id)
+
+    return before, apply_field_updates(before, patch)
@@ -0,0 +1,437 @@
+"""
+Outbound email queue.
+
+API handlers enqueue email jobs and return immediately. A small pool of worker
+threads drains the queue, renders deferred jobs, and delivers through a shared
+pooled HTTP client with retry/backoff and Resend's batch endpoint.
+
+Two queue backends are available:
+- InMemoryEmailQueue: in-process, lost on restart (tests / local dev)
+- SQLiteEmailQueue: durable on local disk (EMAIL_QUEUE_PATH, under DATA_DIR by
+  default), survives restarts
+
+The dispatcher creates its backend on first use (worker start or the first
+enqueue), so importing the module touches no files.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import nullcontext
+from typing import Any, Callable, ContextManager, Dict, List, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+EMAIL_QUEUE_BACKEND = os.getenv("EMAIL_QUEUE_BACKEND", "sqlite")
+EMAIL_QUEUE_PATH = os.getenv("EMAIL_QUEUE_PATH", os.path.join(settings.DATA_DIR, "email_queue.db"))
+EMAIL_WORKERS = int(os.getenv("EMAIL_WORKERS", 2))
+
+MAX_ATTEMPTS = 5
+BATCH_SIZE = 50  # Resend accepts up to 100 emails per batch call
+BACKOFF_BASE_SECONDS = 2.0
+BACKOFF_MAX_SECONDS = 300.0
+POLL_INTERVAL_SECONDS = 1.0
+
+# Job statuses
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+FAILED = "failed"
+
+RAW_JOB = "raw"  # Job payload is already a complete Resend message
+
+# ---------- Queue Backends ----------
+
+class EmailQueueBackend:
+    """Storage for email jobs. Jobs are plain dicts: id, kind, payload, attempts."""
+
+    def put(self, job: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def claim(self, limit: int) -> List[Dict[str, Any]]:
+        """Atomically take up to `limit` due jobs and mark them as sending"""
+        raise NotImplementedError
+
+    def complete(self, job_ids: List[str]) -> None:
+        raise NotImplementedError
+
+    def retry(self, job: Dict[str, Any], delay: float, error: str) -> None:
+        raise NotImplementedError
+
+    def fail(self, job: Dict[str, Any], error: str) -> None:
+        raise NotImplementedError
+
+    def pending_count(self) -> int:
+        """Jobs not yet sent or permanently failed (pending + in flight)"""
+        raise NotImplementedError
+
+    def due_count(self) -> int:
+        """Jobs that could be worked on now: in flight, or pending and not backing off"""
+        raise NotImplementedError
+
+
+class InMemoryEmailQueue(EmailQueueBackend):
+    """Process-local queue - jobs are lost if the process exits"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+
+    def put(self, job: Dict[str, Any]) -> None:
+        with self._lock:
+            self._jobs[job["id"]] = {**job, "status": PENDING, "availableAt": time.time()}
+
+    def claim(self, limit: int) -> List[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            due = [j for j in self._jobs.values() if j["status"] == PENDING and j["availableAt"] <= now]
+            due.sort(key=lambda j: j["availableAt"])
+            claimed = due[:limit]
+            for job in claimed:
+                job["status"] = SENDING
+            return [dict(job) for job in claimed]
+
+    def complete(self, job_ids: List[str]) -> None:
+        with self._lock:
+            for job_id in job_ids:
+                self._jobs.pop(job_id, None)
+
+    def retry(self, job: Dict[str, Any], delay: float, error: str) -> None:
+        with self._lock:
+            stored = self._jobs.get(job["id"])
+            if stored:
+                stored.update(status=PENDING, attempts=job["attempts"],
+                              availableAt=time.time() + delay, lastError=error)
+
+    def fail(self, job: Dict[str, Any], error: str) -> None:
+        with self._lock:
+            stored = self._jobs.get(job["id"])
+            if stored:
+                stored.update(status=FAILED, attempts=job["attempts"], lastError=error)
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return sum(1 for j in self._jobs.values() if j["status"] in (PENDING, SENDING))
+
+    def due_count(self) -> int:
+        now = time.time()
+        with self._lock:
+            return sum(1 for j in self._jobs.values()
+                       if j["status"] == SENDING or (j["status"] == PENDING and j["availableAt"] <= now))
+
+
+class SQLiteEmailQueue(EmailQueueBackend):
+    """Durable queue stored in a local SQLite file"""
+
+    def __init__(self, path: str = EMAIL_QUEUE_PATH):
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS email_jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                available_at REAL NOT NULL,
+                last_error TEXT,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_email_jobs_due ON email_jobs (status, available_at)"
+        )
+        # Jobs left "sending" by a crashed process are picked up again
+        self._conn.execute("UPDATE email_jobs SET status = ? WHERE status = ?", (PENDING, SENDING))
+
+    def put(self, job: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO email_jobs (id, kind, payload, status, attempts, available_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job["id"], job["kind"], json.dumps(job["payload"], default=str), PENDING,
+                 job.get("attempts", 0), now, now)
+            )
+
+    def claim(self, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, kind, payload, attempts FROM email_jobs "
+                    "WHERE status = ? AND available_at <= ? ORDER BY available_at LIMIT ?",
+                    (PENDING, time.time(), limit)
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE email_jobs SET status = ? WHERE id = ?",
+                    [(SENDING, row[0]) for row in rows]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [
+            {"id": row[0], "kind": row[1], "payload": json.loads(row[2]), "attempts": row[3]}
+            for row in rows
+        ]
+
+    def complete(self, job_ids: List[str]) -> None:
+        with self._lock:
+            self._conn.executemany("DELETE FROM email_jobs WHERE id = ?", [(job_id,) for job_id in job_ids])
+
+    def retry(self, job: Dict[str, Any], delay: float, error: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE email_jobs SET status = ?, attempts = ?, available_at = ?, last_error = ? WHERE id = ?",
+                (PENDING, job["attempts"], time.time() + delay, error, job["id"])
+            )
+
+    def fail(self, job: Dict[str, Any], error: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE email_jobs SET status = ?, attempts = ?, last_error = ? WHERE id = ?",
+                (FAILED, job["attempts"], error, job["id"])
+            )
+
+    def pending_count(self) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM email_jobs WHERE status IN (?, ?)", (PENDING, SENDING)
+            ).fetchone()
+        return row[0]
+
+    def due_count(self) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM email_jobs WHERE status = ? OR (status = ? AND available_at <= ?)",
+                (SENDING, PENDING, time.time())
+            ).fetchone()
+        return row[0]
+
+
+def create_queue_backend(kind: str = EMAIL_QUEUE_BACKEND) -> EmailQueueBackend:
+    """Build the queue backend selected by EMAIL_QUEUE_BACKEND"""
+    if kind == "memory":
+        return InMemoryEmailQueue()
+    if kind == "sqlite":
+        return SQLiteEmailQueue(EMAIL_QUEUE_PATH)
+    raise ValueError(f"Unknown email queue backend: {kind}")
+
+# ---------- Dispatcher ----------
+
+class DeliveryError(Exception):
+    """Raised by a sender when delivery fails. `retryable` marks transient errors."""
+
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class EmailDispatcher:
+    """
+    Drains an EmailQueueBackend with a pool of worker threads.
+
+    `sender` must provide deliver(messages) which sends one or more messages in a
+    single call and raises DeliveryError on failure. `backend` defaults to
+    `backend_factory()`, called on first use.
+    Deferred jobs are turned into messages by builders registered per job kind,
+    so expensive lookups and rendering happen on the workers, not in the request.
+    Each batch is built inside `batch_scope()`, after every job's `prefetch`
+    hook has named the documents its builder will read, so a batch's lookups
+    can be served by one batched read.
+    """
+
+    def __init__(self, sender, backend: Optional[EmailQueueBackend] = None, workers: int = EMAIL_WORKERS,
+                 batch_size: int = BATCH_SIZE, max_attempts: int = MAX_ATTEMPTS,
+                 backoff_base: float = BACKOFF_BASE_SECONDS, poll_interval: float = POLL_INTERVAL_SECONDS,
+                 batch_scope: Callable[[], ContextManager] = nullcontext,
+                 backend_factory: Callable[[], EmailQueueBackend] = create_queue_backend):
+        self.sender = sender
+        self._backend = backend
+        self._backend_factory = backend_factory
+        self._backend_lock = threading.Lock()
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.poll_interval = poll_interval
+        self.batch_scope = batch_scope
+        self._builders: Dict[str, Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]] = {}
+        self._prefetchers: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+        self._threads: List[threading.Thread] = []
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+
+    @property
+    def backend(self) -> EmailQueueBackend:
+        if self._backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    self._backend = self._backend_factory()
+        return self._backend
+
+    def register_builder(self, kind: str, builder: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]],
+                         prefetch: Optional[Callable[[Dict[str, Any]], Any]] = None) -> None:
+        """
+        Register a function turning a job payload into a message (or None to drop it).
+
+        `prefetch(payload)` runs for every job in a batch before any builder does.
+        """
+        self._builders[kind] = builder
+        if prefetch is not None:
+            self._prefetchers[kind] = prefetch
+
+    def enqueue(self, kind: str, payload: Dict[str, Any]) -> str:
+        """Queue a job and return its id without waiting for delivery"""
+        job_id = f"email_{uuid.uuid4().hex[:16]}"
+        self.backend.put({"id": job_id, "kind": kind, "payload": payload, "attempts": 0})
+        self.start()
+        self._wakeup.set()
+        return job_id
+
+    def enqueue_message(self, message: Dict[str, Any]) -> str:
+        return self.enqueue(RAW_JOB, message)
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._threads:
+                return
+            self.backend  # Open the queue before any worker polls it
+            self._stopping.clear()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"email-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def wait_until_idle(self, timeout: float = 10.0, due_only: bool = True) -> bool:
+        """
+        Block until nothing due is pending or in flight (used by tests and shutdown).
+
+        Jobs backing off after a failure are left for the next start unless
+        `due_only` is False.
+        """
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            with self._in_flight_lock:
+                in_flight = self._in_flight
+            remaining = self.backend.due_count() if due_only else self.backend.pending_count()
+            if in_flight == 0 and remaining == 0:
+                return True
+            time.sleep(0.01)
+        return False
+
+    # ----- worker internals -----
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            with self._in_flight_lock:
+                jobs = self.backend.claim(self.batch_size)
+                self._in_flight += len(jobs)
+            if not jobs:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            try:
+                self._process(jobs)
+            except Exception as e:
+                logger.error("Email worker crashed on batch: %s", e)
+                for job in jobs:
+                    self._reschedule(job, str(e))
+            finally:
+                with self._in_flight_lock:
+                    self._in_flight -= len(jobs)
+
+    def _process(self, jobs: List[Dict[str, Any]]) -> None:
+        ready_jobs, messages = [], []
+        with self.batch_scope():
+            for job in jobs:
+                prefetch = self._prefetchers.get(job["kind"])
+                if prefetch is not None:
+                    try:
+                        prefetch(job["payload"])
+                    except Exception as e:
+                        logger.debug("Prefetch failed for email job %s: %s", job["id"], e)
+            for job in jobs:
+                try:
+                    message = self._build(job)
+                except DeliveryError as e:
+                    # e.g. no builder for this kind - retrying cannot help
+                    self._handle_failure(job, e)
+                    continue
+                except Exception as e:
+                    self._reschedule(job, f"build failed: {e}")
+                    continue
+                if message is None:
+                    self.backend.complete([job["id"]])
+                    continue
+                ready_jobs.append(job)
+                messages.append(message)
+
+        if not messages:
+            return
+
+        try:
+            self.sender.deliver(messages)
+            self.backend.complete([job["id"] for job in ready_jobs])
+        except DeliveryError as e:
+            if not e.retryable and len(messages) > 1:
+                # One bad message rejects the whole batch - fall back to single sends
+                for job, message in zip(ready_jobs, messages):
+                    self._deliver_single(job, message)
+                return
+            for job in ready_jobs:
+                self._handle_failure(job, e)
+
+    def _deliver_single(self, job: Dict[str, Any], message: Dict[str, Any]) -> None:
+        try:
+            self.sender.deliver([message])
+            self.backend.complete([job["id"]])
+        except DeliveryError as e:
+            self._handle_failure(job, e)
+
+    def _build(self, job: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if job["kind"] == RAW_JOB:
+            return job["payload"]
+        builder = self._builders.get(job["kind"])
+        if builder is None:
+            raise DeliveryError(f"No email builder registered for '{job['kind']}'", retryable=False)
+        return builder(job["payload"])
+
+    def _handle_failure(self, job: Dict[str, Any], error: DeliveryError) -> None:
+        if error.retryable:
+            self._reschedule(job, str(error))
+        else:
+            job["attempts"] += 1
+            logger.error("Email job %s failed permanently: %s", job["id"], error)
+            self.backend.fail(job, str(error))
+
+    def _reschedule(self, job: Dict[str, Any], error: str) -> None:
+        job["attempts"] += 1
+        if job["attempts"] >= self.max_attempts:
+            logger.error("Email job %s gave up after %s attempts: %s", job["id"], job["attempts"], error)
+            self.backend.fail(job, error)
+            return
+        delay = min(self.backoff_base * (2 ** (job["attempts"] - 1)), BACKOFF_MAX_SECONDS)
+        logger.warning("Email job %s failed (attempt %s), retrying in %.1fs: %s",
+                       job["id"], job["attempts"], delay, error)
+        self.backend.retry(job, delay, error)
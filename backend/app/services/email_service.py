@@ -1,318 +1,114 @@
 """
 Email service using Resend API
 Perfect integration with Next.js and React Email templates
+
+Emails are queued and delivered by background workers (see email_queue) so
+request handlers never wait on Resend or on the lookups needed to render.
 """
-import requests
+import httpx
+import logging
 import uuid
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 import os
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Callable, List, Tuple
 from app.services.firestore import db
+from app.services.email_queue import EmailDispatcher, DeliveryError
+from app.services.document_loader import get_document, loader_scope, prime_documents
+from app.services.email_templates import EmailTemplates, FRONTEND_URL
+
+logger = logging.getLogger(__name__)
 
 # Resend Configuration
 RESEND_API_KEY = os.getenv("RESEND_API_KEY", "")
+RESEND_API_URL = os.getenv("RESEND_API_URL", "https://api.resend.com")
 FROM_EMAIL = os.getenv("FROM_EMAIL", "noreply@rootsnwings.com") 
-FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
 BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
 
 class ResendEmailService:
     """
     Email service using Resend API
+
+    Holds one pooled HTTP client shared by all email workers.
     """
     
-    def __init__(self):
-        self.api_key = RESEND_API_KEY
-        self.base_url = "https://api.resend.com"
+    def __init__(self, api_key: str = None, base_url: str = None):
+        self.api_key = RESEND_API_KEY if api_key is None else api_key
+        self.base_url = (base_url or RESEND_API_URL).rstrip("/")
         self.enabled = bool(self.api_key)
+        self._client: Optional[httpx.Client] = None
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            self._client = httpx.Client(
+                base_url=self.base_url,
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json"
+                },
+                timeout=httpx.Timeout(10.0, connect=5.0),
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=10)
+            )
+        return self._client
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    @staticmethod
+    def build_message(to: str | List[str], subject: str, html: str,
+                      from_email: str = None, reply_to: str = None) -> Dict[str, Any]:
+        """Build a Resend email payload"""
+        email_data = {
+            "from": from_email or FROM_EMAIL,
+            "to": to if isinstance(to, list) else [to],
+            "subject": subject,
+            "html": html
+        }
+        if reply_to:
+            email_data["reply_to"] = reply_to
+        return email_data
+
+    def deliver(self, messages: List[Dict[str, Any]]) -> None:
+        """
+        Send one or more messages in a single API call (batch endpoint for >1).
+        Raises DeliveryError; rate limits, 5xx and network errors are retryable.
+        """
+        if not self.enabled:
+            for message in messages:
+                logger.info("Resend not configured - Email would be sent: %s to %s",
+                            message.get("subject"), message.get("to"))
+            return
+
+        try:
+            if len(messages) == 1:
+                response = self.client.post("/emails", json=messages[0])
+            else:
+                response = self.client.post("/emails/batch", json=messages)
+        except httpx.HTTPError as e:
+            raise DeliveryError(f"Resend request failed: {str(e)}", retryable=True)
+
+        if response.status_code in (200, 201, 202):
+            logger.info("Sent %s email(s) via Resend", len(messages))
+            return
+
+        retryable = response.status_code == 429 or response.status_code >= 500
+        raise DeliveryError(f"Resend returned {response.status_code} - {response.text}", retryable=retryable)
         
     def send_email(self, to: str | List[str], subject: str, html: str, 
                    from_email: str = None, reply_to: str = None) -> bool:
-        """Send email using Resend API"""
+        """Queue an email for delivery. Returns once the job is stored."""
         try:
-            if not self.enabled:
-                print(f"Resend not configured - Email would be sent: {subject} to {to}")
-                return True
-            
-            # Prepare email data
-            email_data = {
-                "from": from_email or FROM_EMAIL,
-                "to": to if isinstance(to, list) else [to],
-                "subject": subject,
-                "html": html
-            }
-            
-            if reply_to:
-                email_data["reply_to"] = reply_to
-            
-            # Send via Resend API
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.post(
-                f"{self.base_url}/emails",
-                json=email_data,
-                headers=headers
+            email_dispatcher.enqueue_message(
+                self.build_message(to, subject, html, from_email, reply_to)
             )
-            
-            if response.status_code == 200:
-                result = response.json()
-                print(f"Email sent successfully to {to}, ID: {result.get('id', 'unknown')}")
-                return True
-            else:
-                print(f"Failed to send email: {response.status_code} - {response.text}")
-                return False
-                
+            return True
         except Exception as e:
-            print(f"Error sending email: {str(e)}")
+            logger.error(f"Error queueing email: {str(e)}")
             return False
 
-# Email Templates (Simple HTML for now - can be replaced with React Email)
-class EmailTemplates:
-    """
-    Email templates - these will be replaced with React Email components in frontend
-    """
-    
-    @staticmethod
-    def base_template(title: str, content: str, cta_text: str = None, cta_link: str = None) -> str:
-        """Base email template with Roots & Wings branding"""
-        cta_html = ""
-        if cta_text and cta_link:
-            cta_html = f"""
-            <div style="text-align: center; margin: 30px 0;">
-                <a href="{cta_link}" 
-                   style="background-color: #00A2E8; color: white; padding: 15px 30px; 
-                          text-decoration: none; border-radius: 8px; font-weight: bold; 
-                          display: inline-block; font-size: 16px;">
-                    {cta_text}
-                </a>
-            </div>
-            """
-        
-        return f"""
-        <!DOCTYPE html>
-        <html lang="en">
-        <head>
-            <meta charset="utf-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>{title}</title>
-        </head>
-        <body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; 
-                     line-height: 1.6; color: #333; max-width: 600px; margin: 0 auto; 
-                     padding: 20px; background-color: #f8fbff;">
-            
-            <!-- Main Container -->
-            <div style="background-color: white; border-radius: 12px; padding: 40px; box-shadow: 0 4px 6px rgba(0,0,0,0.1);">
-                
-                <!-- Header -->
-                <div style="text-align: center; border-bottom: 3px solid #00A2E8; padding-bottom: 20px; margin-bottom: 30px;">
-                    <h1 style="color: #00468C; margin: 0; font-size: 28px; font-weight: bold;">Roots & Wings</h1>
-                    <p style="color: #666; margin: 5px 0 0 0; font-size: 14px;">Educational Mentorship Platform</p>
-                </div>
-                
-                <!-- Content -->
-                <div style="margin-bottom: 30px;">
-                    {content}
-                </div>
-                
-                <!-- CTA Button -->
-                {cta_html}
-                
-                <!-- Footer -->
-                <div style="border-top: 1px solid #eee; padding-top: 20px; margin-top: 40px; 
-                            text-align: center; font-size: 12px; color: #666;">
-                    <p style="margin: 5px 0;">© 2025 Roots & Wings. All rights reserved.</p>
-                    <p style="margin: 5px 0;">
-                        <a href="{FRONTEND_URL}/unsubscribe" style="color: #00A2E8; text-decoration: none;">Unsubscribe</a> | 
-                        <a href="mailto:support@rootsnwings.com" style="color: #00A2E8; text-decoration: none;">Support</a>
-                    </p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-    
-    @staticmethod
-    def welcome_email(user_name: str, user_type: str = "student") -> str:
-        """Welcome email after successful registration"""
-        content = f"""
-        <h2 style="color: #00468C; margin-bottom: 20px;">Welcome to Roots & Wings, {user_name}! 🎉</h2>
-        <p style="font-size: 16px; margin-bottom: 15px;">
-            Thank you for joining our educational mentorship platform. We're excited to help you on your learning journey!
-        </p>
-        <p style="margin-bottom: 15px;">Here's what you can do next:</p>
-        <ul style="margin-bottom: 20px; padding-left: 20px;">
-            <li style="margin-bottom: 8px;">Complete your profile to get personalized recommendations</li>
-            <li style="margin-bottom: 8px;">Browse our amazing mentors and classes</li>
-            <li style="margin-bottom: 8px;">Book your first session</li>
-        </ul>
-        <p>If you have any questions, our support team is here to help!</p>
-        """
-        
-        dashboard_url = f"{FRONTEND_URL}/dashboard" if user_type == "student" else f"{FRONTEND_URL}/mentor/dashboard"
-        
-        return EmailTemplates.base_template(
-            title="Welcome to Roots & Wings!",
-            content=content,
-            cta_text="Get Started",
-            cta_link=dashboard_url
-        )
-    
-    @staticmethod
-    def email_verification(user_name: str, verification_link: str) -> str:
-        """Email verification template"""
-        content = f"""
-        <h2 style="color: #00468C; margin-bottom: 20px;">Verify Your Email Address</h2>
-        <p style="font-size: 16px; margin-bottom: 15px;">Hi {user_name},</p>
-        <p style="margin-bottom: 15px;">
-            To complete your Roots & Wings account setup, please verify your email address by clicking the button below.
-        </p>
-        <div style="background-color: #f8fbff; padding: 20px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #00A2E8;">
-            <p style="margin: 0; font-size: 14px; color: #666;">
-                ⏰ This verification link expires in 24 hours for security.
-            </p>
-        </div>
-        <p style="margin-bottom: 15px;">
-            If you didn't create this account, please ignore this email.
-        </p>
-        """
-        
-        return EmailTemplates.base_template(
-            title="Verify Your Email - Roots & Wings",
-            content=content,
-            cta_text="Verify Email Address",
-            cta_link=verification_link
-        )
-    
-    @staticmethod
-    def password_reset(user_name: str, reset_link: str) -> str:
-        """Password reset email template"""
-        content = f"""
-        <h2 style="color: #00468C; margin-bottom: 20px;">Reset Your Password</h2>
-        <p style="font-size: 16px; margin-bottom: 15px;">Hi {user_name},</p>
-        <p style="margin-bottom: 15px;">
-            We received a request to reset your password for your Roots & Wings account.
-        </p>
-        <p style="margin-bottom: 15px;">
-            Click the button below to create a new password:
-        </p>
-        <div style="background-color: #fff3cd; padding: 20px; border-radius: 8px; margin: 20px 0; border-left: 4px solid #ffc107;">
-            <p style="margin: 0; font-size: 14px; color: #856404;">
-                ⚠️ This reset link expires in 1 hour for security.
-            </p>
-        </div>
-        <p style="margin-bottom: 15px;">
-            <strong>If you didn't request this reset, please ignore this email.</strong> 
-            Your account remains secure and no changes have been made.
-        </p>
-        """
-        
-        return EmailTemplates.base_template(
-            title="Reset Your Password - Roots & Wings",
-            content=content,
-            cta_text="Reset Password",
-            cta_link=reset_link
-        )
-    
-    @staticmethod
-    def booking_confirmation(student_name: str, class_name: str, mentor_name: str, 
-                           booking_details: Dict[str, Any]) -> str:
-        """Booking confirmation email"""
-        # Format sessions
-        sessions_html = ""
-        if booking_details.get("scheduledSlots"):
-            sessions_html = """
-            <div style="margin: 20px 0;">
-                <h4 style="color: #00468C; margin-bottom: 10px;">📅 Scheduled Sessions:</h4>
-                <ul style="list-style: none; padding: 0;">
-            """
-            for i, slot in enumerate(booking_details["scheduledSlots"][:3]):
-                sessions_html += f"""
-                <li style="background-color: #f8fbff; padding: 10px; margin: 5px 0; border-radius: 6px; border-left: 3px solid #00A2E8;">
-                    <strong>Session {slot.get('sessionNumber', i+1)}:</strong> {slot['date']} at {slot['startTime']} - {slot['endTime']}
-                </li>
-                """
-            if len(booking_details["scheduledSlots"]) > 3:
-                remaining = len(booking_details["scheduledSlots"]) - 3
-                sessions_html += f"""
-                <li style="padding: 10px; color: #666; font-style: italic;">
-                    ... and {remaining} more session{'s' if remaining > 1 else ''}
-                </li>
-                """
-            sessions_html += "</ul></div>"
-        
-        content = f"""
-        <h2 style="color: #00468C; margin-bottom: 20px;">🎉 Booking Confirmed!</h2>
-        <p style="font-size: 16px; margin-bottom: 15px;">Hi {student_name},</p>
-        <p style="margin-bottom: 20px;">
-            Great news! Your booking has been confirmed. Here are your class details:
-        </p>
-        
-        <div style="background-color: #f8fbff; padding: 25px; border-radius: 10px; margin: 25px 0; border: 2px solid #e6f7ff;">
-            <h3 style="margin-top: 0; color: #00468C; margin-bottom: 15px;">📚 Class Details</h3>
-            <p style="margin: 8px 0;"><strong>Class:</strong> {class_name}</p>
-            <p style="margin: 8px 0;"><strong>Mentor:</strong> {mentor_name}</p>
-            <p style="margin: 8px 0;"><strong>Total Price:</strong> £{booking_details.get('pricing', {}).get('finalPrice', 0)}</p>
-            <p style="margin: 8px 0;"><strong>Payment Status:</strong> ✅ {booking_details.get('paymentStatus', 'Confirmed').title()}</p>
-            
-            {sessions_html}
-        </div>
-        
-        <p style="margin-bottom: 15px;">
-            📧 You'll receive reminder emails before each session.
-        </p>
-        <p style="margin-bottom: 15px;">
-            Need to reschedule or have questions? Contact your mentor or our support team.
-        </p>
-        <p style="font-size: 16px; color: #00468C; font-weight: bold;">
-            We're excited for your learning journey to begin! 🚀
-        </p>
-        """
-        
-        return EmailTemplates.base_template(
-            title="Booking Confirmed - Roots & Wings",
-            content=content,
-            cta_text="View My Bookings",
-            cta_link=f"{FRONTEND_URL}/dashboard/bookings"
-        )
-    
-    @staticmethod
-    def mentor_application_status(mentor_name: str, status: str) -> str:
-        """Mentor application status update"""
-        if status == "approved":
-            title = "🎉 Mentor Application Approved!"
-            emoji = "✅"
-            message = "Congratulations! Your mentor application has been approved. You can now start accepting students and hosting classes."
-            cta_text = "Start Teaching"
-            cta_link = f"{FRONTEND_URL}/mentor/dashboard"
-        elif status == "rejected":
-            title = "Mentor Application Update"
-            emoji = "❌"
-            message = "Thank you for your interest in becoming a mentor. Unfortunately, we cannot approve your application at this time. Please feel free to reapply in the future."
-            cta_text = "Contact Support"
-            cta_link = "mailto:support@rootsnwings.com"
-        else:
-            title = "Mentor Application Received"
-            emoji = "⏳"
-            message = "Thank you for your mentor application! We're currently reviewing your submission and will get back to you within 2-3 business days."
-            cta_text = "View Application"
-            cta_link = f"{FRONTEND_URL}/mentor/application-status"
-        
-        content = f"""
-        <h2 style="color: #00468C; margin-bottom: 20px;">{title}</h2>
-        <p style="font-size: 16px; margin-bottom: 15px;">Hi {mentor_name},</p>
-        <div style="text-align: center; font-size: 48px; margin: 20px 0;">{emoji}</div>
-        <p style="margin-bottom: 20px; font-size: 16px;">{message}</p>
-        """
-        
-        return EmailTemplates.base_template(
-            title=title,
-            content=content,
-            cta_text=cta_text,
-            cta_link=cta_link
-        )
-
 # Token Management for Email Verification
 def generate_verification_token(user_id: str, token_type: str = "email_verification", expires_hours: int = 24) -> str:
     """Generate and store verification token in Firestore"""
@@ -359,12 +155,14 @@ def verify_token(token: str) -> Optional[Dict[str, Any]]:
         return token_data
         
     except Exception as e:
-        print(f"Error verifying token: {str(e)}")
+        logger.warning("Error verifying token: %s", e)
         return None
 
 # Initialize services
 email_service = ResendEmailService()
 email_templates = EmailTemplates()
+# The queue backend (a SQLite file by default) is created when the workers start or on the first enqueue
+email_dispatcher = EmailDispatcher(email_service, batch_scope=loader_scope)
 
 # Email helper functions
 def send_welcome_email(user_email: str, user_name: str, user_type: str = "student") -> bool:
@@ -400,108 +198,147 @@ def send_password_reset_email(user_email: str, user_name: str, user_id: str) ->
         html=html_content
     )
 
+def _get_docs(*keys: Tuple[str, str]) -> List[Optional[Dict[str, Any]]]:
+    """Fetch several (collection, id) documents in one round trip, returned in the order requested"""
+    with loader_scope():
+        for collection, doc_id in keys:
+            prime_documents(collection, doc_id)
+        snapshots = [get_document(collection, doc_id) for collection, doc_id in keys]
+    return [snap.to_dict() if snap is not None and snap.exists else None for snap in snapshots]
+
+def _booking_docs(booking_data: Dict[str, Any]) -> List[Tuple[str, str]]:
+    return [("classes", booking_data["classId"]), ("mentors", booking_data["mentorId"]),
+            ("users", booking_data["studentId"])]
+
+def _mentor_docs(payload: Dict[str, Any]) -> List[Tuple[str, str]]:
+    return [("mentors", payload["mentorId"]), ("users", payload["mentorId"])]
+
+def _prefetch(keys: Callable[[Dict[str, Any]], List[Tuple[str, str]]]) -> Callable[[Dict[str, Any]], None]:
+    """Worker prefetch hook: queue a job's documents so the whole batch is read at once"""
+    def prefetch(payload: Dict[str, Any]) -> None:
+        for collection, doc_id in keys(payload):
+            prime_documents(collection, doc_id)
+    return prefetch
+
 def send_booking_confirmation_email(booking_data: Dict[str, Any]) -> bool:
-    """Send booking confirmation email"""
-    # Get class and mentor data from Firestore for email template
+    """Queue booking confirmation email. Class/mentor/student lookups run on the email worker."""
     try:
-        class_doc = db.collection('classes').document(booking_data["classId"]).get()
-        mentor_doc = db.collection('mentors').document(booking_data["mentorId"]).get()
-        user_doc = db.collection('users').document(booking_data["studentId"]).get()
-        
-        if not all([class_doc.exists, mentor_doc.exists, user_doc.exists]):
-            print("Missing class, mentor, or user data for booking confirmation")
-            return False
-            
-        class_data = class_doc.to_dict()
-        mentor_data = mentor_doc.to_dict()
-        user_data = user_doc.to_dict()
-        
-        # Build email template data
-        email_booking_data = {
-            **booking_data,
-            "className": class_data.get("title", "Class"),
-            "mentorName": mentor_data.get("displayName", "Mentor"),
-            "studentName": user_data.get("displayName", "Student"),
-            # Generate sessions from class schedule for email display
-            "scheduledSlots": generate_session_preview(class_data, booking_data)
-        }
-        
-        html_content = email_templates.booking_confirmation(
-            student_name=email_booking_data["studentName"],
-            class_name=email_booking_data["className"],
-            mentor_name=email_booking_data["mentorName"],
-            booking_details=email_booking_data
-        )
-        
-        user_email = user_data.get("email")
-        if user_email:
-            return email_service.send_email(
-                to=user_email,
-                subject=f"Booking Confirmed: {email_booking_data['className']} - Roots & Wings",
-                html=html_content
-            )
-                
+        email_dispatcher.enqueue("booking_confirmation", booking_data)
+        return True
     except Exception as e:
-        print(f"Error sending booking confirmation: {str(e)}")
+        logger.error(f"Error queueing booking confirmation: {str(e)}")
+        return False
+
+def build_booking_confirmation_message(booking_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Render a booking confirmation job into a Resend message (runs on the email worker)"""
+    class_data, mentor_data, user_data = _get_docs(*_booking_docs(booking_data))
+    
+    if not all([class_data, mentor_data, user_data]):
+        logger.warning("Missing class, mentor, or user data for booking confirmation")
+        return None
     
-    return False
+    user_email = user_data.get("email")
+    if not user_email:
+        return None
+    
+    # Build email template data
+    email_booking_data = {
+        **booking_data,
+        "className": class_data.get("title", "Class"),
+        "mentorName": mentor_data.get("displayName", "Mentor"),
+        "studentName": user_data.get("displayName", "Student"),
+        # Generate sessions from class schedule for email display
+        "scheduledSlots": generate_session_preview(class_data, booking_data)
+    }
+    
+    html_content = email_templates.booking_confirmation(
+        student_name=email_booking_data["studentName"],
+        class_name=email_booking_data["className"],
+        mentor_name=email_booking_data["mentorName"],
+        booking_details=email_booking_data
+    )
+    
+    return email_service.build_message(
+        to=user_email,
+        subject=f"Booking Confirmed: {email_booking_data['className']} - Roots & Wings",
+        html=html_content
+    )
 
 def generate_session_preview(class_data: Dict[str, Any], booking_data: Dict[str, Any]) -> List[Dict[str, Any]]:
     """Generate a preview of sessions for email (first 3 sessions)"""
     try:
-        from datetime import datetime, timedelta
-        
         schedule = class_data.get("schedule", {})
         weekly_schedule = schedule.get("weeklySchedule", [])
         
         if not weekly_schedule:
             return []
         
-        # Simple preview generation - first 3 sessions
-        preview_sessions = []
-        current_date = datetime.now()
-        session_number = 1
-        
-        for week in range(3):  # Show first 3 weeks
-            for day_schedule in weekly_schedule:
-                if len(preview_sessions) >= 3:
-                    break
-                    
-                session_date = current_date + timedelta(days=week*7 + day_schedule.get("dayOfWeek", 0))
-                preview_sessions.append({
-                    "sessionNumber": session_number,
-                    "date": session_date.strftime("%Y-%m-%d"),
-                    "startTime": day_schedule.get("startTime", "18:00"),
-                    "endTime": day_schedule.get("endTime", "19:00")
-                })
-                session_number += 1
-                
-        return preview_sessions
+        schedule_key = tuple(
+            (day.get("dayOfWeek", 0), day.get("startTime", "18:00"), day.get("endTime", "19:00"))
+            for day in weekly_schedule
+        )
+        return [dict(session) for session in _session_preview(schedule_key, date.today())]
         
     except Exception:
         return []
 
+@lru_cache(maxsize=1024)
+def _session_preview(schedule_key: tuple, today: date) -> tuple:
+    """Preview for one weekly schedule, computed once per schedule per day"""
+    preview_sessions = []
+    session_number = 1
+    
+    for week in range(3):  # Show first 3 weeks
+        for day_of_week, start_time, end_time in schedule_key:
+            if len(preview_sessions) >= 3:
+                break
+                
+            session_date = today + timedelta(days=week*7 + day_of_week)
+            preview_sessions.append({
+                "sessionNumber": session_number,
+                "date": session_date.strftime("%Y-%m-%d"),
+                "startTime": start_time,
+                "endTime": end_time
+            })
+            session_number += 1
+            
+    return tuple(preview_sessions)
+
 def send_mentor_status_email(mentor_id: str, status: str) -> bool:
-    """Send mentor application status update"""
+    """Queue mentor application status update. Lookups run on the email worker."""
     try:
-        # Get mentor and user data
-        mentor_doc = db.collection('mentors').document(mentor_id).get()
-        user_doc = db.collection('users').document(mentor_id).get()
-        
-        if mentor_doc.exists and user_doc.exists:
-            mentor_name = mentor_doc.to_dict().get("displayName", "Mentor")
-            user_email = user_doc.to_dict().get("email")
-            
-            if user_email:
-                html_content = email_templates.mentor_application_status(mentor_name, status)
-                subject = f"Mentor Application {status.title()} - Roots & Wings"
-                
-                return email_service.send_email(
-                    to=user_email,
-                    subject=subject,
-                    html=html_content
-                )
+        email_dispatcher.enqueue("mentor_status", {"mentorId": mentor_id, "status": status})
+        return True
     except Exception as e:
-        print(f"Error sending mentor status email: {str(e)}")
+        logger.error(f"Error queueing mentor status email: {str(e)}")
+        return False
+
+def build_mentor_status_message(payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Render a mentor status job into a Resend message (runs on the email worker)"""
+    mentor_id, status = payload["mentorId"], payload["status"]
+    mentor_data, user_data = _get_docs(*_mentor_docs(payload))
     
-    return False
\ No newline at end of file
+    if not mentor_data or not user_data or not user_data.get("email"):
+        logger.warning(f"Missing mentor or user data for mentor status email: {mentor_id}")
+        return None
+    
+    html_content = email_templates.mentor_application_status(mentor_data.get("displayName", "Mentor"), status)
+    return email_service.build_message(
+        to=user_data["email"],
+        subject=f"Mentor Application {status.title()} - Roots & Wings",
+        html=html_content
+    )
+
+email_dispatcher.register_builder("booking_confirmation", build_booking_confirmation_message,
+                                  prefetch=_prefetch(_booking_docs))
+email_dispatcher.register_builder("mentor_status", build_mentor_status_message, prefetch=_prefetch(_mentor_docs))
+
+def start_email_workers() -> None:
+    """Start background email delivery (called on application startup)"""
+    email_dispatcher.start()
+
+def stop_email_workers(timeout: float = 10.0) -> None:
+    """Flush what is due within `timeout`, then stop workers (called on shutdown)"""
+    email_dispatcher.wait_until_idle(timeout)
+    email_dispatcher.stop()
+    email_service.close()
@@ -0,0 +1,153 @@
+"""
+Email template rendering.
+
+Templates live in app/templates/email and are compiled once per process by
+Jinja2 (compiled bytecode is also cached on disk, so restarts skip parsing).
+Static fragments such as the header and footer are rendered once per locale
+and reused by every email. render_bulk renders many personalised emails from
+a single compiled template.
+"""
+import os
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, pass_context
+from markupsafe import Markup
+
+FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
+DEFAULT_LOCALE = "en"
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "templates" / "email"
+EMAIL_TEMPLATE_CACHE_DIR = os.getenv(
+    "EMAIL_TEMPLATE_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "rootsnwings-email-templates")
+)
+
+def _create_environment() -> Environment:
+    os.makedirs(EMAIL_TEMPLATE_CACHE_DIR, exist_ok=True)
+    env = Environment(
+        loader=FileSystemLoader(str(TEMPLATE_DIR)),
+        bytecode_cache=FileSystemBytecodeCache(EMAIL_TEMPLATE_CACHE_DIR),
+        autoescape=True,
+        auto_reload=False,  # Templates ship with the code - never re-stat them per render
+        trim_blocks=True,
+        lstrip_blocks=True,
+    )
+    env.globals["fragment"] = _fragment
+    env.globals["frontend_url"] = FRONTEND_URL
+    return env
+
+# ---------- Static Fragments ----------
+
+@lru_cache(maxsize=64)
+def render_fragment(name: str, locale: str = DEFAULT_LOCALE) -> Markup:
+    """Render a static fragment once per locale. Falls back to the default fragment."""
+    template = environment.select_template([
+        f"fragments/{locale}/{name}.html",
+        f"fragments/{name}.html",
+    ])
+    return Markup(template.render(locale=locale))
+
+@pass_context
+def _fragment(context, name: str) -> Markup:
+    return render_fragment(name, context.get("locale", DEFAULT_LOCALE))
+
+environment = _create_environment()
+
+# ---------- Rendering ----------
+
+def render(template_name: str, locale: str = DEFAULT_LOCALE, **context) -> str:
+    """Render a single email"""
+    return environment.get_template(template_name).render(locale=locale, **context)
+
+def render_bulk(template_name: str, contexts: Iterable[Dict[str, Any]],
+                locale: str = DEFAULT_LOCALE, **shared) -> List[str]:
+    """
+    Render one template for many recipients.
+
+    `shared` values are common to every email; each entry in `contexts` holds the
+    per-recipient values (and may override shared ones).
+    """
+    template = environment.get_template(template_name)
+    base = {"locale": locale, **shared}
+    return [template.render({**base, **context}) for context in contexts]
+
+# Mentor application status -> (title, emoji, message, cta_text, cta_link)
+MENTOR_STATUS_COPY = {
+    "approved": (
+        "🎉 Mentor Application Approved!",
+        "✅",
+        "Congratulations! Your mentor application has been approved. You can now start accepting students and hosting classes.",
+        "Start Teaching",
+        f"{FRONTEND_URL}/mentor/dashboard",
+    ),
+    "rejected": (
+        "Mentor Application Update",
+        "❌",
+        "Thank you for your interest in becoming a mentor. Unfortunately, we cannot approve your application at this time. Please feel free to reapply in the future.",
+        "Contact Support",
+        "mailto:support@rootsnwings.com",
+    ),
+    "pending": (
+        "Mentor Application Received",
+        "⏳",
+        "Thank you for your mentor application! We're currently reviewing your submission and will get back to you within 2-3 business days.",
+        "View Application",
+        f"{FRONTEND_URL}/mentor/application-status",
+    ),
+}
+
+class EmailTemplates:
+    """
+    Email templates - these will be replaced with React Email components in frontend
+    """
+
+    @staticmethod
+    def base_template(title: str, content: str, cta_text: str = None, cta_link: str = None,
+                      locale: str = DEFAULT_LOCALE) -> str:
+        """Base email template with Roots & Wings branding. `content` is trusted HTML."""
+        return render("base.html", locale=locale, title=title, content=Markup(content),
+                      cta_text=cta_text, cta_link=cta_link)
+
+    @staticmethod
+    def welcome_email(user_name: str, user_type: str = "student", locale: str = DEFAULT_LOCALE) -> str:
+        """Welcome email after successful registration"""
+        dashboard_url = f"{FRONTEND_URL}/dashboard" if user_type == "student" else f"{FRONTEND_URL}/mentor/dashboard"
+        return render("welcome.html", locale=locale, title="Welcome to Roots & Wings!",
+                      user_name=user_name, cta_text="Get Started", cta_link=dashboard_url)
+
+    @staticmethod
+    def email_verification(user_name: str, verification_link: str, locale: str = DEFAULT_LOCALE) -> str:
+        """Email verification template"""
+        return render("email_verification.html", locale=locale, title="Verify Your Email - Roots & Wings",
+                      user_name=user_name, cta_text="Verify Email Address", cta_link=verification_link)
+
+    @staticmethod
+    def password_reset(user_name: str, reset_link: str, locale: str = DEFAULT_LOCALE) -> str:
+        """Password reset email template"""
+        return render("password_reset.html", locale=locale, title="Reset Your Password - Roots & Wings",
+                      user_name=user_name, cta_text="Reset Password", cta_link=reset_link)
+
+    @staticmethod
+    def booking_confirmation(student_name: str, class_name: str, mentor_name: str,
+                             booking_details: Dict[str, Any], locale: str = DEFAULT_LOCALE) -> str:
+        """Booking confirmation email"""
+        return render("booking_confirmation.html", locale=locale, title="Booking Confirmed - Roots & Wings",
+                      student_name=student_name, class_name=class_name, mentor_name=mentor_name,
+                      booking_details=booking_details, cta_text="View My Bookings",
+                      cta_link=f"{FRONTEND_URL}/dashboard/bookings")
+
+    @staticmethod
+    def mentor_application_status(mentor_name: str, status: str, locale: str = DEFAULT_LOCALE) -> str:
+        """Mentor application status update"""
+        title, emoji, message, cta_text, cta_link = MENTOR_STATUS_COPY.get(status, MENTOR_STATUS_COPY["pending"])
+        return render("mentor_application_status.html", locale=locale, title=title, mentor_name=mentor_name,
+                      emoji=emoji, message=message, cta_text=cta_text, cta_link=cta_link)
+
+    @staticmethod
+    def render_bulk(template_name: str, contexts: Iterable[Dict[str, Any]],
+                    locale: str = DEFAULT_LOCALE, **shared) -> List[str]:
+        """Render many personalised emails from one compiled template (see module render_bulk)"""
+        return render_bulk(f"{template_name}.html", contexts, locale=locale, **shared)
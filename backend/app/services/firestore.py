@@ -1,11 +1,24 @@
 from google.cloud import firestore
 from google.oauth2 import service_account
 from app.config import settings
+from app.services.instrumentation import InstrumentedFirestoreAPI
 import os
 import logging
 
 logger = logging.getLogger(__name__)
 
+class InstrumentedClient(firestore.Client):
+    """Firestore client whose RPCs are counted and timed per request (see instrumentation)"""
+
+    _instrumented_api = None
+
+    @property
+    def _firestore_api(self):
+        api = super()._firestore_api
+        if self._instrumented_api is None or self._instrumented_api._api is not api:
+            self._instrumented_api = InstrumentedFirestoreAPI(api)
+        return self._instrumented_api
+
 # Initialize Firestore client
 def initialize_firestore():
     try:
@@ -15,11 +28,11 @@ def initialize_firestore():
             credentials = service_account.Credentials.from_service_account_file(
                 settings.GOOGLE_CREDENTIALS
             )
-            return firestore.Client(project=settings.PROJECT_ID, credentials=credentials)
+            return InstrumentedClient(project=settings.PROJECT_ID, credentials=credentials)
         else:
             # Use default credentials (works on Cloud Run, GCE, etc.)
             logger.info("Using default credentials (Cloud Run/GCE)")
-            return firestore.Client(project=settings.PROJECT_ID)
+            return InstrumentedClient(project=settings.PROJECT_ID)
     except Exception as e:
         logger.error(f"Failed to initialize Firestore: {e}")
         # For development/testing, create a mock client that will fail gracefully
@@ -0,0 +1,178 @@
+"""
+Homepage snapshot.
+
+The homepage used to assemble featured classes, featured mentors, upcoming
+workshops and testimonials on every load (full class and mentor scans plus
+several reads per testimonial). The snapshot builds them once, serializes the
+result to a single JSON blob and keeps it:
+
+- in memory, served by GET /home with no Firestore read, and
+- in the `catalog/homepage` document, so a cold instance starts from one read
+  and instances share a build instead of each scanning the catalog.
+
+A snapshot is stale once one of the catalog versions it was built from
+changes (see response_cache.catalog_versions) or after HOME_REFRESH_SECONDS
+(upcoming workshops move with the date). A background thread checks every
+HOME_POLL_SECONDS and rebuilds stale snapshots; requests keep getting the
+previous snapshot meanwhile. Without the thread (tests, scripts) a stale
+snapshot is rebuilt on the request path.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import NamedTuple, Optional, Tuple
+
+from app.models.home_models import HomepageResponse
+from app.services.class_service import fetch_featured_classes, fetch_upcoming_workshops
+from app.services.firestore import db
+from app.services.mentor_service import fetch_featured_mentors
+from app.services.response_cache import POLL_INTERVAL, VERSIONS_COLLECTION, catalog_versions
+from app.services.review_service import get_testimonials
+
+logger = logging.getLogger(__name__)
+
+HOMEPAGE_DOCUMENT = "homepage"
+REFRESH_SECONDS = float(os.getenv("HOME_REFRESH_SECONDS", "300"))
+POLL_SECONDS = float(os.getenv("HOME_POLL_SECONDS", str(POLL_INTERVAL)))
+SECTION_SIZE = int(os.getenv("HOME_SECTION_SIZE", "6"))
+TESTIMONIALS_LIMIT = 10
+
+# Catalog collections the homepage sections are built from
+HOME_DEPENDENCIES = ("classes", "mentors", "reviews")
+
+
+class HomepageSnapshot(NamedTuple):
+    versions: Tuple[int, ...]
+    built_at: float  # time.time(), comparable across instances
+    etag: str
+    body: bytes
+
+
+def build_homepage() -> bytes:
+    """Compute every homepage section and serialize them in one pass"""
+    workshops, _ = fetch_upcoming_workshops(1, SECTION_SIZE)
+    return HomepageResponse(
+        featuredClasses=fetch_featured_classes(SECTION_SIZE),
+        featuredMentors=fetch_featured_mentors(SECTION_SIZE),
+        upcomingWorkshops=workshops,
+        testimonials=get_testimonials(4, TESTIMONIALS_LIMIT),
+        generatedAt=datetime.now().isoformat(),
+    ).model_dump_json().encode()
+
+
+class HomepageSnapshots:
+    """The current homepage snapshot of this instance and its background refresh"""
+
+    def __init__(self, refresh_seconds: float = REFRESH_SECONDS, poll_seconds: float = POLL_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self.poll_seconds = poll_seconds
+        self._snapshot: Optional[HomepageSnapshot] = None
+        self._build_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _ref(self):
+        return db.collection(VERSIONS_COLLECTION).document(HOMEPAGE_DOCUMENT)
+
+    def _is_fresh(self, snapshot: HomepageSnapshot, versions: Tuple[int, ...]) -> bool:
+        # Another instance may have seen a version bump this one has not polled yet
+        return (all(stored >= current for stored, current in zip(snapshot.versions, versions))
+                and time.time() - snapshot.built_at <= self.refresh_seconds)
+
+    def _load(self) -> Optional[HomepageSnapshot]:
+        doc = self._ref().get()
+        if not doc.exists:
+            return None
+        data = doc.to_dict()
+        versions = data.get("versions") or {}
+        return HomepageSnapshot(tuple(versions.get(name, 0) for name in HOME_DEPENDENCIES),
+                                data["builtAt"], data["etag"], data["body"].encode())
+
+    def _store(self, snapshot: HomepageSnapshot) -> None:
+        try:
+            self._ref().set({
+                "versions": dict(zip(HOME_DEPENDENCIES, snapshot.versions)),
+                "builtAt": snapshot.built_at,
+                "etag": snapshot.etag,
+                "body": snapshot.body.decode(),
+            })
+        except Exception as e:
+            # This instance still serves it from memory; others rebuild their own
+            logger.warning("Failed to store homepage snapshot: %s", e)
+
+    def refresh(self) -> HomepageSnapshot:
+        """Adopt the stored snapshot if it is fresh, otherwise build and store a new one"""
+        with self._build_lock:
+            versions = catalog_versions.snapshot(HOME_DEPENDENCIES)
+            current = self._snapshot
+            if current is not None and self._is_fresh(current, versions):
+                return current  # Built by a concurrent caller while this one waited
+            try:
+                stored = self._load()
+            except Exception as e:
+                logger.warning("Failed to read homepage snapshot: %s", e)
+                stored = None
+            if stored is not None and self._is_fresh(stored, versions):
+                self._snapshot = stored
+                return stored
+
+            started = time.perf_counter()
+            body = build_homepage()
+            snapshot = HomepageSnapshot(versions, time.time(),
+                                        f'"{hashlib.sha1(body).hexdigest()[:20]}"', body)
+            self._store(snapshot)
+            self._snapshot = snapshot
+            logger.info("Built homepage snapshot (%d bytes) in %.0f ms", len(body),
+                        (time.perf_counter() - started) * 1000)
+            return snapshot
+
+    def current(self) -> HomepageSnapshot:
+        """Snapshot to serve: the in-memory one unless it is missing, or stale with no refresh thread"""
+        snapshot = self._snapshot
+        if snapshot is not None and (self._thread is not None
+                                     or self._is_fresh(snapshot, catalog_versions.snapshot(HOME_DEPENDENCIES))):
+            return snapshot
+        return self.refresh()
+
+    def _poll(self) -> None:
+        while not self._stop.is_set():
+            snapshot = self._snapshot
+            if snapshot is None or not self._is_fresh(snapshot, catalog_versions.snapshot(HOME_DEPENDENCIES)):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.warning("Failed to refresh homepage snapshot: %s", e)
+            self._stop.wait(self.poll_seconds)
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._poll, name="homepage-snapshot", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def clear(self) -> None:
+        self._snapshot = None
+
+
+homepage_snapshots = HomepageSnapshots()
+
+
+def get_homepage_snapshot() -> HomepageSnapshot:
+    return homepage_snapshots.current()
+
+
+def start_homepage_refresh() -> None:
+    homepage_snapshots.start()
+
+
+def stop_homepage_refresh() -> None:
+    homepage_snapshots.stop()
@@ -0,0 +1,276 @@
+"""
+Profile image upload pipeline.
+
+Uploads are streamed to storage in chunks (never read fully into memory),
+the size limit is enforced while streaming, and resized WebP thumbnails are
+generated in a worker pool off the request path. Stored files are named by
+content hash so they can be served with long-lived immutable cache headers.
+
+An upload responds as soon as the original is stored, with the original's
+URL standing in for every thumbnail. Once the caller has saved those URLs,
+schedule_thumbnail_update resizes in the pool and writes the thumbnail URLs
+to the document - unless a newer upload has replaced the image meanwhile.
+"""
+import hashlib
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+from fastapi import HTTPException, UploadFile
+from fastapi.staticfiles import StaticFiles
+from google.cloud import firestore
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.services.firestore import db
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional - originals are still stored without it
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_IMAGE_TYPES = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+}
+MAX_PROFILE_IMAGE_BYTES = 5 * 1024 * 1024  # 5MB
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Thumbnail name -> longest edge in pixels
+THUMBNAIL_SIZES = {
+    "sm": 96,
+    "md": 256,
+}
+
+PROFILE_IMAGE_PREFIX = "profile-images"
+THUMBNAIL_PREFIX = f"{PROFILE_IMAGE_PREFIX}/thumbs"
+
+# ---------- Storage Backends ----------
+
+class StorageBackend:
+    """
+    Minimal storage interface used by the upload pipeline.
+
+    Keys are relative, slash-separated paths (e.g. "profile-images/abc.jpg").
+    Writes go through a temporary key first and are committed with a rename so
+    readers never see a partially written file.
+    """
+
+    def open_temp(self):
+        """Return (temp_key, writable binary file object)"""
+        raise NotImplementedError
+
+    def commit(self, temp_key: str, key: str) -> None:
+        """Atomically move a finished temp upload to its final key"""
+        raise NotImplementedError
+
+    def discard(self, temp_key: str) -> None:
+        """Remove an abandoned temp upload"""
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """Filesystem path for key, if the backend is disk based (used for thumbnailing)"""
+        return None
+
+    def url_for(self, key: str) -> str:
+        raise NotImplementedError
+
+
+class LocalStorageBackend(StorageBackend):
+    """Stores files on local disk under the uploads directory served at /uploads"""
+
+    def __init__(self, root: str, url_prefix: str = "/uploads"):
+        self.root = Path(root)
+        self.url_prefix = url_prefix.rstrip("/")
+        (self.root / ".tmp").mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key
+
+    def open_temp(self):
+        temp_key = f".tmp/{uuid.uuid4().hex}"
+        return temp_key, open(self._path(temp_key), "wb")
+
+    def commit(self, temp_key: str, key: str) -> None:
+        final_path = self._path(key)
+        final_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(self._path(temp_key), final_path)
+
+    def discard(self, temp_key: str) -> None:
+        try:
+            self._path(temp_key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def exists(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    def local_path(self, key: str) -> Optional[Path]:
+        return self._path(key)
+
+    def url_for(self, key: str) -> str:
+        return f"{self.url_prefix}/{key}"
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """
+    StaticFiles that marks responses as cacheable forever.
+
+    Only safe because every stored file name embeds its content hash - a new
+    upload always produces a new URL.
+    """
+
+    async def get_response(self, path, scope):
+        response = await super().get_response(path, scope)
+        if response.status_code == 200:
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+# ---------- Thumbnail Worker Pool ----------
+
+_thumbnail_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="thumbnails")
+
+def thumbnail_key(content_hash: str, size_name: str) -> str:
+    return f"{THUMBNAIL_PREFIX}/{content_hash}_{size_name}.webp"
+
+def generate_thumbnails(backend: StorageBackend, source_key: str, content_hash: str) -> Dict[str, str]:
+    """Resize the stored original into WebP thumbnails. Runs in the worker pool."""
+    if Image is None:
+        logger.warning("Pillow not installed - skipping thumbnails for %s", source_key)
+        return {}
+
+    source_path = backend.local_path(source_key)
+    if source_path is None:
+        logger.warning("Storage backend has no local path for %s - skipping thumbnails", source_key)
+        return {}
+
+    generated = {}
+    try:
+        with Image.open(source_path) as img:
+            img.seek(0)  # First frame only for animated GIFs
+            img = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+            for size_name, edge in THUMBNAIL_SIZES.items():
+                key = thumbnail_key(content_hash, size_name)
+                if backend.exists(key):
+                    generated[size_name] = key
+                    continue
+                thumb = img.copy()
+                thumb.thumbnail((edge, edge))
+                target_path = backend.local_path(key)
+                target_path.parent.mkdir(parents=True, exist_ok=True)
+                temp_path = target_path.with_suffix(".webp.part")
+                thumb.save(temp_path, format="WEBP", quality=80, method=4)
+                os.replace(temp_path, target_path)
+                generated[size_name] = key
+    except Exception as e:
+        logger.error("Failed to generate thumbnails for %s: %s", source_key, e)
+    return generated
+
+def thumbnails_supported(backend: StorageBackend, source_key: str) -> bool:
+    """Whether thumbnails can be produced for this upload at all"""
+    return Image is not None and backend.local_path(source_key) is not None
+
+@firestore.transactional
+def _store_thumbnails(transaction, ref, original_url: str, thumbnails: Dict[str, str]) -> bool:
+    snapshot = ref.get(transaction=transaction)
+    if not snapshot.exists or (snapshot.to_dict() or {}).get("photoURL") != original_url:
+        return False  # Deleted, or a newer upload replaced the image
+    transaction.update(ref, {"photoThumbnails": thumbnails})
+    return True
+
+def _generate_and_store(backend: StorageBackend, upload: Dict[str, object], collection: str, doc_id: str) -> bool:
+    generated = generate_thumbnails(backend, upload["key"], upload["contentHash"])
+    if not generated:
+        return False  # The document keeps the original's URL for every size
+    thumbnails = dict(upload["thumbnails"])
+    thumbnails.update({size_name: backend.url_for(key) for size_name, key in generated.items()})
+    try:
+        return _store_thumbnails(db.transaction(), db.collection(collection).document(doc_id),
+                                 upload["url"], thumbnails)
+    except Exception as e:
+        logger.error("Failed to store thumbnails for %s/%s: %s", collection, doc_id, e)
+        return False
+
+def schedule_thumbnail_update(upload: Dict[str, object], collection: str, doc_id: str,
+                              backend: Optional[StorageBackend] = None):
+    """
+    Resize an upload in the worker pool, then set photoThumbnails on
+    collection/doc_id. Call it after the upload's photoURL is saved there.
+    """
+    backend = backend or storage_backend
+    if not thumbnails_supported(backend, upload["key"]):
+        return None
+    return _thumbnail_pool.submit(_generate_and_store, backend, upload, collection, doc_id)
+
+# ---------- Upload Pipeline ----------
+
+storage_backend: StorageBackend = LocalStorageBackend(settings.UPLOADS_DIR)
+
+async def save_profile_image(user_id: str, file: UploadFile,
+                             backend: Optional[StorageBackend] = None,
+                             max_bytes: int = MAX_PROFILE_IMAGE_BYTES) -> Dict[str, object]:
+    """
+    Stream an uploaded profile image into storage.
+
+    Returns the storage key and public URL of the original, with that URL as
+    every thumbnail until schedule_thumbnail_update replaces them. Nothing
+    waits on the resize, and a size that is never produced keeps a link
+    that resolves.
+    """
+    backend = backend or storage_backend
+
+    extension = ALLOWED_IMAGE_TYPES.get(file.content_type)
+    if not extension:
+        raise HTTPException(status_code=400, detail="Invalid file type. Only JPG, PNG, and GIF allowed")
+
+    # Cheap early rejection when the client declared the size up front
+    if file.size and file.size > max_bytes:
+        raise HTTPException(status_code=413, detail="File too large. Maximum size is 5MB")
+
+    hasher = hashlib.sha256()
+    total = 0
+    temp_key, out = await run_in_threadpool(backend.open_temp)
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            total += len(chunk)
+            if total > max_bytes:
+                raise HTTPException(status_code=413, detail="File too large. Maximum size is 5MB")
+            hasher.update(chunk)
+            await run_in_threadpool(out.write, chunk)
+        await run_in_threadpool(out.close)
+
+        if total == 0:
+            raise HTTPException(status_code=400, detail="Uploaded file is empty")
+
+        content_hash = hasher.hexdigest()[:16]
+        key = f"{PROFILE_IMAGE_PREFIX}/{user_id}_{content_hash}{extension}"
+        await run_in_threadpool(backend.commit, temp_key, key)
+    except BaseException:
+        out.close()
+        await run_in_threadpool(backend.discard, temp_key)
+        raise
+
+    original_url = backend.url_for(key)
+    return {
+        "key": key,
+        "url": original_url,
+        "thumbnails": {size_name: original_url for size_name in THUMBNAIL_SIZES},
+        "contentHash": content_hash,
+        "size": total,
+    }
+
+def shutdown_thumbnail_pool():
+    """Wait for queued thumbnails to finish (called on application shutdown)"""
+    _thumbnail_pool.shutdown(wait=True)
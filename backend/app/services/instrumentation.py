@@ -0,0 +1,337 @@
+"""
+Request-level performance instrumentation.
+
+- Firestore RPCs are counted and timed at the GAPIC layer (see
+  InstrumentedFirestoreAPI, installed by app.services.firestore), so every
+  get/stream/get_all/count/commit made through `db` is seen, including
+  batches and transactions.
+- Per-request totals live in a contextvar (RequestStats) that the ASGI
+  middleware opens for each HTTP request; sync endpoints run in a threadpool
+  with a copy of the context, so they update the same stats object.
+- Process-wide counters and histograms are exposed in the Prometheus text
+  format by render_prometheus() (served at /metrics).
+"""
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Iterable, Optional, Tuple
+
+# ---------- Metric Primitives ----------
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = ['%s="%s"' % (name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+             for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: Tuple[str, ...] = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # labels -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: Tuple[str, ...] = ()) -> None:
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._values.items()]
+        for labels, series in items:
+            for bound, count in zip(self.buckets, series):
+                bucket_labels = _format_labels(self.labelnames, labels, 'le="%s"' % bound)
+                yield f"{self.name}_bucket{bucket_labels} {count}"
+            inf_labels = _format_labels(self.labelnames, labels, 'le="+Inf"')
+            yield f"{self.name}_bucket{inf_labels} {series[-1]}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {series[-2]}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {series[-1]}"
+
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route"))
+HTTP_FIRESTORE_READS = Histogram(
+    "http_request_firestore_reads", "Firestore documents read per HTTP request", ("method", "route"),
+    buckets=COUNT_BUCKETS)
+FIRESTORE_CALLS = Counter(
+    "firestore_rpc_total", "Firestore RPCs by method", ("method",))
+FIRESTORE_DOCUMENTS = Counter(
+    "firestore_documents_total", "Firestore documents read or written by method", ("method",))
+FIRESTORE_LATENCY = Histogram(
+    "firestore_rpc_duration_seconds", "Firestore RPC latency by method", ("method",))
+FIRESTORE_BYTES = Counter(
+    "firestore_response_bytes_total", "Encoded size of Firestore responses by method", ("method",))
+
+SINGLE_FLIGHT_CALLS = Counter(
+    "single_flight_calls_total", "Coalesced service calls by function and outcome (leader, shared, cached)",
+    ("function", "outcome"))
+
+METRICS = (HTTP_REQUESTS, HTTP_LATENCY, HTTP_FIRESTORE_READS, FIRESTORE_CALLS, FIRESTORE_DOCUMENTS, FIRESTORE_LATENCY,
+           FIRESTORE_BYTES, SINGLE_FLIGHT_CALLS)
+
+def render_prometheus() -> str:
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# ---------- Per-Request Stats ----------
+
+class RequestStats:
+    """Firestore work done on behalf of one request"""
+
+    __slots__ = ("reads", "writes", "queries", "gets", "docs", "bytes", "rpcs", "firestore_seconds", "_lock")
+
+    def __init__(self):
+        self.reads = 0       # Billed document reads (found + missing)
+        self.writes = 0      # Write operations committed
+        self.queries = 0     # run_query / aggregation RPCs
+        self.gets = 0        # batch_get_documents RPCs (get / get_all)
+        self.docs = 0        # Documents returned to the caller
+        self.bytes = 0       # Encoded size of the responses (what projections shrink)
+        self.rpcs = 0
+        self.firestore_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "reads": self.reads,
+            "writes": self.writes,
+            "queries": self.queries,
+            "gets": self.gets,
+            "docs": self.docs,
+            "bytes": self.bytes,
+            "rpcs": self.rpcs,
+            "firestoreMs": round(self.firestore_seconds * 1000, 2),
+        }
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("firestore_request_stats", default=None)
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+def begin_request_stats():
+    """Start collecting stats for the current context. Returns (stats, reset token)."""
+    stats = RequestStats()
+    return stats, _request_stats.set(stats)
+
+def end_request_stats(token) -> None:
+    _request_stats.reset(token)
+
+def record_firestore_call(method: str, seconds: float, reads: int = 0, docs: int = 0, writes: int = 0,
+                          size: int = 0) -> None:
+    """Record one Firestore RPC globally and against the current request (if any)"""
+    FIRESTORE_CALLS.inc((method,))
+    FIRESTORE_LATENCY.observe(seconds, (method,))
+    if reads or writes:
+        FIRESTORE_DOCUMENTS.inc((method,), reads + writes)
+    if size:
+        FIRESTORE_BYTES.inc((method,), size)
+
+    stats = _request_stats.get()
+    if stats is None:
+        return
+    with stats._lock:
+        stats.rpcs += 1
+        stats.firestore_seconds += seconds
+        stats.reads += reads
+        stats.docs += docs
+        stats.writes += writes
+        stats.bytes += size
+        if method in ("run_query", "run_aggregation_query"):
+            stats.queries += 1
+        elif method == "batch_get_documents":
+            stats.gets += 1
+
+# ---------- Firestore GAPIC Wrapper ----------
+
+class _CountingStream:
+    """Wraps a server-streaming response, counting documents until it is exhausted"""
+
+    def __init__(self, method: str, stream, started: float):
+        self._method = method
+        self._stream = iter(stream)
+        self._started = started
+        self._reads = 0
+        self._docs = 0
+        self._size = 0
+        self._done = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            response = next(self._stream)
+        except StopIteration:
+            self._finish()
+            raise
+        except Exception:
+            self._finish()
+            raise
+        self._count(response)
+        return response
+
+    def _count(self, response) -> None:
+        try:
+            self._size += type(response).pb(response).ByteSize()
+        except Exception:
+            pass  # Not a proto-plus message
+        if self._method == "batch_get_documents":
+            self._reads += 1  # Missing documents are billed as reads too
+            if "found" in response:
+                self._docs += 1
+        elif self._method == "run_query":
+            if "document" in response:
+                self._reads += 1
+                self._docs += 1
+        elif self._method == "run_aggregation_query":
+            self._reads = max(self._reads, 1)  # Aggregations bill per 1000 index entries, min 1
+
+    def _finish(self) -> None:
+        if not self._done:
+            self._done = True
+            record_firestore_call(self._method, time.perf_counter() - self._started,
+                                  reads=self._reads, docs=self._docs, size=self._size)
+
+    def __del__(self):
+        # Callers that stop iterating early (e.g. `break`) still get recorded
+        self._finish()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+STREAMING_METHODS = {"batch_get_documents", "run_query", "run_aggregation_query"}
+WRITE_METHODS = {"commit", "batch_write"}
+UNARY_METHODS = {"begin_transaction", "rollback", "list_documents", "list_collection_ids", "partition_query"}
+
+
+class InstrumentedFirestoreAPI:
+    """Proxy for the GAPIC FirestoreClient that records every RPC"""
+
+    def __init__(self, api):
+        self._api = api
+
+    def __getattr__(self, name):
+        attr = getattr(self._api, name)
+        if name in STREAMING_METHODS:
+            def streaming_call(*args, **kwargs):
+                started = time.perf_counter()
+                return _CountingStream(name, attr(*args, **kwargs), started)
+            return streaming_call
+        if name in WRITE_METHODS:
+            def write_call(*args, request=None, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return attr(*args, request=request, **kwargs)
+                finally:
+                    writes = len((request or {}).get("writes", [])) if isinstance(request, dict) \
+                        else len(getattr(request, "writes", []) or [])
+                    record_firestore_call(name, time.perf_counter() - started, writes=writes)
+            return write_call
+        if name in UNARY_METHODS:
+            def unary_call(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return attr(*args, **kwargs)
+                finally:
+                    record_firestore_call(name, time.perf_counter() - started)
+            return unary_call
+        return attr
+
+# ---------- ASGI Middleware ----------
+
+class PerformanceMiddleware:
+    """
+    Per-request Firestore stats, route latency histograms and Server-Timing headers.
+
+    Routes are labelled by their path template (e.g. /classes/{class_id}) so
+    metric cardinality stays bounded; unmatched paths share one label.
+    """
+
+    def __init__(self, app, skip_paths: Tuple[str, ...] = ("/metrics",)):
+        self.app = app
+        self.skip_paths = skip_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        stats, token = begin_request_stats()
+        status_holder = {"status": 500}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status_holder["status"] = message["status"]
+                total_ms = (time.perf_counter() - started) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing_header(stats, total_ms).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            end_request_stats(token)
+            route = scope.get("route")
+            route_label = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "GET")
+            HTTP_REQUESTS.inc((method, route_label, str(status_holder["status"])))
+            HTTP_LATENCY.observe(time.perf_counter() - started, (method, route_label))
+            HTTP_FIRESTORE_READS.observe(stats.reads, (method, route_label))
+
+def server_timing_header(stats: RequestStats, total_ms: float) -> str:
+    return (
+        f'app;dur={total_ms:.1f}, '
+        f'firestore;dur={stats.firestore_seconds * 1000:.1f};desc="{stats.rpcs} rpcs", '
+        f'fs-reads;desc="{stats.reads}", fs-queries;desc="{stats.queries}", '
+        f'fs-gets;desc="{stats.gets}", fs-docs;desc="{stats.docs}", fs-bytes;desc="{stats.bytes}", '
+        f'fs-writes;desc="{stats.writes}"'
+    )
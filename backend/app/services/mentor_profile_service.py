@@ -0,0 +1,75 @@
+"""
+Mentor profile page in one call (GET /mentors/{id}/profile).
+
+The profile page used to call GET /mentors/{id}?include_classes=true,
+GET /reviews?type=mentor (every review the mentor ever received),
+GET /availability/mentors/{id} and the slot lookup one after another. The
+composite runs the sub-fetches side by side on a small pool, with the
+request's context (document loader, Firestore stats) copied into each:
+
+- mentor profile and the mentor's classes;
+- the newest reviews, cursor-paged, with the aggregate rating taken from
+  the mentor's stats (kept up to date by the review write paths) instead of
+  averaging every review;
+- weekly availability;
+- the next bookable one-on-one slots, from the in-memory availability index
+  minus the mentor's pending and confirmed bookings (one query).
+
+The assembled response is cached per URL by ResponseCacheMiddleware (see
+CACHE_POLICIES) and dropped when mentors, classes, reviews, availability or
+one-on-one bookings are written.
+"""
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from app.services.availability_index import DEFAULT_TIMEZONE, availability_index
+from app.services.availability_search_service import next_open_slots
+from app.services.availability_service import AvailabilityService
+from app.services.class_service import get_classes_by_mentor_id
+from app.services.mentor_service import fetch_mentor_by_id
+from app.services.review_service import get_mentor_reviews_page
+
+PROFILE_WORKERS = int(os.getenv("PROFILE_WORKERS", "8"))
+PROFILE_REVIEWS = 10
+PROFILE_SLOTS = 5
+SLOT_SEARCH_DAYS = 14
+
+# Sub-fetches of one profile run side by side on this pool (PROFILE_WORKERS threads)
+_profile_pool = ThreadPoolExecutor(max_workers=PROFILE_WORKERS, thread_name_prefix="mentor-profile")
+
+availability_service = AvailabilityService()
+
+def _submit(func, *args):
+    return _profile_pool.submit(contextvars.copy_context().run, func, *args)
+
+def get_mentor_profile(mentor_id: str, reviews_limit: int = PROFILE_REVIEWS, reviews_cursor: Optional[str] = None,
+                       slot_count: int = PROFILE_SLOTS, slot_minutes: int = 60) -> Dict[str, Any]:
+    """Everything the mentor profile page shows; 404 if the mentor does not exist"""
+    mentor = _submit(fetch_mentor_by_id, mentor_id)
+    classes = _submit(get_classes_by_mentor_id, mentor_id)
+    reviews = _submit(get_mentor_reviews_page, mentor_id, reviews_limit, reviews_cursor)
+    availability = _submit(availability_service.get_mentor_availability, mentor_id)
+    slots = next_open_slots(mentor_id, slot_count, slot_minutes, SLOT_SEARCH_DAYS) if slot_count else []
+
+    mentor = mentor.result()  # Raises the 404 once the other fetches are under way
+    page, next_cursor = reviews.result()
+    stats = mentor.stats
+    compiled = availability_index.get(mentor_id)
+    return {
+        "mentor": mentor,
+        "classes": classes.result(),
+        "reviews": {
+            "reviews": page,
+            "nextCursor": next_cursor,
+            "avgRating": stats.avgRating if stats else 0,
+            "total": stats.totalReviews if stats else 0,
+        },
+        "availability": availability.result(),
+        "nextSlots": {
+            "durationMinutes": slot_minutes,
+            "timezone": compiled.timezone if compiled else DEFAULT_TIMEZONE,
+            "slots": slots,
+        },
+    }
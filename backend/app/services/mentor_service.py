@@ -1,126 +1,137 @@
 from app.services.firestore import db
+from app.services.model_cache import validated
+from app.services.response_cache import bump_catalog_version
+from app.services.availability_index import availability_index
+from app.services.query_planner import (
+    ASCENDING, DESCENDING, InvalidCursor, Predicate, QuerySort, execute_page, get_path, plan_query
+)
+from app.services.projections import merge_paths
+from app.services.single_flight import HOT_QUERY_TTL, single_flight
+from app.services.document_loader import get_document, get_documents
+from app.services.document_writes import update_document
 from datetime import datetime
 from app.models.mentor_models import Mentor, MentorStats, MentorSearchQuery
 from fastapi import HTTPException
-from typing import List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 import re
+import logging
 from app.services.cultural_ranking_service import calculate_mentor_cultural_expertise
 
-def search_mentors(query: MentorSearchQuery) -> Tuple[List[Mentor], int]:
+logger = logging.getLogger(__name__)
+
+# sortBy -> field path; mentor onboarding writes all of these, so Firestore can order by them
+SORT_FIELDS = {"avgRating": "stats.avgRating", "totalReviews": "stats.totalReviews",
+               "oneOnOneRate": "pricing.oneOnOneRate", "createdAt": "createdAt"}
+
+# Document fields the free-text check reads (projected reads must include them)
+TEXT_FIELDS = ("displayName", "headline", "bio", "searchKeywords")
+
+def _mentor_predicates(query: MentorSearchQuery) -> Tuple[List[Predicate], Optional[Callable[[str, Dict], bool]]]:
+    """Filters Firestore could evaluate, and a Python check for the ones it cannot (None if there are none)"""
+    # base_query = db.collection("mentors").where("status", "==", "active")  # COMMENTED OUT - NO STATUS FILTER for testing
+    predicates = []
+    for field, value in (("category", query.category), ("city", query.city), ("country", query.country)):
+        if value:
+            predicates.append(Predicate(field, "==", value))
+    if query.isVerified is not None:
+        predicates.append(Predicate("isVerified", "==", query.isVerified))
+    if query.acceptingStudents is not None:
+        predicates.append(Predicate("acceptingNewStudents", "==", query.acceptingStudents))
+    if query.minRating:
+        predicates.append(Predicate("stats.avgRating", ">=", query.minRating))
+    if query.maxRate:
+        predicates.append(Predicate("pricing.oneOnOneRate", "<=", query.maxRate))
+    
+    # Array-based filters (Firestore takes one array-contains per query; the planner keeps the rest here)
+    for field, value in (("teachingModes", query.teachingMode), ("teachingLevels", query.teachingLevel),
+                         ("ageGroups", query.ageGroup), ("languages", query.language)):
+        if value:
+            predicates.append(Predicate(field, "array_contains", value))
+    
+    checks = []
+    if query.q:
+        search_text = query.q.lower()
+        def text_match(data):
+            searchable_fields = [
+                data.get("displayName", ""),
+                data.get("headline", ""),
+                data.get("bio", ""),
+                " ".join(data.get("searchKeywords", []))
+            ]
+            return search_text in " ".join(searchable_fields).lower()
+        checks.append(text_match)
+    
+    python_filter = (lambda doc_id, data: all(check(data) for check in checks)) if checks else None
+    return predicates, python_filter
+
+def search_mentors(query: MentorSearchQuery, projection: Optional[Tuple[str, ...]] = None,
+                   all_matches: bool = False) -> Tuple[List[Mentor], int]:
     """
-    Search mentors with advanced filtering, sorting, and pagination
+    Search mentors with advanced filtering, sorting, and pagination.
+    
+    Filters, sort and page window are pushed down to Firestore as far as the
+    declared indexes allow (see app/services/query_planner.py). `projection`
+    limits the fields read (see app/services/projections.py). `all_matches`
+    returns every match in order instead of one page (see search_classes).
     """
+    mentors, total, _ = search_mentors_page(query, projection, all_matches)
+    return mentors, total
+
+def search_mentors_page(query: MentorSearchQuery, projection: Optional[Tuple[str, ...]] = None,
+                        all_matches: bool = False) -> Tuple[List[Mentor], int, Optional[str]]:
+    """search_mentors plus the cursor for the next page (query.cursor continues from it instead of query.page)"""
+    page_size = None if all_matches else query.pageSize
+    cursor = None if all_matches else query.cursor
     try:
-        # Start with base query - only active mentors
-        # base_query = db.collection("mentors").where("status", "==", "active")  # COMMENTED OUT
-        base_query = db.collection("mentors")  # NO STATUS FILTER for testing
-        
-        # Apply filters
-        filters = []
+        predicates, python_filter = _mentor_predicates(query)
         
-        if query.category:
-            filters.append(("category", "==", query.category))
-        
-        if query.city:
-            filters.append(("city", "==", query.city))
-            
-        if query.country:
-            filters.append(("country", "==", query.country))
-            
-        if query.isVerified is not None:
-            filters.append(("isVerified", "==", query.isVerified))
-            
-        if query.acceptingStudents is not None:
-            filters.append(("acceptingNewStudents", "==", query.acceptingStudents))
-            
-        if query.minRating:
-            filters.append(("stats.avgRating", ">=", query.minRating))
+        # Compiled weekly availability - one bit test per mentor
+        if query.availableNow:
+            available_now = set(availability_index.available_now())
+            text_filter = python_filter
+            python_filter = lambda doc_id, data: doc_id in available_now and (text_filter is None or text_filter(doc_id, data))
         
-        # Apply basic filters to query
-        current_query = base_query
-        for field, op, value in filters:
-            current_query = current_query.where(field, op, value)
+        sort = None
+        if query.sortBy in SORT_FIELDS:
+            sort = QuerySort(SORT_FIELDS[query.sortBy], DESCENDING if query.sortOrder == "desc" else ASCENDING,
+                             dense=True)
+        plan = plan_query("mentors", predicates, sort, query.pageSize)
+        logger.debug("search_mentors plan", extra={"plan": plan.describe()})
+        start_idx = 0 if all_matches else (query.page - 1) * query.pageSize
         
-        # Get all documents (we'll do complex filtering in Python)
-        docs = list(current_query.stream())
+        sort_key = None
+        if sort is not None:
+            missing = "" if sort.field == "createdAt" else 0
+            sort_key = lambda doc: get_path(doc.to_dict(), sort.field) or missing
+        select = merge_paths(projection, TEXT_FIELDS if query.q else ()) if projection is not None else None
+        docs, total, next_cursor = execute_page(plan, start_idx, page_size, python_filter=python_filter,
+                                                sort_key=sort_key, select=select, cursor=cursor)
         
-        # Convert to mentor objects and apply complex filters
+        # Convert to mentor objects
         mentors = []
         for doc in docs:
             data = doc.to_dict()
             data["uid"] = doc.id
-            
-            # Apply array-based filters
-            if query.teachingMode and query.teachingMode not in data.get("teachingModes", []):
-                continue
-                
-            if query.teachingLevel and query.teachingLevel not in data.get("teachingLevels", []):
-                continue
-                
-            if query.ageGroup and query.ageGroup not in data.get("ageGroups", []):
-                continue
-                
-            if query.language and query.language not in data.get("languages", []):
-                continue
-                
-            # Apply rate filter
-            if query.maxRate:
-                pricing = data.get("pricing", {})
-                if pricing.get("oneOnOneRate", 0) > query.maxRate:
-                    continue
-            
-            # Apply text search
-            if query.q:
-                search_text = query.q.lower()
-                searchable_fields = [
-                    data.get("displayName", ""),
-                    data.get("headline", ""),
-                    data.get("bio", ""),
-                    " ".join(data.get("searchKeywords", []))
-                ]
-                searchable_content = " ".join(searchable_fields).lower()
-                if search_text not in searchable_content:
-                    continue
-            
             try:
-                mentor = Mentor(**data)
-                mentors.append(mentor)
+                mentors.append(validated(Mentor, doc, data, select))
             except Exception as e:
                 # Skip invalid mentor data
                 continue
         
-        # Sort mentors
-        if query.sortBy == "avgRating":
-            mentors.sort(key=lambda m: m.stats.avgRating if m.stats else 0, 
-                        reverse=(query.sortOrder == "desc"))
-        elif query.sortBy == "totalReviews":
-            mentors.sort(key=lambda m: m.stats.totalReviews if m.stats else 0, 
-                        reverse=(query.sortOrder == "desc"))
-        elif query.sortBy == "oneOnOneRate":
-            mentors.sort(key=lambda m: m.pricing.oneOnOneRate if m.pricing else 0, 
-                        reverse=(query.sortOrder == "desc"))
-        elif query.sortBy == "createdAt":
-            mentors.sort(key=lambda m: m.createdAt or "", 
-                        reverse=(query.sortOrder == "desc"))
-        
-        # Get total count
-        total = len(mentors)
-        
-        # Apply pagination
-        start_idx = (query.page - 1) * query.pageSize
-        end_idx = start_idx + query.pageSize
-        paginated_mentors = mentors[start_idx:end_idx]
-        
-        return paginated_mentors, total
+        return mentors, total, next_cursor
         
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to search mentors: {str(e)}")
 
-def fetch_all_mentors(page: int = 1, page_size: int = 20) -> Tuple[List[Mentor], int]:
+def fetch_all_mentors(page: int = 1, page_size: int = 20,
+                      projection: Optional[Tuple[str, ...]] = None) -> Tuple[List[Mentor], int]:
     """Get all approved mentors with pagination"""
     query = MentorSearchQuery(page=page, pageSize=page_size, sortBy="createdAt")
-    return search_mentors(query)
+    return search_mentors(query, projection)
 
+@single_flight(ttl=HOT_QUERY_TTL, dependencies=("mentors",))
 def fetch_featured_mentors(limit: int = 6) -> List[Mentor]:
     """Get featured mentors based on cultural expertise and performance score"""
     try:
@@ -133,7 +144,7 @@ def fetch_featured_mentors(limit: int = 6) -> List[Mentor]:
             data["uid"] = doc.id
             
             try:
-                mentor = Mentor(**data)
+                mentor = validated(Mentor, doc, data)
                 stats = mentor.stats or MentorStats()
                 
                 # Calculate base performance score
@@ -156,7 +167,7 @@ def fetch_featured_mentors(limit: int = 6) -> List[Mentor]:
                 
             except Exception as e:
                 # Skip invalid mentor data but log for debugging
-                print(f"Skipping mentor {doc.id}: {str(e)}")
+                logger.debug("Skipping mentor %s: %s", doc.id, e)
                 continue
         
         # Sort by combined score and return top mentors
@@ -165,7 +176,8 @@ def fetch_featured_mentors(limit: int = 6) -> List[Mentor]:
         # Return mentors with logging for cultural expertise
         featured_mentors = []
         for score, mentor, cultural_score in mentor_scores[:limit]:
-            print(f"Featured mentor {mentor.displayName}: Total score={score:.2f}, Cultural expertise={cultural_score:.2f}")
+            logger.debug("Featured mentor %s: total score=%.2f, cultural expertise=%.2f",
+                         mentor.displayName, score, cultural_score)
             featured_mentors.append(mentor)
         
         return featured_mentors
@@ -176,25 +188,40 @@ def fetch_featured_mentors(limit: int = 6) -> List[Mentor]:
 def fetch_mentor_by_id(mentor_id: str) -> Mentor:
     """Get mentor by ID"""
     try:
-        doc = db.collection("mentors").document(mentor_id).get()
+        doc = get_document("mentors", mentor_id)
         if not doc.exists:
             raise HTTPException(status_code=404, detail="Mentor not found")
         
         data = doc.to_dict()
         data["uid"] = doc.id
         
-        return Mentor(**data)
+        return validated(Mentor, doc, data)
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch mentor: {str(e)}")
 
+def fetch_mentors_by_ids(mentor_ids: List[str]) -> List[Optional[Mentor]]:
+    """Mentors in input order, read in one get_all (None for missing or invalid documents)"""
+    mentors = []
+    for doc in get_documents("mentors", mentor_ids):
+        mentor = None
+        if doc is not None and doc.exists:
+            data = doc.to_dict()
+            data["uid"] = doc.id
+            try:
+                mentor = validated(Mentor, doc, data)
+            except Exception as e:
+                logger.debug("Skipping mentor %s: %s", doc.id, e)
+        mentors.append(mentor)
+    return mentors
+
 def get_mentor_categories() -> List[str]:
     """Get list of all mentor categories"""
     try:
         # docs = db.collection("mentors").where("status", "==", "active").stream()  # COMMENTED OUT
-        docs = db.collection("mentors").stream()  # NO STATUS FILTER for testing
+        docs = db.collection("mentors").select(["category"]).stream()  # NO STATUS FILTER for testing
         categories = set()
         
         for doc in docs:
@@ -212,7 +239,7 @@ def get_mentor_cities() -> List[str]:
     """Get list of all mentor cities"""
     try:
         # docs = db.collection("mentors").where("status", "==", "active").stream()  # COMMENTED OUT
-        docs = db.collection("mentors").stream()  # NO STATUS FILTER for testing
+        docs = db.collection("mentors").select(["city"]).stream()  # NO STATUS FILTER for testing
         cities = set()
         
         for doc in docs:
@@ -229,20 +256,16 @@ def get_mentor_cities() -> List[str]:
 def update_mentor_flexible(mentor_id: str, update_data: dict) -> dict:
     """Pure MongoDB-style flexible update - accept ANY fields"""
     try:
-        mentor_doc = db.collection("mentors").document(mentor_id).get()
-        if not mentor_doc.exists:
-            raise HTTPException(status_code=404, detail="Mentor not found")
-        
         # Pure flexibility - use whatever frontend sends
         flexible_update = update_data.copy()
         flexible_update["updatedAt"] = datetime.now().isoformat()
         
-        # Update with ANY fields
-        db.collection("mentors").document(mentor_id).update(flexible_update)
+        # Update with ANY fields; the response is the stored mentor with the update applied
+        _, updated = update_document("mentors", mentor_id, flexible_update, not_found="Mentor not found")
+        bump_catalog_version("mentors")
         
         # Return updated mentor as plain dict
-        updated_doc = db.collection("mentors").document(mentor_id).get()
-        return updated_doc.to_dict()
+        return updated
         
     except HTTPException:
         raise
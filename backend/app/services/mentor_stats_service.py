@@ -5,7 +5,11 @@ This service is now replaced by real-time stats updates in review_service.py
 Reviews are no longer stored in bookings, but in a separate reviews collection.
 """
 from typing import Optional
+import logging
 from app.services.firestore import db
+from app.services.response_cache import bump_catalog_version
+
+logger = logging.getLogger(__name__)
 
 def update_mentor_stats(mentor_id: str):
     """
@@ -49,7 +53,7 @@ def update_mentor_stats(mentor_id: str):
         # Get current mentor data to preserve other stats
         mentor_doc = mentor_ref.get()
         if not mentor_doc.exists:
-            print(f"Warning: Mentor {mentor_id} not found")
+            logger.warning("Mentor %s not found", mentor_id)
             return False
         
         mentor_data = mentor_doc.to_dict()
@@ -67,12 +71,15 @@ def update_mentor_stats(mentor_id: str):
         mentor_ref.update({
             'stats': updated_stats
         })
+        # Mentor and class responses show the rating
+        bump_catalog_version('mentors', 'classes')
         
-        print(f"Updated mentor {mentor_id} stats: avgRating={avg_rating:.2f}, totalReviews={review_count}, totalStudents={total_students}")
+        logger.info("Updated mentor %s stats", mentor_id, extra={"avgRating": round(avg_rating, 2),
+                    "totalReviews": review_count, "totalStudents": total_students})
         return True
         
     except Exception as e:
-        print(f"Error updating mentor stats for {mentor_id}: {str(e)}")
+        logger.error("Error updating mentor stats for %s: %s", mentor_id, e)
         return False
 
 def get_mentor_stats(mentor_id: str) -> Optional[dict]:
@@ -92,5 +99,5 @@ def get_mentor_stats(mentor_id: str) -> Optional[dict]:
             return None
             
     except Exception as e:
-        print(f"Error getting mentor stats for {mentor_id}: {str(e)}")
+        logger.error("Error getting mentor stats for %s: %s", mentor_id, e)
         return None
\ No newline at end of file
@@ -1,4 +1,6 @@
 from app.services.firestore import db
+from app.services.dashboard_service import record_message
+from app.services.model_cache import validated
 from app.models.message_models import Message, MessageCreate
 from datetime import datetime
 from typing import List
@@ -23,6 +25,7 @@ def send_message(message_data: MessageCreate) -> str:
     
     # Save to Firestore
     db.collection('messages').document(message_id).set(message_doc)
+    record_message(message_doc)
     
     return message_id
 
@@ -38,7 +41,7 @@ def get_messages_for_conversation(student_id: str, mentor_id: str, parent_id: st
     for doc in docs:
         data = doc.to_dict()
         try:
-            message = Message(**data)
+            message = validated(Message, doc, data)
             # If parent_id specified, only show messages involving that parent
             if parent_id and data.get('parentId') != parent_id:
                 continue
@@ -58,7 +61,7 @@ def get_messages_for_user(user_id: str) -> List[Message]:
     for doc in query1.stream():
         data = doc.to_dict()
         try:
-            messages.append(Message(**data))
+            messages.append(validated(Message, doc, data))
         except Exception:
             continue
     
@@ -67,7 +70,7 @@ def get_messages_for_user(user_id: str) -> List[Message]:
     for doc in query2.stream():
         data = doc.to_dict()
         try:
-            messages.append(Message(**data))
+            messages.append(validated(Message, doc, data))
         except Exception:
             continue
             
@@ -76,7 +79,7 @@ def get_messages_for_user(user_id: str) -> List[Message]:
     for doc in query3.stream():
         data = doc.to_dict()
         try:
-            messages.append(Message(**data))
+            messages.append(validated(Message, doc, data))
         except Exception:
             continue
             
@@ -85,7 +88,7 @@ def get_messages_for_user(user_id: str) -> List[Message]:
     for doc in query4.stream():
         data = doc.to_dict()
         try:
-            messages.append(Message(**data))
+            messages.append(validated(Message, doc, data))
         except Exception:
             continue
     
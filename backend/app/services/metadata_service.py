@@ -2,33 +2,44 @@
 Metadata service functions for direct AI calls
 """
 from typing import List, Dict, Any, Optional
+import logging
 from app.services.firestore import db
+from app.services.single_flight import HOT_QUERY_TTL, single_flight
 from app.routers.metadata import Subject, SubjectsResponse
 
+logger = logging.getLogger(__name__)
+
+@single_flight(ttl=HOT_QUERY_TTL, dependencies=("subjects",))
+def _load_subjects(category: Optional[str], region: Optional[str]) -> List[Subject]:
+    """Subjects matching the filters, highest searchBoost first (shared - do not mutate)"""
+    subjects_ref = db.collection('subjects')
+    
+    # Apply filters
+    if category:
+        subjects_ref = subjects_ref.where('category', '==', category)
+    
+    if region:
+        subjects_ref = subjects_ref.where('region', '==', region)
+    
+    # Get documents
+    subjects_docs = subjects_ref.stream()
+    
+    subjects_list = []
+    for doc in subjects_docs:
+        subject_data = doc.to_dict()
+        subjects_list.append(Subject(**subject_data))
+    
+    # Sort by searchBoost (higher boost = more popular/important)
+    subjects_list.sort(key=lambda x: x.searchBoost, reverse=True)
+    return subjects_list
+
 def get_subjects_service(category: Optional[str] = None, region: Optional[str] = None, limit: Optional[int] = None) -> SubjectsResponse:
     """
-    Get subjects from the subjects collection - service layer function for AI calls.
+    Get subjects from the subjects collection - service layer function for AI calls
+    and GET /metadata/subjects. Concurrent identical reads share one query.
     """
     try:
-        subjects_ref = db.collection('subjects')
-        
-        # Apply filters
-        if category:
-            subjects_ref = subjects_ref.where('category', '==', category)
-        
-        if region:
-            subjects_ref = subjects_ref.where('region', '==', region)
-        
-        # Get documents
-        subjects_docs = subjects_ref.stream()
-        
-        subjects_list = []
-        for doc in subjects_docs:
-            subject_data = doc.to_dict()
-            subjects_list.append(Subject(**subject_data))
-        
-        # Sort by searchBoost (higher boost = more popular/important)
-        subjects_list.sort(key=lambda x: x.searchBoost, reverse=True)
+        subjects_list = _load_subjects(category, region)
         
         # Apply limit if specified
         if limit:
@@ -40,7 +51,7 @@ def get_subjects_service(category: Optional[str] = None, region: Optional[str] =
         )
         
     except Exception as e:
-        print(f"Error fetching subjects: {str(e)}")
+        logger.error("Error fetching subjects: %s", e)
         return SubjectsResponse(subjects=[], count=0)
 
 def search_subjects_service(search_query: str, limit: int = 10) -> SubjectsResponse:
@@ -94,5 +105,5 @@ def search_subjects_service(search_query: str, limit: int = 10) -> SubjectsRespo
         )
         
     except Exception as e:
-        print(f"Error searching subjects: {str(e)}")
+        logger.error("Error searching subjects: %s", e)
         return SubjectsResponse(subjects=[], count=0)
\ No newline at end of file
@@ -0,0 +1,272 @@
+"""
+Versioned, resumable data migrations.
+
+    python -m app.services.migrations list
+    python -m app.services.migrations run users.clean_structure [--dry-run] [--batch-size 300] [--workers 4]
+                                                                [--restart] [--rerun]
+
+A migration is a transform registered with `@register_migration(...)` in
+the module that owns the data (see MIGRATION_MODULES). The transform gets a
+document's data and returns the full new document, or None to leave it as is.
+
+The runner:
+- reads the collection in document-id pages and transforms each page on a
+  thread pool;
+- writes only the top-level fields that changed. Removed fields are written
+  as DELETE_FIELD. Writes go through a BulkWriter with a last_update_time
+  precondition, so a document edited mid-run is reported as a conflict
+  instead of being overwritten with stale data. Rerun the migration to pick
+  it up;
+- stores progress in `_migrations/{id}` after each flushed page. An
+  interrupted run resumes from there. A completed migration is not rerun at
+  the same version unless --rerun is passed, and bumping `version` runs it
+  again;
+- with --dry-run, writes nothing and logs a per-document diff of the first
+  changes instead;
+- logs throughput (docs/s, writes/s, ETA) after every page.
+"""
+import argparse
+import importlib
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from google.cloud import firestore
+from google.cloud.firestore_v1.bulk_writer import BulkWriterOptions
+from google.cloud.firestore_v1.field_path import FieldPath
+
+from app.services.firestore import db
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_COLLECTION = "_migrations"
+DEFAULT_BATCH_SIZE = 300
+DEFAULT_WORKERS = 4
+DIFF_SAMPLE_SIZE = 20
+MAX_WRITE_ATTEMPTS = 5
+# gRPC codes that will not succeed on retry: NOT_FOUND (deleted mid-run), FAILED_PRECONDITION (edited mid-run)
+_PERMANENT_ERRORS = {5, 9}
+
+# Modules that define migrations; imported by load_migrations()
+MIGRATION_MODULES = [
+    "app.services.user_migration",
+    "app.services.search_metadata_backfill",
+]
+
+# ---------- Registry ----------
+
+@dataclass(frozen=True)
+class Migration:
+    id: str
+    version: int
+    collection: str
+    transform: Callable[[Dict[str, Any], Any], Optional[Dict[str, Any]]]
+    description: str = ""
+    # Called once per run; the result is passed to every transform call (e.g. lookup tables)
+    prepare: Optional[Callable[[], Any]] = None
+    # Called with the final counters when a run changed documents
+    on_complete: Optional[Callable[[Dict[str, Any]], None]] = None
+
+MIGRATIONS: Dict[str, Migration] = {}
+
+def register_migration(id: str, version: int, collection: str, description: str = "",
+                       prepare: Optional[Callable[[], Any]] = None,
+                       on_complete: Optional[Callable[[Dict[str, Any]], None]] = None):
+    """Decorator registering `transform(data, context) -> new document | None`"""
+    def decorator(transform):
+        MIGRATIONS[id] = Migration(id, version, collection, transform, description, prepare, on_complete)
+        return transform
+    return decorator
+
+def load_migrations() -> Dict[str, Migration]:
+    for module in MIGRATION_MODULES:
+        importlib.import_module(module)
+    return MIGRATIONS
+
+def get_migration(migration_id: str) -> Migration:
+    migrations = load_migrations()
+    if migration_id not in migrations:
+        raise KeyError(f"Unknown migration {migration_id!r}; known: {', '.join(sorted(migrations))}")
+    return migrations[migration_id]
+
+# ---------- Diffing ----------
+
+def diff_document(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Top-level field changes as an update() payload (removed fields -> DELETE_FIELD)"""
+    changes = {key: value for key, value in new.items() if key not in old or old[key] != value}
+    changes.update({key: firestore.DELETE_FIELD for key in old if key not in new})
+    return changes
+
+def _describe(old: Dict[str, Any], changes: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: {"from": old.get(key), "to": None if value is firestore.DELETE_FIELD else value}
+            for key, value in changes.items()}
+
+# ---------- Runner ----------
+
+def _checkpoint_ref(migration: Migration):
+    return db.collection(MIGRATIONS_COLLECTION).document(migration.id)
+
+def _initial_state(migration: Migration, restart: bool, rerun: bool) -> Dict[str, Any]:
+    fresh = {"migration": migration.id, "version": migration.version, "collection": migration.collection,
+             "status": "running", "lastDocId": None, "processed": 0, "changed": 0, "unchanged": 0,
+             "failed": 0, "startedAt": datetime.now().isoformat(), "completedAt": None}
+    if restart:
+        return fresh
+    snapshot = _checkpoint_ref(migration).get()
+    state = snapshot.to_dict() if snapshot.exists else None
+    if not state or state.get("version") != migration.version:
+        return fresh
+    if state.get("status") == "completed":
+        return fresh if rerun else state
+    logger.info("Resuming migration %s v%s after %s (%s processed)", migration.id, migration.version,
+                state.get("lastDocId"), state.get("processed"))
+    return {**fresh, **state}
+
+def _read_page(collection: str, after: Optional[str], batch_size: int) -> List:
+    query = db.collection(collection).order_by("__name__").limit(batch_size)
+    if after:
+        query = query.start_after({"__name__": after})
+    return list(query.stream())
+
+def _count(collection: str) -> int:
+    try:
+        return int(db.collection(collection).count().get()[0][0].value)
+    except Exception as e:
+        logger.warning("Could not count %s for progress reporting: %s", collection, e)
+        return 0
+
+def _report(migration: Migration, state: Dict[str, Any], total: int, elapsed: float, processed_this_run: int,
+            written_this_run: int) -> None:
+    elapsed = max(elapsed, 1e-6)
+    rate = processed_this_run / elapsed
+    state["docsPerSecond"] = round(rate, 1)
+    remaining = max(total - state["processed"], 0)
+    logger.info(
+        "Migration %s: %s/%s processed, %s changed, %s unchanged, %s failed, %.0f docs/s, %.0f writes/s, ETA %.0fs",
+        migration.id, state["processed"], total or "?", state["changed"], state["unchanged"], state["failed"],
+        rate, written_this_run / elapsed, remaining / rate if rate else 0,
+        extra={"migration": migration.id, "processed": state["processed"], "total": total,
+               "docs_per_second": state["docsPerSecond"]},
+    )
+
+def run_migration(migration: Migration, batch_size: int = DEFAULT_BATCH_SIZE, workers: int = DEFAULT_WORKERS,
+                  dry_run: bool = False, restart: bool = False, rerun: bool = False,
+                  max_ops_per_second: Optional[int] = None) -> Dict[str, Any]:
+    """Apply a migration to its whole collection; returns the final counters (and sample diffs on dry runs)"""
+    state = _initial_state(migration, restart or dry_run, rerun)
+    if state.get("status") == "completed":
+        logger.info("Migration %s v%s already completed at %s", migration.id, migration.version, state["completedAt"])
+        return state
+
+    context = migration.prepare() if migration.prepare else None
+    total = _count(migration.collection)
+    started, resumed_from, written = time.monotonic(), state["processed"], 0
+    diffs: List[Dict[str, Any]] = []
+
+    writer, failures = None, []
+    if not dry_run:
+        options = None
+        if max_ops_per_second:
+            options = BulkWriterOptions(initial_ops_per_second=min(500, max_ops_per_second),
+                                        max_ops_per_second=max_ops_per_second)
+        writer = db.bulk_writer(options=options)
+
+        def on_error(failure, _writer) -> bool:
+            if failure.code not in _PERMANENT_ERRORS and failure.attempts < MAX_WRITE_ATTEMPTS:
+                return True
+            failures.append(failure.operation.reference.id)
+            logger.warning("Migration %s failed for %s: %s", migration.id, failure.operation.reference.id,
+                           failure.message)
+            return False
+
+        writer.on_write_error(on_error)
+
+    def transform(snapshot):
+        old = snapshot.to_dict() or {}
+        new = migration.transform(dict(old), context)
+        return snapshot, old, (diff_document(old, new) if new is not None else {})
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix=f"migrate-{migration.collection}") as pool, \
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="migrate-read") as reader:
+        pending = reader.submit(_read_page, migration.collection, state["lastDocId"], batch_size)
+        while True:
+            page = pending.result()
+            if not page:
+                break
+            pending = reader.submit(_read_page, migration.collection, page[-1].id, batch_size)  # Read ahead
+
+            for snapshot, old, changes in pool.map(transform, page):
+                state["processed"] += 1
+                if not changes:
+                    state["unchanged"] += 1
+                    continue
+                state["changed"] += 1
+                if writer is None:
+                    if len(diffs) < DIFF_SAMPLE_SIZE:
+                        diffs.append({"id": snapshot.id, "changes": _describe(old, changes)})
+                    continue
+                writer.update(snapshot.reference, {FieldPath(key).to_api_repr(): value for key, value in changes.items()},
+                              option=db.write_option(last_update_time=snapshot.update_time))
+                written += 1
+
+            state["lastDocId"] = page[-1].id
+            if writer is not None:
+                writer.flush()  # Checkpoint only covers durable writes
+                state["failed"] += len(failures)
+                state["changed"] -= len(failures)
+                failures.clear()
+            _report(migration, state, total, time.monotonic() - started, state["processed"] - resumed_from, written)
+            if writer is not None:
+                _checkpoint_ref(migration).set({**state, "updatedAt": datetime.now().isoformat()})
+
+    if dry_run:
+        for diff in diffs:
+            logger.info("Migration %s would change %s", migration.id, diff["id"], extra={"changes": diff["changes"]})
+        return {**state, "status": "dry-run", "diffs": diffs}
+
+    writer.close()
+    state.update(status="completed", completedAt=datetime.now().isoformat())
+    _checkpoint_ref(migration).set({**state, "updatedAt": state["completedAt"]})
+    if state["changed"] and migration.on_complete:
+        migration.on_complete(state)
+    return state
+
+# ---------- CLI ----------
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run versioned Firestore data migrations")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="Show registered migrations and their status")
+    run = commands.add_parser("run", help="Apply a migration")
+    run.add_argument("migration_id")
+    run.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Documents read per page")
+    run.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Transform threads")
+    run.add_argument("--dry-run", action="store_true", help="Log diffs without writing")
+    run.add_argument("--restart", action="store_true", help="Ignore a saved checkpoint and start from the beginning")
+    run.add_argument("--rerun", action="store_true", help="Run again even if this version already completed")
+    run.add_argument("--max-ops-per-second", type=int, default=None, help="BulkWriter throughput cap")
+    args = parser.parse_args(argv)
+
+    from app.logging_config import configure_logging
+    configure_logging()
+
+    if args.command == "list":
+        for migration in sorted(load_migrations().values(), key=lambda m: m.id):
+            snapshot = _checkpoint_ref(migration).get()
+            state = snapshot.to_dict() if snapshot.exists else {}
+            status = state.get("status", "pending") if state.get("version") == migration.version else "pending"
+            logger.info("%s v%s (%s): %s - %s", migration.id, migration.version, migration.collection, status,
+                        migration.description)
+        return
+
+    result = run_migration(get_migration(args.migration_id), args.batch_size, args.workers, args.dry_run,
+                           args.restart, args.rerun, args.max_ops_per_second)
+    logger.info("Migration %s finished", args.migration_id,
+                extra={key: value for key, value in result.items() if key != "diffs"})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Validated-model cache for Firestore reads.
+
+List endpoints used to run full Pydantic validation (`ClassItem(**data)`,
+`Mentor(**data)`, ...) for every document on every request. Validation is
+not just a type check here - the models coerce legacy strings to dates and
+numbers - so raw `model_construct` on stored documents would change results.
+Instead each document is validated once per version: the model is cached
+under the document path and reused while the snapshot's `update_time` is
+unchanged. Write paths that already build the model can prime the cache
+with the WriteResult's `update_time` (see `remember`). Documents read with a
+field projection (select()) are cached separately per projection, so a
+partial model is never served to a full read.
+
+Cached models are shared between requests and must be treated as read-only.
+
+STRICT_MODEL_READS=1 disables the cache and logs every document that fails
+validation (callers otherwise skip invalid documents silently) - useful when
+debugging data that disappears from listings.
+"""
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+logger = logging.getLogger(__name__)
+
+M = TypeVar("M", bound=BaseModel)
+
+MAX_ENTRIES = int(os.getenv("MODEL_CACHE_MAX_ENTRIES", "20000"))
+STRICT_READS = os.getenv("STRICT_MODEL_READS", "").lower() in ("1", "true", "yes")
+
+
+class ValidatedModelCache:
+    """Bounded LRU of (model class, document path, projection) -> (update_time, model)"""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, strict: bool = STRICT_READS):
+        self.max_entries = max_entries
+        self.strict = strict
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[type, str, Any], Tuple[Any, BaseModel]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, model_cls: Type[M], path: str, update_time, projection: Optional[Tuple[str, ...]] = None) -> Optional[M]:
+        key = (model_cls, path, projection)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != update_time:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, model_cls: Type[M], path: str, update_time, model: M,
+            projection: Optional[Tuple[str, ...]] = None) -> None:
+        key = (model_cls, path, projection)
+        with self._lock:
+            self._entries[key] = (update_time, model)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+model_cache = ValidatedModelCache()
+
+
+def validated(model_cls: Type[M], snapshot, data: Dict[str, Any], projection: Optional[Tuple[str, ...]] = None) -> M:
+    """
+    `model_cls(**data)` for a document snapshot, validated once per document version.
+
+    Pass the field paths the snapshot was read with (select()) as `projection`.
+
+    `data` must be derived only from the snapshot (to_dict() plus the doc id
+    and deterministic clean-up) - anything mixed in from other documents
+    would be served stale from the cache. Raises ValidationError like the
+    constructor does.
+    """
+    path = snapshot.reference.path
+    update_time = getattr(snapshot, "update_time", None)
+    if model_cache.strict or not isinstance(update_time, datetime):
+        try:
+            return model_cls(**data)
+        except ValidationError as e:
+            if model_cache.strict:
+                logger.warning("Invalid %s document %s: %s", model_cls.__name__, path, e)
+            raise
+
+    model = model_cache.get(model_cls, path, update_time, projection)
+    if model is None:
+        model = model_cls(**data)
+        model_cache.put(model_cls, path, update_time, model, projection)
+    return model
+
+
+def remember(model: BaseModel, reference, write_result) -> None:
+    """Prime the cache with a model validated on the write path"""
+    update_time = getattr(write_result, "update_time", None)
+    if isinstance(update_time, datetime) and not model_cache.strict:
+        model_cache.put(type(model), reference.path, update_time, model)
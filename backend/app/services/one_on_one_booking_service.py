@@ -1,9 +1,13 @@
 from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta
 import uuid
+from fastapi import HTTPException
 from app.services.firestore import db
 from app.services.availability_service import AvailabilityService
 from app.services.mentor_service import fetch_mentor_by_id
+from app.services.dashboard_service import record_booking_change
+from app.services.document_writes import update_document
+from app.services.response_cache import bump_catalog_version
 from app.models.booking_models import (
     OneOnOneBookingRequest, RecurringOneOnOneBookingRequest, OneOnOneBooking,
     AvailableSlotForBooking, OneOnOneAvailabilityResponse,
@@ -168,6 +172,9 @@ class OneOnOneBookingService:
         # Create the booking
         doc_ref = self.collection.document(booking_id)
         doc_ref.set(booking_data)
+        record_booking_change(None, booking_data)
+        # Mentor profiles list the next open slots
+        bump_catalog_version("one_on_one_bookings")
         
         # Mark the availability slot as booked (we'll do this after payment confirmation)
         # For now, we'll mark it as pending
@@ -177,7 +184,7 @@ class OneOnOneBookingService:
     async def _check_slot_availability(self, mentor_id: str, date: str, start_time: str, end_time: str) -> bool:
         """Check if a mentor's slot is available for booking"""
         # Check against availability system
-        has_conflict = await self.availability_service.check_slot_conflict(
+        has_conflict = self.availability_service.check_slot_conflict(
             mentor_id, datetime.strptime(date, '%Y-%m-%d').strftime('%A'), start_time, end_time
         )
         if has_conflict:
@@ -230,23 +237,22 @@ class OneOnOneBookingService:
     
     async def confirm_booking(self, booking_id: str) -> Optional[OneOnOneBooking]:
         """Confirm a booking after payment is successful"""
-        doc_ref = self.collection.document(booking_id)
-        doc = doc_ref.get()
-        
-        if not doc.exists:
-            return None
-        
-        booking_data = doc.to_dict()
-        
-        # Update booking status
-        update_data = {
-            'bookingStatus': BookingStatus.CONFIRMED,
-            'paymentStatus': PaymentStatus.PAID,
-            'confirmedAt': datetime.utcnow(),
-            'lastUpdated': datetime.utcnow()
-        }
-        
-        doc_ref.update(update_data)
+        def prepare(current: Dict[str, Any], update_data: Dict[str, Any]) -> Dict[str, Any]:
+            update_data['confirmedAt'] = update_data['lastUpdated'] = datetime.utcnow()
+            return update_data
+        
+        # Update booking status (written against the version the slot is booked from)
+        try:
+            booking_data, updated = update_document('one_on_one_bookings', booking_id, {
+                'bookingStatus': BookingStatus.CONFIRMED,
+                'paymentStatus': PaymentStatus.PAID,
+            }, prepare)
+        except HTTPException as e:
+            if e.status_code == 404:
+                return None
+            raise
+        record_booking_change(booking_data, updated)
+        bump_catalog_version("one_on_one_bookings")
         
         # Mark availability slot as booked
         session_date = datetime.strptime(booking_data['sessionDate'], '%Y-%m-%d')
@@ -261,31 +267,28 @@ class OneOnOneBookingService:
         
         await self.availability_service.book_time_slot(booking_data['mentorId'], booking_request)
         
-        # Get updated booking
-        updated_doc = doc_ref.get()
-        return OneOnOneBooking(**updated_doc.to_dict())
+        return OneOnOneBooking(**updated)
     
     async def cancel_booking(self, booking_id: str, reason: Optional[str] = None) -> Optional[OneOnOneBooking]:
         """Cancel a booking and release the time slot"""
-        doc_ref = self.collection.document(booking_id)
-        doc = doc_ref.get()
-        
-        if not doc.exists:
-            return None
-        
-        booking_data = doc.to_dict()
+        def prepare(current: Dict[str, Any], update_data: Dict[str, Any]) -> Dict[str, Any]:
+            update_data['cancelledAt'] = update_data['lastUpdated'] = datetime.utcnow()
+            return update_data
         
         # Update booking status
-        update_data = {
-            'bookingStatus': BookingStatus.CANCELLED,
-            'cancelledAt': datetime.utcnow(),
-            'lastUpdated': datetime.utcnow()
-        }
-        
+        update_data = {'bookingStatus': BookingStatus.CANCELLED}
         if reason:
             update_data['cancellationReason'] = reason
         
-        doc_ref.update(update_data)
+        # Whether the slot is released depends on the status this update replaced
+        try:
+            booking_data, updated = update_document('one_on_one_bookings', booking_id, update_data, prepare)
+        except HTTPException as e:
+            if e.status_code == 404:
+                return None
+            raise
+        record_booking_change(booking_data, updated)
+        bump_catalog_version("one_on_one_bookings")
         
         # Release availability slot if it was confirmed
         if booking_data.get('bookingStatus') == BookingStatus.CONFIRMED:
@@ -300,9 +303,7 @@ class OneOnOneBookingService:
             
             await self.availability_service.release_time_slot(booking_data['mentorId'], release_request)
         
-        # Get updated booking
-        updated_doc = doc_ref.get()
-        return OneOnOneBooking(**updated_doc.to_dict())
+        return OneOnOneBooking(**updated)
     
     async def get_booking(self, booking_id: str) -> Optional[OneOnOneBooking]:
         """Get a booking by ID"""
@@ -1,10 +1,12 @@
 import stripe
 import os
+import hashlib
+import json
 from pathlib import Path
 from datetime import datetime
 from typing import Optional, List, Tuple
 from fastapi import HTTPException
-import uuid
+from google.api_core.exceptions import AlreadyExists
 
 from app.models.payment_models import (
     PaymentIntent, PaymentIntentResponse, PaymentConfirmation, 
@@ -13,6 +15,20 @@ from app.models.payment_models import (
 from app.services.firestore import db
 from app.services.booking_service import get_simple_booking, update_booking_flexible
 
+def idempotency_key_for(scope: str, request_data: dict, client_key: Optional[str] = None) -> str:
+    """
+    Stripe idempotency key for a create call.
+    Uses the client's Idempotency-Key header when sent, otherwise a hash of the request,
+    so a retried request returns the original Stripe object instead of creating another.
+    """
+    if client_key:
+        return f"{scope}:{client_key}"
+    digest = hashlib.sha256(json.dumps(request_data, sort_keys=True, default=str).encode()).hexdigest()
+    return f"{scope}:{digest[:32]}"
+
+# Payment states whose intent can no longer be paid; a retried create makes a new intent
+RETRYABLE_PAYMENT_STATUSES = {PaymentStatus.FAILED.value, PaymentStatus.CANCELLED.value}
+
 class PaymentService:
     """Stripe payment processing service"""
     
@@ -24,14 +40,32 @@ class PaymentService:
             # This will now only fail if the deployment is misconfigured
             raise ValueError("Stripe API key is not set in the environment.")
     
-    def create_payment_intent(self, payment_request: PaymentIntent) -> PaymentIntentResponse:
-        """Create a Stripe payment intent"""
+    def create_payment_intent(self, payment_request: PaymentIntent,
+                              idempotency_key: Optional[str] = None) -> PaymentIntentResponse:
+        """
+        Create a Stripe payment intent (idempotent - retries return the same intent
+        until it fails or is cancelled, then a new one for the same payment record)
+        """
         try:
             # Verify booking exists
             booking = get_simple_booking(payment_request.bookingId)
             if not booking:
                 raise HTTPException(status_code=404, detail="Booking not found")
             
+            key = idempotency_key_for("payment_intent", payment_request.dict(), idempotency_key)
+            # Derived from the key so a retried request maps onto the same payment record
+            payment_id = f"pay_{hashlib.sha256(key.encode()).hexdigest()[:12]}"
+            payment_ref = db.collection('payments').document(payment_id)
+            
+            # A failed or cancelled intent cannot be reused - a retry starts the next attempt,
+            # which gets its own Stripe idempotency key (and so a new intent)
+            existing_doc = payment_ref.get()
+            existing = existing_doc.to_dict() if existing_doc.exists else None
+            attempt = (existing or {}).get('attempt', 0)
+            if existing and existing.get('status') in RETRYABLE_PAYMENT_STATUSES:
+                attempt += 1
+            stripe_key = f"{key}:{attempt}" if attempt else key
+            
             # Create Stripe payment intent
             intent = stripe.PaymentIntent.create(
                 amount=payment_request.amount,
@@ -39,33 +73,48 @@ class PaymentService:
                 description=payment_request.description or f"Payment for booking {payment_request.bookingId}",
                 receipt_email=payment_request.receiptEmail,
                 metadata={
+                    **payment_request.metadata,
                     'booking_id': payment_request.bookingId,
-                    **payment_request.metadata
+                    'payment_id': payment_id
                 },
                 automatic_payment_methods={
                     'enabled': True,
-                }
+                },
+                idempotency_key=stripe_key
             )
             
-            # Save payment record to Firestore
-            payment_id = f"pay_{uuid.uuid4().hex[:12]}"
-            payment_data = {
-                'paymentId': payment_id,
-                'bookingId': payment_request.bookingId,
-                'stripePaymentIntentId': intent.id,
-                'amount': payment_request.amount,
-                'currency': payment_request.currency.value,
-                'status': PaymentStatus.PENDING.value,
-                'description': payment_request.description,
-                'receiptEmail': payment_request.receiptEmail,
-                'metadata': payment_request.metadata,
-                'createdAt': datetime.now().isoformat(),
-                'updatedAt': datetime.now().isoformat(),
-                'succeededAt': None,
-                'refundedAmount': 0
-            }
+            if existing is None:
+                # Save payment record to Firestore
+                payment_data = {
+                    'paymentId': payment_id,
+                    'bookingId': payment_request.bookingId,
+                    'stripePaymentIntentId': intent.id,
+                    'attempt': attempt,
+                    'amount': payment_request.amount,
+                    'currency': payment_request.currency.value,
+                    'status': PaymentStatus.PENDING.value,
+                    'description': payment_request.description,
+                    'receiptEmail': payment_request.receiptEmail,
+                    'metadata': payment_request.metadata,
+                    'createdAt': datetime.now().isoformat(),
+                    'updatedAt': datetime.now().isoformat(),
+                    'succeededAt': None,
+                    'refundedAmount': 0
+                }
+                try:
+                    payment_ref.create(payment_data)
+                except AlreadyExists:
+                    existing = {}  # Created by a concurrent retry - make sure it points at this intent
             
-            db.collection('payments').document(payment_id).set(payment_data)
+            if existing is not None and existing.get('stripePaymentIntentId') != intent.id:
+                # New attempt, or Stripe's idempotency key expired and it created a new intent
+                payment_ref.update({
+                    'stripePaymentIntentId': intent.id,
+                    'attempt': attempt,
+                    'status': PaymentStatus.PENDING.value,
+                    'lastPaymentError': None,
+                    'updatedAt': datetime.now().isoformat()
+                })
             
             return PaymentIntentResponse(
                 paymentIntentId=payment_id,
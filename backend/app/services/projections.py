@@ -0,0 +1,99 @@
+"""
+Field projections for list reads.
+
+Card-style endpoints render a dozen fields but used to download whole
+documents, including searchMetadata, bios, qualifications and schedules.
+Each endpoint now names a view and the service reads only that view's
+fields with Firestore select():
+
+- card:   discovery and homepage cards (/classes, /mentors)
+- admin:  admin approval and management lists
+- ai:     what the chat assistant's tools put in front of the model
+- detail: the whole document (the default, and what single-item reads use)
+
+Every view includes the fields its model requires, so partial documents
+still validate; the fields a view leaves out keep their model defaults and
+are dropped from the response (see view_include). Callers add whatever
+their filters and sorts read on top of the view (see merge_paths).
+"""
+from typing import Dict, Iterable, Optional, Tuple
+
+from fastapi import HTTPException
+
+DETAIL = "detail"
+
+# Fields ClassItem / Mentor require besides the document id (clean_data looks up
+# the mentor when mentorName is missing, so it is read whenever a class is)
+CLASS_REQUIRED = ("type", "title", "subject", "category", "mentorId", "mentorName")
+MENTOR_REQUIRED = ("displayName", "category")
+# Nested objects whose model requires sub-fields are always read whole
+MENTOR_WHOLE = ("pricing",)
+
+CLASS_VIEWS: Dict[str, Optional[Tuple[str, ...]]] = {
+    "card": CLASS_REQUIRED + (
+        "description", "classImage", "mentorPhotoURL", "mentorRating", "level", "ageGroup", "format",
+        "city", "country", "schedule", "capacity", "pricing", "avgRating", "totalReviews"),
+    "admin": CLASS_REQUIRED + (
+        "status", "capacity.maxStudents", "pricing.perSessionRate", "createdAt"),
+    "ai": CLASS_REQUIRED + (
+        "description", "mentorRating", "level", "ageGroup", "format", "city", "country",
+        "schedule.startDate", "schedule.endDate", "schedule.weeklySchedule", "pricing.perSessionRate",
+        "capacity.maxStudents", "capacity.currentEnrollment"),
+    DETAIL: None,
+}
+
+MENTOR_VIEWS: Dict[str, Optional[Tuple[str, ...]]] = {
+    "card": MENTOR_REQUIRED + (
+        "photoURL", "headline", "subjects", "teachingModes", "city", "region", "pricing",
+        "stats.avgRating", "stats.totalReviews"),
+    "admin": MENTOR_REQUIRED + (
+        "status", "isVerified", "backgroundChecked", "subjects", "headline", "city", "country", "stats",
+        "pricing", "createdAt"),
+    "ai": MENTOR_REQUIRED + (
+        "headline", "subjects", "languages", "teachingLevels", "ageGroups", "teachingModes", "city", "country",
+        "pricing", "stats.avgRating", "stats.totalReviews", "isVerified", "acceptingNewStudents"),
+    DETAIL: None,
+}
+
+
+def merge_paths(*groups: Optional[Iterable[str]]) -> Optional[Tuple[str, ...]]:
+    """
+    Union of field paths for select(), without paths already covered by a parent.
+
+    None in any group means "the whole document" and wins.
+    """
+    paths = set()
+    for group in groups:
+        if group is None:
+            return None
+        paths.update(path for path in group if path)
+    merged = []
+    for path in sorted(paths):
+        if not any(path.startswith(parent + ".") for parent in merged):
+            merged.append(path)
+    return tuple(merged)
+
+
+def view_fields(views: Dict[str, Optional[Tuple[str, ...]]], view: Optional[str], fields: Optional[str] = None,
+                required: Tuple[str, ...] = (), whole: Tuple[str, ...] = ()) -> Optional[Tuple[str, ...]]:
+    """
+    Field paths to read for a `view` name and/or a `fields=a,b.c` sparse fieldset.
+
+    A sparse fieldset narrows the read to those fields (plus the required
+    ones, and with paths inside `whole` widened to their parent); otherwise
+    the view decides. None means the whole document.
+    """
+    if view is not None and view not in views:
+        raise HTTPException(status_code=400, detail=f"Unknown view '{view}'. Use one of: {', '.join(views)}")
+    if fields:
+        paths = [path.strip() for path in fields.split(",")]
+        return merge_paths(required, [path.split(".")[0] if path.split(".")[0] in whole else path for path in paths])
+    return views.get(view or DETAIL)
+
+
+def view_include(views: Dict[str, Optional[Tuple[str, ...]]], view: Optional[str],
+                 fields: Optional[str] = None) -> Optional[str]:
+    """The `fields` argument for list_response: the sparse fieldset, or the view's fields"""
+    if fields or not view or views.get(view) is None:
+        return fields
+    return ",".join(views[view])
@@ -0,0 +1,471 @@
+"""
+Firestore query planner.
+
+Services describe a query as predicates plus an optional sort; the planner
+decides which of them Firestore evaluates and which are left for Python.
+
+- Composite indexes are declared in backend/firestore.indexes.json (the
+  Firebase CLI format, deployed with `firebase deploy --only
+  firestore:indexes`). The planner only pushes down a combination that a
+  declared index, or Firestore's built-in single-field indexes, can serve,
+  so a plan never fails with "The query requires an index".
+- Among supported combinations it picks the cheapest: a plan that Firestore
+  can fully filter and sort reads about one page (plus a count()
+  aggregation for the total). Otherwise the plan with the most selective
+  server-side filters wins, and the rest is filtered and sorted in Python.
+- `in` filters with more values than Firestore allows per query are split
+  into chunks that run in parallel; ordered pages from the chunks are
+  merged.
+- execute_page returns a cursor for the next page. On a server-paged plan
+  it holds the last document's sort values and id, and the next page starts
+  after them (order fields, then `__name__`), so any page costs about one
+  page of reads. An `offset` is billed for every document it skips, so it
+  is only used for page-number requests. Plans finished in Python page by
+  position in the filtered list.
+
+Firestore leaves documents that lack an ordered field out of the results,
+so ordering is pushed only for sort fields the caller expects on every
+document (`QuerySort.dense`) and only while that holds: the planner
+compares count() with and without the ordering (cached for
+QUERY_PLANNER_DENSE_TTL seconds) and sorts in Python otherwise. A sort on a
+field the query also filters on is always safe to push, because documents
+without the field fail the filter anyway.
+"""
+import base64
+import contextvars
+import heapq
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Dict, FrozenSet, List, NamedTuple, Optional, Sequence, Tuple
+
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+from app.services.firestore import db
+from app.services.projections import merge_paths
+
+logger = logging.getLogger(__name__)
+
+INDEX_MANIFEST = os.getenv(
+    "FIRESTORE_INDEXES_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "firestore.indexes.json"),
+)
+DENSE_CHECK_TTL = float(os.getenv("QUERY_PLANNER_DENSE_TTL", "600"))
+MAX_IN_VALUES = 30  # Firestore limit for in / array-contains-any per query
+NOMINAL_COLLECTION_SIZE = 10000  # Only used to compare plans with each other
+ASCENDING, DESCENDING = "ASCENDING", "DESCENDING"
+
+EQUALITY_OPS = ("==", "in", "array_contains", "array_contains_any")
+INEQUALITY_OPS = ("<", "<=", ">", ">=", "!=")
+DISJUNCTIVE_OPS = ("in", "array_contains_any")
+ARRAY_OPS = ("array_contains", "array_contains_any")
+
+# Rough share of documents a predicate keeps - enough to rank plans
+_SELECTIVITY = {"==": 0.1, "in": 0.3, "array_contains": 0.2, "array_contains_any": 0.3,
+                "<": 0.33, "<=": 0.33, ">": 0.33, ">=": 0.33, "!=": 0.9}
+
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv("QUERY_PLANNER_WORKERS", "8")), thread_name_prefix="query-chunk")
+
+# ---------- Query description ----------
+
+@dataclass(frozen=True)
+class Predicate:
+    field: str
+    op: str
+    value: Any
+
+    @property
+    def is_equality(self) -> bool:
+        return self.op in EQUALITY_OPS
+
+    def matches(self, data: Dict[str, Any]) -> bool:
+        """Python evaluation with Firestore semantics (a missing field never matches)"""
+        value = get_path(data, self.field)
+        if value is None:
+            return False
+        try:
+            if self.op == "==":
+                return value == self.value
+            if self.op == "!=":
+                return value != self.value
+            if self.op == "in":
+                return value in self.value
+            if self.op == "array_contains":
+                return isinstance(value, list) and self.value in value
+            if self.op == "array_contains_any":
+                return isinstance(value, list) and any(v in value for v in self.value)
+            if self.op == "<":
+                return value < self.value
+            if self.op == "<=":
+                return value <= self.value
+            if self.op == ">":
+                return value > self.value
+            if self.op == ">=":
+                return value >= self.value
+        except TypeError:
+            return False  # Firestore never compares across types
+        raise ValueError(f"Unsupported operator {self.op}")
+
+@dataclass(frozen=True)
+class QuerySort:
+    field: str
+    direction: str = ASCENDING
+    dense: bool = False  # Every document has the field, so server-side ordering drops nothing
+
+def get_path(data: Dict[str, Any], path: str) -> Any:
+    for part in path.split("."):
+        if not isinstance(data, dict):
+            return None
+        data = data.get(part)
+    return data
+
+# ---------- Index manifest ----------
+
+@lru_cache(maxsize=None)
+def load_index_manifest(path: str = INDEX_MANIFEST) -> Dict[str, Tuple[Tuple[Tuple[str, str], ...], ...]]:
+    """collection -> composite indexes as ((fieldPath, ASCENDING|DESCENDING|CONTAINS), ...)"""
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        logger.warning("Index manifest %s not found - only single-field indexes will be used", path)
+        return {}
+    indexes: Dict[str, List[Tuple[Tuple[str, str], ...]]] = {}
+    for index in manifest.get("indexes", []):
+        fields = tuple((f["fieldPath"], f.get("order") or f.get("arrayConfig")) for f in index["fields"])
+        indexes.setdefault(index["collectionGroup"], []).append(fields)
+    return {collection: tuple(found) for collection, found in indexes.items()}
+
+def index_supports(collection: str, equalities: FrozenSet[Tuple[str, bool]], orders: Tuple[Tuple[str, str], ...],
+                   manifest: Optional[str] = None) -> Optional[Tuple[Tuple[str, str], ...]]:
+    """
+    The index that serves equality filters on `equalities` ((field, is_array)
+    pairs) followed by `orders`, or () when built-in indexes are enough.
+    Returns None when the combination needs an index that is not declared.
+    """
+    if not orders or (not equalities and len(orders) == 1):
+        return ()  # Equality-only queries merge single-field indexes; a lone range or sort uses one
+    for index in load_index_manifest(manifest or INDEX_MANIFEST).get(collection, ()):
+        prefix, rest = index[:len(equalities)], index[len(equalities):len(equalities) + len(orders)]
+        if {(name, mode == "CONTAINS") for name, mode in prefix} == set(equalities) and rest == orders:
+            return index
+    return None
+
+# ---------- Field coverage ----------
+
+_dense_fields: Dict[Tuple, Tuple[float, bool]] = {}
+_dense_lock = threading.Lock()
+
+def _count(query) -> int:
+    return int(query.count().get()[0][0].value)
+
+def field_is_dense(collection: str, field_path: str) -> bool:
+    """True if every document has the field, i.e. ordering by it drops nothing"""
+    key = (collection, field_path)
+    with _dense_lock:
+        cached = _dense_fields.get(key)
+    if cached and time.monotonic() - cached[0] < DENSE_CHECK_TTL:
+        return cached[1]
+    try:
+        missing = _count(db.collection(collection)) - _count(db.collection(collection).order_by(field_path))
+    except Exception as e:
+        logger.warning("Could not check %s.%s coverage: %s", collection, field_path, e)
+        missing = -1
+    if missing:
+        logger.info("%s documents in %s lack %s - sorting by it in Python", missing, collection, field_path)
+    with _dense_lock:
+        _dense_fields[key] = (time.monotonic(), missing == 0)
+    return missing == 0
+
+def field_values_within(collection: str, field_path: str, values: Sequence[Any]) -> bool:
+    """True if no document has the field set to anything outside `values` (cached like field_is_dense)"""
+    key = (collection, field_path, tuple(values))
+    with _dense_lock:
+        cached = _dense_fields.get(key)
+    if cached and time.monotonic() - cached[0] < DENSE_CHECK_TTL:
+        return cached[1]
+    try:
+        other = _count(db.collection(collection).where(filter=FieldFilter(field_path, "not-in", list(values))))
+    except Exception as e:
+        logger.warning("Could not check %s.%s values: %s", collection, field_path, e)
+        other = -1
+    if other:
+        logger.info("%s documents in %s have a %s outside %s", other, collection, field_path, list(values))
+    with _dense_lock:
+        _dense_fields[key] = (time.monotonic(), other == 0)
+    return other == 0
+
+def clear_field_coverage() -> None:
+    with _dense_lock:
+        _dense_fields.clear()
+
+# ---------- Planning ----------
+
+@dataclass
+class QueryPlan:
+    collection: str
+    filters: List[Predicate] = field(default_factory=list)  # Evaluated by Firestore
+    order: Optional[QuerySort] = None  # Applied by Firestore
+    residual: List[Predicate] = field(default_factory=list)  # Evaluated in Python
+    sort_in_python: Optional[QuerySort] = None
+    index: Tuple[Tuple[str, str], ...] = ()
+
+    @property
+    def paginates_on_server(self) -> bool:
+        return not self.residual and self.sort_in_python is None
+
+    def describe(self) -> Dict[str, Any]:
+        return {"collection": self.collection,
+                "server": [f"{p.field} {p.op}" for p in self.filters],
+                "order": f"{self.order.field} {self.order.direction}" if self.order else None,
+                "python": [f"{p.field} {p.op}" for p in self.residual],
+                "sortInPython": self.sort_in_python.field if self.sort_in_python else None,
+                "index": [f"{name} {mode}" for name, mode in self.index]}
+
+def _shape(predicates: Sequence[Predicate]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((p.field, p.op) for p in predicates))
+
+def plan_query(collection: str, predicates: Sequence[Predicate], sort: Optional[QuerySort] = None,
+               page_size: int = 20, manifest: Optional[str] = None) -> QueryPlan:
+    """Split predicates and sort between Firestore and Python (see module docstring)"""
+    if sort is not None and any(p.field == sort.field for p in predicates):
+        sort = QuerySort(sort.field, sort.direction, dense=True)  # Only documents with the field can match
+    elif sort is not None and sort.dense and not field_is_dense(collection, sort.field):
+        sort = QuerySort(sort.field, sort.direction, dense=False)
+    choice = _plan_shape(collection, _shape(predicates), sort, page_size, manifest)
+    pushed_keys, push_order, index = choice
+    pushed = [p for p in predicates if (p.field, p.op) in pushed_keys]
+    residual = [p for p in predicates if (p.field, p.op) not in pushed_keys]
+    return QueryPlan(collection, pushed, sort if push_order else None, residual,
+                     None if push_order or sort is None else sort, index)
+
+@lru_cache(maxsize=1024)
+def _plan_shape(collection: str, shape: Tuple[Tuple[str, str], ...], sort: Optional[QuerySort], page_size: int,
+                manifest: Optional[str]):
+    """Best (pushed predicate keys, push order?, index) for a query shape; cached since shapes repeat"""
+    equalities = [key for key in shape if key[1] in EQUALITY_OPS]
+    inequality_fields = sorted({name for name, op in shape if op in INEQUALITY_OPS})
+
+    best, best_cost = (frozenset(), False, ()), float("inf")
+    for size in range(len(equalities), -1, -1):
+        for subset in itertools.combinations(equalities, size):
+            # Firestore allows one array-contains and one disjunction (in / array-contains-any) per query
+            if sum(op in ARRAY_OPS for _, op in subset) > 1 or sum(op in DISJUNCTIVE_OPS for _, op in subset) > 1:
+                continue
+            equality_fields = frozenset((name, op in ARRAY_OPS) for name, op in subset)
+            for inequality in [None] + inequality_fields:
+                for push_order in ((False, True) if sort is not None and sort.dense else (False,)):
+                    if push_order and inequality and sort.field != inequality:
+                        continue  # The first ordering must be the inequality field
+                    orders: Tuple[Tuple[str, str], ...] = ()
+                    if push_order:
+                        orders = ((sort.field, sort.direction),)
+                    elif inequality:
+                        orders = ((inequality, ASCENDING),)
+                    index = index_supports(collection, equality_fields, orders, manifest)
+                    if index is None:
+                        continue
+                    pushed = set(subset) | {key for key in shape if inequality and key[0] == inequality
+                                            and key[1] in INEQUALITY_OPS}
+                    residual = [key for key in shape if key not in pushed]
+                    if not residual and (push_order or sort is None):
+                        cost = page_size  # Page read straight from the index
+                    else:
+                        cost = NOMINAL_COLLECTION_SIZE
+                        for key in pushed:
+                            cost *= _SELECTIVITY[key[1]]
+                    cost -= 0.001 * len(pushed)  # Prefer pushing more on ties
+                    if cost < best_cost:
+                        best, best_cost = (frozenset(pushed), push_order, index), cost
+    return best
+
+# ---------- Execution ----------
+
+def _chunks(plan: QueryPlan) -> List[List[Predicate]]:
+    """Server filters per query, with long in / array-contains-any lists split into chunks"""
+    for i, predicate in enumerate(plan.filters):
+        if predicate.op in DISJUNCTIVE_OPS and len(predicate.value) > MAX_IN_VALUES:
+            others = plan.filters[:i] + plan.filters[i + 1:]
+            values = list(predicate.value)
+            return [others + [Predicate(predicate.field, predicate.op, values[start:start + MAX_IN_VALUES])]
+                    for start in range(0, len(values), MAX_IN_VALUES)]
+    return [plan.filters]
+
+def _build(collection: str, filters: List[Predicate], order: Optional[QuerySort],
+           select: Optional[Sequence[str]] = None):
+    query = db.collection(collection)
+    for predicate in filters:
+        query = query.where(filter=FieldFilter(predicate.field, predicate.op, predicate.value))
+    if order is not None:
+        query = query.order_by(order.field, direction=order.direction)
+    if select is not None:
+        query = query.select(select)
+    return query
+
+def _parallel(func: Callable, items: List) -> List:
+    if len(items) == 1:
+        return [func(items[0])]
+    # Copy the request context so Firestore calls are still attributed to this request
+    futures = [_executor.submit(contextvars.copy_context().run, func, item) for item in items]
+    return [future.result() for future in futures]
+
+class InvalidCursor(ValueError):
+    """A page cursor that is malformed or does not fit the query"""
+
+class PlanPage(NamedTuple):
+    docs: List
+    total: int
+    next_cursor: Optional[str]
+
+def encode_page_cursor(position: Dict[str, Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(position, separators=(",", ":")).encode()).decode().rstrip("=")
+
+def decode_page_cursor(cursor: str) -> Dict[str, Any]:
+    """Position written by encode_page_cursor ({"v": sort values, "id": doc id} or {"o": offset})"""
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (TypeError, ValueError) as e:
+        raise InvalidCursor("malformed cursor") from e
+    if isinstance(position, dict) and isinstance(position.get("o"), int) and position["o"] >= 0:
+        return position
+    if isinstance(position, dict) and isinstance(position.get("id"), str) and isinstance(position.get("v"), list):
+        return position
+    raise InvalidCursor("malformed cursor")
+
+def slice_page(items: List, ids: Sequence[str], limit: Optional[int], offset: int = 0,
+               cursor: Optional[str] = None) -> Tuple[List, Optional[str]]:
+    """Page of an already filtered and sorted list, and the cursor for the one after it"""
+    start = offset
+    if cursor:
+        position = decode_page_cursor(cursor)
+        # A keyed cursor from a plan that paged on the server (its coverage has changed since)
+        if "o" in position:
+            start = position["o"]
+        elif position["id"] in ids:
+            start = list(ids).index(position["id"]) + 1
+        else:
+            raise InvalidCursor("cursor document is no longer in the results")
+    if limit is None:
+        return items[start:], None
+    end = start + limit
+    return items[start:end], (encode_page_cursor({"o": end}) if end < len(items) else None)
+
+def _key_orders(plan: QueryPlan) -> List[Tuple[str, str]]:
+    """Fields Firestore orders a server-paged plan by, before the document id"""
+    if plan.order is not None:
+        return [(plan.order.field, plan.order.direction)]
+    # Without an explicit order Firestore sorts by the inequality field (if any), then by id
+    return [(name, ASCENDING) for name in sorted({p.field for p in plan.filters if p.op in INEQUALITY_OPS})]
+
+def _key_cursor(orders: List[Tuple[str, str]], doc) -> Optional[str]:
+    data = doc.to_dict()
+    try:
+        return encode_page_cursor({"v": [get_path(data, name) for name, _ in orders], "id": doc.id})
+    except TypeError:
+        return None  # A sort value JSON cannot carry (e.g. a timestamp) - page by offset instead
+
+def execute_page(plan: QueryPlan, offset: int = 0, limit: Optional[int] = None,
+                 python_filter: Optional[Callable[[str, Dict[str, Any]], bool]] = None,
+                 sort_key: Optional[Callable[[Any], Any]] = None, with_total: bool = True,
+                 select: Optional[Sequence[str]] = None, cursor: Optional[str] = None) -> PlanPage:
+    """
+    Run a plan and return the requested page, total matches and the next page's cursor.
+
+    `cursor` (a previous page's next_cursor) replaces `offset`.
+    `python_filter(doc_id, data)` holds predicates the planner cannot
+    express (text search, fallbacks across fields). `sort_key` maps a snapshot to its sort
+    value when the plan sorts in Python. `select` limits the fields read
+    (see app/services/projections.py); the plan's own filter and sort fields
+    are added to it, whatever `python_filter` reads must already be in it.
+    Raises InvalidCursor for a cursor this query cannot continue from.
+    """
+    chunks = _chunks(plan)
+    if select is not None:
+        sorts = [s.field for s in (plan.order, plan.sort_in_python) if s is not None]
+        select = merge_paths(select, [p.field for p in plan.filters + plan.residual], sorts)
+
+    if plan.paginates_on_server and python_filter is None:
+        position = decode_page_cursor(cursor) if cursor else None
+        if position is not None and "o" in position:
+            offset, position = position["o"], None
+        orders = _key_orders(plan)
+        if position is not None and len(position["v"]) != len(orders):
+            raise InvalidCursor("cursor does not match the query")
+        wanted = None if limit is None else offset + limit
+
+        def read_page(filters):
+            if position is not None:
+                # Keyset page: ordered by the sort fields and id, starting after the previous page's last document
+                query = _build(plan.collection, filters, None, select)
+                for name, direction in orders:
+                    query = query.order_by(name, direction=direction)
+                query = query.order_by("__name__", direction=orders[-1][1] if orders else ASCENDING)
+                query = query.start_after(position["v"] + [position["id"]])
+                return list((query if limit is None else query.limit(limit + 1)).stream())
+            query = _build(plan.collection, filters, plan.order, select)
+            if len(chunks) == 1:
+                if offset:
+                    query = query.offset(offset)
+                if limit is not None:
+                    query = query.limit(limit)
+            elif wanted is not None:
+                query = query.limit(wanted)
+            return list(query.stream())
+        def count(filters):
+            return _count(_build(plan.collection, filters, None))
+
+        pages = _parallel(read_page, chunks)
+        if len(chunks) == 1:
+            docs = pages[0]
+        else:
+            key = lambda doc: tuple(get_path(doc.to_dict(), name) for name, _ in orders) + (doc.id,)
+            merged = heapq.merge(*pages, key=key, reverse=bool(orders) and orders[-1][1] == DESCENDING)
+            docs = list(merged) if position is not None else list(itertools.islice(merged, offset, wanted))
+        more = False
+        if position is not None and limit is not None:
+            more, docs = len(docs) > limit, docs[:limit]  # One extra document tells whether a page follows
+        if not with_total:
+            total = len(docs)
+        else:
+            total = sum(_parallel(count, chunks)) if (offset or limit is not None or position) else len(docs)
+        if position is None and limit is not None:
+            more = offset + len(docs) < total if with_total else len(docs) == limit
+        next_cursor = None
+        if more and docs:
+            next_cursor = _key_cursor(orders, docs[-1])
+            if next_cursor is None and position is None:
+                next_cursor = encode_page_cursor({"o": offset + len(docs)})
+        return PlanPage(docs, total, next_cursor)
+
+    # Residual predicates: stream the (narrowed) match set once and finish in Python
+    docs = [doc for page in _parallel(lambda filters: list(_build(plan.collection, filters, plan.order, select).stream()),
+                                      chunks)
+            for doc in page]
+    if plan.residual or python_filter is not None:
+        kept = []
+        for doc in docs:
+            data = doc.to_dict()
+            if all(p.matches(data) for p in plan.residual) and (python_filter is None or python_filter(doc.id, data)):
+                kept.append(doc)
+        docs = kept
+    if plan.sort_in_python is not None and sort_key is not None:
+        docs.sort(key=sort_key, reverse=plan.sort_in_python.direction == DESCENDING)
+    elif plan.order is not None and len(chunks) > 1:
+        key = lambda doc: (get_path(doc.to_dict(), plan.order.field), doc.id)
+        docs.sort(key=key, reverse=plan.order.direction == DESCENDING)
+    page, next_cursor = slice_page(docs, [doc.id for doc in docs], limit, offset, cursor)
+    return PlanPage(page, len(docs), next_cursor)
+
+def execute_plan(plan: QueryPlan, offset: int = 0, limit: Optional[int] = None,
+                 python_filter: Optional[Callable[[str, Dict[str, Any]], bool]] = None,
+                 sort_key: Optional[Callable[[Any], Any]] = None, with_total: bool = True,
+                 select: Optional[Sequence[str]] = None) -> Tuple[List, int]:
+    """Run a plan and return (snapshots of the requested page, total matches); see execute_page"""
+    docs, total, _ = execute_page(plan, offset, limit, python_filter, sort_key, with_total, select)
+    return docs, total
@@ -0,0 +1,271 @@
+"""
+HTTP caching for public catalog endpoints.
+
+- Catalog version counters (classes, mentors, subjects, availability, reviews,
+  one_on_one_bookings) are bumped by the
+  write paths (create_class, update_class_flexible, update_mentor_flexible,
+  ...). Each instance holds them in memory and shares them through the
+  `catalog/versions` document, which a background thread polls every
+  CATALOG_VERSION_POLL_SECONDS, so other instances pick up writes within
+  one poll interval.
+- ETags are derived from the normalized request (path + sorted query
+  parameters + negotiated content coding) and the versions of the
+  collections the route depends on, so `If-None-Match` is answered with 304
+  without touching Firestore, and gzip / brotli / identity bodies never
+  share a strong ETag.
+- Successful responses are kept in a bounded LRU keyed by the normalized
+  request and stored with the versions they were computed from; a version
+  change (or RESPONSE_CACHE_TTL, for writes that bypass the hooks) makes the
+  entry stale.
+- ETags and cache entries also carry the policy's max-age epoch
+  (now // max_age), so clock-dependent responses (availableNow, next open
+  slots) are recomputed at least once per max-age even without writes.
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Pattern, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from google.cloud import firestore
+
+from app.services.compression import negotiate_encoding
+from app.services.firestore import db
+
+logger = logging.getLogger(__name__)
+
+VERSIONS_COLLECTION = "catalog"
+VERSIONS_DOCUMENT = "versions"
+POLL_INTERVAL = float(os.getenv("CATALOG_VERSION_POLL_SECONDS", "5"))
+CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "300"))
+
+# ---------- Catalog Versions ----------
+
+class CatalogVersions:
+    """Per-collection version counters shared across instances through Firestore"""
+
+    def __init__(self, poll_interval: float = POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _ref(self):
+        return db.collection(VERSIONS_COLLECTION).document(VERSIONS_DOCUMENT)
+
+    def snapshot(self, names: Tuple[str, ...]) -> Tuple[int, ...]:
+        with self._lock:
+            return tuple(self._versions.get(name, 0) for name in names)
+
+    def bump(self, *names: str) -> None:
+        """Invalidate cached responses that depend on these collections"""
+        with self._lock:
+            for name in names:
+                self._versions[name] = self._versions.get(name, 0) + 1
+        try:
+            self._ref().set({name: firestore.Increment(1) for name in names}, merge=True)
+        except Exception as e:
+            # Local caches are already invalidated; other instances catch up via RESPONSE_CACHE_TTL
+            logger.warning("Failed to publish catalog version bump for %s: %s", names, e)
+
+    def refresh(self) -> None:
+        snapshot = self._ref().get()
+        remote = (snapshot.to_dict() or {}) if snapshot.exists else {}
+        with self._lock:
+            for name, version in remote.items():
+                if isinstance(version, int) and version > self._versions.get(name, 0):
+                    self._versions[name] = version
+
+    def _poll(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning("Failed to refresh catalog versions: %s", e)
+            self._stop.wait(self.poll_interval)
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._poll, name="catalog-versions", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._versions.clear()
+
+catalog_versions = CatalogVersions()
+
+def bump_catalog_version(*names: str) -> None:
+    catalog_versions.bump(*names)
+
+# ---------- Response Cache ----------
+
+class CachedResponse(NamedTuple):
+    versions: Tuple[int, ...]
+    stored_at: float
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+
+class ResponseCache:
+    """Bounded LRU of complete responses keyed by normalized request"""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, versions: Tuple[int, ...]) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.versions != versions or time.monotonic() - entry.stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: CachedResponse) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+response_cache = ResponseCache()
+
+# ---------- Policies ----------
+
+class CachePolicy(NamedTuple):
+    pattern: Pattern
+    dependencies: Tuple[str, ...]
+    max_age: int
+    stale_while_revalidate: int
+
+    @property
+    def cache_control(self) -> str:
+        return f"public, max-age={self.max_age}, stale-while-revalidate={self.stale_while_revalidate}"
+
+CACHE_POLICIES = [
+    # Class responses embed mentor names and ratings
+    CachePolicy(re.compile(r"^/classes/?$"), ("classes", "mentors"), 60, 300),
+    CachePolicy(re.compile(r"^/classes/(?!debug/?$)[^/]+/?$"), ("classes", "mentors"), 60, 300),
+    # ?availableNow=true depends on availability (and the clock - max-age stays short)
+    CachePolicy(re.compile(r"^/mentors/?$"), ("mentors", "availability"), 60, 300),
+    # ?include_classes=true embeds the mentor's classes
+    CachePolicy(re.compile(r"^/mentors/[^/]+/?$"), ("mentors", "classes"), 60, 300),
+    # Profile composite: reviews page and next open slots. The slots move with the clock, so the
+    # body is rebuilt (and the ETag changes) every max-age bucket and clients revalidate soon after
+    CachePolicy(re.compile(r"^/mentors/[^/]+/profile/?$"),
+                ("mentors", "classes", "reviews", "availability", "one_on_one_bookings"), 60, 60),
+    # Subjects are edited outside the API (console, seed scripts), so no write path bumps "subjects":
+    # max-age matches RESPONSE_CACHE_TTL and an edit shows within it
+    CachePolicy(re.compile(r"^/metadata/(subjects|categories|regions)/?$"), ("subjects",), 300, 300),
+]
+
+def policy_for(path: str) -> Optional[CachePolicy]:
+    for policy in CACHE_POLICIES:
+        if policy.pattern.match(path):
+            return policy
+    return None
+
+def cache_key(path: str, query_string: bytes, encoding: Optional[str] = None) -> str:
+    """Path without trailing slash plus sorted, non-empty query parameters and the content coding"""
+    params = sorted(parse_qsl(query_string.decode("latin-1"), keep_blank_values=False))
+    normalized = path.rstrip("/") or "/"
+    key = f"{normalized}?{urlencode(params)}" if params else normalized
+    return f"{key}|{encoding}" if encoding else key
+
+def max_age_epoch(policy: CachePolicy, now: Optional[float] = None) -> int:
+    """Counter that advances every `max_age` seconds; part of the ETag and cached versions"""
+    return int((time.time() if now is None else now) // policy.max_age)
+
+def make_etag(key: str, versions: Tuple[int, ...]) -> str:
+    digest = hashlib.sha1(f"{key}|{versions}".encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+# ---------- ASGI Middleware ----------
+
+_CACHE_HEADERS = (b"etag", b"cache-control", b"x-cache")
+
+class ResponseCacheMiddleware:
+    """ETag / conditional GET handling and server-side caching for CACHE_POLICIES routes"""
+
+    def __init__(self, app, cache: ResponseCache = response_cache, versions: CatalogVersions = catalog_versions):
+        self.app = app
+        self.cache = cache
+        self.versions = versions
+
+    async def __call__(self, scope, receive, send):
+        policy = policy_for(scope.get("path", "")) if scope["type"] == "http" and scope["method"] == "GET" else None
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = dict(scope.get("headers", []))
+        encoding = negotiate_encoding(request_headers.get(b"accept-encoding", b"").decode("latin-1"))
+        key = cache_key(scope["path"], scope.get("query_string", b""), encoding)
+        versions = self.versions.snapshot(policy.dependencies) + (max_age_epoch(policy),)
+        etag = make_etag(key, versions)
+        cache_headers = [(b"etag", etag.encode()), (b"cache-control", policy.cache_control.encode())]
+
+        if_none_match = request_headers.get(b"if-none-match", b"").decode("latin-1")
+        if etag_matches(if_none_match, etag):
+            await send({"type": "http.response.start", "status": 304, "headers": cache_headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        cached = self.cache.get(key, versions)
+        if cached is not None:
+            await send({"type": "http.response.start", "status": cached.status,
+                        "headers": cached.headers + cache_headers + [(b"x-cache", b"HIT")]})
+            await send({"type": "http.response.body", "body": cached.body})
+            return
+
+        state = {"status": None, "headers": [], "body": []}
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                state["headers"] = [(k, v) for k, v in message.get("headers", []) if k.lower() not in _CACHE_HEADERS]
+                if message["status"] == 200:
+                    message = {**message, "headers": state["headers"] + cache_headers + [(b"x-cache", b"MISS")]}
+            elif message["type"] == "http.response.body" and state["status"] == 200:
+                state["body"].append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    self.cache.put(key, CachedResponse(versions, time.monotonic(), 200, state["headers"],
+                                                       b"".join(state["body"])))
+            await send(message)
+
+        await self.app(scope, receive, capture)
+
+def start_catalog_version_sync() -> None:
+    catalog_versions.start()
+
+def stop_catalog_version_sync() -> None:
+    catalog_versions.stop()
@@ -1,11 +1,21 @@
 from app.services.firestore import db
 from app.models.review_models import Review, ReviewRequest, TestimonialResponse
 from app.services.booking_service import get_bookings_by_student, get_simple_booking
+from app.services.dashboard_service import record_review
+from app.services.document_loader import get_document, loader_scope, prime_documents
+from app.services.response_cache import bump_catalog_version
+from app.services.single_flight import HOT_QUERY_TTL, single_flight
+from app.services.query_planner import DESCENDING
 from datetime import datetime
 from typing import List, Optional, Tuple
 from fastapi import HTTPException
+import base64
+import json
+import logging
 import uuid
 
+logger = logging.getLogger(__name__)
+
 def check_review_eligibility(student_id: str, class_id: str) -> str:
     """
     Check if student is eligible to review this class.
@@ -99,8 +109,11 @@ def create_or_update_review(student_id: str, review_request: ReviewRequest) -> R
             review = Review(**review_data)
         
         # Update stats in real-time
-        _update_mentor_stats(mentor_id)
+        avg_rating, total_reviews = _update_mentor_stats(mentor_id)
         _update_class_stats(review_request.classId)
+        # Testimonials, and the mentor and class ratings, changed
+        bump_catalog_version("reviews", "mentors", "classes")
+        record_review(mentor_id, review.dict(), avg_rating, total_reviews)
         
         return review
         
@@ -109,15 +122,15 @@ def create_or_update_review(student_id: str, review_request: ReviewRequest) -> R
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create/update review: {str(e)}")
 
-def _update_mentor_stats(mentor_id: str):
-    """Recalculate and update mentor stats"""
+def _update_mentor_stats(mentor_id: str) -> Tuple[float, int]:
+    """Recalculate and update mentor stats. Returns (avg_rating, total_reviews)."""
     try:
         # Get all reviews for this mentor
         query = db.collection("reviews").where("mentorId", "==", mentor_id)
         reviews = list(query.stream())
         
         if not reviews:
-            return
+            return 0, 0
         
         total_reviews = len(reviews)
         total_rating = sum(doc.to_dict().get("rating", 0) for doc in reviews)
@@ -129,9 +142,11 @@ def _update_mentor_stats(mentor_id: str):
             "stats.avgRating": avg_rating,
             "stats.totalReviews": total_reviews
         })
+        return avg_rating, total_reviews
         
     except Exception as e:
-        print(f"Failed to update mentor stats: {e}")
+        logger.warning("Failed to update mentor stats: %s", e)
+        return 0, 0
 
 def _update_class_stats(class_id: str):
     """Recalculate and update class stats"""
@@ -155,7 +170,7 @@ def _update_class_stats(class_id: str):
         })
         
     except Exception as e:
-        print(f"Failed to update class stats: {e}")
+        logger.warning("Failed to update class stats: %s", e)
 
 def get_class_reviews(class_id: str) -> Tuple[List[Review], float]:
     """Get all reviews for a class with average rating"""
@@ -195,6 +210,49 @@ def get_mentor_reviews(mentor_id: str) -> Tuple[List[Review], float]:
     
     return reviews, avg_rating
 
+def _encode_review_cursor(created_at: str, review_id: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"t": created_at, "id": review_id}).encode()).decode().rstrip("=")
+
+def _decode_review_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        created_at, review_id = data["t"], data["id"]
+        if not isinstance(created_at, str) or not isinstance(review_id, str) or not review_id:
+            raise ValueError("malformed cursor")
+        return created_at, review_id
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid reviews cursor")
+
+def get_mentor_reviews_page(mentor_id: str, limit: int = 10,
+                            cursor: Optional[str] = None) -> Tuple[List[Review], Optional[str]]:
+    """
+    A mentor's reviews, newest first, `limit` at a time (reads limit + 1 documents).
+    Returns the page and the cursor for the next one (None on the last page).
+    Reviews sharing a createdAt are ordered by id, so none is skipped at a page boundary.
+    """
+    query = (db.collection("reviews").where("mentorId", "==", mentor_id)
+             .order_by("createdAt", direction=DESCENDING).order_by("__name__", direction=DESCENDING))
+    if cursor:
+        created_at, review_id = _decode_review_cursor(cursor)
+        query = query.start_after({"createdAt": created_at, "__name__": review_id})
+    docs = list(query.limit(limit + 1).stream())
+    
+    reviews = []
+    for doc in docs[:limit]:
+        data = doc.to_dict()
+        data["reviewId"] = doc.id
+        try:
+            reviews.append(Review(**data))
+        except Exception as e:
+            logger.debug("Skipping review %s: %s", doc.id, e)
+    
+    next_cursor = None
+    if len(docs) > limit:
+        last = docs[limit - 1]
+        next_cursor = _encode_review_cursor(last.to_dict()["createdAt"], last.id)
+    return reviews, next_cursor
+
+@single_flight(ttl=HOT_QUERY_TTL, dependencies=("reviews", "classes", "mentors"))
 def get_testimonials(min_rating: int = 4, limit: int = 10) -> List[TestimonialResponse]:
     """Get high-rated reviews for homepage testimonials"""
     query = db.collection("reviews").where("rating", ">=", min_rating).limit(limit)
@@ -202,43 +260,52 @@ def get_testimonials(min_rating: int = 4, limit: int = 10) -> List[TestimonialRe
     
     testimonials = []
     
-    for doc in docs:
-        review_data = doc.to_dict()
+    with loader_scope():
+        # Every class, mentor and booking the page needs, in one batched read
+        for doc in docs:
+            review_data = doc.to_dict()
+            prime_documents("classes", review_data.get("classId"))
+            prime_documents("mentors", review_data.get("mentorId"))
+            prime_documents("bookings", review_data.get("bookingId"))
         
-        # Get additional info for testimonial
-        try:
-            # Get class info
-            class_doc = db.collection("classes").document(review_data["classId"]).get()
-            class_data = class_doc.to_dict() if class_doc.exists else {}
-            
-            # Get mentor info
-            mentor_doc = db.collection("mentors").document(review_data["mentorId"]).get()
-            mentor_data = mentor_doc.to_dict() if mentor_doc.exists else {}
-            
-            # Check if parent booking
-            booking_doc = db.collection("bookings").document(review_data["bookingId"]).get()
-            booking_data = booking_doc.to_dict() if booking_doc.exists else {}
-            user_type = "Parent" if booking_data.get("parentId") else "Student"
-            
-            testimonial = TestimonialResponse(
-                studentName="Anonymous",
-                studentInitial="S",  # Could enhance this later
-                mentorName=mentor_data.get("displayName", "Mentor"),
-                className=class_data.get("title", "Class"),
-                rating=review_data["rating"],
-                review=review_data["review"],
-                userType=user_type,
-                createdAt=review_data["createdAt"]
-            )
-            
-            testimonials.append(testimonial)
-            
-        except Exception as e:
-            print(f"Error building testimonial: {e}")
-            continue
+        for doc in docs:
+            testimonial = _build_testimonial(doc.to_dict())
+            if testimonial is not None:
+                testimonials.append(testimonial)
     
     return testimonials
 
+def _build_testimonial(review_data: dict) -> Optional[TestimonialResponse]:
+    """Testimonial for one review, or None if its documents cannot be read"""
+    try:
+        # Get class info
+        class_doc = get_document("classes", review_data["classId"])
+        class_data = class_doc.to_dict() if class_doc.exists else {}
+        
+        # Get mentor info
+        mentor_doc = get_document("mentors", review_data["mentorId"])
+        mentor_data = mentor_doc.to_dict() if mentor_doc.exists else {}
+        
+        # Check if parent booking
+        booking_doc = get_document("bookings", review_data["bookingId"])
+        booking_data = booking_doc.to_dict() if booking_doc.exists else {}
+        user_type = "Parent" if booking_data.get("parentId") else "Student"
+        
+        return TestimonialResponse(
+            studentName="Anonymous",
+            studentInitial="S",  # Could enhance this later
+            mentorName=mentor_data.get("displayName", "Mentor"),
+            className=class_data.get("title", "Class"),
+            rating=review_data["rating"],
+            review=review_data["review"],
+            userType=user_type,
+            createdAt=review_data["createdAt"]
+        )
+        
+    except Exception as e:
+        logger.debug("Error building testimonial: %s", e)
+        return None
+
 def get_my_reviews(student_id: str) -> Tuple[List[Review], float]:
     """Get all reviews written by a specific student"""
     query = db.collection("reviews").where("studentId", "==", student_id)
@@ -276,8 +343,10 @@ def delete_review(review_id: str, student_id: str):
         db.collection("reviews").document(review_id).delete()
         
         # Update stats
-        _update_mentor_stats(review_data["mentorId"])
+        avg_rating, total_reviews = _update_mentor_stats(review_data["mentorId"])
         _update_class_stats(review_data["classId"])
+        bump_catalog_version("reviews", "mentors", "classes")
+        record_review(review_data["mentorId"], None, avg_rating, total_reviews, removed_review_id=review_id)
         
     except HTTPException:
         raise
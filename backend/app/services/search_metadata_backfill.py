@@ -0,0 +1,80 @@
+"""
+Backfill searchMetadata for every class.
+
+    python -m app.services.migrations run classes.search_metadata [--dry-run] [--restart] [--rerun]
+    python -m app.services.search_metadata_backfill [--force] ...
+
+Registered as the `classes.search_metadata` migration, versioned with
+SEARCH_METADATA_VERSION, so paging, parallel transforms, BulkWriter writes,
+checkpointing (`_migrations/classes.search_metadata`) and progress logging
+come from app.services.migrations.
+
+Classes already stamped with the current SEARCH_METADATA_VERSION are left
+alone (unless --force), so reruns only touch stale documents. The catalog
+version is bumped when a run changed anything.
+"""
+import argparse
+import dataclasses
+import logging
+from typing import Any, Dict, List, Optional
+
+from app.services.class_service import SEARCH_METADATA_VERSION, generate_search_metadata
+from app.services.firestore import db
+from app.services.migrations import DEFAULT_BATCH_SIZE, get_migration, register_migration, run_migration
+from app.services.response_cache import bump_catalog_version
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_ID = "classes.search_metadata"
+
+
+def _load_subjects(force: bool = False) -> Dict[str, Any]:
+    return {"subjects": {doc.id: doc.to_dict() for doc in db.collection("subjects").stream()}, "force": force}
+
+
+def _bump_classes(state: Dict[str, Any]) -> None:
+    bump_catalog_version("classes")
+
+
+@register_migration(MIGRATION_ID, version=SEARCH_METADATA_VERSION, collection="classes",
+                    description="Regenerate searchMetadata with the current generator",
+                    prepare=_load_subjects, on_complete=_bump_classes)
+def regenerate_search_metadata(data: Dict[str, Any], context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    if (not context["force"] and data.get("searchMetadata")
+            and data.get("searchMetadataVersion") == SEARCH_METADATA_VERSION):
+        return None
+    return {**data, "searchMetadata": generate_search_metadata(data, context["subjects"]),
+            "searchMetadataVersion": SEARCH_METADATA_VERSION}
+
+
+def run_backfill(batch_size: int = DEFAULT_BATCH_SIZE, force: bool = False, dry_run: bool = False,
+                 restart: bool = False, rerun: bool = False,
+                 max_ops_per_second: Optional[int] = None) -> Dict[str, Any]:
+    """Regenerate searchMetadata for all stale (or with `force`, all) classes; returns the final counters"""
+    migration = get_migration(MIGRATION_ID)
+    if force:
+        migration = dataclasses.replace(migration, prepare=lambda: _load_subjects(force=True))
+    return run_migration(migration, batch_size=batch_size, dry_run=dry_run, restart=restart,
+                         rerun=rerun or force, max_ops_per_second=max_ops_per_second)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Regenerate searchMetadata for all classes")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Classes read per page")
+    parser.add_argument("--force", action="store_true", help="Regenerate even if already at the current version")
+    parser.add_argument("--dry-run", action="store_true", help="Log what would be updated without writing")
+    parser.add_argument("--restart", action="store_true", help="Ignore the saved checkpoint")
+    parser.add_argument("--rerun", action="store_true", help="Run again even if this version already completed")
+    parser.add_argument("--max-ops-per-second", type=int, default=None, help="BulkWriter throughput cap")
+    args = parser.parse_args(argv)
+
+    from app.logging_config import configure_logging
+    configure_logging()
+    result = run_backfill(args.batch_size, args.force, args.dry_run, args.restart, args.rerun,
+                          args.max_ops_per_second)
+    logger.info("searchMetadata backfill finished",
+                extra={"migration": MIGRATION_ID, **{k: v for k, v in result.items() if k != "diffs"}})
+
+
+if __name__ == "__main__":
+    main()
@@ -2,153 +2,255 @@ from app.services.firestore import db
 from app.models.search_models import UnifiedSearchQuery, SearchResult, UnifiedSearchResponse
 from app.models.mentor_models import Mentor, MentorSearchQuery
 from app.models.class_models import ClassItem, ClassSearchQuery
-from app.services.mentor_service import search_mentors
-from app.services.class_service import search_classes
-from typing import List, Tuple
+from app.services.mentor_service import fetch_mentors_by_ids, search_mentors
+from app.services.class_service import fetch_classes_by_ids, search_classes
+from app.services.document_loader import loader_scope, prime_documents
+from app.services.response_cache import catalog_versions
+from app.services.search_sessions import (
+    SESSION_DEPENDENCIES, SearchSession, decode_cursor, encode_cursor, search_sessions, session_key
+)
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 from fastapi import HTTPException
+from pydantic import ValidationError
+import contextvars
+import heapq
+import os
 import re
+import time
 
-def unified_search(query: UnifiedSearchQuery) -> Tuple[List[SearchResult], dict]:
+SEARCH_WORKERS = int(os.getenv("SEARCH_WORKERS", "8"))
+# Ranked results kept per session
+SEARCH_SESSION_DEPTH = int(os.getenv("SEARCH_SESSION_DEPTH", "1000"))
+CURSOR_FIELDS = frozenset(UnifiedSearchQuery.model_fields) - {"page", "pageSize"}
+
+# Mentor and class retrieval run side by side on this pool (SEARCH_WORKERS threads)
+_search_pool = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix="search")
+
+def _mentor_result(mentor: Mentor) -> dict:
+    """Unified result dict for a mentor"""
+    # Calculate price (use one-on-one rate as primary price)
+    price = None
+    if mentor.pricing:
+        price = mentor.pricing.oneOnOneRate
+    
+    # Format location string
+    location = f"{mentor.city}, {mentor.country}"
+    
+    return {
+        "type": "mentor",
+        "id": mentor.uid,
+        "title": mentor.displayName,
+        "description": mentor.headline or mentor.bio,
+        "category": mentor.category,
+        "rating": mentor.stats.avgRating if mentor.stats else None,
+        "price": price,
+        "location": location,
+        "imageUrl": mentor.photoURL,
+        "tags": mentor.searchKeywords,
+        "data": mentor,  # Already validated - reused as is
+        "searchMetadata": {  # Add basic searchMetadata for cultural ranking
+            "keywords": mentor.searchKeywords or [],
+            "is_culturally_rooted": False,  # Will be determined by cultural ranking
+            "cultural_authenticity_score": 0.3
+        }
+    }
+
+def _class_result(class_item: ClassItem) -> dict:
+    """Unified result dict for a class"""
+    # Calculate price
+    price = None
+    if class_item.pricing:
+        price = class_item.pricing.perSessionRate
+    
+    # Format location string
+    location = "Online" if class_item.format == "online" else class_item.format
+    
+    return {
+        "type": "class",
+        "id": class_item.classId,
+        "title": class_item.title,
+        "description": class_item.description,
+        "category": class_item.category,
+        "rating": class_item.mentorRating,
+        "price": price,
+        "location": location,
+        "imageUrl": class_item.mentorPhotoURL,
+        "tags": [class_item.subject] if class_item.subject else [],
+        "data": class_item,  # Already validated - reused as is
+        "searchMetadata": getattr(class_item, 'searchMetadata', {  # Use existing or create basic
+            "keywords": [class_item.subject] if class_item.subject else [],
+            "is_culturally_rooted": False,
+            "cultural_authenticity_score": 0.3
+        })
+    }
+
+def _mentor_results(query: UnifiedSearchQuery) -> Tuple[List[dict], int]:
+    """Retrieval stage: mentors as unified result dicts, and the mentor total"""
+    mentor_query = MentorSearchQuery(
+        q=query.q,
+        category=query.category,
+        city=query.city,
+        country=query.country,
+        minRating=query.minRating,
+        maxRate=query.maxPrice,
+        isVerified=query.isVerified,
+        sortBy="avgRating",
+        sortOrder="desc"
+    )
+    
+    # Every match is ranked, not just one API page
+    mentors, total_mentors = search_mentors(mentor_query, all_matches=True)
+    return [_mentor_result(mentor) for mentor in mentors], total_mentors
+
+def _class_results(query: UnifiedSearchQuery) -> Tuple[List[dict], int]:
+    """Retrieval stage: classes as unified result dicts, and the class total"""
+    class_query = ClassSearchQuery(
+        q=query.q,
+        category=query.category,
+        ageGroup=query.ageGroup,
+        format=query.format if query.format else ("online" if query.isOnline else None),
+        city=query.city,
+        country=query.country,
+        minRating=query.minRating,
+        maxPrice=query.maxPrice,
+        sortBy="createdAt",
+        sortOrder="desc"
+    )
+    
+    classes, total_classes = search_classes(class_query, all_matches=True)
+    return [_class_result(class_item) for class_item in classes], total_classes
+
+def _run_stage(retrieve: Callable[[UnifiedSearchQuery], Tuple[List[dict], int]],
+               query: UnifiedSearchQuery) -> Tuple[List[dict], int, dict]:
+    """Retrieve and filter one result type; returns (results, total, timing)"""
+    started = time.perf_counter()
+    results, total = retrieve(query)
+    retrieved = time.perf_counter()
+    filtered = apply_unified_filters(results, query)
+    timing = {
+        "retrieveMs": round((retrieved - started) * 1000, 2),
+        "filterMs": round((time.perf_counter() - retrieved) * 1000, 2),
+        "candidates": len(results),
+        "matched": len(filtered),
+    }
+    return filtered, total, timing
+
+def _rank(query: UnifiedSearchQuery, depth: int) -> Tuple[List[dict], int, Dict[str, int], dict]:
+    """Run the retrieval stages concurrently and keep the first `depth` ranked results"""
+    stages = []
+    # Search mentors if not filtered to classes only
+    if not query.type or query.type == "mentor":
+        stages.append(("mentors", _mentor_results))
+    # Search classes if not filtered to mentors only
+    if not query.type or query.type == "class":
+        stages.append(("classes", _class_results))
+    
+    # Each stage sees this request's Firestore stats and document loader
+    futures = [(name, _search_pool.submit(contextvars.copy_context().run, _run_stage, retrieve, query))
+               for name, retrieve in stages]
+    
+    counts = {"mentors": 0, "classes": 0}
+    timings = {}
+    
+    def stage_results():
+        # Mentors first, so ties keep the order a full sort would give them
+        for name, future in futures:
+            results, counts[name], timings[name] = future.result()
+            yield from results
+    
+    merge_started = time.perf_counter()
+    ranked, total = merge_unified_results(stage_results(), query.sortBy, query.sortOrder, depth)
+    timings["merge"] = {"ms": round((time.perf_counter() - merge_started) * 1000, 2), "heapSize": depth}
+    return ranked, total, counts, timings
+
+def _hydrate(refs: Iterable[Tuple[str, str]]) -> List[dict]:
+    """Unified result dicts for (type, id) pairs, read in one get_all (deleted documents are skipped)"""
+    refs = list(refs)
+    mentor_ids = [doc_id for kind, doc_id in refs if kind == "mentor"]
+    class_ids = [doc_id for kind, doc_id in refs if kind == "class"]
+    with loader_scope():
+        prime_documents("mentors", *mentor_ids)
+        prime_documents("classes", *class_ids)
+        items = {("mentor", doc_id): item for doc_id, item in zip(mentor_ids, fetch_mentors_by_ids(mentor_ids))}
+        items.update({("class", doc_id): item for doc_id, item in zip(class_ids, fetch_classes_by_ids(class_ids))})
+    results = []
+    for ref in refs:
+        item = items.get(ref)
+        if item is not None:
+            results.append(_mentor_result(item) if ref[0] == "mentor" else _class_result(item))
+    return results
+
+def unified_search(query: UnifiedSearchQuery, cursor: Optional[str] = None) -> Tuple[List[SearchResult], dict]:
     """
     Unified search across mentors and classes with intelligent ranking
+    
+    The first page of a query ranks every candidate: mentor and class
+    retrieval run concurrently and feed a bounded heap that keeps the first
+    SEARCH_SESSION_DEPTH results (more if the requested page lies deeper).
+    The ranked ids are stored as a search session (see
+    app/services/search_sessions.py), so later pages - by `page` or by the
+    `cursor` returned in stats["nextCursor"] - only read the documents they
+    show. stats["stages"] has per-stage timings (returned by
+    /search?debug=true).
     """
     try:
-        search_results = []
-        mentor_count = 0
-        class_count = 0
-        
-        # Search mentors if not filtered to classes only
-        if not query.type or query.type == "mentor":
-            mentor_query = MentorSearchQuery(
-                q=query.q,
-                category=query.category,
-                city=query.city,
-                country=query.country,
-                minRating=query.minRating,
-                maxRate=query.maxPrice,
-                isVerified=query.isVerified,
-                sortBy="avgRating",
-                sortOrder="desc",
-                page=1,
-                pageSize=100  # Get more results for unified ranking
-            )
-            
-            mentors, total_mentors = search_mentors(mentor_query)
-            mentor_count = total_mentors
-            
-            # Convert mentors to unified search results
-            for mentor in mentors:
-                # Calculate price (use one-on-one rate as primary price)
-                price = None
-                if mentor.pricing:
-                    price = mentor.pricing.oneOnOneRate
-                
-                # Format location string
-                location = f"{mentor.city}, {mentor.country}"
-                
-                # Convert mentor to dict format for cultural ranking (handle nested Pydantic objects)
-                mentor_dict = mentor.dict() if hasattr(mentor, 'dict') else mentor.__dict__
-                
-                search_result = {
-                    "type": "mentor",
-                    "id": mentor.uid,
-                    "title": mentor.displayName,
-                    "description": mentor.headline or mentor.bio,
-                    "category": mentor.category,
-                    "rating": mentor.stats.avgRating if mentor.stats else None,
-                    "price": price,
-                    "location": location,
-                    "imageUrl": mentor.photoURL,
-                    "tags": mentor.searchKeywords,
-                    "data": mentor_dict,  # Use dict format for cultural ranking
-                    "searchMetadata": {  # Add basic searchMetadata for cultural ranking
-                        "keywords": mentor.searchKeywords or [],
-                        "is_culturally_rooted": False,  # Will be determined by cultural ranking
-                        "cultural_authenticity_score": 0.3
-                    }
-                }
-                
-                search_results.append(search_result)
+        started = time.perf_counter()
+        if cursor:
+            params, offset = decode_cursor(cursor)
+            # Cursors carry the normalized query only; page and pageSize come from the request
+            if not set(params) <= CURSOR_FIELDS:
+                raise HTTPException(status_code=400, detail="Invalid search cursor")
+            try:
+                query = UnifiedSearchQuery(**params, pageSize=query.pageSize)
+            except ValidationError:
+                raise HTTPException(status_code=400, detail="Invalid search cursor")
+        else:
+            offset = (query.page - 1) * query.pageSize
+        params = query.model_dump(exclude={"page", "pageSize"}, exclude_none=True)
+        key = session_key(params)
+        end_idx = offset + query.pageSize
         
-        # Search classes if not filtered to mentors only
-        if not query.type or query.type == "class":
-            class_query = ClassSearchQuery(
-                q=query.q,
-                category=query.category,
-                ageGroup=query.ageGroup,
-                format=query.format if query.format else ("online" if query.isOnline else None),
-                city=query.city,
-                country=query.country,
-                minRating=query.minRating,
-                maxPrice=query.maxPrice,
-                sortBy="createdAt",
-                sortOrder="desc",
-                page=1,
-                pageSize=100  # Get more results for unified ranking
-            )
-            
-            classes, total_classes = search_classes(class_query)
-            class_count = total_classes
-            
-            # Convert classes to unified search results
-            for class_item in classes:
-                # Calculate price
-                price = None
-                if class_item.pricing:
-                    price = class_item.pricing.perSessionRate
-                
-                # Format location string
-                location = "Online" if class_item.format == "online" else class_item.format
-                
-                # Convert class to dict format for cultural ranking (handle nested Pydantic objects)
-                class_dict = class_item.dict() if hasattr(class_item, 'dict') else class_item.__dict__
-                
-                search_result = {
-                    "type": "class",
-                    "id": class_item.classId,
-                    "title": class_item.title,
-                    "description": class_item.description,
-                    "category": class_item.category,
-                    "rating": class_item.mentorRating,
-                    "price": price,
-                    "location": location,
-                    "imageUrl": class_item.mentorPhotoURL,
-                    "tags": [class_item.subject] if class_item.subject else [],
-                    "data": class_dict,  # Use dict format for cultural ranking
-                    "searchMetadata": getattr(class_item, 'searchMetadata', {  # Use existing or create basic
-                        "keywords": [class_item.subject] if class_item.subject else [],
-                        "is_culturally_rooted": False,
-                        "cultural_authenticity_score": 0.3
-                    })
-                }
-                
-                search_results.append(search_result)
-                
-        # Apply unified filtering
-        filtered_results = apply_unified_filters(search_results, query)
+        # Versions are read before ranking, so a write made meanwhile invalidates the session
+        versions = catalog_versions.snapshot(SESSION_DEPENDENCIES)
+        session = search_sessions.get(key, versions)
+        if session is not None and end_idx > len(session.ranked) and len(session.ranked) < session.total:
+            session = None  # Page lies past the ranked depth - rank again, deep enough for it
+        if session is None:
+            ranked, total, counts, timings = _rank(query, max(SEARCH_SESSION_DEPTH, end_idx))
+            session = SearchSession(versions, time.monotonic(), tuple((r["type"], r["id"]) for r in ranked),
+                                    total, counts["mentors"], counts["classes"])
+            search_sessions.put(key, session)
+            paginated_results = ranked[offset:end_idx]
+            timings["session"] = "miss"
+        else:
+            hydrate_started = time.perf_counter()
+            paginated_results = _hydrate(session.ranked[offset:end_idx])
+            timings = {"session": "hit",
+                       "hydrate": {"ms": round((time.perf_counter() - hydrate_started) * 1000, 2),
+                                   "ids": len(session.ranked[offset:end_idx])}}
         
-        # Sort results
-        sorted_results = sort_unified_results(filtered_results, query.sortBy, query.sortOrder)
-        
-        # Apply pagination
-        total = len(sorted_results)
-        start_idx = (query.page - 1) * query.pageSize
-        end_idx = start_idx + query.pageSize
-        paginated_results = sorted_results[start_idx:end_idx]
-        
-        # Convert back to SearchResult objects  
+        # Wrap in SearchResult without re-validating the mentor/class models
         final_results = []
         for result_dict in paginated_results:
-            final_results.append(SearchResult(**result_dict))
+            final_results.append(SearchResult.model_construct(**result_dict))
+        
+        timings["totalMs"] = round((time.perf_counter() - started) * 1000, 2)
         
         stats = {
-            "total": total,
-            "mentorCount": mentor_count,
-            "classCount": class_count
+            "total": session.total,
+            "mentorCount": session.mentor_count,
+            "classCount": session.class_count,
+            "page": offset // query.pageSize + 1,
+            "nextCursor": encode_cursor(params, end_idx) if end_idx < session.total else None,
+            "query": query,
+            "stages": timings
         }
         
         return final_results, stats
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unified search failed: {str(e)}")
 
@@ -255,23 +357,45 @@ def apply_unified_filters(results: List[dict], query: UnifiedSearchQuery) -> Lis
     
     return filtered_results
 
+def _sort_spec(sort_by: str, sort_order: str) -> Tuple[Callable[[dict], Any], bool]:
+    """(key, reverse) for ordering unified results"""
+    if sort_by == "rating":
+        return (lambda r: r["rating"] or 0), sort_order == "desc"
+    if sort_by == "price":
+        return (lambda r: r["price"] or 0), sort_order == "desc"
+    
+    # Default to creation date - newest first
+    def get_date_score(r):
+        created_at = getattr(r["data"], "createdAt", None)
+        # Ensure it's always a string for comparison
+        return str(created_at) if created_at else "1970-01-01"
+    return get_date_score, True
+
 def sort_unified_results(results: List[dict], sort_by: str, sort_order: str) -> List[dict]:
     """Sort results by basic criteria"""
-    reverse = sort_order == "desc"
+    key, reverse = _sort_spec(sort_by, sort_order)
+    results.sort(key=key, reverse=reverse)
+    return results
+
+def merge_unified_results(results: Iterable[dict], sort_by: str, sort_order: str,
+                          limit: int) -> Tuple[List[dict], int]:
+    """
+    The first `limit` results in sort_unified_results order, and how many results there were.
     
-    if sort_by == "rating":
-        results.sort(key=lambda r: r["rating"] or 0, reverse=reverse)
-    elif sort_by == "price":
-        results.sort(key=lambda r: r["price"] or 0, reverse=reverse)
-    else:
-        # Default to creation date - newest first
-        def get_date_score(r):
-            created_at = r["data"].get("createdAt", "1970-01-01") if isinstance(r["data"], dict) else "1970-01-01"
-            # Ensure it's always a string for comparison
-            return str(created_at) if created_at else "1970-01-01"
-        results.sort(key=get_date_score, reverse=True)
+    Uses a heap of `limit` entries instead of sorting everything;
+    heapq.nsmallest/nlargest keep ties in input order, like the stable sort.
+    """
+    key, reverse = _sort_spec(sort_by, sort_order)
+    total = 0
     
-    return results
+    def counted():
+        nonlocal total
+        for result in results:
+            total += 1
+            yield result
+    
+    top = (heapq.nlargest if reverse else heapq.nsmallest)(limit, counted(), key=key)
+    return top, total
 
 # Legacy function for backward compatibility
 def search_classes_with_filters(
@@ -0,0 +1,97 @@
+"""
+Search sessions for /search pagination.
+
+Ranking a unified search means retrieving and filtering every candidate
+mentor and class, so it used to be redone for every page (and only the first
+100 candidates of each type were ever ranked). Now the first request for a
+query ranks once and stores the ranked (type, id) list as a session; later
+pages slice the list and read only the visible documents.
+
+- Sessions are keyed by the normalized query (everything but page/pageSize)
+  and stored with the catalog versions of mentors and classes; a catalog
+  write, SEARCH_SESSION_TTL or LRU eviction ends the session.
+- The cursor returned with each page is an opaque token carrying the
+  normalized query and the next offset, so it survives an expired session
+  or a request landing on another instance (the query is ranked again).
+"""
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException
+
+SESSION_TTL = float(os.getenv("SEARCH_SESSION_TTL", "300"))
+SESSION_MAX_ENTRIES = int(os.getenv("SEARCH_SESSION_MAX_ENTRIES", "500"))
+
+# Catalog collections a ranking depends on (see response_cache.catalog_versions)
+SESSION_DEPENDENCIES = ("mentors", "classes")
+
+
+class SearchSession(NamedTuple):
+    versions: Tuple[int, ...]
+    stored_at: float
+    ranked: Tuple[Tuple[str, str], ...]  # (type, id) in rank order
+    total: int
+    mentor_count: int
+    class_count: int
+
+
+class SearchSessionCache:
+    """Bounded LRU of ranked result lists keyed by normalized query"""
+
+    def __init__(self, max_entries: int = SESSION_MAX_ENTRIES, ttl: float = SESSION_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, SearchSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, versions: Tuple[int, ...]) -> Optional[SearchSession]:
+        with self._lock:
+            session = self._entries.get(key)
+            if session is None:
+                return None
+            if session.versions != versions or time.monotonic() - session.stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return session
+
+    def put(self, key: str, session: SearchSession) -> None:
+        with self._lock:
+            self._entries[key] = session
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+search_sessions = SearchSessionCache()
+
+
+def session_key(params: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def encode_cursor(params: Dict[str, Any], offset: int) -> str:
+    raw = json.dumps({"q": params, "o": offset}, sort_keys=True, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Dict[str, Any], int]:
+    """(normalized query, offset) from a cursor; 400 if it was not issued by encode_cursor"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        params, offset = payload["q"], payload["o"]
+        if not isinstance(params, dict) or not isinstance(offset, int) or offset < 0:
+            raise ValueError("malformed cursor")
+        return params, offset
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid search cursor")
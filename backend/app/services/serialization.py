@@ -0,0 +1,61 @@
+"""
+Response serialization for the large list endpoints.
+
+- The app's default response class is ORJSONResponse (see main.py).
+- List endpoints (/classes, /mentors, /search) build their response model and
+  serialize it in a single `model_dump_json` call (pydantic-core, in Rust)
+  instead of FastAPI's validate -> encode -> json.dumps round trip.
+- `fields=title,schedule,mentorName` trims every item to those fields
+  (dotted paths such as `pricing.subtotal` select nested fields); the item's
+  id fields are always kept so clients can still link to it.
+"""
+from typing import Dict, Iterable, Optional, Type, Union
+
+from fastapi import Response
+from pydantic import BaseModel
+
+IncludeTree = Dict[str, Union[bool, "IncludeTree"]]
+
+
+def parse_fields(fields: Optional[str]) -> Optional[IncludeTree]:
+    """'title,pricing.subtotal' -> {'title': True, 'pricing': {'subtotal': True}}"""
+    if not fields:
+        return None
+    tree: IncludeTree = {}
+    for path in fields.split(","):
+        parts = [part.strip() for part in path.split(".") if part.strip()]
+        if not parts:
+            continue
+        node = tree
+        for part in parts[:-1]:
+            child = node.get(part)
+            if child is True:
+                break  # Whole parent already selected
+            node = node.setdefault(part, {})
+        else:
+            node[parts[-1]] = True
+    return tree or None
+
+
+def list_response(
+    model: Type[BaseModel],
+    payload: dict,
+    items_key: str,
+    fields: Optional[str] = None,
+    always: Iterable[str] = (),
+    exclude: Iterable[str] = (),
+) -> Response:
+    """
+    Serialize a list response model in one pass, optionally with a sparse fieldset.
+
+    `exclude` names top-level fields to leave out (e.g. optional debug output).
+    """
+    include = None
+    item_fields = parse_fields(fields)
+    if item_fields is not None:
+        for name in always:
+            item_fields[name] = True
+        include = {name: True for name in model.model_fields}
+        include[items_key] = {"__all__": item_fields}
+    body = model.model_validate(payload).model_dump_json(include=include, exclude=set(exclude) or None)
+    return Response(content=body, media_type="application/json")
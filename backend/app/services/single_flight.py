@@ -0,0 +1,121 @@
+"""
+Single-flight coalescing for hot catalog queries.
+
+The homepage fires the same few reads in bursts (upcoming workshops,
+featured classes and mentors, testimonials, subjects), and each request used
+to scan Firestore on its own. Functions decorated with `@single_flight`
+share one computation between concurrent calls with the same arguments: the
+first caller runs it, the others wait for its result (or its exception).
+
+With `ttl` the result is also kept for that many seconds, and with
+`dependencies` it is dropped as soon as one of those catalog versions
+changes (see response_cache.catalog_versions), so a write is visible to the
+next call. Results are shared between callers and must be treated as
+read-only, like the models in model_cache.
+
+Outcomes are counted in single_flight_calls_total{function, outcome}:
+`leader` (ran the function), `shared` (waited for a leader) and `cached`.
+"""
+import functools
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from app.services.instrumentation import SINGLE_FLIGHT_CALLS
+from app.services.response_cache import catalog_versions
+
+# Default TTL for the homepage queries; 0 coalesces concurrent calls only
+HOT_QUERY_TTL = float(os.getenv("HOT_QUERY_TTL", "10"))
+# SINGLE_FLIGHT=0 turns coalescing and caching off (every call runs the function)
+ENABLED = os.getenv("SINGLE_FLIGHT", "1").lower() not in ("0", "false", "no")
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """In-flight calls and recent results of one function, keyed by its arguments"""
+
+    enabled = ENABLED
+
+    def __init__(self, name: str, ttl: float = 0.0, dependencies: Tuple[str, ...] = ()):
+        self.name = name
+        self.ttl = ttl
+        self.dependencies = dependencies
+        self._calls: Dict[Hashable, _Call] = {}
+        self._results: Dict[Hashable, Tuple[float, Tuple[int, ...], Any]] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        if not self.enabled:
+            return func()
+        versions = catalog_versions.snapshot(self.dependencies)
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None:
+                stored_at, stored_versions, result = cached
+                if stored_versions == versions and time.monotonic() - stored_at <= self.ttl:
+                    SINGLE_FLIGHT_CALLS.inc((self.name, "cached"))
+                    return result
+                del self._results[key]
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            SINGLE_FLIGHT_CALLS.inc((self.name, "shared"))
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        SINGLE_FLIGHT_CALLS.inc((self.name, "leader"))
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if call.error is None and self.ttl > 0:
+                    self._results[key] = (time.monotonic(), versions, call.result)
+            call.done.set()
+        return call.result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._results.clear()
+
+
+_registry: Dict[str, SingleFlight] = {}
+
+
+def single_flight(ttl: float = 0.0, dependencies: Tuple[str, ...] = ()):
+    """Decorator: coalesce concurrent identical calls (and keep results for `ttl` seconds)"""
+    def decorate(func):
+        group = SingleFlight(f"{func.__module__}.{func.__qualname__}", ttl, dependencies)
+        _registry[group.name] = group
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            return group.do(key, lambda: func(*args, **kwargs))
+
+        wrapper.single_flight = group
+        return wrapper
+    return decorate
+
+
+def clear_single_flight() -> None:
+    """Drop every kept result (tests, or after bulk writes that bypass the version hooks)"""
+    for group in _registry.values():
+        group.clear()
@@ -0,0 +1,336 @@
+"""
+Stripe webhook ingestion.
+
+Verified events are recorded in the `stripe_events` collection keyed by the
+Stripe event id, so redeliveries of the same event are stored only once. A
+worker pool then applies each event to `payments` and `bookings` inside a
+single Firestore transaction.
+
+Transitions only move state forward (e.g. a late `payment_intent.processing`
+never downgrades a succeeded payment), so replayed and out-of-order events
+converge on the same final documents.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import stripe
+from fastapi import HTTPException
+from google.api_core.exceptions import AlreadyExists
+from google.cloud import firestore
+
+from app.config import settings
+from app.services.firestore import db
+from app.services.dashboard_service import booking_change_writes
+
+logger = logging.getLogger(__name__)
+
+STRIPE_EVENTS_COLLECTION = "stripe_events"
+STRIPE_EVENT_WORKERS = int(os.getenv("STRIPE_EVENT_WORKERS", 4))
+MAX_EVENT_ATTEMPTS = 3
+# Failed processing rounds (each up to MAX_EVENT_ATTEMPTS tries) before an event is dead-lettered
+MAX_EVENT_REPLAYS = int(os.getenv("STRIPE_EVENT_MAX_REPLAYS", 5))
+
+# Event processing statuses
+RECEIVED = "received"
+PROCESSED = "processed"
+IGNORED = "ignored"
+FAILED = "failed"
+DEAD_LETTER = "dead_letter"  # Given up on - left for manual inspection, never replayed
+
+# Forward-only ordering of statuses. Lower ranks never overwrite higher ones.
+PAYMENT_STATUS_RANK = {
+    "pending": 0,
+    "processing": 1,
+    "failed": 2,
+    "cancelled": 2,
+    "succeeded": 3,
+    "refunded": 4,
+}
+BOOKING_PAYMENT_STATUS_RANK = {
+    "unpaid": 0,
+    "paid": 1,
+    "completed": 1,
+    "refunded": 2,
+}
+
+HANDLED_EVENT_TYPES = {
+    "payment_intent.processing",
+    "payment_intent.succeeded",
+    "payment_intent.payment_failed",
+    "payment_intent.canceled",
+    "charge.refunded",
+    "checkout.session.completed",
+}
+
+def booking_id_for_checkout_session(session_id: str) -> str:
+    """Deterministic booking id so the webhook and /payments/success create the same booking"""
+    return f"booking_{hashlib.sha256(session_id.encode()).hexdigest()[:12]}"
+
+# ---------- Intake ----------
+
+def ingest_event(payload: bytes, sig_header: Optional[str]) -> Dict[str, Any]:
+    """Verify a webhook delivery, record it once, and queue it for processing"""
+    if not settings.stripe_webhook_secret:
+        raise HTTPException(status_code=500, detail="Stripe webhook secret is not configured")
+
+    try:
+        stripe.Webhook.construct_event(payload, sig_header, settings.stripe_webhook_secret)
+    except (ValueError, stripe.error.SignatureVerificationError):
+        raise HTTPException(status_code=400, detail="Invalid Stripe webhook signature")
+
+    event = json.loads(payload)
+    event_id = event["id"]
+
+    try:
+        db.collection(STRIPE_EVENTS_COLLECTION).document(event_id).create({
+            "eventId": event_id,
+            "type": event.get("type"),
+            "livemode": event.get("livemode", False),
+            "stripeCreated": event.get("created"),
+            "payload": event,
+            "status": RECEIVED,
+            "attempts": 0,
+            "receivedAt": datetime.now().isoformat(),
+        })
+    except AlreadyExists:
+        # Redelivery - the original copy is already queued or processed
+        return {"received": True, "eventId": event_id, "duplicate": True}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to record Stripe event: {str(e)}")
+
+    schedule_event(event_id)
+    return {"received": True, "eventId": event_id, "duplicate": False}
+
+# ---------- State Transitions ----------
+
+def _event_time(event: Dict[str, Any]) -> str:
+    created = event.get("created")
+    return datetime.fromtimestamp(created).isoformat() if created else datetime.now().isoformat()
+
+def _forward_status(current: Optional[str], new: str, ranks: Dict[str, int]) -> bool:
+    return current is None or ranks.get(new, 0) > ranks.get(current, -1)
+
+def _fill_missing(update: Dict[str, Any], current: Optional[Dict[str, Any]], fields: Dict[str, Any]) -> None:
+    """Set fields only if the stored document does not have them yet"""
+    for key, value in fields.items():
+        if value is not None and not (current or {}).get(key):
+            update[key] = value
+
+def plan_event_writes(event: Dict[str, Any], payment: Optional[Dict[str, Any]],
+                      booking: Optional[Dict[str, Any]],
+                      related: Optional[Dict[str, Optional[Dict[str, Any]]]] = None
+                      ) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Work out the (payment, booking) field updates for an event given the current
+    documents. Pure function - returns None for a document that needs no change.
+    """
+    event_type = event.get("type")
+    obj = event.get("data", {}).get("object", {})
+    at = _event_time(event)
+    payment_update: Dict[str, Any] = {}
+    booking_update: Dict[str, Any] = {}
+
+    # Late events for an earlier attempt's intent must not touch the current one
+    intent_id = obj.get("payment_intent") if (event_type or "").startswith("charge.") else obj.get("id")
+    if payment is not None and payment.get("stripePaymentIntentId") and intent_id \
+            and intent_id != payment["stripePaymentIntentId"]:
+        payment = None
+
+    def set_payment_status(status: str):
+        if payment is not None and _forward_status(payment.get("status"), status, PAYMENT_STATUS_RANK):
+            payment_update["status"] = status
+
+    def set_booking_payment_status(status: str):
+        if booking is not None and _forward_status(booking.get("paymentStatus"), status, BOOKING_PAYMENT_STATUS_RANK):
+            booking_update["paymentStatus"] = status
+
+    if event_type == "payment_intent.processing":
+        set_payment_status("processing")
+
+    elif event_type == "payment_intent.succeeded":
+        set_payment_status("succeeded")
+        if payment is not None:
+            _fill_missing(payment_update, payment, {"stripeChargeId": obj.get("latest_charge"), "succeededAt": at})
+        set_booking_payment_status("paid")
+        if booking is not None:
+            if booking.get("bookingStatus", "pending") == "pending":
+                booking_update["bookingStatus"] = "confirmed"
+            _fill_missing(booking_update, booking, {"paymentIntentId": obj.get("id"), "confirmedAt": at})
+
+    elif event_type == "payment_intent.payment_failed":
+        set_payment_status("failed")
+        if payment is not None:
+            _fill_missing(payment_update, payment,
+                          {"lastPaymentError": (obj.get("last_payment_error") or {}).get("message")})
+
+    elif event_type == "payment_intent.canceled":
+        set_payment_status("cancelled")
+
+    elif event_type == "charge.refunded":
+        if payment is not None:
+            refunded = obj.get("amount_refunded", 0)
+            if refunded > (payment.get("refundedAmount") or 0):
+                payment_update["refundedAmount"] = refunded
+            _fill_missing(payment_update, payment, {"stripeChargeId": obj.get("id")})
+            if refunded >= obj.get("amount", payment.get("amount", 0)):
+                set_payment_status("refunded")
+                set_booking_payment_status("refunded")
+
+    elif event_type == "checkout.session.completed" and obj.get("payment_status") == "paid" and booking is None:
+        metadata = obj.get("metadata") or {}
+        student = (related or {}).get("student") or {}
+        class_data = (related or {}).get("class") or {}
+        booking_update = {
+            "bookingId": booking_id_for_checkout_session(obj["id"]),
+            "studentId": metadata.get("studentId"),
+            "classId": metadata.get("classId"),
+            "mentorId": metadata.get("mentorId") or class_data.get("mentorId"),
+            "studentName": student.get("displayName", "Unknown Student"),
+            "className": class_data.get("title", "Unknown Class"),
+            "mentorName": class_data.get("mentorName", "Unknown Mentor"),
+            "bookingStatus": "confirmed",
+            "paymentStatus": "paid",
+            "stripeSessionId": obj["id"],
+            "amount": float(metadata.get("amount") or (obj.get("amount_total") or 0) / 100),
+            "currency": metadata.get("currency") or obj.get("currency"),
+            "personalGoals": metadata.get("personalGoals") or None,
+            "parentId": metadata.get("parentId") or None,
+            "youngLearnerName": metadata.get("youngLearnerName") or None,
+            "bookedAt": at,
+            "confirmedAt": at,
+        }
+
+    if payment_update:
+        payment_update["updatedAt"] = datetime.now().isoformat()
+    if booking_update:
+        booking_update["updatedAt"] = datetime.now().isoformat()
+    return payment_update or None, booking_update or None
+
+# ---------- Worker ----------
+
+def _resolve_targets(event: Dict[str, Any], transaction) -> Tuple[Optional[Any], Optional[Any], Dict[str, Any]]:
+    """Document references (payment, booking) plus related refs an event touches"""
+    obj = event.get("data", {}).get("object", {})
+    metadata = obj.get("metadata") or {}
+    event_type = event.get("type", "")
+
+    if event_type == "checkout.session.completed":
+        booking_ref = db.collection("bookings").document(booking_id_for_checkout_session(obj["id"]))
+        related = {}
+        if metadata.get("studentId"):
+            related["student"] = db.collection("users").document(metadata["studentId"])
+        if metadata.get("classId"):
+            related["class"] = db.collection("classes").document(metadata["classId"])
+        return None, booking_ref, related
+
+    payment_ref = None
+    if metadata.get("payment_id"):
+        payment_ref = db.collection("payments").document(metadata["payment_id"])
+    else:
+        # Intents created before payment_id was added to metadata
+        intent_id = obj.get("payment_intent") if event_type.startswith("charge.") else obj.get("id")
+        if intent_id:
+            query = db.collection("payments").where("stripePaymentIntentId", "==", intent_id).limit(1)
+            for doc in transaction.get(query):
+                payment_ref = doc.reference
+
+    booking_ref = db.collection("bookings").document(metadata["booking_id"]) if metadata.get("booking_id") else None
+    return payment_ref, booking_ref, {}
+
+@firestore.transactional
+def _apply_event(transaction, event_ref) -> str:
+    event_doc = event_ref.get(transaction=transaction)
+    if not event_doc.exists:
+        return IGNORED
+    stored = event_doc.to_dict()
+    if stored.get("status") in (PROCESSED, IGNORED):
+        return stored["status"]
+
+    event = stored["payload"]
+    if event.get("type") not in HANDLED_EVENT_TYPES:
+        transaction.update(event_ref, {"status": IGNORED, "processedAt": datetime.now().isoformat()})
+        return IGNORED
+
+    payment_ref, booking_ref, related_refs = _resolve_targets(event, transaction)
+    refs = [ref for ref in [payment_ref, booking_ref, *related_refs.values()] if ref is not None]
+    snapshots = {snap.reference.path: snap for snap in db.get_all(refs, transaction=transaction)} if refs else {}
+
+    def data_for(ref):
+        snap = snapshots.get(ref.path) if ref is not None else None
+        return snap.to_dict() if snap is not None and snap.exists else None
+
+    payment = data_for(payment_ref)
+    booking = data_for(booking_ref)
+    related = {name: data_for(ref) for name, ref in related_refs.items()}
+
+    payment_update, booking_update = plan_event_writes(event, payment, booking, related)
+    if payment_update and payment is not None:
+        transaction.update(payment_ref, payment_update)
+    if booking_update and booking_ref is not None:
+        transaction.set(booking_ref, booking_update, merge=True)
+        old_booking = {**booking, "bookingId": booking_ref.id} if booking is not None else None
+        for dashboard_ref, dashboard_update in booking_change_writes(old_booking, {**booking_update, "bookingId": booking_ref.id}):
+            transaction.set(dashboard_ref, dashboard_update, merge=True)
+
+    transaction.update(event_ref, {
+        "status": PROCESSED,
+        "attempts": stored.get("attempts", 0) + 1,
+        "processedAt": datetime.now().isoformat(),
+        "lastError": None,
+    })
+    return PROCESSED
+
+def process_event(event_id: str) -> str:
+    """Apply a recorded event, retrying transient failures with backoff"""
+    event_ref = db.collection(STRIPE_EVENTS_COLLECTION).document(event_id)
+    for attempt in range(1, MAX_EVENT_ATTEMPTS + 1):
+        try:
+            return _apply_event(db.transaction(), event_ref)
+        except Exception as e:
+            logger.warning("Stripe event %s failed (attempt %s): %s", event_id, attempt, e)
+            if attempt == MAX_EVENT_ATTEMPTS:
+                try:
+                    event_ref.update({"status": FAILED, "attempts": firestore.Increment(1), "lastError": str(e)})
+                except Exception:
+                    logger.exception("Could not mark Stripe event %s as failed", event_id)
+                return FAILED
+            time.sleep(0.5 * 2 ** (attempt - 1))
+    return FAILED
+
+_event_pool = ThreadPoolExecutor(max_workers=STRIPE_EVENT_WORKERS, thread_name_prefix="stripe-events")
+
+def schedule_event(event_id: str):
+    """Queue a recorded event for processing without waiting for it"""
+    return _event_pool.submit(process_event, event_id)
+
+def replay_pending_events(limit: int = 500) -> int:
+    """
+    Re-queue events that were recorded but never applied (e.g. after a restart).
+    Events that already failed MAX_EVENT_REPLAYS times are moved to DEAD_LETTER instead.
+    """
+    query = (db.collection(STRIPE_EVENTS_COLLECTION)
+             .where("status", "in", [RECEIVED, FAILED])
+             .limit(limit))
+    count = 0
+    for doc in query.stream():
+        data = doc.to_dict()
+        if data.get("status") == FAILED and data.get("attempts", 0) >= MAX_EVENT_REPLAYS:
+            logger.error("Stripe event %s failed %s times, dead-lettering it: %s",
+                         doc.id, data.get("attempts"), data.get("lastError"))
+            doc.reference.update({"status": DEAD_LETTER, "deadLetteredAt": datetime.now().isoformat()})
+            continue
+        schedule_event(doc.id)
+        count += 1
+    if count:
+        logger.info("Re-queued %s unprocessed Stripe events", count)
+    return count
+
+def shutdown_event_pool():
+    """Let in-flight events finish (called on application shutdown)"""
+    _event_pool.shutdown(wait=True)
@@ -2,6 +2,7 @@
 User data migration utilities to clean up redundant fields and inconsistencies
 """
 from app.services.firestore import db
+from app.services.migrations import register_migration, run_migration, get_migration
 from typing import Dict, Any, Optional
 import logging
 
@@ -103,33 +104,24 @@ def migrate_user_document(uid: str) -> bool:
         logger.error(f"Failed to migrate user {uid}: {str(e)}")
         return False
 
-def migrate_all_users() -> Dict[str, int]:
+@register_migration("users.clean_structure", version=1, collection="users",
+                    description="Remove redundant role/verification fields and normalize field names")
+def clean_structure(user_data: Dict[str, Any], context=None) -> Dict[str, Any]:
+    return migrate_user_data(user_data)
+
+def migrate_all_users(dry_run: bool = False, rerun: bool = True) -> Dict[str, int]:
     """
-    Migrate all users in the database to the new clean structure
+    Migrate all users in the database to the new clean structure.
+
+    Runs the `users.clean_structure` migration (paged, parallel, resumable -
+    see app.services.migrations); a rerun only writes users that still differ.
+    As before, "migrated" counts every user now in the clean structure, whether
+    it was rewritten or already clean, and "skipped" stays 0.
     """
-    results = {"migrated": 0, "skipped": 0, "failed": 0}
-    
-    try:
-        users_ref = db.collection("users")
-        docs = users_ref.stream()
-        
-        for doc in docs:
-            uid = doc.id
-            try:
-                if migrate_user_document(uid):
-                    results["migrated"] += 1
-                else:
-                    results["failed"] += 1
-            except Exception as e:
-                logger.error(f"Failed to process user {uid}: {str(e)}")
-                results["failed"] += 1
-        
-        logger.info(f"Migration complete: {results}")
-        return results
-        
-    except Exception as e:
-        logger.error(f"Failed to migrate users: {str(e)}")
-        return results
+    state = run_migration(get_migration("users.clean_structure"), dry_run=dry_run, rerun=rerun)
+    results = {"migrated": state["changed"] + state["unchanged"], "skipped": 0, "failed": state["failed"]}
+    logger.info("Migration complete: %s", results)
+    return results
 
 # Helper functions for checking roles (replacing the removed fields)
 def has_student_role(user_data: Dict[str, Any]) -> bool:
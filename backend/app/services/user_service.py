@@ -1,4 +1,7 @@
 from app.services.firestore import db
+from app.services.document_loader import get_documents
+from app.services.document_writes import update_document
+from app.services.response_cache import bump_catalog_version
 from app.models.user_models import (
     User, UserCreate, UserUpdate, StudentProfile, StudentProfileCreate, 
     StudentProfileUpdate, ParentProfile, ParentProfileCreate, ParentProfileUpdate
@@ -73,25 +76,26 @@ def get_user_flexible(uid: str) -> Optional[dict]:
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get user: {str(e)}")
 
+def get_users_flexible(uids: List[str]) -> List[Optional[dict]]:
+    """Users in input order, read in one get_all (None for missing users) - same format as get_user_flexible"""
+    from app.services.user_migration import clean_user_response
+    try:
+        return [clean_user_response(doc.to_dict()) if doc is not None and doc.exists else None
+                for doc in get_documents("users", uids)]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get users: {str(e)}")
+
 def update_user_flexible(uid: str, update_data: dict) -> dict:
     """Pure MongoDB-style flexible user update"""
     try:
-        doc_ref = db.collection("users").document(uid)
-        doc = doc_ref.get()
-        
-        if not doc.exists:
-            raise HTTPException(status_code=404, detail="User not found")
-        
         # Pure flexibility - use whatever frontend sends
         flexible_update = update_data.copy()
         flexible_update["updatedAt"] = datetime.now().isoformat()
         
         # Update with ANY fields
-        doc_ref.update(flexible_update)
+        _, raw_data = update_document("users", uid, flexible_update, not_found="User not found")
         
         # Return updated user as clean dict
-        updated_doc = doc_ref.get()
-        raw_data = updated_doc.to_dict()
         
         # Apply migration to clean up the response
         from app.services.user_migration import clean_user_response
@@ -184,22 +188,15 @@ def get_student_profile(uid: str) -> Optional[StudentProfile]:
 def update_student_profile_flexible(uid: str, update_data: dict) -> dict:
     """Update student profile"""
     try:
-        doc_ref = db.collection("student_profiles").document(uid)
-        doc = doc_ref.get()
-        
-        if not doc.exists:
-            raise HTTPException(status_code=404, detail="Student profile not found")
-        
         # Pure flexibility - use whatever frontend sends
         flexible_update = update_data.copy()
         flexible_update["updatedAt"] = datetime.now().isoformat()
         
         # Update with ANY fields
-        doc_ref.update(flexible_update)
+        _, updated = update_document("student_profiles", uid, flexible_update, not_found="Student profile not found")
         
         # Return updated profile as plain dict
-        updated_doc = doc_ref.get()
-        return updated_doc.to_dict()
+        return updated
         
     except Exception as e:
         if isinstance(e, HTTPException):
@@ -261,22 +258,15 @@ def get_parent_profile(uid: str) -> Optional[ParentProfile]:
 def update_parent_profile_flexible(uid: str, update_data: dict) -> dict:
     """Update parent profile"""
     try:
-        doc_ref = db.collection("parent_profiles").document(uid)
-        doc = doc_ref.get()
-        
-        if not doc.exists:
-            raise HTTPException(status_code=404, detail="Parent profile not found")
-        
         # Pure flexibility - use whatever frontend sends
         flexible_update = update_data.copy()
         flexible_update["updatedAt"] = datetime.now().isoformat()
         
         # Update with ANY fields
-        doc_ref.update(flexible_update)
+        _, updated = update_document("parent_profiles", uid, flexible_update, not_found="Parent profile not found")
         
         # Return updated profile as plain dict
-        updated_doc = doc_ref.get()
-        return updated_doc.to_dict()
+        return updated
         
     except Exception as e:
         if isinstance(e, HTTPException):
@@ -323,6 +313,8 @@ def delete_user(uid: str) -> bool:
         
         # Delete user
         user_ref.delete()
+        # Cached mentor listings and classes (mentor names) may include this user
+        bump_catalog_version("mentors", "classes")
         
         return True
         
@@ -0,0 +1,103 @@
+"""
+Endpoint benchmarks against the in-memory Firestore fake.
+
+    cd backend && python -m pytest benchmarks
+    BENCH_SIZES=1k,10k,100k python -m pytest benchmarks --benchmark-autosave
+    python -m pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:20%
+
+Latency is measured by pytest-benchmark. Firestore reads and bytes received
+per request (from the Server-Timing header), response size, items returned
+and read amplification (reads per returned item) are attached to each
+benchmark's extra_info and summarised at the end of the run. test_load fires
+BENCH_BURST identical homepage requests at once and reports the reads they
+cost with single-flight off and on.
+"""
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+# The real client is replaced by the fake before any request, so these only
+# need to let app.main import without credentials (K_SERVICE selects the lazy
+# Application Default Credentials path for firebase_admin)
+os.environ.setdefault("K_SERVICE", "benchmarks")
+os.environ.setdefault("FIRESTORE_EMULATOR_HOST", "localhost:8080")
+os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "benchmarks")
+os.environ.setdefault("STRIPE_SECRET_KEY", "sk_test_benchmarks")
+os.environ.setdefault("GOOGLE_AI_API_KEY", "benchmarks")
+os.environ.setdefault("EMAIL_QUEUE_BACKEND", "memory")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.response_cache import response_cache
+from app.services.search_sessions import search_sessions
+from app.services.single_flight import clear_single_flight
+from benchmarks.datasets import SIZES, seed
+from tests.firestore_fake import FakeFirestore, use_fake_firestore
+
+BENCH_SIZES = [size.strip() for size in os.getenv("BENCH_SIZES", "1k,10k").split(",") if size.strip()]
+BURST = int(os.getenv("BENCH_BURST", "16"))
+ROUNDS = {"1k": 20, "10k": 5, "100k": 2}
+READS_PATTERN = re.compile(r'fs-reads;desc="(\d+)"')
+BYTES_PATTERN = re.compile(r'fs-bytes;desc="(\d+)"')
+
+_read_report = []
+_burst_report = []
+
+
+@pytest.fixture(scope="session", params=BENCH_SIZES)
+def seeded(request):
+    """(TestClient, Dataset) with a seeded fake injected in place of `db`"""
+    fake = FakeFirestore()
+    dataset = seed(fake, SIZES[request.param])
+    with use_fake_firestore(fake):
+        yield TestClient(app), dataset, request.param
+
+
+@pytest.fixture
+def measure(benchmark, seeded):
+    """Benchmark an uncached GET and record Firestore reads and read amplification"""
+    client, dataset, size = seeded
+
+    def run(path, count_items):
+        def call():
+            # Measure the handler, not ResponseCacheMiddleware or the service-level caches
+            response_cache.clear()
+            search_sessions.clear()
+            clear_single_flight()
+            response = client.get(path)
+            assert response.status_code == 200, response.text
+            return response
+
+        response = benchmark.pedantic(call, rounds=ROUNDS.get(size, 3), iterations=1, warmup_rounds=1)
+        reads = int(READS_PATTERN.search(response.headers["server-timing"]).group(1))
+        firestore_bytes = int(BYTES_PATTERN.search(response.headers["server-timing"]).group(1))
+        items = count_items(response.json())
+        amplification = round(reads / max(items, 1), 1)
+        benchmark.extra_info.update(dataset=size, firestore_reads=reads, firestore_bytes=firestore_bytes,
+                                    response_bytes=len(response.content), items=items,
+                                    read_amplification=amplification)
+        _read_report.append((benchmark.name, reads, firestore_bytes, len(response.content), items, amplification))
+        return response
+
+    run.dataset = dataset
+    return run
+
+
+def pytest_terminal_summary(terminalreporter):
+    if _burst_report:
+        terminalreporter.section(f"firestore reads per burst of {BURST} identical requests")
+        terminalreporter.write_line(f"{'endpoint':<52} {'size':>5} {'single-flight off':>18} {'on':>8}")
+        for path, size, off, on in _burst_report:
+            terminalreporter.write_line(f"{path:<52} {size:>5} {off:>18} {on:>8}")
+    if not _read_report:
+        return
+    terminalreporter.section("firestore reads per request")
+    terminalreporter.write_line(f"{'benchmark':<52} {'reads':>8} {'fs bytes':>10} {'resp bytes':>10} "
+                                f"{'items':>6} {'reads/item':>11}")
+    for name, reads, firestore_bytes, response_bytes, items, amplification in _read_report:
+        terminalreporter.write_line(f"{name:<52} {reads:>8} {firestore_bytes:>10} {response_bytes:>10} "
+                                    f"{items:>6} {amplification:>11}")
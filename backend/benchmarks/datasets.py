@@ -0,0 +1,210 @@
+"""
+Seeded synthetic datasets for the endpoint benchmarks.
+
+Each size seeds that many classes, mentors and bookings (plus one
+mentor_availability doc per mentor, a review for every tenth booking and the
+subject taxonomy) with the field shapes the services and models expect. Generation is deterministic for a given seed, so runs are
+comparable across commits.
+"""
+import random
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, List
+
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000}
+
+CATEGORIES = {
+    "music": ["piano", "guitar", "violin", "tabla", "singing"],
+    "art": ["painting", "drawing", "pottery", "calligraphy"],
+    "dance": ["bharatanatyam", "ballet", "salsa"],
+    "language": ["spanish", "mandarin", "hindi", "french"],
+    "wellness": ["yoga", "meditation"],
+}
+SUBJECTS = [(category, subject) for category, subjects in CATEGORIES.items() for subject in subjects]
+CLASS_TYPES = ["workshop", "batch", "group", "one-on-one"]
+LEVELS = ["beginner", "intermediate", "advanced"]
+AGE_GROUPS = ["child", "teen", "adult"]
+FORMATS = ["online", "in-person", "hybrid"]
+CITIES = [("London", "Greater London"), ("Manchester", "Greater Manchester"), ("Birmingham", "West Midlands"),
+          ("Leeds", "West Yorkshire"), ("Bristol", "South West"), ("Edinburgh", "Scotland")]
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+BOOKING_STATUSES = ["pending", "confirmed", "confirmed", "completed", "cancelled"]
+PAYMENT_STATUS = {"pending": "unpaid", "confirmed": "paid", "completed": "paid", "cancelled": "refunded"}
+
+
+@dataclass
+class Dataset:
+    size: int
+    mentor_ids: List[str] = field(default_factory=list)
+    class_ids: List[str] = field(default_factory=list)
+    student_ids: List[str] = field(default_factory=list)
+    busiest_mentor_id: str = ""
+    busiest_student_id: str = ""
+
+
+def _mentor(rng: random.Random, i: int, created: datetime) -> Dict:
+    category = rng.choice(list(CATEGORIES))
+    city, region = rng.choice(CITIES)
+    subjects = rng.sample(CATEGORIES[category], k=min(2, len(CATEGORIES[category])))
+    rating = round(rng.uniform(3.0, 5.0), 1)
+    return {
+        "displayName": f"Mentor {i}",
+        "photoURL": f"https://example.com/mentors/{i}.jpg",
+        "category": category,
+        "subjects": subjects,
+        "searchKeywords": subjects + [category, city.lower()],
+        "headline": f"{subjects[0].title()} teacher in {city}",
+        "bio": f"Teaching {', '.join(subjects)} for {rng.randint(1, 25)} years.",
+        "languages": rng.sample(["English", "Hindi", "Spanish", "Mandarin", "French"], k=2),
+        "teachingLevels": rng.sample(LEVELS, k=2),
+        "ageGroups": rng.sample(AGE_GROUPS, k=2),
+        "teachingModes": rng.sample(FORMATS, k=2),
+        "city": city,
+        "region": region,
+        "country": "UK",
+        "pricing": {"oneOnOneRate": rng.choice([25, 35, 45, 60]), "groupRate": rng.choice([15, 20, 25]),
+                    "currency": "GBP", "firstSessionFree": rng.random() < 0.3},
+        "stats": {"avgRating": rating, "totalReviews": rng.randint(0, 200), "totalStudents": rng.randint(0, 300),
+                  "totalSessions": rng.randint(0, 1000), "responseTimeMinutes": rng.randint(5, 600),
+                  "repeatStudentRate": round(rng.random(), 2)},
+        "status": "active",
+        "isVerified": rng.random() < 0.7,
+        "createdAt": created.isoformat(),
+        "updatedAt": created.isoformat(),
+    }
+
+
+def _class(rng: random.Random, i: int, mentor_id: str, mentor: Dict, created: datetime) -> Dict:
+    category, subject = rng.choice(SUBJECTS)
+    class_type = rng.choice(CLASS_TYPES)
+    start = date(2025, 9, 1) + timedelta(days=rng.randint(0, 180))
+    sessions = 1 if class_type == "workshop" else rng.randint(4, 12)
+    rate = rng.choice([20, 30, 40, 50, 80, 120])
+    max_students = 1 if class_type == "one-on-one" else rng.randint(5, 20)
+    return {
+        "type": class_type,
+        "title": f"{subject.title()} {class_type.title()} {i}",
+        "subject": subject,
+        "category": category,
+        "description": f"A {class_type} covering {subject} fundamentals and practice.",
+        "classImage": f"https://example.com/subjects/{subject}.jpg",
+        "mentorId": mentor_id,
+        "mentorName": mentor["displayName"],
+        "mentorPhotoURL": mentor["photoURL"],
+        "mentorRating": mentor["stats"]["avgRating"],
+        "level": rng.choice(LEVELS),
+        "ageGroup": rng.choice(AGE_GROUPS),
+        "format": rng.choice(FORMATS),
+        "city": mentor["city"],
+        "region": mentor["region"],
+        "country": "UK",
+        "schedule": {
+            "startDate": start.isoformat(),
+            "endDate": (start + timedelta(weeks=sessions - 1)).isoformat(),
+            "weeklySchedule": [{"day": rng.choice(DAYS), "startTime": "18:00", "endTime": "19:00"}],
+            "sessionDuration": 60,
+        },
+        "capacity": {"maxStudents": max_students, "minStudents": 1,
+                     "currentEnrollment": rng.randint(0, max_students)},
+        "pricing": {"perSessionRate": rate, "totalSessions": sessions, "subtotal": rate * sessions, "currency": "GBP"},
+        "avgRating": round(rng.uniform(3.0, 5.0), 1),
+        "totalReviews": rng.randint(0, 50),
+        "status": "approved" if rng.random() < 0.9 else "pending_approval",
+        "createdAt": created.isoformat(),
+        "updatedAt": created.isoformat(),
+    }
+
+
+def _booking(rng: random.Random, student_id: str, class_id: str, cls: Dict, booked: datetime) -> Dict:
+    status = rng.choice(BOOKING_STATUSES)
+    return {
+        "studentId": student_id,
+        "studentName": f"Student {student_id.rsplit('_', 1)[-1]}",
+        "classId": class_id,
+        "className": cls["title"],
+        "mentorId": cls["mentorId"],
+        "mentorName": cls["mentorName"],
+        "bookingStatus": status,
+        "paymentStatus": PAYMENT_STATUS[status],
+        "pricing": {"finalPrice": cls["pricing"]["subtotal"], "currency": "GBP"},
+        "bookedAt": booked.isoformat(),
+        "confirmedAt": booked.isoformat() if status in ("confirmed", "completed") else None,
+    }
+
+
+def _availability(rng: random.Random, created: datetime) -> Dict:
+    days = rng.sample(DAYS, k=rng.randint(1, 5))
+    return {
+        "availability": [{"day": day, "timeRanges": [{"startTime": "09:00", "endTime": "12:00"},
+                                                      {"startTime": "17:00", "endTime": "20:00"}]}
+                         for day in days],
+        "dateRange": {"startDate": "2025-08-01", "endDate": "2026-07-31"},
+        "timezone": "Europe/London",
+        "isActive": True,
+        "createdAt": created.isoformat(),
+        "updatedAt": created.isoformat(),
+    }
+
+
+def _review(rng: random.Random, booking_id: str, booking: Dict) -> Dict:
+    rating = rng.choice([3, 4, 4, 5, 5, 5])
+    return {
+        "studentId": booking["studentId"],
+        "mentorId": booking["mentorId"],
+        "classId": booking["classId"],
+        "bookingId": booking_id,
+        "rating": rating,
+        "review": f"{booking['className']} was {'great' if rating >= 4 else 'fine'}.",
+        "createdAt": booking["bookedAt"],
+    }
+
+
+def _subject(rng: random.Random, category: str, subject: str) -> Dict:
+    return {
+        "subjectId": subject,
+        "subject": subject.title(),
+        "category": category,
+        "region": rng.choice(["global", "south-asian", "european", "east-asian"]),
+        "synonyms": [subject],
+        "relatedSubjects": [other for other in CATEGORIES[category] if other != subject][:2],
+        "searchBoost": round(rng.uniform(0.5, 2.0), 2),
+    }
+
+
+def seed(client, size: int, seed: int = 42) -> Dataset:
+    """Load `size` classes, mentors and bookings (and their satellites) into a FakeFirestore"""
+    rng = random.Random(seed)
+    epoch = datetime(2025, 1, 1)
+    dataset = Dataset(size=size)
+
+    mentors = {}
+    for i in range(size):
+        mentors[f"mentor_{i:06d}"] = _mentor(rng, i, epoch + timedelta(minutes=i))
+    dataset.mentor_ids = list(mentors)
+
+    classes = {}
+    for i in range(size):
+        mentor_id = rng.choice(dataset.mentor_ids)
+        classes[f"class_{i:06d}"] = _class(rng, i, mentor_id, mentors[mentor_id], epoch + timedelta(minutes=i))
+    dataset.class_ids = list(classes)
+
+    # ~10 bookings per student
+    dataset.student_ids = [f"student_{i:06d}" for i in range(max(size // 10, 1))]
+    bookings = {}
+    for i in range(size):
+        class_id = rng.choice(dataset.class_ids)
+        bookings[f"booking_{i:06d}"] = _booking(rng, rng.choice(dataset.student_ids), class_id, classes[class_id],
+                                                epoch + timedelta(minutes=i))
+
+    dataset.busiest_mentor_id = Counter(b["mentorId"] for b in bookings.values()).most_common(1)[0][0]
+    dataset.busiest_student_id = Counter(b["studentId"] for b in bookings.values()).most_common(1)[0][0]
+
+    client.load("mentors", mentors)
+    client.load("classes", classes)
+    client.load("bookings", bookings)
+    client.load("mentor_availability", {mentor_id: _availability(rng, epoch) for mentor_id in dataset.mentor_ids})
+    client.load("reviews", {f"review_{i:06d}": _review(rng, booking_id, bookings[booking_id])
+                            for i, booking_id in enumerate(list(bookings)[::10])})
+    client.load("subjects", {subject: _subject(rng, category, subject) for category, subject in SUBJECTS})
+    return dataset
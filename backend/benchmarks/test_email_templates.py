@@ -0,0 +1,72 @@
+# Email rendering - one booking confirmation per call vs the bulk render API, and a cold template compile
+import pytest
+
+from app.services import email_templates
+from app.services.email_templates import FRONTEND_URL, EmailTemplates, render_bulk
+
+EMAILS = 1000
+
+SHARED = {
+    "title": "Booking Confirmed - Roots & Wings",
+    "cta_text": "View My Bookings",
+    "cta_link": f"{FRONTEND_URL}/dashboard/bookings",
+}
+
+
+@pytest.fixture(scope="module")
+def contexts():
+    return [
+        {
+            "student_name": f"Student {i}",
+            "class_name": f"Piano Class {i % 50}",
+            "mentor_name": f"Mentor {i % 20}",
+            "booking_details": {
+                "pricing": {"finalPrice": 40 + i % 10},
+                "paymentStatus": "paid",
+                "scheduledSlots": [
+                    {"sessionNumber": n, "date": f"2025-09-0{n}", "startTime": "18:00", "endTime": "19:00"}
+                    for n in range(1, 6)
+                ],
+            },
+        }
+        for i in range(EMAILS)
+    ]
+
+
+def _assert_rendered(emails, contexts):
+    assert len(emails) == len(contexts)
+    for html, context in zip((emails[0], emails[-1]), (contexts[0], contexts[-1])):
+        assert context["student_name"] in html and context["class_name"] in html
+        assert f"£{context['booking_details']['pricing']['finalPrice']}" in html
+
+
+def test_cold_first_render(benchmark, contexts):
+    def render():
+        # Drop the in-process caches so the render parses the template (or loads its bytecode)
+        email_templates.environment.cache.clear()
+        email_templates.render_fragment.cache_clear()
+        return render_bulk("booking_confirmation.html", contexts[:1], **SHARED)
+
+    emails = benchmark.pedantic(render, rounds=20, iterations=1)
+    _assert_rendered(emails, contexts[:1])
+
+
+def test_render_per_email(benchmark, contexts):
+    def render():
+        return [EmailTemplates.booking_confirmation(c["student_name"], c["class_name"], c["mentor_name"],
+                                                    c["booking_details"])
+                for c in contexts]
+
+    emails = benchmark(render)
+    _assert_rendered(emails, contexts)
+    benchmark.extra_info.update(emails=len(emails))
+
+
+def test_render_bulk(benchmark, contexts):
+    emails = benchmark(render_bulk, "booking_confirmation.html", contexts, **SHARED)
+    _assert_rendered(emails, contexts)
+    # Bulk rendering produces exactly what one call per email does
+    assert emails[0] == EmailTemplates.booking_confirmation(
+        contexts[0]["student_name"], contexts[0]["class_name"], contexts[0]["mentor_name"],
+        contexts[0]["booking_details"])
+    benchmark.extra_info.update(emails=len(emails))
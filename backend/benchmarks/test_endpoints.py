@@ -0,0 +1,61 @@
+# Hot endpoint benchmarks - latency and Firestore read amplification per dataset size
+def test_classes_by_type(measure):
+    measure("/classes?type=workshop&pageSize=20", lambda body: len(body["classes"]))
+
+
+def test_classes_by_type_card_view(measure):
+    measure("/classes?type=workshop&pageSize=20&view=card", lambda body: len(body["classes"]))
+
+
+def test_classes_admin(measure):
+    measure("/classes?status=approved&pageSize=50", lambda body: len(body["classes"]))
+
+
+def test_classes_admin_view(measure):
+    measure("/classes?status=approved&pageSize=50&view=admin", lambda body: len(body["classes"]))
+
+
+def test_mentors_directory(measure):
+    measure("/mentors?category=music&pageSize=20", lambda body: len(body["mentors"]))
+
+
+def test_mentors_directory_card_view(measure):
+    measure("/mentors?category=music&pageSize=20&view=card", lambda body: len(body["mentors"]))
+
+
+def test_classes_by_subjects(measure):
+    measure("/classes?subject=piano,guitar,yoga&sortBy=price&pageSize=20", lambda body: len(body["classes"]))
+
+
+def test_search(measure):
+    measure("/search/?q=piano&pageSize=20", lambda body: len(body["results"]))
+
+
+def test_bookings_by_student(measure):
+    student_id = measure.dataset.busiest_student_id
+    measure(f"/bookings?studentId={student_id}&pageSize=5&include_attendance=false",
+            lambda body: len(body["bookings"]))
+
+
+def test_bookings_by_mentor(measure):
+    mentor_id = measure.dataset.busiest_mentor_id
+    measure(f"/bookings?mentorId={mentor_id}&pageSize=20", lambda body: len(body["bookings"]))
+
+
+def test_availability_for_mentor(measure):
+    mentor_id = measure.dataset.mentor_ids[1]
+    measure(f"/availability/mentors/{mentor_id}", lambda body: 1)
+
+
+def test_availability_by_day(measure):
+    measure("/availability/mentors/any?list_all=true&day=Monday", lambda body: body["total"])
+
+
+def test_home_snapshot(measure):
+    measure("/home", lambda body: sum(len(body[key]) for key in
+                                      ("featuredClasses", "featuredMentors", "upcomingWorkshops", "testimonials")))
+
+
+def test_mentor_profile(measure):
+    mentor_id = measure.dataset.busiest_mentor_id
+    measure(f"/mentors/{mentor_id}/profile", lambda body: 1 + len(body["classes"]) + len(body["reviews"]["reviews"]))
@@ -0,0 +1,46 @@
+# Burst load on the homepage queries - Firestore reads with and without single-flight
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services.response_cache import response_cache
+from app.services.single_flight import SingleFlight, clear_single_flight
+from benchmarks.conftest import BURST, READS_PATTERN, _burst_report
+
+HOMEPAGE = [
+    "/classes?type=workshop&upcoming=true&pageSize=3",
+    "/classes?featured=true&pageSize=3",
+    "/mentors?featured=true&pageSize=3",
+    "/reviews?type=testimonials",
+    "/metadata/subjects",
+]
+
+
+def _burst(client, path: str) -> int:
+    """Fire BURST identical GETs at once; total Firestore reads they billed"""
+    barrier = threading.Barrier(BURST)
+
+    def call(i):
+        barrier.wait()
+        # A distinct (ignored) parameter per request keeps ResponseCacheMiddleware out of the way
+        response = client.get(f"{path}{'&' if '?' in path else '?'}burst={i}")
+        assert response.status_code == 200, response.text
+        return int(READS_PATTERN.search(response.headers["server-timing"]).group(1))
+
+    with ThreadPoolExecutor(max_workers=BURST) as pool:
+        return sum(pool.map(call, range(BURST)))
+
+
+@pytest.mark.parametrize("path", HOMEPAGE)
+def test_burst_reads_with_single_flight(seeded, path, monkeypatch):
+    client, dataset, size = seeded
+    reads = {}
+    for enabled in (False, True):
+        monkeypatch.setattr(SingleFlight, "enabled", enabled)
+        response_cache.clear()
+        clear_single_flight()
+        reads[enabled] = _burst(client, path)
+    _burst_report.append((path, size, reads[False], reads[True]))
+    assert reads[True] < reads[False]
+
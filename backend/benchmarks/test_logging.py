@@ -0,0 +1,93 @@
+# Logging overhead - synchronous print vs queued JSON logging, and debug sampling on a hot endpoint
+import contextlib
+import logging
+import logging.handlers
+import os
+import queue
+
+import pytest
+
+from app.logging_config import JsonFormatter, NonBlockingQueueHandler, SamplingFilter
+
+RECORDS = 1000
+
+
+@pytest.fixture
+def devnull():
+    with open(os.devnull, "w") as stream:
+        yield stream
+
+
+@pytest.fixture
+def queued_logger(devnull):
+    """Isolated logger wired like configure_logging(), writing JSON to /dev/null"""
+    output = logging.StreamHandler(devnull)
+    output.setFormatter(JsonFormatter())
+    log_queue = queue.Queue(maxsize=100000)
+    handler = NonBlockingQueueHandler(log_queue)
+    sampler = SamplingFilter(1.0)
+    handler.addFilter(sampler)
+    listener = logging.handlers.QueueListener(log_queue, output)
+    listener.start()
+
+    logger = logging.getLogger("benchmarks.logging")
+    logger.propagate = False
+    logger.addHandler(handler)
+    logger.sampler = sampler
+    yield logger
+    logger.removeHandler(handler)
+    listener.stop()
+
+
+def test_print_per_request(benchmark, devnull):
+    filters = [("type", "==", "workshop"), ("subject", "in", ["piano", "guitar"])]
+
+    def emit():
+        with contextlib.redirect_stdout(devnull):
+            for _ in range(RECORDS):
+                print(f"DEBUG: Applying Firestore filters: {filters}")
+
+    benchmark(emit)
+
+
+def test_queued_json_info(benchmark, queued_logger):
+    filters = [("type", "==", "workshop"), ("subject", "in", ["piano", "guitar"])]
+    queued_logger.setLevel(logging.INFO)
+
+    def emit():
+        for _ in range(RECORDS):
+            queued_logger.info("search_classes filters", extra={"firestore_filters": filters})
+
+    benchmark(emit)
+
+
+def test_debug_disabled(benchmark, queued_logger):
+    queued_logger.setLevel(logging.INFO)
+
+    def emit():
+        for i in range(RECORDS):
+            queued_logger.debug("Featured mentor %s: total score=%.2f", i, 1.5)
+
+    benchmark(emit)
+
+
+def test_debug_sampled_one_percent(benchmark, queued_logger):
+    queued_logger.setLevel(logging.DEBUG)
+    queued_logger.sampler.default_rate = 0.01
+
+    def emit():
+        for i in range(RECORDS):
+            queued_logger.debug("Featured mentor %s: total score=%.2f", i, 1.5)
+
+    benchmark(emit)
+
+
+@pytest.mark.parametrize("level", ["INFO", "DEBUG"])
+def test_classes_endpoint_log_level(measure, level):
+    class_logger = logging.getLogger("app.services.class_service")
+    previous = class_logger.level
+    class_logger.setLevel(level)
+    try:
+        measure("/classes?type=workshop&pageSize=20", lambda body: len(body["classes"]))
+    finally:
+        class_logger.setLevel(previous)
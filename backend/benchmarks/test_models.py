@@ -0,0 +1,41 @@
+# Model construction throughput - objects/sec per list service, validating every read vs the validated-model cache
+import pytest
+
+from app.models.class_models import ClassSearchQuery
+from app.models.mentor_models import MentorSearchQuery
+from app.models.search_models import UnifiedSearchQuery
+from app.services.booking_service import get_bookings_by_mentor
+from app.services.class_service import search_classes
+from app.services.mentor_service import search_mentors
+from app.services.model_cache import model_cache
+from app.services.search_service import unified_search
+
+LIST_SERVICES = {
+    # name -> (call(dataset), number of documents turned into models)
+    "search_classes": (lambda dataset: search_classes(ClassSearchQuery(pageSize=100)), lambda result: result[1]),
+    "search_mentors": (lambda dataset: search_mentors(MentorSearchQuery(pageSize=100)), lambda result: result[1]),
+    "bookings_by_mentor": (lambda dataset: get_bookings_by_mentor(dataset.busiest_mentor_id, page_size=100),
+                           lambda result: len(result[0])),
+    "unified_search": (lambda dataset: unified_search(UnifiedSearchQuery(q="piano", pageSize=100)),
+                       lambda result: result[1]["mentorCount"] + result[1]["classCount"]),
+}
+
+
+@pytest.fixture
+def read_mode(request):
+    model_cache.clear()
+    model_cache.strict = request.param == "validate"
+    yield request.param
+    model_cache.strict = False
+    model_cache.clear()
+
+
+@pytest.mark.parametrize("read_mode", ["validate", "cached"], indirect=True)
+@pytest.mark.parametrize("service", list(LIST_SERVICES))
+def test_list_service_objects_per_second(benchmark, seeded, read_mode, service):
+    _, dataset, size = seeded
+    call, count = LIST_SERVICES[service]
+    result = benchmark.pedantic(call, args=(dataset,), rounds=5, iterations=1, warmup_rounds=1)
+    objects = count(result)
+    benchmark.extra_info.update(dataset=size, objects=objects,
+                                objects_per_sec=round(objects / benchmark.stats.stats.mean))
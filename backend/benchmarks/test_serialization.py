@@ -0,0 +1,54 @@
+# Serialization time and payload size for a 100-class /classes page
+import json
+
+import orjson
+import pytest
+from fastapi.encoders import jsonable_encoder
+
+from app.models.class_models import ClassItem, ClassListResponse
+from app.services.compression import brotli, compress
+from app.services.serialization import list_response
+
+CARD_FIELDS = "title,schedule,mentorName"
+
+
+@pytest.fixture(scope="module")
+def class_page(seeded):
+    client, _, size = seeded
+    body = client.get("/classes?pageSize=100", headers={"Accept-Encoding": "identity"}).json()
+    payload = {**body, "classes": [ClassItem(**item) for item in body["classes"]]}
+    return payload, size
+
+
+ENCODERS = {
+    # FastAPI without a response_model: jsonable_encoder + json.dumps
+    "jsonable_encoder": lambda payload, fields: json.dumps(jsonable_encoder(payload)).encode(),
+    # FastAPI with a response_model: validate, dump to JSON-compatible python, json.dumps
+    "response_model": lambda payload, fields: json.dumps(
+        ClassListResponse.model_validate(payload).model_dump(mode="json")).encode(),
+    "orjson": lambda payload, fields: orjson.dumps(ClassListResponse.model_validate(payload).model_dump(mode="json")),
+    "model_dump_json": lambda payload, fields: list_response(ClassListResponse, payload, "classes", fields,
+                                                             always=["classId"]).body,
+}
+
+
+@pytest.mark.parametrize("fields", [None, CARD_FIELDS], ids=["full", "cards"])
+@pytest.mark.parametrize("encoder", list(ENCODERS))
+def test_serialize_class_page(benchmark, class_page, encoder, fields):
+    payload, size = class_page
+    if fields and encoder != "model_dump_json":
+        pytest.skip("sparse fieldsets are only applied by list_response")
+    body = benchmark(ENCODERS[encoder], payload, fields)
+    benchmark.extra_info.update(dataset=size, items=len(payload["classes"]), payload_bytes=len(body))
+
+
+@pytest.mark.parametrize("fields", [None, CARD_FIELDS], ids=["full", "cards"])
+@pytest.mark.parametrize("encoding", ["gzip", "br"])
+def test_compress_class_page(benchmark, class_page, encoding, fields):
+    payload, size = class_page
+    if encoding == "br" and brotli is None:
+        pytest.skip("brotli is not installed")
+    body = list_response(ClassListResponse, payload, "classes", fields, always=["classId"]).body
+    compressed = benchmark(compress, body, encoding)
+    benchmark.extra_info.update(dataset=size, payload_bytes=len(body), compressed_bytes=len(compressed),
+                                ratio=round(len(compressed) / len(body), 3))
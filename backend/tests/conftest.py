@@ -7,6 +7,12 @@ import sys
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from app.main import app
+from app.services.homepage_service import homepage_snapshots
+from app.services.query_planner import clear_field_coverage
+from app.services.response_cache import catalog_versions, response_cache
+from app.services.search_sessions import search_sessions
+from app.services.single_flight import clear_single_flight
+from tests.firestore_fake import FakeFirestore, use_fake_firestore
 
 @pytest.fixture
 def client():
@@ -23,6 +29,26 @@ def mock_firestore():
         mock_collection.stream.return_value = []
         yield mock_db
 
+@pytest.fixture
+def fake_firestore():
+    """In-memory Firestore injected in place of app.services.firestore.db"""
+    # Search sessions, single-flight results, the homepage snapshot, the planner's field coverage
+    # and cached responses hold whatever data the previous test (or a benchmark's seeded fake) loaded
+    search_sessions.clear()
+    clear_single_flight()
+    homepage_snapshots.clear()
+    clear_field_coverage()
+    response_cache.clear()
+    catalog_versions.clear()
+    with use_fake_firestore(FakeFirestore()) as fake:
+        yield fake
+    search_sessions.clear()
+    clear_single_flight()
+    homepage_snapshots.clear()
+    clear_field_coverage()
+    response_cache.clear()
+    catalog_versions.clear()
+
 # Test data fixtures
 @pytest.fixture  
 def class_data():
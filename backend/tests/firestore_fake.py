@@ -0,0 +1,1007 @@
+"""
+In-memory Firestore stand-in for tests and benchmarks.
+
+Implements the parts of google.cloud.firestore.Client the services use:
+
+- documents: get, set (plain, merge=True, merge=[fields]), update with dotted
+  field paths, create, delete, write_option(exists=...) preconditions
+- queries: where (==, !=, <, <=, >, >=, in, not-in, array_contains,
+  array_contains_any, FieldFilter/And/Or), order_by, limit, offset,
+  start_at/start_after/end_at/end_before, select and count()
+- get_all, write batches (max 500 writes), optimistic transactions that
+  work with @firestore.transactional (contention raises Aborted) and
+  bulk_writer() (independent writes, failures go to on_write_error)
+- field transforms: Increment, Maximum, Minimum, ArrayUnion, ArrayRemove,
+  DELETE_FIELD and SERVER_TIMESTAMP
+
+Query semantics follow the server: documents missing a filtered or ordered
+field are excluded, values order by type then value, inequality filters add
+an implicit order, and results always tie-break on document id.
+
+Every simulated RPC is reported through app.services.instrumentation with
+Firestore's billing rules (one read per returned or offset-skipped document,
+at least one per query, missing documents in get/get_all count too), so
+Server-Timing headers and read amplification match the real backend.
+Response size is the encoded size of the returned documents (after select()).
+`rpc_latency` adds a fixed delay per RPC to model network round trips.
+
+    fake = FakeFirestore()
+    with use_fake_firestore(fake):
+        ...  # every `db` imported from app.services.firestore is now `fake`
+"""
+import itertools
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from google.api_core.exceptions import AlreadyExists, Aborted, FailedPrecondition, InvalidArgument, NotFound
+from google.cloud.firestore_v1 import _helpers, transforms
+from google.cloud.firestore_v1.base_aggregation import AggregationResult
+from google.cloud.firestore_v1.base_client import BaseClient
+from google.cloud.firestore_v1.base_collection import _auto_id
+from google.cloud.firestore_v1.base_query import BaseCompositeFilter, FieldFilter, Or
+from google.cloud.firestore_v1.bulk_writer import (
+    BulkWriteFailure, BulkWriterCreateOperation, BulkWriterDeleteOperation, BulkWriterSetOperation,
+    BulkWriterUpdateOperation,
+)
+from google.cloud.firestore_v1.collection import CollectionReference
+from google.cloud.firestore_v1.types import document as document_pb
+
+from app.services.instrumentation import record_firestore_call
+
+DOCUMENT_ID = "__name__"
+MAX_BATCH_WRITES = 500
+AGGREGATION_READ_UNIT = 1000
+_MISSING = object()
+
+# ---------- Values ----------
+
+def _store(value: Any) -> Any:
+    """Copy a value the way it would round-trip through the server"""
+    if isinstance(value, dict):
+        return {key: _store(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_store(item) for item in value]
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+def _copy(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _copy(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    return value
+
+def _type_rank(value: Any) -> int:
+    # null < boolean < number < timestamp < string < bytes < reference < array < map
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, datetime):
+        return 3
+    if isinstance(value, str):
+        return 4
+    if isinstance(value, bytes):
+        return 5
+    if isinstance(value, list):
+        return 8
+    if isinstance(value, dict):
+        return 9
+    return 6
+
+def _sort_key(value: Any) -> Tuple:
+    rank = _type_rank(value)
+    if rank == 8:
+        return (rank, tuple(_sort_key(item) for item in value))
+    if rank == 9:
+        return (rank, tuple((key, _sort_key(item)) for key, item in sorted(value.items())))
+    if rank == 3:
+        return (rank, value.timestamp())
+    if rank == 6:
+        return (rank, str(getattr(value, "path", value)))
+    return (rank, value)
+
+def _equal(a: Any, b: Any) -> bool:
+    if type(a) is type(b) and type(a) in (str, int, float):
+        return a == b
+    return _sort_key(a) == _sort_key(b)
+
+def _parts(field_path: Any) -> Tuple[str, ...]:
+    if hasattr(field_path, "parts"):
+        return tuple(field_path.parts)
+    if field_path == DOCUMENT_ID:
+        return (DOCUMENT_ID,)
+    return tuple(field_path.split("."))
+
+def _lookup(data: Dict[str, Any], parts: Tuple[str, ...]) -> Any:
+    value = data
+    for part in parts:
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+# ---------- Writes ----------
+
+def _transform(current: Any, sentinel: Any) -> Any:
+    if sentinel is transforms.SERVER_TIMESTAMP:
+        return datetime.now(timezone.utc)
+    numeric = isinstance(current, (int, float)) and not isinstance(current, bool)
+    if isinstance(sentinel, transforms.Increment):
+        return current + sentinel.value if numeric else sentinel.value
+    if isinstance(sentinel, transforms.Maximum):
+        return max(current, sentinel.value) if numeric else sentinel.value
+    if isinstance(sentinel, transforms.Minimum):
+        return min(current, sentinel.value) if numeric else sentinel.value
+    existing = list(current) if isinstance(current, list) else []
+    if isinstance(sentinel, transforms.ArrayUnion):
+        for value in _store(sentinel.values):
+            if not any(_equal(value, item) for item in existing):
+                existing.append(value)
+        return existing
+    if isinstance(sentinel, transforms.ArrayRemove):
+        removed = _store(sentinel.values)
+        return [item for item in existing if not any(_equal(item, value) for value in removed)]
+    raise ValueError(f"Unsupported transform: {sentinel!r}")
+
+_TRANSFORMS = (transforms.Increment, transforms.Maximum, transforms.Minimum,
+               transforms.ArrayUnion, transforms.ArrayRemove)
+
+def _apply_value(container: Dict[str, Any], key: str, value: Any, merge_maps: bool) -> None:
+    if value is transforms.DELETE_FIELD:
+        container.pop(key, None)
+    elif value is transforms.SERVER_TIMESTAMP or isinstance(value, _TRANSFORMS):
+        container[key] = _transform(container.get(key), value)
+    elif isinstance(value, dict):
+        target = container.get(key)
+        if not merge_maps or not isinstance(target, dict) or not value:
+            target = {}
+        container[key] = target
+        for child_key, child in value.items():
+            _apply_value(target, child_key, child, merge_maps)
+    else:
+        container[key] = _store(value)
+
+def _apply_path(data: Dict[str, Any], parts: Tuple[str, ...], value: Any) -> None:
+    container = data
+    for part in parts[:-1]:
+        if not isinstance(container.get(part), dict):
+            container[part] = {}
+        container = container[part]
+    _apply_value(container, parts[-1], value, merge_maps=False)
+
+def _resolve_write(current: Optional[Dict[str, Any]], op: str, data: Optional[Dict[str, Any]], merge: Any) -> Optional[Dict[str, Any]]:
+    """New document contents for one write (None means deleted)"""
+    if op == "delete":
+        return None
+    if op in ("create", "set") and not merge:
+        result: Dict[str, Any] = {}
+        for key, value in data.items():
+            _apply_value(result, key, value, merge_maps=False)
+        return result
+
+    result = _copy(current) if current is not None else {}
+    if op == "update":
+        for field_path, value in data.items():
+            _apply_path(result, _parts(field_path), value)
+    elif merge is True:
+        for key, value in data.items():
+            _apply_value(result, key, value, merge_maps=True)
+    else:
+        for field_path in merge:
+            parts = _parts(field_path)
+            value = _lookup(data, parts)
+            if value is _MISSING:
+                raise ValueError(f"Merge field {'.'.join(parts)} is not present in the data")
+            _apply_path(result, parts, value)
+    return result
+
+class _Write:
+    __slots__ = ("op", "reference", "data", "merge", "option")
+
+    def __init__(self, op: str, reference: "FakeDocumentReference", data=None, merge=False, option=None):
+        self.op = op
+        self.reference = reference
+        self.data = data
+        self.merge = merge
+        self.option = option
+
+class FakeWriteResult:
+    def __init__(self, update_time: datetime):
+        self.update_time = update_time
+
+def _encoded_size(data: Dict[str, Any]) -> int:
+    try:
+        return document_pb.Document.pb(document_pb.Document(fields=_helpers.encode_dict(data))).ByteSize()
+    except Exception:
+        return len(repr(data))
+
+class _StoredDocument:
+    __slots__ = ("data", "create_time", "update_time", "version", "_sizes")
+
+    def __init__(self, data, create_time, update_time, version):
+        self.data = data
+        self.create_time = create_time
+        self.update_time = update_time
+        self.version = version
+        self._sizes = {}
+
+    def project(self, projection) -> Tuple[Dict[str, Any], int]:
+        """(data, encoded size) as returned to a query or get with select()"""
+        data = self.data
+        if projection is not None:
+            data = {}
+            for parts in projection:
+                value = _lookup(self.data, parts)
+                if value is not _MISSING:
+                    _apply_path(data, parts, value)
+        key = None if projection is None else tuple(projection)
+        if key not in self._sizes:
+            self._sizes[key] = _encoded_size(data)
+        return data, self._sizes[key]
+
+# ---------- Snapshots & References ----------
+
+class FakeDocumentSnapshot:
+    def __init__(self, reference, data, exists, create_time=None, update_time=None, read_time=None):
+        self.reference = reference
+        self._data = data
+        self.exists = exists
+        self.create_time = create_time
+        self.update_time = update_time
+        self.read_time = read_time
+
+    @property
+    def id(self) -> str:
+        return self.reference.id
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return _copy(self._data) if self.exists else None
+
+    def get(self, field_path: str) -> Any:
+        if not self.exists:
+            return None
+        value = _lookup(self._data, _parts(field_path))
+        if value is _MISSING:
+            raise KeyError(f"'{field_path}' is not contained in the data")
+        return _copy(value)
+
+    def __eq__(self, other):
+        return isinstance(other, FakeDocumentSnapshot) and self.reference == other.reference and self._data == other._data
+
+    __hash__ = None
+
+class FakeDocumentReference:
+    def __init__(self, client: "FakeFirestore", *path: str):
+        self._client = client
+        self._path = path
+
+    @property
+    def id(self) -> str:
+        return self._path[-1]
+
+    @property
+    def path(self) -> str:
+        return "/".join(self._path)
+
+    @property
+    def parent(self) -> "FakeCollectionReference":
+        return FakeCollectionReference(self._client, *self._path[:-1])
+
+    def collection(self, collection_id: str) -> "FakeCollectionReference":
+        return FakeCollectionReference(self._client, *self._path, collection_id)
+
+    def get(self, field_paths=None, transaction=None, **kwargs) -> FakeDocumentSnapshot:
+        return next(iter(self._client.get_all([self], field_paths=field_paths, transaction=transaction)))
+
+    def create(self, document_data: Dict[str, Any], **kwargs) -> FakeWriteResult:
+        return self._client._commit([_Write("create", self, document_data)])[0]
+
+    def set(self, document_data: Dict[str, Any], merge=False, **kwargs) -> FakeWriteResult:
+        return self._client._commit([_Write("set", self, document_data, merge)])[0]
+
+    def update(self, field_updates: Dict[str, Any], option=None, **kwargs) -> FakeWriteResult:
+        return self._client._commit([_Write("update", self, field_updates, option=option)])[0]
+
+    def delete(self, option=None, **kwargs) -> datetime:
+        return self._client._commit([_Write("delete", self, option=option)])[0].update_time
+
+    def __eq__(self, other):
+        return isinstance(other, FakeDocumentReference) and self._client is other._client and self._path == other._path
+
+    def __hash__(self):
+        return hash(self._path)
+
+    def __repr__(self):
+        return f"<FakeDocumentReference {self.path}>"
+
+# ---------- Queries ----------
+
+class _Filter:
+    """Compiled field or composite filter"""
+
+    def __init__(self, field_path=None, op=None, value=None, composite=None, children=()):
+        self.parts = _parts(field_path) if field_path is not None else None
+        self.op = (op or "").replace("-", "_")
+        self.value = _store(value)
+        self.composite = composite
+        self.children = children
+
+    @classmethod
+    def from_filter(cls, filter_) -> "_Filter":
+        if isinstance(filter_, FieldFilter):
+            return cls(filter_.field_path, filter_.op_string, filter_.value)
+        if isinstance(filter_, BaseCompositeFilter):
+            composite = "or" if isinstance(filter_, Or) else "and"
+            return cls(composite=composite, children=[cls.from_filter(child) for child in filter_.filters])
+        raise ValueError(f"Unsupported filter: {filter_!r}")
+
+    @property
+    def inequality_fields(self) -> List[Tuple[str, ...]]:
+        if self.composite:
+            return [parts for child in self.children for parts in child.inequality_fields]
+        return [self.parts] if self.op in ("<", "<=", ">", ">=", "!=", "not_in") else []
+
+    def matches(self, doc_id: str, data: Dict[str, Any]) -> bool:
+        if self.composite == "and":
+            return all(child.matches(doc_id, data) for child in self.children)
+        if self.composite == "or":
+            return any(child.matches(doc_id, data) for child in self.children)
+
+        value = doc_id if self.parts == (DOCUMENT_ID,) else _lookup(data, self.parts)
+        if value is _MISSING:
+            return False
+        op, target = self.op, self.value
+        if op == "==":
+            return _equal(value, target)
+        if op == "!=":
+            return value is not None and not _equal(value, target)
+        if op == "in":
+            return any(_equal(value, item) for item in target)
+        if op == "not_in":
+            return value is not None and not any(_equal(value, item) for item in target)
+        if op == "array_contains":
+            return isinstance(value, list) and any(_equal(item, target) for item in value)
+        if op == "array_contains_any":
+            return isinstance(value, list) and any(_equal(item, wanted) for item in value for wanted in target)
+        if _type_rank(value) != _type_rank(target):
+            return False
+        left, right = _sort_key(value), _sort_key(target)
+        if op == "<":
+            return left < right
+        if op == "<=":
+            return left <= right
+        if op == ">":
+            return left > right
+        if op == ">=":
+            return left >= right
+        raise ValueError(f"Unsupported operator: {self.op}")
+
+class FakeQuery:
+    ASCENDING = "ASCENDING"
+    DESCENDING = "DESCENDING"
+
+    def __init__(self, client: "FakeFirestore", collection_path: Tuple[str, ...], filters=(), orders=(),
+                 limit=None, limit_to_last=False, offset=0, start=None, end=None, projection=None):
+        self._client = client
+        self._collection_path = collection_path
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._limit = limit
+        self._limit_to_last = limit_to_last
+        self._offset = offset
+        self._start = start
+        self._end = end
+        self._projection = projection
+
+    def _copy(self, **changes) -> "FakeQuery":
+        state = dict(filters=self._filters, orders=self._orders, limit=self._limit,
+                     limit_to_last=self._limit_to_last, offset=self._offset, start=self._start,
+                     end=self._end, projection=self._projection)
+        state.update(changes)
+        return FakeQuery(self._client, self._collection_path, **state)
+
+    # ----- builders -----
+
+    def where(self, field_path=None, op_string=None, value=None, *, filter=None) -> "FakeQuery":
+        if filter is not None:
+            compiled = _Filter.from_filter(filter)
+        else:
+            if op_string in ("in", "not-in", "not_in", "array_contains_any", "array-contains-any") \
+                    and (not isinstance(value, (list, tuple)) or len(value) > 30):
+                raise InvalidArgument(f"'{op_string}' filters support a list of up to 30 values")
+            compiled = _Filter(field_path, op_string, value)
+        return self._copy(filters=self._filters + (compiled,))
+
+    def order_by(self, field_path, direction=ASCENDING) -> "FakeQuery":
+        if direction not in (self.ASCENDING, self.DESCENDING):
+            raise ValueError(f"Invalid direction: {direction!r}")
+        return self._copy(orders=self._orders + ((_parts(field_path), direction == self.DESCENDING),))
+
+    def limit(self, count: int) -> "FakeQuery":
+        return self._copy(limit=count, limit_to_last=False)
+
+    def limit_to_last(self, count: int) -> "FakeQuery":
+        return self._copy(limit=count, limit_to_last=True)
+
+    def offset(self, num_to_skip: int) -> "FakeQuery":
+        return self._copy(offset=num_to_skip)
+
+    def select(self, field_paths: Iterable[str]) -> "FakeQuery":
+        return self._copy(projection=[_parts(path) for path in field_paths])
+
+    def start_at(self, document_fields_or_snapshot) -> "FakeQuery":
+        return self._copy(start=(document_fields_or_snapshot, True))
+
+    def start_after(self, document_fields_or_snapshot) -> "FakeQuery":
+        return self._copy(start=(document_fields_or_snapshot, False))
+
+    def end_at(self, document_fields_or_snapshot) -> "FakeQuery":
+        return self._copy(end=(document_fields_or_snapshot, True))
+
+    def end_before(self, document_fields_or_snapshot) -> "FakeQuery":
+        return self._copy(end=(document_fields_or_snapshot, False))
+
+    def count(self, alias: Optional[str] = None) -> "FakeAggregationQuery":
+        return FakeAggregationQuery(self, alias)
+
+    # ----- execution -----
+
+    def _effective_orders(self) -> List[Tuple[Tuple[str, ...], bool]]:
+        orders = list(self._orders)
+        ordered = {parts for parts, _ in orders}
+        if not orders:
+            for parts in sorted({p for f in self._filters for p in f.inequality_fields}):
+                if parts not in ordered:
+                    orders.append((parts, False))
+                    ordered.add(parts)
+        if (DOCUMENT_ID,) not in ordered:
+            orders.append(((DOCUMENT_ID,), orders[-1][1] if orders else False))
+        return orders
+
+    @staticmethod
+    def _order_values(doc_id: str, data: Dict[str, Any], orders) -> Optional[List[Any]]:
+        values = []
+        for parts, _ in orders:
+            value = doc_id if parts == (DOCUMENT_ID,) else _lookup(data, parts)
+            if value is _MISSING:
+                return None
+            values.append(value)
+        return values
+
+    def _cursor_values(self, cursor, orders) -> List[Any]:
+        if isinstance(cursor, FakeDocumentSnapshot):
+            return self._order_values(cursor.id, cursor._data or {}, orders) or []
+        if isinstance(cursor, dict):
+            return [_lookup(cursor, parts) for parts, _ in orders if _lookup(cursor, parts) is not _MISSING]
+        return list(cursor)
+
+    @staticmethod
+    def _compare(values: List[Any], cursor: List[Any], orders) -> int:
+        for value, bound, (_, descending) in zip(values, cursor, orders):
+            if isinstance(bound, FakeDocumentReference):
+                bound = bound.id
+            left, right = _sort_key(value), _sort_key(bound)
+            if left != right:
+                result = -1 if left < right else 1
+                return -result if descending else result
+        return 0
+
+    def _execute(self, transaction=None) -> Tuple[List[FakeDocumentSnapshot], int, int]:
+        """Run the query; returns (snapshots, documents skipped by offset)"""
+        orders = self._effective_orders()
+        rows = []
+        for doc_id, stored in self._client._documents(self._collection_path):
+            data = stored.data
+            if not all(f.matches(doc_id, data) for f in self._filters):
+                continue
+            values = self._order_values(doc_id, data, orders)
+            if values is None:
+                continue
+            rows.append((values, doc_id, stored))
+
+        def key(row):
+            return tuple(_DescendingKey(_sort_key(v)) if desc else _sort_key(v)
+                         for v, (_, desc) in zip(row[0], orders))
+        rows.sort(key=key)
+
+        if self._start is not None:
+            cursor, inclusive = self._start
+            bound = self._cursor_values(cursor, orders)
+            rows = [r for r in rows if (self._compare(r[0], bound, orders) >= 0 if inclusive
+                                        else self._compare(r[0], bound, orders) > 0)]
+        if self._end is not None:
+            cursor, inclusive = self._end
+            bound = self._cursor_values(cursor, orders)
+            rows = [r for r in rows if (self._compare(r[0], bound, orders) <= 0 if inclusive
+                                        else self._compare(r[0], bound, orders) < 0)]
+
+        skipped = min(self._offset, len(rows))
+        rows = rows[self._offset:]
+        if self._limit is not None:
+            rows = rows[-self._limit:] if self._limit_to_last else rows[:self._limit]
+
+        read_time = datetime.now(timezone.utc)
+        snapshots, size = [], 0
+        for _, doc_id, stored in rows:
+            reference = FakeDocumentReference(self._client, *self._collection_path, doc_id)
+            data, doc_size = stored.project(self._projection)
+            size += doc_size
+            if transaction is not None:
+                transaction._track_read(reference, stored.version)
+            snapshots.append(FakeDocumentSnapshot(reference, data, True, stored.create_time,
+                                                  stored.update_time, read_time))
+        return snapshots, skipped, size
+
+    def stream(self, transaction=None, **kwargs):
+        started = time.perf_counter()
+        if transaction is not None:
+            transaction._check_read()
+        with self._client._lock:
+            snapshots, skipped, size = self._execute(transaction)
+        self._client._finish_rpc("run_query", started, reads=max(1, len(snapshots) + skipped), docs=len(snapshots),
+                                 size=size)
+        return iter(snapshots)
+
+    def get(self, transaction=None, **kwargs) -> List[FakeDocumentSnapshot]:
+        return list(self.stream(transaction=transaction))
+
+class _DescendingKey:
+    __slots__ = ("key",)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+class FakeAggregationQuery:
+    def __init__(self, query: FakeQuery, alias: Optional[str] = None):
+        self._query = query
+        self._alias = alias or "field_1"
+
+    def get(self, transaction=None, **kwargs) -> List[List[AggregationResult]]:
+        started = time.perf_counter()
+        with self._query._client._lock:
+            snapshots, _, _ = self._query._execute()
+        count = len(snapshots)
+        # Aggregations bill one read per batch of up to 1000 index entries
+        reads = max(1, -(-count // AGGREGATION_READ_UNIT))
+        self._query._client._finish_rpc("run_aggregation_query", started, reads=reads)
+        return [[AggregationResult(alias=self._alias, value=count, read_time=datetime.now(timezone.utc))]]
+
+    def stream(self, transaction=None, **kwargs):
+        return iter(self.get(transaction=transaction))
+
+class FakeCollectionReference(FakeQuery):
+    def __init__(self, client: "FakeFirestore", *path: str):
+        super().__init__(client, path)
+
+    @property
+    def id(self) -> str:
+        return self._collection_path[-1]
+
+    @property
+    def _path(self) -> Tuple[str, ...]:
+        return self._collection_path
+
+    @property
+    def parent(self) -> Optional[FakeDocumentReference]:
+        if len(self._collection_path) == 1:
+            return None
+        return FakeDocumentReference(self._client, *self._collection_path[:-1])
+
+    def document(self, document_id: Optional[str] = None) -> FakeDocumentReference:
+        return FakeDocumentReference(self._client, *self._collection_path, document_id or _auto_id())
+
+    def add(self, document_data: Dict[str, Any], document_id: Optional[str] = None, **kwargs):
+        reference = self.document(document_id)
+        result = reference.create(document_data)
+        return result.update_time, reference
+
+    def list_documents(self, page_size: Optional[int] = None, **kwargs):
+        started = time.perf_counter()
+        with self._client._lock:
+            ids = [doc_id for doc_id, _ in self._client._documents(self._collection_path)]
+        self._client._finish_rpc("list_documents", started)
+        return iter([self.document(doc_id) for doc_id in ids])
+
+    def __eq__(self, other):
+        return isinstance(other, FakeCollectionReference) and self._client is other._client \
+            and self._collection_path == other._collection_path
+
+    def __hash__(self):
+        return hash(self._collection_path)
+
+# ---------- Batches & Transactions ----------
+
+class FakeWriteBatch:
+    def __init__(self, client: "FakeFirestore"):
+        self._client = client
+        self._writes: List[_Write] = []
+        self.write_results = None
+
+    def create(self, reference, document_data):
+        self._writes.append(_Write("create", reference, document_data))
+
+    def set(self, reference, document_data, merge=False):
+        self._writes.append(_Write("set", reference, document_data, merge))
+
+    def update(self, reference, field_updates, option=None):
+        self._writes.append(_Write("update", reference, field_updates, option=option))
+
+    def delete(self, reference, option=None):
+        self._writes.append(_Write("delete", reference, option=option))
+
+    def commit(self, **kwargs) -> List[FakeWriteResult]:
+        self.write_results = self._client._commit(self._writes)
+        self._writes = []
+        return self.write_results
+
+    def __len__(self):
+        return len(self._writes)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+
+class FakeTransaction(FakeWriteBatch):
+    """
+    Optimistic transaction: reads record document versions and the commit
+    aborts if any of them changed, which @firestore.transactional retries.
+    """
+
+    def __init__(self, client: "FakeFirestore", max_attempts: int = 5, read_only: bool = False):
+        super().__init__(client)
+        self._max_attempts = max_attempts
+        self._read_only = read_only
+        self._id = None
+        self._read_versions: Dict[Tuple[str, ...], int] = {}
+
+    @property
+    def in_progress(self) -> bool:
+        return self._id is not None
+
+    @property
+    def id(self):
+        return self._id
+
+    def _check_read(self) -> None:
+        if self._writes:
+            raise _helpers.ReadAfterWriteError(_helpers.READ_AFTER_WRITE_ERROR)
+
+    def _track_read(self, reference: FakeDocumentReference, version: int) -> None:
+        self._read_versions.setdefault(reference._path, version)
+
+    def _clean_up(self) -> None:
+        self._writes = []
+        self._read_versions = {}
+        self._id = None
+
+    def _begin(self, retry_id=None) -> None:
+        if self.in_progress:
+            raise ValueError("Cannot begin a transaction that is already in progress")
+        started = time.perf_counter()
+        self._id = uuid.uuid4().bytes
+        self._client._finish_rpc("begin_transaction", started)
+
+    def _rollback(self) -> None:
+        if not self.in_progress:
+            raise ValueError("Cannot rollback a transaction that is not in progress")
+        started = time.perf_counter()
+        self._clean_up()
+        self._client._finish_rpc("rollback", started)
+
+    def _commit(self) -> List[FakeWriteResult]:
+        if not self.in_progress:
+            raise ValueError("Cannot commit a transaction that is not in progress")
+        if self._read_only and self._writes:
+            raise InvalidArgument("Cannot write in a read-only transaction")
+        results = self._client._commit(self._writes, read_versions=self._read_versions)
+        self._clean_up()
+        return results
+
+    def commit(self, **kwargs):
+        raise ValueError("Transactions are committed by @firestore.transactional")
+
+    def get(self, ref_or_query, **kwargs):
+        if isinstance(ref_or_query, FakeDocumentReference):
+            return self._client.get_all([ref_or_query], transaction=self)
+        if isinstance(ref_or_query, FakeQuery):
+            return ref_or_query.stream(transaction=self)
+        raise ValueError('Value for argument "ref_or_query" must be a DocumentReference or a Query.')
+
+    def get_all(self, references, **kwargs):
+        return self._client.get_all(references, transaction=self)
+
+class FakeBulkWriter:
+    """
+    BulkWriter stand-in: writes are queued and applied independently on
+    flush()/close(), BULK_BATCH_SIZE at a time. A failed write is reported to
+    the on_write_error callback, which may ask for a retry.
+    """
+
+    BULK_BATCH_SIZE = 20
+    MAX_ATTEMPTS = 10
+
+    def __init__(self, client: "FakeFirestore", options=None):
+        self._client = client
+        self._queue: List[Tuple[_Write, int]] = []
+        self._closed = False
+        self._on_result = None
+        self._on_error = lambda failure, bulk_writer: failure.attempts < self.MAX_ATTEMPTS
+
+    def create(self, reference, document_data, attempts: int = 0):
+        self._enqueue(_Write("create", reference, document_data))
+
+    def set(self, reference, document_data, merge=False, attempts: int = 0):
+        self._enqueue(_Write("set", reference, document_data, merge))
+
+    def update(self, reference, field_updates, option=None, attempts: int = 0):
+        self._enqueue(_Write("update", reference, field_updates, option=option))
+
+    def delete(self, reference, option=None, attempts: int = 0):
+        self._enqueue(_Write("delete", reference, option=option))
+
+    def on_write_result(self, callback) -> None:
+        self._on_result = callback
+
+    def on_write_error(self, callback) -> None:
+        self._on_error = callback
+
+    def _enqueue(self, write: _Write) -> None:
+        if self._closed:
+            raise Exception("BulkWriter is closed and cannot enqueue new operations")
+        self._queue.append((write, 0))
+        if len(self._queue) >= self.BULK_BATCH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        while self._queue:
+            batch, self._queue = self._queue[:self.BULK_BATCH_SIZE], self._queue[self.BULK_BATCH_SIZE:]
+            for write, attempts in batch:
+                try:
+                    result = self._client._commit([write])[0]
+                except Exception as e:
+                    status = getattr(e, "grpc_status_code", None)
+                    failure = BulkWriteFailure(operation=self._operation(write, attempts + 1),
+                                               code=status.value[0] if status is not None else 2, message=str(e))
+                    if self._on_error(failure, self):
+                        self._queue.append((write, attempts + 1))
+                    continue
+                if self._on_result is not None:
+                    self._on_result(write.reference, result, self)
+
+    def close(self) -> None:
+        self.flush()
+        self._closed = True
+
+    @staticmethod
+    def _operation(write: _Write, attempts: int):
+        if write.op == "create":
+            return BulkWriterCreateOperation(write.reference, write.data, attempts)
+        if write.op == "set":
+            return BulkWriterSetOperation(write.reference, write.data, write.merge, attempts)
+        if write.op == "update":
+            return BulkWriterUpdateOperation(write.reference, write.data, write.option, attempts)
+        return BulkWriterDeleteOperation(write.reference, write.option, attempts)
+
+# ---------- Client ----------
+
+class FakeFirestore:
+    """In-memory replacement for google.cloud.firestore.Client"""
+
+    def __init__(self, project: str = "fake-project", rpc_latency: float = 0.0):
+        self.project = project
+        self.rpc_latency = rpc_latency
+        self._lock = threading.RLock()
+        self._collections: Dict[Tuple[str, ...], Dict[str, _StoredDocument]] = {}
+        self._versions = itertools.count(1)
+        self._clock = datetime.now(timezone.utc)
+
+    # ----- public API -----
+
+    def collection(self, *collection_path: str) -> FakeCollectionReference:
+        path = tuple(part for segment in collection_path for part in segment.split("/"))
+        return FakeCollectionReference(self, *path)
+
+    def document(self, *document_path: str) -> FakeDocumentReference:
+        path = tuple(part for segment in document_path for part in segment.split("/"))
+        return FakeDocumentReference(self, *path)
+
+    def collections(self):
+        with self._lock:
+            roots = sorted({path[0] for path, docs in self._collections.items() if docs})
+        return iter([self.collection(name) for name in roots])
+
+    def get_all(self, references, field_paths=None, transaction=None, **kwargs):
+        started = time.perf_counter()
+        if transaction is not None:
+            transaction._check_read()
+        unique = list({reference._path: reference for reference in references}.values())
+        projection = [_parts(path) for path in field_paths] if field_paths is not None else None
+        read_time = datetime.now(timezone.utc)
+        snapshots, size = [], 0
+        with self._lock:
+            for reference in unique:
+                stored = self._collections.get(reference._path[:-1], {}).get(reference.id)
+                if transaction is not None:
+                    transaction._track_read(reference, stored.version if stored else 0)
+                if stored is None:
+                    snapshots.append(FakeDocumentSnapshot(reference, None, False, read_time=read_time))
+                    continue
+                data, doc_size = stored.project(projection)
+                size += doc_size
+                snapshots.append(FakeDocumentSnapshot(reference, data, True, stored.create_time,
+                                                      stored.update_time, read_time))
+        found = sum(1 for snapshot in snapshots if snapshot.exists)
+        self._finish_rpc("batch_get_documents", started, reads=len(unique), docs=found, size=size)
+        return iter(snapshots)
+
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch(self)
+
+    def transaction(self, max_attempts: int = 5, read_only: bool = False) -> FakeTransaction:
+        return FakeTransaction(self, max_attempts=max_attempts, read_only=read_only)
+
+    def bulk_writer(self, options=None) -> FakeBulkWriter:
+        return FakeBulkWriter(self, options)
+
+    write_option = staticmethod(BaseClient.write_option)
+
+    # ----- seeding & inspection (no RPCs recorded) -----
+
+    def load(self, collection: str, documents: Dict[str, Dict[str, Any]]) -> None:
+        """Bulk-insert documents directly into the store, e.g. for seeded datasets"""
+        path = tuple(collection.split("/"))
+        with self._lock:
+            store = self._collections.setdefault(path, {})
+            for doc_id, data in documents.items():
+                now = self._tick()
+                store[doc_id] = _StoredDocument(_store(data), now, now, next(self._versions))
+
+    def dump(self, collection: str) -> Dict[str, Dict[str, Any]]:
+        """Current documents of a collection by id"""
+        with self._lock:
+            return {doc_id: _copy(stored.data)
+                    for doc_id, stored in self._collections.get(tuple(collection.split("/")), {}).items()}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._collections.clear()
+
+    # ----- internals -----
+
+    def _tick(self) -> datetime:
+        self._clock += timedelta(microseconds=1)
+        return self._clock
+
+    def _documents(self, collection_path: Tuple[str, ...]):
+        return list(self._collections.get(collection_path, {}).items())
+
+    def _finish_rpc(self, method: str, started: float, reads: int = 0, docs: int = 0, writes: int = 0,
+                    size: int = 0) -> None:
+        if self.rpc_latency:
+            time.sleep(self.rpc_latency)
+        record_firestore_call(method, time.perf_counter() - started, reads=reads, docs=docs, writes=writes, size=size)
+
+    def _commit(self, writes: List[_Write], read_versions: Optional[Dict[Tuple[str, ...], int]] = None) -> List[FakeWriteResult]:
+        started = time.perf_counter()
+        if len(writes) > MAX_BATCH_WRITES:
+            raise InvalidArgument(f"A batch can contain at most {MAX_BATCH_WRITES} writes, got {len(writes)}")
+
+        with self._lock:
+            for path, version in (read_versions or {}).items():
+                stored = self._collections.get(path[:-1], {}).get(path[-1])
+                if (stored.version if stored else 0) != version:
+                    raise Aborted(f"Transaction contention on {'/'.join(path)}")
+
+            staged: Dict[Tuple[str, ...], Optional[Dict[str, Any]]] = {}
+            for write in writes:
+                path = write.reference._path
+                if path in staged:
+                    current = staged[path]
+                else:
+                    stored = self._collections.get(path[:-1], {}).get(path[-1])
+                    current = stored.data if stored else None
+                self._check_preconditions(write, path, current)
+                staged[path] = _resolve_write(current, write.op, write.data, write.merge)
+
+            update_time = self._tick()
+            for path, data in staged.items():
+                store = self._collections.setdefault(path[:-1], {})
+                if data is None:
+                    store.pop(path[-1], None)
+                    continue
+                previous = store.get(path[-1])
+                create_time = previous.create_time if previous else update_time
+                store[path[-1]] = _StoredDocument(data, create_time, update_time, next(self._versions))
+
+        self._finish_rpc("commit", started, writes=len(writes))
+        return [FakeWriteResult(update_time) for _ in writes]
+
+    def _check_preconditions(self, write: _Write, path: Tuple[str, ...], current: Optional[Dict[str, Any]]) -> None:
+        name = "/".join(path)
+        if write.op == "create" and current is not None:
+            raise AlreadyExists(f"Document already exists: {name}")
+        if write.op == "update" and current is None:
+            raise NotFound(f"No document to update: {name}")
+        exists = getattr(write.option, "_exists", None)
+        if exists is not None and exists != (current is not None):
+            if exists:
+                raise NotFound(f"No document to update: {name}")
+            raise FailedPrecondition(f"Document already exists: {name}")
+        last_update_time = getattr(write.option, "_last_update_time", None)
+        if last_update_time is not None:
+            stored = self._collections.get(path[:-1], {}).get(path[-1])
+            if stored is None or stored.update_time != last_update_time:
+                raise FailedPrecondition(f"Document {name} was modified since {last_update_time}")
+
+# ---------- Injection ----------
+
+@contextmanager
+def use_fake_firestore(fake: FakeFirestore):
+    """
+    Swap every reference to the real client under `app.*` for `fake`.
+
+    Services import `db` by name, and some hold collection references on
+    module-level instances (e.g. AvailabilityService().collection), so both
+    module globals and the attributes of module-level objects are rebound.
+    Nested use (a test inside a session-wide fixture that installed another
+    fake) moves references to the outer fake as well.
+    """
+    from app.services import firestore as firestore_module
+
+    clients = (firestore_module.db,)
+    undo = []
+
+    def swap(target, name, value):
+        undo.append((target, name, getattr(target, name)))
+        setattr(target, name, value)
+
+    def is_client(value):
+        return value is not fake and (isinstance(value, FakeFirestore) or any(value is c for c in clients))
+
+    def replacement(value):
+        if is_client(value):
+            return fake
+        if isinstance(value, (CollectionReference, FakeCollectionReference)) and is_client(value._client):
+            return fake.collection(*value._path)
+        return None
+
+    for module_name, module in list(sys.modules.items()):
+        if module is None or not (module_name == "app" or module_name.startswith("app.")):
+            continue
+        for name, value in list(vars(module).items()):
+            new = replacement(value)
+            if new is not None:
+                swap(module, name, new)
+                continue
+            if isinstance(value, type) or not hasattr(value, "__dict__") or getattr(value, "__module__", None) is None:
+                continue
+            for attr, attr_value in list(vars(value).items()):
+                new = replacement(attr_value)
+                if new is not None:
+                    swap(value, attr, new)
+    try:
+        yield fake
+    finally:
+        for target, name, value in reversed(undo):
+            setattr(target, name, value)
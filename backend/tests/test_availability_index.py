@@ -0,0 +1,103 @@
+# Compiled availability bitmap tests
+import threading
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.availability_models import AvailabilityRequest
+from app.services.availability_index import (
+    CompiledAvailability, availability_index, compile_week, ranges_for_day, request_bits
+)
+from app.services.availability_service import AvailabilityService
+
+LONDON = ZoneInfo("Europe/London")
+
+
+def week(*days):
+    return [{"day": day, "timeRanges": [{"startTime": start, "endTime": end} for start, end in ranges]}
+            for day, ranges in days]
+
+
+@pytest.fixture
+def availability(fake_firestore):
+    availability_index.clear()
+    fake_firestore.load("mentor_availability", {
+        "m1": {"isActive": True, "timezone": "Europe/London",
+               "availability": week(("Tuesday", [("17:00", "21:00")]), ("Friday", [("09:10", "10:00")]))},
+        "m2": {"isActive": True, "timezone": "Europe/London", "availability": week(("Tuesday", [("19:00", "20:00")]))},
+        "m3": {"isActive": False, "availability": week(("Tuesday", [("00:00", "23:45")]))},
+    })
+    yield AvailabilityService()
+    availability_index.clear()
+
+
+def test_bitmap_compilation_rounds_conservatively():
+    compiled = compile_week(week(("Monday", [("09:10", "10:00"), ("10:00", "11:00")])))
+    assert ranges_for_day(compiled, 0) == [("09:15", "11:00")]
+    assert compiled & request_bits("Monday", "09:15", "11:00") == request_bits("Monday", "09:15", "11:00")
+    assert compiled & request_bits("Monday", "09:00", "09:30") != request_bits("Monday", "09:00", "09:30")
+    assert ranges_for_day(compile_week(week(("Sunday", [("22:00", "24:00")]))), 6) == [("22:00", "24:00")]
+
+
+def test_next_free_slot_wraps_and_respects_date_range():
+    entry = CompiledAvailability.from_document("m1", {"availability": week(("Tuesday", [("18:00", "19:30")]))})
+    tuesday_evening = datetime(2025, 9, 2, 18, 40, tzinfo=LONDON)
+    assert entry.next_free_slot(tuesday_evening, 45) == datetime(2025, 9, 2, 18, 45, tzinfo=LONDON)
+    assert entry.next_free_slot(tuesday_evening, 60) == datetime(2025, 9, 9, 18, 0, tzinfo=LONDON)
+    assert entry.next_free_slot(tuesday_evening, 120) is None
+
+    limited = entry._replace(end_date="2025-09-05")
+    assert limited.next_free_slot(tuesday_evening, 60) is None
+
+
+def test_service_queries_use_index(availability, fake_firestore):
+    assert availability.get_mentors_with_availability() == ["m1", "m2"]
+    assert availability.get_mentors_with_availability("Tuesday", "18:00", "20:00") == ["m1"]
+    assert availability.get_mentors_with_availability("Tuesday", "19:00", "19:30") == ["m1", "m2"]
+    assert availability.get_mentors_with_availability("Friday") == ["m1"]
+    assert availability.check_slot_conflict("m1", "Friday", "09:00", "10:00")
+    assert not availability.check_slot_conflict("m1", "Friday", "09:15", "10:00")
+    assert availability.check_slot_conflict("m3", "Tuesday", "09:00", "10:00")
+    assert availability_index.available_now(datetime(2025, 9, 2, 19, 10, tzinfo=LONDON)) == ["m1", "m2"]
+
+    # Writes recompile the mentor in place
+    availability.set_mentor_availability("m2", AvailabilityRequest(availability=week(("Tuesday", [("18:00", "20:00")]))))
+    assert availability.get_mentors_with_availability("Tuesday", "18:00", "20:00") == ["m1", "m2"]
+    assert fake_firestore.dump("mentor_availability")["m2"]["availability"][0]["timeRanges"][0]["startTime"] == "18:00"
+
+
+def test_available_now_filter_on_mentors(availability, client, fake_firestore, monkeypatch):
+    fake_firestore.load("mentors", {"m1": {"displayName": "Asha", "category": "music", "city": "London"},
+                                    "m2": {"displayName": "Ravi", "category": "music", "city": "Leeds"},
+                                    "m4": {"displayName": "Lena", "category": "art", "city": "York"}})
+    monkeypatch.setattr(availability_index, "available_now", lambda now=None: ["m2"])
+    response = client.get("/mentors?availableNow=true")
+    assert [mentor["uid"] for mentor in response.json()["mentors"]] == ["m2"]
+
+
+def test_day_and_time_are_validated(availability):
+    assert availability.get_mentors_with_availability("tuesday", "19:00", "19:30") == ["m1", "m2"]
+    for args in [("Funday",), ("Tuesday", "7pm", "8pm"), ("Tuesday", "19:00", "19:75")]:
+        with pytest.raises(HTTPException) as error:
+            availability.get_mentors_with_availability(*args)
+        assert error.value.status_code == 400
+
+
+def test_stale_index_reloads_in_background(availability, fake_firestore, monkeypatch):
+    assert availability_index.available_on("Friday") == ["m1"]
+    fake_firestore.collection("mentor_availability").document("m2").update(
+        {"availability": week(("Friday", [("09:00", "10:00")]))})
+    monkeypatch.setattr(availability_index, "ttl", 0)
+    release, load = threading.Event(), availability_index._load
+    monkeypatch.setattr(availability_index, "_load", lambda: release.wait(5) and load())
+
+    # The previous index is served while the reload runs
+    assert availability_index.available_on("Friday") == ["m1"]
+    release.set()
+    deadline = time.monotonic() + 5
+    while availability_index.available_on("Friday") != ["m1", "m2"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert availability_index.available_on("Friday") == ["m1", "m2"]
@@ -0,0 +1,65 @@
+# Availability-aware mentor search tests
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from app.models.availability_models import AvailabilitySearchQuery
+from app.services.availability_index import availability_index
+from app.services.availability_search_service import search_available_mentors
+
+# Friday 5 September 2025, 09:00 London; the next Saturday is the 6th
+NOW = datetime(2025, 9, 5, 9, 0, tzinfo=ZoneInfo("Europe/London"))
+
+
+def saturday(start, end):
+    return {"isActive": True, "timezone": "Europe/London",
+            "availability": [{"day": "Saturday", "timeRanges": [{"startTime": start, "endTime": end}]}]}
+
+
+def mentor(name, rating, subjects=("sitar",)):
+    return {"displayName": name, "category": "music", "city": "London", "subjects": list(subjects),
+            "stats": {"avgRating": rating, "totalReviews": 10}}
+
+
+@pytest.fixture
+def catalog(fake_firestore):
+    availability_index.clear()
+    fake_firestore.load("mentors", {"m1": mentor("Asha", 4.2), "m2": mentor("Ravi", 4.9),
+                                    "m3": mentor("Lena", 5.0, ["guitar"]), "m4": mentor("Omar", 4.5)})
+    fake_firestore.load("mentor_availability", {"m1": saturday("08:00", "11:00"), "m2": saturday("09:00", "10:00"),
+                                                "m3": saturday("08:00", "12:00"), "m4": saturday("14:00", "18:00")})
+    yield fake_firestore
+    availability_index.clear()
+
+
+def test_saturday_morning_sitar_ranked_by_rating(catalog):
+    catalog.load("one_on_one_bookings", {
+        "b1": {"mentorId": "m1", "sessionDate": "2025-09-06", "startTime": "08:00", "endTime": "09:00",
+               "bookingStatus": "confirmed"},
+        "b2": {"mentorId": "m1", "sessionDate": "2025-09-06", "startTime": "10:00", "endTime": "11:00",
+               "bookingStatus": "cancelled"},
+        "b3": {"mentorId": "m2", "sessionDate": "2025-09-06", "startTime": "09:00", "endTime": "10:00",
+               "bookingStatus": "pending"},
+    })
+    query = AvailabilitySearchQuery(subject="sitar", day="Saturday", startTime="08:00", endTime="12:00",
+                                    dateFrom="2025-09-05", dateTo="2025-09-14", slotsPerMentor=3)
+    results, total = search_available_mentors(query, now=NOW)
+
+    # m3 teaches guitar, m4 is free only in the afternoon
+    assert [r.mentor.uid for r in results] == ["m2", "m1"] and total == 2
+    ravi, asha = results
+    assert [(s.date, s.startTime) for s in ravi.slots] == [("2025-09-13", "09:00")]  # 6th is booked
+    assert [(s.date, s.startTime, s.endTime) for s in asha.slots] == [
+        ("2025-09-06", "09:00", "10:00"), ("2025-09-06", "10:00", "11:00"), ("2025-09-13", "08:00", "09:00")]
+
+
+def test_search_endpoint_validates_and_paginates(catalog, client):
+    response = client.get("/availability/search?subject=sitar&day=Sat")
+    assert response.status_code == 400
+
+    response = client.get("/availability/search?subject=music&day=Saturday&pageSize=2&dateFrom=2030-01-01")
+    body = response.json()
+    assert response.status_code == 200
+    assert (body["total"], body["totalPages"], len(body["results"])) == (4, 2, 2)
+    assert body["results"][0]["mentor"]["uid"] == "m3"
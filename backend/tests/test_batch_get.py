@@ -0,0 +1,42 @@
+# batchGet endpoint tests - request order, per-id errors, round trips
+def test_classes_batch_get_keeps_order_and_reports_each_id(fake_firestore, client):
+    fake_firestore.load("mentors", {"m1": {"displayName": "Asha", "category": "music"}})
+    fake_firestore.load("classes", {
+        "c1": {"title": "Sitar", "subject": "sitar", "category": "music", "type": "group",
+               "mentorId": "m1", "mentorName": "Asha"},
+        "c2": {"title": "Tabla", "subject": "tabla", "category": "music", "type": "group", "mentorId": "m1"},
+    })
+    response = client.post("/classes:batchGet", json={"ids": ["c2", "missing", "a/b", "c1", "c2"]})
+    assert response.status_code == 200
+    body = response.json()
+    assert [r["id"] for r in body["results"]] == ["c2", "missing", "a/b", "c1", "c2"]
+    assert body["results"][0]["class"]["mentorName"] == "Asha"  # Resolved from the mentor profile
+    assert body["results"][1]["error"] == {"code": 404, "message": "Class not found"}
+    assert body["results"][2]["error"]["code"] == 400
+    assert body["results"][3]["class"]["title"] == "Sitar"
+    assert (body["found"], body["total"]) == (3, 5)
+    # One get_all for the classes, one for the missing mentor name
+    assert 'fs-gets;desc="2"' in response.headers["server-timing"]
+
+
+def test_class_mentor_name_falls_back_to_user_record(fake_firestore, client):
+    fake_firestore.load("users", {"u9": {"firstName": "Ravi", "lastName": "shankar"}})
+    fake_firestore.load("classes", {"c9": {"title": "Sitar", "subject": "sitar", "category": "music",
+                                           "type": "group", "mentorId": "u9"}})
+    assert client.get("/classes/c9").json()["class"]["mentorName"] == "Ravi S"
+    body = client.post("/classes:batchGet", json={"ids": ["c9"]}).json()
+    assert body["results"][0]["class"]["mentorName"] == "Ravi S"
+
+
+def test_mentors_and_users_batch_get(fake_firestore, client):
+    fake_firestore.load("mentors", {"m1": {"displayName": "Asha", "category": "music"}})
+    fake_firestore.load("users", {"u1": {"email": "a@example.com", "displayName": "Asha", "roles": ["student"]}})
+
+    mentors = client.post("/mentors:batchGet", json={"ids": ["nope", "m1"]}).json()["results"]
+    assert mentors[0]["error"]["code"] == 404 and mentors[1]["mentor"]["uid"] == "m1"
+
+    users = client.post("/users:batchGet", json={"ids": ["u1"]}).json()
+    assert users["results"][0]["user"]["displayName"] == "Asha"
+
+    assert client.post("/users:batchGet", json={"ids": []}).status_code == 422
+    assert client.post("/users:batchGet", json={"ids": [f"u{i}" for i in range(301)]}).status_code == 422
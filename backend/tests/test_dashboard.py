@@ -0,0 +1,98 @@
+# Dashboard read model tests
+from datetime import date, timedelta
+
+import threading
+
+from google.cloud import firestore
+
+from app.services.booking_service import update_booking_flexible
+from app.services.dashboard_service import (
+    booking_change_writes, get_dashboard, rebuild_dashboard, record_booking_change, record_review)
+from app.services.document_loader import get_document, loader_scope
+
+
+def test_dashboard_requires_auth(client):
+    response = client.get("/dashboard")
+    assert response.status_code in [401, 403]
+
+
+def test_new_booking_counts_for_student_and_mentor():
+    booking = {"bookingId": "booking_1", "studentId": "student_1", "mentorId": "mentor_1",
+               "className": "Piano", "bookingStatus": "pending", "paymentStatus": "unpaid"}
+    writes = {ref.id: data for ref, data in booking_change_writes(None, booking)}
+
+    assert set(writes) == {"student_1", "mentor_1"}
+    student = writes["student_1"]["student"]
+    assert student["counts"]["pending"].value == 1
+    assert student["counts"]["total"].value == 1
+    assert student["upcoming"]["booking_1"]["className"] == "Piano"
+
+
+def test_paid_cancellation_updates_counts_and_earnings():
+    old = {"bookingId": "booking_1", "studentId": "student_1", "mentorId": "mentor_1",
+           "bookingStatus": "confirmed", "paymentStatus": "paid", "amount": 40.0}
+    writes = {ref.id: data for ref, data in booking_change_writes(old, {"bookingStatus": "cancelled",
+                                                                        "paymentStatus": "refunded"})}
+
+    mentor = writes["mentor_1"]["mentor"]
+    assert mentor["counts"]["cancelled"].value == 1
+    assert mentor["counts"]["confirmed"].value == -1
+    assert mentor["upcoming"]["booking_1"] is firestore.DELETE_FIELD
+    assert mentor["earnings"]["total"].value == -40.0
+    assert "earnings" not in writes["student_1"]["student"]
+
+
+def test_upcoming_leaves_out_past_sessions(fake_firestore):
+    today = date.today()
+    upcoming = {
+        "past": {"bookingId": "past", "sessionDate": (today - timedelta(days=1)).isoformat()},
+        "today": {"bookingId": "today", "sessionDate": today.isoformat()},
+        "group": {"bookingId": "group"},
+    }
+    fake_firestore.collection("dashboards").document("student_1").set({"student": {"upcoming": upcoming}})
+
+    listed = [b["bookingId"] for b in get_dashboard("student_1")["student"]["upcoming"]]
+    assert listed == ["group", "today"]
+
+
+def test_record_review_keeps_newest_first(fake_firestore):
+    for i in range(7):
+        record_review("mentor_1", {"reviewId": f"review_{i}", "rating": 5}, 5.0, i + 1)
+    record_review("mentor_1", None, 5.0, 6, removed_review_id="review_6")
+
+    mentor = fake_firestore.collection("dashboards").document("mentor_1").get().to_dict()["mentor"]
+    assert [r["reviewId"] for r in mentor["latestReviews"]] == ["review_5", "review_4", "review_3", "review_2"]
+    assert mentor["rating"] == {"avg": 5.0, "total": 6}
+
+
+def test_rebuild_matches_incremental_for_parents(fake_firestore):
+    bookings = {
+        "b1": {"bookingId": "b1", "studentId": "child_1", "parentId": "parent_1", "mentorId": "mentor_1",
+               "bookingStatus": "confirmed"},
+        "b2": {"bookingId": "b2", "studentId": "parent_1", "parentId": "parent_1", "mentorId": "mentor_1",
+               "bookingStatus": "pending"},
+        "b3": {"bookingId": "b3", "studentId": "parent_1", "mentorId": "mentor_1", "bookingStatus": "cancelled"},
+    }
+    fake_firestore.load("bookings", bookings)
+    for booking in bookings.values():
+        record_booking_change(None, booking)
+    incremental = get_dashboard("parent_1")["student"]
+
+    rebuilt = rebuild_dashboard("parent_1")["student"]
+    assert rebuilt["counts"] == incremental["counts"] == {"total": 3, "confirmed": 1, "pending": 1, "cancelled": 1}
+    assert sorted(rebuilt["upcoming"]) == sorted(b["bookingId"] for b in incremental["upcoming"]) == ["b1", "b2"]
+
+
+def test_racing_status_changes_count_once(fake_firestore):
+    fake_firestore.load("bookings", {"b1": {"studentId": "student_1", "mentorId": "mentor_1",
+                                            "bookingStatus": "confirmed"}})
+    rebuild_dashboard("student_1")
+    with loader_scope():
+        get_document("bookings", "b1")  # This request read the booking while it was confirmed...
+        other = threading.Thread(target=update_booking_flexible, args=("b1", {"bookingStatus": "cancelled"}))
+        other.start()  # ...and another cancelled it before this request's write
+        other.join()
+        update_booking_flexible("b1", {"bookingStatus": "cancelled"})
+
+    counts = fake_firestore.collection("dashboards").document("student_1").get().to_dict()["student"]["counts"]
+    assert (counts["confirmed"], counts["cancelled"]) == (0, 1)
@@ -0,0 +1,80 @@
+# Request-scoped document loader tests - batching, identity map, invalidation
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.models.booking_models import SimpleBookingRequest
+from app.services.booking_service import create_simple_booking
+from app.services.document_loader import (
+    DocumentLoader, forget_document, get_document, get_documents, loader_scope, prime_documents
+)
+from app.services.instrumentation import begin_request_stats, end_request_stats
+from app.services.review_service import get_testimonials
+
+
+def test_repeated_and_primed_ids_share_one_get_all(fake_firestore):
+    fake_firestore.load("users", {"u1": {"displayName": "Asha"}, "u2": {"displayName": "Ravi"}})
+    fake_firestore.load("classes", {"c1": {"title": "Sitar"}})
+    stats, token = begin_request_stats()
+    try:
+        with loader_scope() as loader:
+            prime_documents("classes", "c1")
+            users = get_documents("users", ["u2", "u1", "u2", "missing"])
+            assert [s.id for s in users] == ["u2", "u1", "u2", "missing"] and not users[3].exists
+            assert get_document("classes", "c1").to_dict()["title"] == "Sitar"
+            assert stats.gets == 1 and loader.batches == 1 and loader.hits == 1
+
+            fake_firestore.collection("classes").document("c1").update({"title": "Sitar II"})
+            assert get_document("classes", "c1").to_dict()["title"] == "Sitar"
+            forget_document("classes", "c1")
+            assert get_document("classes", "c1").to_dict()["title"] == "Sitar II"
+            assert stats.gets == 2
+    finally:
+        end_request_stats(token)
+
+
+def test_services_batch_their_lookups(fake_firestore):
+    fake_firestore.load("users", {"s1": {"displayName": "Sam"}})
+    fake_firestore.load("classes", {f"c{i}": {"title": f"Class {i}", "mentorId": "m1", "mentorName": "Asha"}
+                                    for i in range(3)})
+    fake_firestore.load("mentors", {"m1": {"displayName": "Asha"}})
+    fake_firestore.load("bookings", {f"b{i}": {"parentId": "p1" if i else None} for i in range(3)})
+    fake_firestore.load("reviews", {f"r{i}": {"rating": 5, "review": "Lovely", "createdAt": "2025-01-01",
+                                              "classId": f"c{i}", "mentorId": "m1", "bookingId": f"b{i}"}
+                                    for i in range(3)})
+    stats, token = begin_request_stats()
+    try:
+        with loader_scope():
+            booking = create_simple_booking(SimpleBookingRequest(studentId="s1", classId="c0"))
+            assert booking.studentName == "Sam" and booking.className == "Class 0"
+            assert stats.gets == 1
+
+            testimonials = get_testimonials()
+            assert sorted(t.userType for t in testimonials) == ["Parent", "Parent", "Student"]
+            # c0 is already loaded; the other six documents come back in one get_all
+            assert stats.gets == 2 and stats.queries == 1
+    finally:
+        end_request_stats(token)
+
+
+def test_reads_run_outside_the_lock(fake_firestore, monkeypatch):
+    fake_firestore.load("users", {"u1": {"displayName": "Asha"}, "u2": {"displayName": "Ravi"}})
+    loader = DocumentLoader()
+    started, release = threading.Event(), threading.Event()
+    get_all = fake_firestore.get_all
+
+    def slow_get_all(refs, *args, **kwargs):
+        if any(ref.id == "u1" for ref in refs):
+            started.set()
+            release.wait(5)
+        return get_all(refs, *args, **kwargs)
+
+    monkeypatch.setattr(fake_firestore, "get_all", slow_get_all)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        first = pool.submit(loader.load, "users", "u1")
+        assert started.wait(5)
+        same = pool.submit(loader.load, "users", "u1")
+        # Another document is read while the first get_all is still running
+        assert loader.load("users", "u2").to_dict()["displayName"] == "Ravi"
+        release.set()
+        assert first.result().to_dict() == same.result().to_dict() == {"displayName": "Asha"}
+    assert loader.batches == 2
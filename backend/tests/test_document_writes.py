@@ -0,0 +1,44 @@
+# Conditional single-document updates - round trips, 404s, concurrent changes
+import pytest
+from fastapi import HTTPException
+
+from app.services.document_loader import get_document, loader_scope
+from app.services.document_writes import update_document
+from app.services.instrumentation import begin_request_stats, end_request_stats
+from app.services.mentor_service import update_mentor_flexible
+
+
+@pytest.fixture
+def stats():
+    stats, token = begin_request_stats()
+    yield stats
+    end_request_stats(token)
+
+
+def test_update_returns_merged_document_without_rereading(fake_firestore, stats):
+    fake_firestore.load("mentors", {"m1": {"displayName": "Asha", "category": "music", "pricing": {"oneOnOneRate": 40}}})
+    updated = update_mentor_flexible("m1", {"pricing.oneOnOneRate": 45, "city": "Leeds"})
+    assert updated["pricing"] == {"oneOnOneRate": 45} and updated["city"] == "Leeds"
+    assert updated == fake_firestore.dump("mentors")["m1"]
+    assert stats.gets == 1
+
+    # A document this request already read costs no extra read
+    with loader_scope():
+        get_document("mentors", "m1")
+        update_mentor_flexible("m1", {"city": "York"})
+    assert stats.gets == 2
+
+    with pytest.raises(HTTPException) as missing:
+        update_mentor_flexible("nope", {"city": "York"})
+    assert missing.value.status_code == 404
+
+
+def test_derived_patch_is_recomputed_when_document_changes(fake_firestore):
+    fake_firestore.load("counters", {"c1": {"value": 1}})
+    prepare = lambda current, changes: {**changes, "value": current["value"] + 1}
+    with loader_scope():
+        get_document("counters", "c1")
+        fake_firestore.collection("counters").document("c1").update({"value": 10})
+        before, after = update_document("counters", "c1", {"label": "x"}, prepare)
+    assert before["value"] == 10 and after == {"value": 11, "label": "x"}
+    assert fake_firestore.dump("counters")["c1"] == after
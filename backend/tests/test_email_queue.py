@@ -0,0 +1,124 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services.email_queue import EmailDispatcher, InMemoryEmailQueue, SQLiteEmailQueue
+from app.services.email_service import ResendEmailService
+
+
+class ResendStub:
+    """Local HTTP server standing in for the Resend API"""
+
+    def __init__(self, fail_first=0):
+        self.requests = []
+        self.fail_first = fail_first
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stub.requests.append((self.path, body))
+                if stub.fail_first > 0:
+                    stub.fail_first -= 1
+                    self.send_response(500)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(b'{"id": "stub"}')
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+
+
+@pytest.fixture
+def resend_stub():
+    stub = ResendStub()
+    yield stub
+    stub.close()
+
+
+def make_message(i):
+    return ResendEmailService.build_message(f"user{i}@example.com", f"Subject {i}", "<p>Hi</p>")
+
+
+def test_queued_emails_are_sent_in_batches(resend_stub):
+    sender = ResendEmailService(api_key="re_test", base_url=resend_stub.url)
+    backend = InMemoryEmailQueue()
+    for i in range(5):
+        backend.put({"id": f"job{i}", "kind": "raw", "payload": make_message(i), "attempts": 0})
+
+    dispatcher = EmailDispatcher(sender, backend, workers=1, batch_size=10)
+    dispatcher.start()
+    assert dispatcher.wait_until_idle(5)
+    dispatcher.stop()
+
+    assert resend_stub.requests[0][0] == "/emails/batch"
+    assert len(resend_stub.requests[0][1]) == 5
+
+
+def test_failed_send_is_retried(resend_stub):
+    resend_stub.fail_first = 1
+    sender = ResendEmailService(api_key="re_test", base_url=resend_stub.url)
+    dispatcher = EmailDispatcher(sender, InMemoryEmailQueue(), workers=1, backoff_base=0.01)
+
+    dispatcher.enqueue_message(make_message(1))
+    assert dispatcher.wait_until_idle(5, due_only=False)
+    dispatcher.stop()
+
+    assert [path for path, _ in resend_stub.requests] == ["/emails", "/emails"]
+
+
+def test_sqlite_queue_survives_restart(tmp_path):
+    path = str(tmp_path / "emails.db")
+    SQLiteEmailQueue(path).put({"id": "job1", "kind": "raw", "payload": make_message(1), "attempts": 0})
+
+    claimed = SQLiteEmailQueue(path).claim(10)
+    assert [job["id"] for job in claimed] == ["job1"]
+    assert claimed[0]["payload"]["to"] == ["user1@example.com"]
+
+
+def test_idle_does_not_wait_for_backoff(resend_stub):
+    resend_stub.fail_first = 1
+    sender = ResendEmailService(api_key="re_test", base_url=resend_stub.url)
+    backend = InMemoryEmailQueue()
+    dispatcher = EmailDispatcher(sender, backend, workers=1, backoff_base=60)
+
+    dispatcher.enqueue_message(make_message(1))
+    assert dispatcher.wait_until_idle(5)
+    dispatcher.stop()
+
+    assert len(resend_stub.requests) == 1
+    assert backend.pending_count() == 1 and backend.due_count() == 0
+
+
+def test_missing_builder_fails_permanently():
+    backend = InMemoryEmailQueue()
+    backend.put({"id": "job1", "kind": "unknown", "payload": {}, "attempts": 0})
+    dispatcher = EmailDispatcher(object(), backend, workers=1)
+    dispatcher.start()
+    assert dispatcher.wait_until_idle(5)
+    dispatcher.stop()
+
+    assert backend.pending_count() == 0
+    assert backend._jobs["job1"]["status"] == "failed"
+
+
+def test_backend_is_created_on_first_use():
+    created = []
+    dispatcher = EmailDispatcher(object(), workers=1,
+                                 backend_factory=lambda: created.append(1) or InMemoryEmailQueue())
+    assert created == []
+    dispatcher.start()
+    dispatcher.stop()
+    assert created == [1]
@@ -0,0 +1,87 @@
+import pytest
+
+from app.services.email_templates import FRONTEND_URL, EmailTemplates, MENTOR_STATUS_COPY, render_bulk
+
+EVIL = '<script>alert("x")</script>'
+ESCAPED = "&lt;script&gt;alert(&#34;x&#34;)&lt;/script&gt;"
+
+BOOKING = {
+    "pricing": {"finalPrice": 45},
+    "paymentStatus": "paid",
+    "scheduledSlots": [
+        {"sessionNumber": n, "date": f"2025-09-0{n}", "startTime": "18:00", "endTime": "19:00"}
+        for n in range(1, 6)
+    ],
+}
+
+# Template -> (render call, values the email must show)
+TEMPLATES = {
+    "welcome": (
+        lambda name: EmailTemplates.welcome_email(name, "mentor"),
+        ["Welcome to Roots &amp; Wings!", "Get Started", "/mentor/dashboard"],
+    ),
+    "email_verification": (
+        lambda name: EmailTemplates.email_verification(name, "https://example.com/verify?t=abc"),
+        ["Verify Email Address", "https://example.com/verify?t=abc"],
+    ),
+    "password_reset": (
+        lambda name: EmailTemplates.password_reset(name, "https://example.com/reset?t=abc"),
+        ["Reset Password", "https://example.com/reset?t=abc"],
+    ),
+    "booking_confirmation": (
+        lambda name: EmailTemplates.booking_confirmation(name, "Piano Basics", "Jane Mentor", BOOKING),
+        ["Piano Basics", "Jane Mentor", "£45", "Paid", "2025-09-01 at 18:00 - 19:00", "... and 2 more sessions"],
+    ),
+    "mentor_application_status": (
+        lambda name: EmailTemplates.mentor_application_status(name, "approved"),
+        ["Mentor Application Approved!", "Start Teaching", MENTOR_STATUS_COPY["approved"][2]],
+    ),
+}
+
+
+@pytest.mark.parametrize("template", TEMPLATES)
+def test_template_renders_required_values(template):
+    render, expected = TEMPLATES[template]
+    html = render("Ada Lovelace")
+
+    assert "Ada Lovelace" in html
+    for value in expected:
+        assert value in html
+    # Header and footer fragments are included in every email
+    assert html.count("Roots &amp; Wings") >= 2
+
+
+@pytest.mark.parametrize("template", TEMPLATES)
+def test_template_escapes_user_values(template):
+    render, _ = TEMPLATES[template]
+    html = render(EVIL)
+
+    assert EVIL not in html
+    assert ESCAPED in html
+
+
+def test_base_template_keeps_trusted_content():
+    html = EmailTemplates.base_template("Title", "<p>Trusted</p>", "Go", "https://example.com")
+    assert "<p>Trusted</p>" in html
+    assert 'href="https://example.com"' in html
+
+
+def test_bulk_render_matches_single_render():
+    names = ["Ada", EVIL, "Grace"]
+    bulk = render_bulk("booking_confirmation.html", [{"student_name": name} for name in names],
+                       title="Booking Confirmed - Roots & Wings", class_name="Piano Basics",
+                       mentor_name="Jane Mentor", booking_details=BOOKING, cta_text="View My Bookings",
+                       cta_link=f"{FRONTEND_URL}/dashboard/bookings")
+
+    assert len(bulk) == len(names)
+    for name, html in zip(names, bulk):
+        assert html == EmailTemplates.booking_confirmation(name, "Piano Basics", "Jane Mentor", BOOKING)
+    assert ESCAPED in bulk[1]
+
+
+def test_bulk_render_per_recipient_values_override_shared():
+    contexts = [{"mentor_name": "Ada"}, {"mentor_name": "Grace", "emoji": "⏳"}]
+    bulk = EmailTemplates.render_bulk("mentor_application_status", contexts,
+                                      title="Update", emoji="✅", message="Hello")
+    assert "✅" in bulk[0] and "⏳" not in bulk[0]
+    assert "⏳" in bulk[1]
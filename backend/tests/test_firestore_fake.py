@@ -0,0 +1,89 @@
+# In-memory Firestore fake - query semantics, transforms, transactions and injection
+import pytest
+from google.api_core.exceptions import AlreadyExists, NotFound
+from google.cloud import firestore
+
+from app.services import booking_service
+from app.services.mentor_profile_service import availability_service
+from app.services.instrumentation import begin_request_stats, end_request_stats
+from tests.firestore_fake import FakeFirestore, use_fake_firestore
+
+
+@pytest.fixture
+def classes(fake_firestore):
+    collection = fake_firestore.collection("classes")
+    for i in range(10):
+        collection.document(f"c{i}").set({"n": i, "type": "workshop" if i % 2 else "batch"})
+    collection.document("no_n").set({"type": "workshop"})
+    return collection
+
+
+def test_query_filters_order_and_cursors(classes):
+    assert [d.id for d in classes.where("n", ">=", 5).order_by("n", direction="DESCENDING").limit(3).stream()] \
+        == ["c9", "c8", "c7"]
+    assert [d.id for d in classes.where("type", "in", ["workshop"]).order_by("n").start_after({"n": 3}).stream()] \
+        == ["c5", "c7", "c9"]
+    after = classes.document("c4").get()
+    assert [d.id for d in classes.order_by("n").start_after(after).limit(2).stream()] == ["c5", "c6"]
+    # != excludes documents missing the field; ordering on a field excludes them too
+    assert len(classes.where("n", "!=", 0).get()) == 9
+    assert classes.where("type", "==", "workshop").count().get()[0][0].value == 6
+
+
+def test_offset_reads_are_billed(classes):
+    stats, token = begin_request_stats()
+    try:
+        docs = classes.order_by("n").offset(5).limit(2).get()
+        classes.where("n", "==", 42).get()
+    finally:
+        end_request_stats(token)
+    assert [d.id for d in docs] == ["c5", "c6"]
+    assert (stats.reads, stats.docs, stats.queries) == (8, 2, 2)
+
+
+def test_writes_and_transforms(classes):
+    ref = classes.document("c1")
+    ref.update({"stats.views": firestore.Increment(2), "tags": firestore.ArrayUnion(["a", "b"])})
+    ref.set({"stats": {"likes": 1}}, merge=True)
+    assert ref.get().to_dict() == {"n": 1, "type": "workshop", "tags": ["a", "b"], "stats": {"views": 2, "likes": 1}}
+
+    with pytest.raises(AlreadyExists):
+        ref.create({"n": 1})
+    with pytest.raises(NotFound):
+        classes.document("missing").update({"n": 1})
+
+
+def test_transaction_retries_on_contention(classes):
+    ref = classes.document("c5")
+    attempts = []
+
+    @firestore.transactional
+    def bump(transaction):
+        snapshot = next(transaction.get(ref))
+        if not attempts:
+            ref.update({"n": 100})  # Concurrent writer
+        attempts.append(1)
+        transaction.update(ref, {"n": snapshot.get("n") + 1})
+
+    bump(classes._client.transaction())
+    assert len(attempts) == 2
+    assert ref.get().get("n") == 101
+
+
+def test_services_use_injected_fake(fake_firestore):
+    fake_firestore.collection("bookings").document("b1").set({
+        "studentId": "s1", "studentName": "Sam", "classId": "c1", "className": "Piano",
+        "mentorId": "m1", "mentorName": "Maya", "bookingStatus": "confirmed", "paymentStatus": "paid",
+        "bookedAt": "2025-09-01T10:00:00",
+    })
+    bookings, total = booking_service.get_bookings_by_student("s1")
+    assert total == 1 and bookings[0].bookingId == "b1"
+
+
+def test_nested_fake_rebinds_references_to_the_outer_fake(fake_firestore):
+    service = availability_service  # A module-level instance holding a collection reference
+    inner = FakeFirestore()
+    with use_fake_firestore(inner):
+        assert booking_service.db is inner
+        assert service.collection._client is inner
+    assert booking_service.db is fake_firestore and service.collection._client is fake_firestore
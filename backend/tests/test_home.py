@@ -0,0 +1,52 @@
+# Homepage snapshot tests - one blob, ETags, shared snapshot document, catalog changes
+import pytest
+
+from app.services.homepage_service import HomepageSnapshots
+from app.services.instrumentation import begin_request_stats, end_request_stats
+from app.services.mentor_service import update_mentor_flexible
+
+
+@pytest.fixture
+def catalog(fake_firestore):
+    fake_firestore.load("mentors", {"m1": {"displayName": "Asha", "category": "music", "city": "Leeds",
+                                           "country": "UK", "stats": {"avgRating": 4.8}}})
+    fake_firestore.load("classes", {
+        "c1": {"title": "Sitar Batch", "subject": "sitar", "category": "music", "type": "batch",
+               "mentorId": "m1", "mentorName": "Asha", "status": "approved"},
+        "w1": {"title": "Tabla Workshop", "subject": "tabla", "category": "music", "type": "workshop",
+               "mentorId": "m1", "mentorName": "Asha", "status": "approved",
+               "schedule": {"startDate": "2099-01-01"}},
+    })
+    fake_firestore.load("reviews", {"r1": {"rating": 5, "review": "Lovely", "createdAt": "2025-01-01",
+                                           "classId": "c1", "mentorId": "m1", "bookingId": "b1"}})
+    return fake_firestore
+
+
+def test_home_is_one_snapshot_with_etag(catalog, client):
+    response = client.get("/home")
+    assert response.status_code == 200
+    body = response.json()
+    assert [c["classId"] for c in body["featuredClasses"]] == ["c1"]
+    assert [c["classId"] for c in body["upcomingWorkshops"]] == ["w1"]
+    assert [m["uid"] for m in body["featuredMentors"]] == ["m1"]
+    assert body["testimonials"][0]["mentorName"] == "Asha"
+
+    etag = response.headers["etag"]
+    assert client.get("/home", headers={"If-None-Match": etag}).status_code == 304
+
+    # A catalog write makes the snapshot stale; the next request sees the change
+    update_mentor_flexible("m1", {"displayName": "Asha Rao"})
+    changed = client.get("/home", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+    assert changed.json()["featuredMentors"][0]["displayName"] == "Asha Rao"
+
+
+def test_cold_instance_adopts_the_stored_snapshot_in_one_read(catalog, client):
+    built = client.get("/home")
+    stats, token = begin_request_stats()
+    try:
+        snapshot = HomepageSnapshots().current()
+    finally:
+        end_request_stats(token)
+    assert stats.reads == 1
+    assert f"W/{snapshot.etag}" == built.headers["etag"] and snapshot.body == built.content
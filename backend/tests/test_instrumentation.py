@@ -0,0 +1,41 @@
+# Instrumentation tests - Firestore RPC counting, Server-Timing headers and /metrics
+from app.services.instrumentation import (
+    InstrumentedFirestoreAPI, begin_request_stats, end_request_stats,
+)
+
+
+class FakeGapic:
+    """Minimal stand-in for the GAPIC FirestoreClient"""
+
+    def batch_get_documents(self, request=None, **kwargs):
+        return iter([{"found": {"name": "a"}}, {"missing": "b"}, {"found": {"name": "c"}}])
+
+    def run_query(self, request=None, **kwargs):
+        return iter([{"document": {"name": "a"}}, {"document": {"name": "b"}}, {"read_time": "t"}])
+
+    def commit(self, request=None, **kwargs):
+        return {"write_results": request["writes"]}
+
+
+def test_instrumented_api_counts_reads_queries_and_writes():
+    api = InstrumentedFirestoreAPI(FakeGapic())
+    stats, token = begin_request_stats()
+    try:
+        assert len(list(api.batch_get_documents(request={}))) == 3
+        assert len(list(api.run_query(request={}))) == 3
+        api.commit(request={"writes": [1, 2]})
+    finally:
+        end_request_stats(token)
+
+    assert (stats.reads, stats.docs, stats.gets, stats.queries, stats.writes, stats.rpcs) == (5, 4, 1, 1, 2, 3)
+
+
+def test_server_timing_header_and_metrics(client):
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert "fs-reads" in response.headers["server-timing"]
+
+    metrics = client.get("/metrics")
+    assert metrics.status_code == 200
+    assert 'http_requests_total{method="GET",route="/health",status="200"}' in metrics.text
+    assert "server-timing" not in metrics.headers
@@ -0,0 +1,37 @@
+# Logging setup tests - JSON formatting, debug sampling and non-blocking queueing
+import json
+import logging
+import queue
+
+from app.logging_config import JsonFormatter, NonBlockingQueueHandler, SamplingFilter
+
+
+def make_record(level=logging.INFO, name="app.services.class_service", msg="hello %s", args=("world",), **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_extra_fields():
+    entry = json.loads(JsonFormatter().format(make_record(firestore_filters=[("type", "==", "workshop")])))
+    assert entry["severity"] == "INFO"
+    assert entry["logger"] == "app.services.class_service"
+    assert entry["message"] == "hello world"
+    assert entry["firestore_filters"] == [["type", "==", "workshop"]]
+
+
+def test_sampling_filter_only_samples_debug():
+    sampler = SamplingFilter(0.0, {"app.ai": 1.0})
+    assert sampler.filter(make_record(logging.INFO))
+    assert not sampler.filter(make_record(logging.DEBUG))
+    assert sampler.filter(make_record(logging.DEBUG, name="app.ai.ai_service"))
+    assert sampler.filter(make_record(logging.DEBUG, sample_rate=1.0))
+
+
+def test_queue_handler_drops_when_full():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    handler.handle(make_record())
+    handler.handle(make_record())
+    assert handler.queue.qsize() == 1
+    assert handler.dropped == 1
+    assert handler.queue.get_nowait().getMessage() == "hello world"
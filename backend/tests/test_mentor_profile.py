@@ -0,0 +1,96 @@
+# Mentor profile composite tests - sub-fetches, review paging, next slots, caching
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from app.services.availability_index import availability_index
+from app.services.availability_search_service import next_open_slots
+from app.services.response_cache import bump_catalog_version, catalog_versions, response_cache
+
+# Friday 5 September 2025, 09:00 London
+NOW = datetime(2025, 9, 5, 9, 0, tzinfo=ZoneInfo("Europe/London"))
+
+
+@pytest.fixture
+def profile(fake_firestore):
+    availability_index.clear()
+    response_cache.clear()
+    fake_firestore.load("mentors", {"m1": {"displayName": "Asha", "category": "music",
+                                           "stats": {"avgRating": 4.5, "totalReviews": 3}}})
+    fake_firestore.load("classes", {"c1": {"title": "Sitar", "subject": "sitar", "category": "music",
+                                           "type": "group", "mentorId": "m1", "mentorName": "Asha"}})
+    fake_firestore.load("reviews", {f"r{i}": {"mentorId": "m1", "classId": "c1", "rating": 4 + i % 2,
+                                              "review": f"Review {i}", "createdAt": f"2025-0{i}-01T10:00:00"}
+                                    for i in range(1, 4)})
+    fake_firestore.load("mentor_availability", {"m1": {
+        "isActive": True, "timezone": "Europe/London",
+        "availability": [{"day": day, "timeRanges": [{"startTime": "09:00", "endTime": "11:00"}]}
+                         for day in ("Friday", "Saturday")]}})
+    yield fake_firestore
+    availability_index.clear()
+    response_cache.clear()
+
+
+def test_profile_composes_every_section_and_pages_reviews(profile, client):
+    response = client.get("/mentors/m1/profile?reviewsLimit=2&slots=3")
+    assert response.status_code == 200 and response.headers["x-cache"] == "MISS"
+    body = response.json()
+    assert body["mentor"]["uid"] == "m1" and [c["classId"] for c in body["classes"]] == ["c1"]
+    assert body["availability"]["timezone"] == "Europe/London"
+    assert len(body["nextSlots"]["slots"]) == 3
+    reviews = body["reviews"]
+    assert [r["reviewId"] for r in reviews["reviews"]] == ["r3", "r2"]
+    assert (reviews["avgRating"], reviews["total"]) == (4.5, 3)
+
+    rest = client.get(f"/mentors/m1/profile?reviewsLimit=2&reviewsCursor={reviews['nextCursor']}").json()
+    assert [r["reviewId"] for r in rest["reviews"]["reviews"]] == ["r1"] and rest["reviews"]["nextCursor"] is None
+
+    # Cached per URL until one of the collections it is built from is written
+    assert client.get("/mentors/m1/profile?reviewsLimit=2&slots=3").headers["x-cache"] == "HIT"
+    bump_catalog_version("reviews")
+    assert client.get("/mentors/m1/profile?reviewsLimit=2&slots=3").headers["x-cache"] == "MISS"
+
+    assert client.get("/mentors/nope/profile").status_code == 404
+    assert client.get("/mentors/m1/profile?reviewsCursor=bad").status_code == 400
+
+
+def test_next_slots_skip_booked_time(profile):
+    assert [(s.date, s.startTime) for s in next_open_slots("m1", 3, 60, now=NOW)] == [
+        ("2025-09-05", "09:00"), ("2025-09-05", "10:00"), ("2025-09-06", "09:00")]
+    profile.load("one_on_one_bookings", {"b1": {"mentorId": "m1", "sessionDate": "2025-09-05", "startTime": "09:00",
+                                                "endTime": "10:00", "bookingStatus": "confirmed"}})
+    assert [(s.date, s.startTime) for s in next_open_slots("m1", 2, 60, now=NOW)] == [
+        ("2025-09-05", "10:00"), ("2025-09-06", "09:00")]
+
+
+def test_review_pages_keep_reviews_with_equal_timestamps(profile, client):
+    profile.load("reviews", {f"s{i}": {"mentorId": "m1", "classId": "c1", "rating": 5, "review": f"Same {i}",
+                                       "createdAt": "2025-08-01T10:00:00"} for i in range(1, 5)})
+    seen, cursor = [], None
+    while True:
+        suffix = f"&reviewsCursor={cursor}" if cursor else ""
+        reviews = client.get(f"/mentors/m1/profile?reviewsLimit=2&slots=0{suffix}").json()["reviews"]
+        seen += [r["reviewId"] for r in reviews["reviews"]]
+        cursor = reviews["nextCursor"]
+        if cursor is None:
+            break
+    assert seen == ["s4", "s3", "s2", "s1", "r3", "r2", "r1"]
+
+
+def test_next_slots_are_rebuilt_every_max_age_bucket(profile, client, monkeypatch):
+    catalog_versions.refresh()
+    now = 1_700_000_000.0
+    monkeypatch.setattr(time, "time", lambda: now)
+
+    first = client.get("/mentors/m1/profile?slots=3")
+    assert "stale-while-revalidate=60" in first.headers["cache-control"]
+    assert client.get("/mentors/m1/profile?slots=3").headers["x-cache"] == "HIT"
+    assert client.get("/mentors/m1/profile?slots=3",
+                      headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+
+    now += 60
+    later = client.get("/mentors/m1/profile?slots=3", headers={"If-None-Match": first.headers["etag"]})
+    assert later.status_code == 200 and later.headers["x-cache"] == "MISS"
+    assert later.headers["etag"] != first.headers["etag"]
@@ -0,0 +1,58 @@
+# Migration framework tests - diffs, dry runs, checkpoints and versioning
+from app.services.migrations import MIGRATIONS_COLLECTION, Migration, get_migration, load_migrations, run_migration
+from app.services.user_migration import migrate_all_users
+
+
+def legacy_user(i):
+    return {"displayName": f"User {i}", "roles": ["student"], "userType": "student", "isVerified": True,
+            "accountStatus": "active", "lastLoginAt": "2025-01-01"}
+
+
+def clean_user(i):
+    return {"displayName": f"User {i}", "roles": ["student"], "status": "active", "profileComplete": True}
+
+
+def test_registry_covers_users_and_classes():
+    migrations = load_migrations()
+    assert {"users.clean_structure", "classes.search_metadata"} <= set(migrations)
+    assert get_migration("users.clean_structure").collection == "users"
+
+
+def test_user_migration_dry_run_then_apply(fake_firestore):
+    fake_firestore.load("users", {"u1": legacy_user(1), "u2": clean_user(2), "u3": legacy_user(3)})
+
+    result = run_migration(get_migration("users.clean_structure"), batch_size=2, dry_run=True)
+    assert (result["changed"], result["unchanged"]) == (2, 1)
+    assert result["diffs"][0]["id"] == "u1"
+    assert result["diffs"][0]["changes"]["userType"] == {"from": "student", "to": None}
+    assert result["diffs"][0]["changes"]["status"] == {"from": None, "to": "active"}
+    assert fake_firestore.dump("users")["u1"] == legacy_user(1)  # Nothing written
+
+    assert migrate_all_users() == {"migrated": 3, "skipped": 0, "failed": 0}
+    users = fake_firestore.dump("users")
+    assert users["u1"] == {**clean_user(1), "lastLogin": "2025-01-01"}
+    assert users["u2"] == clean_user(2)
+
+    # Already-clean users still count as migrated, as they did before the runner
+    assert migrate_all_users() == {"migrated": 3, "skipped": 0, "failed": 0}
+    assert fake_firestore.dump("users") == users
+
+
+def test_checkpoint_resume_and_version_skip(fake_firestore):
+    fake_firestore.load("bookings", {f"b{i}": {"status": "confirmed"} for i in range(5)})
+    fake_firestore.load(MIGRATIONS_COLLECTION, {"bookings.rename": {
+        "version": 1, "status": "running", "lastDocId": "b1", "processed": 2, "changed": 2, "unchanged": 0,
+        "failed": 0}})
+    migration = Migration("bookings.rename", 1, "bookings",
+                          lambda data, context: {"bookingStatus": data.pop("status"), **data} if "status" in data else None)
+
+    result = run_migration(migration, batch_size=2, workers=2)
+    assert (result["status"], result["processed"], result["changed"]) == ("completed", 5, 5)
+    bookings = fake_firestore.dump("bookings")
+    assert bookings["b1"] == {"status": "confirmed"}  # Before the checkpoint - not reprocessed
+    assert bookings["b4"] == {"bookingStatus": "confirmed"}
+
+    assert run_migration(migration)["completedAt"] == result["completedAt"]  # Same version - skipped
+    bumped = run_migration(Migration("bookings.rename", 2, "bookings", migration.transform))
+    assert (bumped["processed"], bumped["changed"]) == (5, 2)
+    assert fake_firestore.dump(MIGRATIONS_COLLECTION)["bookings.rename"]["version"] == 2
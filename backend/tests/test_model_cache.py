@@ -0,0 +1,64 @@
+# Validated-model cache tests - reuse per document version, strict mode, search wrapping
+import logging
+
+import pytest
+from pydantic import ValidationError
+
+from app.models.class_models import ClassItem, ClassSearchQuery
+from app.models.search_models import UnifiedSearchQuery
+from app.services.class_service import search_classes
+from app.services.model_cache import model_cache, validated
+from app.services.search_service import unified_search
+
+CLASS = {"title": "Tabla basics", "subject": "tabla", "category": "music", "type": "group",
+         "format": "online", "mentorId": "m1", "mentorName": "Asha", "createdAt": "2025-01-01T10:00:00"}
+
+
+@pytest.fixture(autouse=True)
+def empty_model_cache():
+    model_cache.clear()
+    yield
+    model_cache.clear()
+    model_cache.strict = False
+
+
+def test_models_are_validated_once_per_document_version(fake_firestore):
+    fake_firestore.load("classes", {"c1": CLASS})
+    first, _ = search_classes(ClassSearchQuery())
+    second, _ = search_classes(ClassSearchQuery())
+    assert first[0] is second[0]
+    assert model_cache.hits == 1
+
+    fake_firestore.collection("classes").document("c1").update({"title": "Tabla II"})
+    third, _ = search_classes(ClassSearchQuery())
+    assert third[0] is not first[0]
+    assert third[0].title == "Tabla II"
+
+
+def test_resolved_mentor_name_is_not_cached(fake_firestore):
+    fake_firestore.load("mentors", {"m1": {"displayName": "Asha", "category": "music", "city": "London"}})
+    fake_firestore.load("classes", {"c1": {**CLASS, "mentorName": None}})
+    first, _ = search_classes(ClassSearchQuery())
+    assert first[0].mentorName == "Asha"
+
+    fake_firestore.collection("mentors").document("m1").update({"displayName": "Asha K"})
+    second, _ = search_classes(ClassSearchQuery())
+    assert second[0].mentorName == "Asha K"
+
+
+def test_strict_mode_validates_every_read_and_logs_failures(fake_firestore, caplog):
+    model_cache.strict = True
+    fake_firestore.load("classes", {"bad": {"title": None}})
+    snapshot = fake_firestore.collection("classes").document("bad").get()
+    with caplog.at_level(logging.WARNING, logger="app.services.model_cache"):
+        with pytest.raises(ValidationError):
+            validated(ClassItem, snapshot, snapshot.to_dict())
+    assert "classes/bad" in caplog.text
+
+
+def test_unified_search_reuses_validated_models(fake_firestore):
+    fake_firestore.load("classes", {"c1": CLASS})
+    results, stats = unified_search(UnifiedSearchQuery(type="class"))
+    assert stats["classCount"] == 1
+    cached, _ = search_classes(ClassSearchQuery())
+    assert results[0].data is cached[0]
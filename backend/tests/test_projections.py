@@ -0,0 +1,78 @@
+# Field projection tests - per-view select(), partial models and response trimming
+import re
+
+import pytest
+
+from app.models.class_models import ClassItem
+from app.models.mentor_models import Mentor
+from app.services.projections import (
+    CLASS_REQUIRED, CLASS_VIEWS, MENTOR_REQUIRED, MENTOR_VIEWS, merge_paths
+)
+from app.services.response_cache import response_cache
+
+BYTES_PATTERN = re.compile(r'fs-bytes;desc="(\d+)"')
+
+
+def make_class(i):
+    return {"title": f"Sitar {i}", "subject": "sitar", "category": "music", "type": "workshop", "mentorId": "m1",
+            "mentorName": "Asha", "description": "Long description " * 50, "createdAt": f"2025-01-0{i}T10:00:00",
+            "pricing": {"perSessionRate": 30, "totalSessions": 4}, "status": "approved",
+            "searchMetadata": {"keywords": ["sitar", "music"] * 100, "region": "South Asia"}}
+
+
+@pytest.fixture
+def catalog(fake_firestore):
+    response_cache.clear()
+    fake_firestore.load("classes", {f"c{i}": make_class(i) for i in range(1, 6)})
+    fake_firestore.load("mentors", {
+        "m1": {"displayName": "Asha", "category": "music", "city": "London", "bio": "Sitar player " * 200,
+               "pricing": {"oneOnOneRate": 40, "groupRate": 20}, "stats": {"avgRating": 4.8}},
+        "m2": {"displayName": "Ravi", "category": "music", "city": "Leeds", "bio": "Tabla",
+               "pricing": {"oneOnOneRate": 30, "groupRate": 15}, "stats": {"avgRating": 4.1}},
+    })
+    yield fake_firestore
+    response_cache.clear()
+
+
+def fs_bytes(response):
+    return int(BYTES_PATTERN.search(response.headers["server-timing"]).group(1))
+
+
+def test_views_cover_required_model_fields():
+    class_required = {name for name, info in ClassItem.model_fields.items() if info.is_required()} - {"classId"}
+    mentor_required = {name for name, info in Mentor.model_fields.items() if info.is_required()} - {"uid"}
+    assert class_required <= set(CLASS_REQUIRED) and mentor_required <= set(MENTOR_REQUIRED)
+    for views, required in ((CLASS_VIEWS, CLASS_REQUIRED), (MENTOR_VIEWS, MENTOR_REQUIRED)):
+        for fields in views.values():
+            assert fields is None or set(required) <= set(fields)
+    assert merge_paths(["pricing.perSessionRate", "title"], ["pricing", "title"]) == ("pricing", "title")
+    assert merge_paths(["title"], None) is None
+
+
+def test_card_view_reads_and_returns_only_card_fields(catalog, client):
+    full = client.get("/classes?type=workshop&status=approved")
+    card = client.get("/classes?type=workshop&status=approved&view=card")
+    assert full.status_code == card.status_code == 200
+    assert [c["classId"] for c in card.json()["classes"]] == [c["classId"] for c in full.json()["classes"]]
+    assert fs_bytes(card) * 2 < fs_bytes(full)
+
+    item = card.json()["classes"][0]
+    assert "searchMetadata" not in item and "updatedAt" not in item
+    assert item["pricing"]["perSessionRate"] == 30 and item["description"].startswith("Long")
+
+    # Partial models are cached per projection and never served to a full read
+    again = client.get("/classes?type=workshop&status=approved&page=1")
+    assert again.json()["classes"][0]["searchMetadata"]["region"] == "South Asia"
+
+    assert client.get("/classes?view=tiny").status_code == 400
+
+
+def test_sparse_fields_narrow_mentor_reads(catalog, client):
+    response = client.get("/mentors?fields=city&sortBy=avgRating")
+    assert response.status_code == 200
+    assert response.json()["mentors"] == [{"uid": "m1", "city": "London"}, {"uid": "m2", "city": "Leeds"}]
+    assert fs_bytes(response) * 5 < fs_bytes(client.get("/mentors?sortBy=avgRating"))
+
+    # The text filter still sees the fields it searches even though they are not returned
+    response = client.get("/mentors?fields=city&q=sitar%20player")
+    assert [m["uid"] for m in response.json()["mentors"]] == ["m1"]
@@ -0,0 +1,163 @@
+# Query planner tests - index-aware pushdown, chunked in queries and page-sized reads
+import pytest
+from fastapi import HTTPException
+
+from app.models.class_models import ClassSearchQuery
+from app.services.class_service import search_classes, search_classes_page
+from app.services.instrumentation import begin_request_stats, end_request_stats
+from app.services.query_planner import (
+    ASCENDING, DESCENDING, Predicate, QuerySort, clear_field_coverage, execute_plan, plan_query
+)
+
+
+def make_class(i, **overrides):
+    data = {"title": f"Sitar {i:02d}", "subject": "sitar", "category": "music", "type": "workshop",
+            "format": "online", "level": "beginner", "mentorId": "m1", "mentorName": "Asha", "status": "approved",
+            "createdAt": f"2025-01-{i + 1:02d}T10:00:00", "pricing": {"perSessionRate": 10 + i, "totalSessions": 1}}
+    data.update(overrides)
+    return data
+
+
+@pytest.fixture
+def catalog(fake_firestore):
+    clear_field_coverage()
+    fake_firestore.load("classes", {f"c{i:02d}": make_class(i, type="workshop" if i % 2 else "batch")
+                                    for i in range(20)})
+    yield fake_firestore
+    clear_field_coverage()
+
+
+def test_plan_uses_declared_indexes(catalog):
+    newest = QuerySort("createdAt", DESCENDING, dense=True)
+    plan = plan_query("classes", [Predicate("type", "==", "workshop"), Predicate("category", "==", "music")], newest)
+    assert plan.paginates_on_server
+    assert [p.field for p in plan.filters] == ["type", "category"] and plan.order == newest
+
+    # No index pairs type with mentorRating, so the range stays in Python and so does the sort
+    plan = plan_query("classes", [Predicate("type", "==", "workshop"), Predicate("mentorRating", ">=", 4)],
+                      QuerySort("title", ASCENDING))
+    assert not plan.paginates_on_server
+    assert [p.field for p in plan.residual] == ["mentorRating"] and plan.sort_in_python.field == "title"
+
+    # A sort field some documents lack is never pushed
+    catalog.collection("classes").document("legacy").set({"type": "workshop", "title": "Legacy"})
+    clear_field_coverage()
+    plan = plan_query("classes", [Predicate("type", "==", "workshop")], newest)
+    assert plan.order is None and plan.sort_in_python.field == "createdAt"
+
+
+def test_long_in_lists_are_chunked_and_merged(catalog):
+    subjects = [f"s{i}" for i in range(40)]
+    catalog.load("classes", {f"x{i}": make_class(i, subject=f"s{i * 2}") for i in range(20)})
+    plan = plan_query("classes", [Predicate("subject", "in", subjects)], QuerySort("createdAt", DESCENDING, True))
+    docs, total = execute_plan(plan, offset=2, limit=5)
+    # s0..s38 even subjects all match; newest first across both chunks
+    assert total == 20
+    assert [doc.id for doc in docs] == ["x17", "x16", "x15", "x14", "x13"]
+
+
+def test_search_reads_a_page_not_the_collection(catalog):
+    stats, token = begin_request_stats()
+    try:
+        items, total = search_classes(ClassSearchQuery(type="workshop", sortBy="createdAt", page=2, pageSize=3))
+    finally:
+        end_request_stats(token)
+    assert total == 10
+    assert [c.title for c in items] == ["Sitar 13", "Sitar 11", "Sitar 09"]
+    # Two coverage counts, one count for the total and offset + limit documents
+    assert stats.reads <= 4 + 6
+
+    # Residual filters still apply on the Python path
+    items, total = search_classes(ClassSearchQuery(type="workshop", mentorName="asha", maxPrice=14))
+    assert total == 2 and {c.title for c in items} == {"Sitar 01", "Sitar 03"}
+
+
+def test_sort_on_filtered_field_and_default_type_filter_page_on_server(catalog):
+    # Upcoming workshops: the startDate range already excludes classes without it
+    plan = plan_query("classes", [Predicate("type", "==", "workshop"), Predicate("schedule.startDate", ">=", "2025-01-01")],
+                      QuerySort("schedule.startDate", ASCENDING))
+    assert plan.paginates_on_server and plan.order.field == "schedule.startDate"
+
+    # Listings without a type filter still order by createdAt in Firestore
+    catalog.collection("classes").document("private").set(make_class(30, type="one-on-one"))
+    stats, token = begin_request_stats()
+    try:
+        items, total = search_classes(ClassSearchQuery(sortBy="createdAt", pageSize=3))
+    finally:
+        end_request_stats(token)
+    assert total == 20
+    assert [c.title for c in items] == ["Sitar 19", "Sitar 18", "Sitar 17"]
+    # Coverage and type checks (cached after this), the total and one page
+    assert stats.reads <= 4 + 3
+
+
+def walk_pages(query):
+    pages, reads, cursor = [], [], None
+    while True:
+        stats, token = begin_request_stats()
+        try:
+            items, total, cursor = search_classes_page(query.model_copy(update={"cursor": cursor}))
+        finally:
+            end_request_stats(token)
+        pages.append([c.title for c in items])
+        reads.append(stats.reads)
+        if cursor is None:
+            return pages, reads
+
+
+def test_cursor_pages_read_a_page_however_deep(catalog):
+    catalog.load("classes", {f"w{i:02d}": make_class(i, title=f"Tabla {i:02d}", createdAt=f"2025-02-{i + 1:02d}T10:00:00")
+                             for i in range(20)})
+    pages, reads = walk_pages(ClassSearchQuery(type="workshop", sortBy="createdAt", pageSize=3))
+    everything, _ = search_classes(ClassSearchQuery(type="workshop", sortBy="createdAt", pageSize=100))
+    assert [title for page in pages for title in page] == [c.title for c in everything]
+    assert len(pages) == 10 and all(len(page) == 3 for page in pages[:-1])
+    # Every later page is a count plus pageSize + 1 documents, however deep
+    assert max(reads[1:]) <= 1 + 3 + 1
+
+
+def test_cursor_keeps_ties_on_the_sort_field(catalog):
+    catalog.load("classes", {f"t{i:02d}": make_class(i, title=f"Tie {i}", type="workshop", createdAt="2025-03-01T10:00:00")
+                             for i in range(7)})
+    pages, _ = walk_pages(ClassSearchQuery(type="workshop", sortBy="createdAt", pageSize=3))
+    titles = [title for page in pages for title in page]
+    assert len(titles) == len(set(titles)) == 17
+    assert sorted(titles[:7]) == [f"Tie {i}" for i in range(7)]
+
+
+def test_cursor_on_the_python_path_and_bad_cursors(catalog):
+    # mentorName is matched in Python, so the cursor is the position in the filtered list
+    pages, _ = walk_pages(ClassSearchQuery(type="workshop", mentorName="asha", sortBy="title", sortOrder="asc",
+                                           pageSize=4))
+    assert [title for page in pages for title in page] == [f"Sitar {i:02d}" for i in range(1, 20, 2)]
+
+    for cursor in ("not-a-cursor", "eyJ2IjpbXSwiaWQiOiJjMDEifQ"):  # The second is {"v": [], "id": "c01"}
+        with pytest.raises(HTTPException) as raised:
+            search_classes_page(ClassSearchQuery(type="workshop", sortBy="createdAt", cursor=cursor))
+        assert raised.value.status_code == 400
+
+
+def test_listings_keep_classes_of_other_types(catalog):
+    catalog.collection("classes").document("private").set(make_class(30, type="one-on-one"))
+    items, total = search_classes(ClassSearchQuery(sortBy="createdAt", pageSize=3))
+    assert total == 20 and [c.title for c in items] == ["Sitar 19", "Sitar 18", "Sitar 17"]
+
+    # A type listings do not know about is still listed, sorted in Python instead
+    catalog.collection("classes").document("masterclass").set(make_class(25, type="masterclass"))
+    clear_field_coverage()
+    items, total = search_classes(ClassSearchQuery(sortBy="createdAt", pageSize=3))
+    assert total == 21 and [c.title for c in items] == ["Sitar 25", "Sitar 19", "Sitar 18"]
+
+
+def test_max_price_keeps_classes_without_a_price(catalog):
+    items, total = search_classes(ClassSearchQuery(type="workshop", maxPrice=14, sortBy="createdAt"))
+    assert [c.title for c in items] == ["Sitar 03", "Sitar 01"]
+
+    unpriced = make_class(21, type="workshop")
+    del unpriced["pricing"]
+    catalog.collection("classes").document("unpriced").set(unpriced)
+    clear_field_coverage()
+    items, total = search_classes(ClassSearchQuery(type="workshop", maxPrice=14, sortBy="createdAt"))
+    assert total == 3 and [c.title for c in items] == ["Sitar 21", "Sitar 03", "Sitar 01"]
+    items, total = search_classes(ClassSearchQuery(type="workshop", minPrice=28))
+    assert [c.title for c in items] == ["Sitar 19"]
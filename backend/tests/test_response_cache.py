@@ -0,0 +1,68 @@
+# Response cache tests - ETags, conditional GET and invalidation on catalog writes
+import time
+
+import pytest
+
+from app.services.mentor_service import update_mentor_flexible
+from app.services.response_cache import CACHE_TTL, cache_key, catalog_versions, etag_matches, policy_for, response_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    response_cache.clear()
+    yield
+    response_cache.clear()
+
+
+def test_cache_key_normalizes_query_params():
+    assert cache_key("/classes/", b"type=workshop&page=1") == cache_key("/classes", b"page=1&type=workshop")
+    assert cache_key("/classes", b"q=") == "/classes"
+    assert etag_matches('W/"abc", "def"', '"abc"')
+    assert not etag_matches('"abc"', '"def"')
+
+
+def test_conditional_get_and_invalidation(client, fake_firestore):
+    fake_firestore.load("mentors", {"m1": {"displayName": "Asha", "category": "music", "city": "London"}})
+    catalog_versions.refresh()
+
+    first = client.get("/mentors/m1")
+    assert first.status_code == 200
+    assert first.headers["x-cache"] == "MISS"
+    assert "stale-while-revalidate" in first.headers["cache-control"]
+    etag = first.headers["etag"]
+
+    not_modified = client.get("/mentors/m1", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert 'fs-reads;desc="0"' in not_modified.headers["server-timing"]
+
+    cached = client.get("/mentors/m1")
+    assert cached.headers["x-cache"] == "HIT"
+    assert cached.json() == first.json()
+
+    update_mentor_flexible("m1", {"displayName": "Asha K"})
+    refreshed = client.get("/mentors/m1", headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["etag"] != etag
+    assert refreshed.json()["mentor"]["displayName"] == "Asha K"
+
+
+def test_etag_changes_after_max_age(client, fake_firestore, monkeypatch):
+    fake_firestore.load("mentors", {"m1": {"displayName": "Asha", "category": "music", "city": "London"}})
+    catalog_versions.refresh()
+    now = 1_700_000_000.0
+    monkeypatch.setattr(time, "time", lambda: now)
+
+    etag = client.get("/mentors").headers["etag"]
+    assert client.get("/mentors", headers={"If-None-Match": etag}).status_code == 304
+
+    now += 60
+    expired = client.get("/mentors", headers={"If-None-Match": etag})
+    assert expired.status_code == 200
+    assert expired.headers["x-cache"] == "MISS"
+    assert expired.headers["etag"] != etag
+
+
+def test_unversioned_subjects_are_not_cached_past_the_ttl():
+    # No API write path bumps "subjects", so clients must not keep them longer than the server does
+    policy = policy_for("/metadata/subjects")
+    assert policy.max_age <= CACHE_TTL and policy.stale_while_revalidate <= CACHE_TTL
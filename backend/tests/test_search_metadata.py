@@ -0,0 +1,63 @@
+# searchMetadata pipeline tests - regeneration on update and the resumable backfill
+import pytest
+
+from app.services.class_service import SEARCH_METADATA_VERSION, fetch_subject_from_database, update_class_flexible
+from app.services.migrations import MIGRATIONS_COLLECTION
+from app.services.search_metadata_backfill import MIGRATION_ID, run_backfill
+
+
+def make_class(i, **overrides):
+    data = {"title": f"Sitar {i}", "subject": "sitar", "subjectId": "sitar", "category": "music",
+            "type": "group", "format": "online", "level": "beginner", "mentorName": "Asha",
+            "pricing": {"perSessionRate": 30, "totalSessions": 8},
+            "schedule": {"sessionDuration": 60, "weeklySchedule": [{"day": "Monday", "startTime": "18:00",
+                                                                    "endTime": "19:00"}]}}
+    data.update(overrides)
+    return data
+
+
+@pytest.fixture
+def catalog(fake_firestore):
+    fake_firestore.load("subjects", {"sitar": {"region": "South Asia", "cultural_authenticity_score": 0.9,
+                                               "is_culturally_rooted": True}})
+    return fake_firestore
+
+
+def test_fetch_subject_from_database(catalog):
+    assert fetch_subject_from_database("sitar")["region"] == "South Asia"
+    assert fetch_subject_from_database("missing") is None
+
+
+def test_update_regenerates_metadata_only_for_relevant_fields(catalog):
+    catalog.load("classes", {"c1": make_class(1)})
+
+    updated = update_class_flexible("c1", {"pricing.perSessionRate": 45})
+    assert updated["searchMetadata"]["pricePerHour"] == 45
+    assert updated["searchMetadata"]["cultural_authenticity_score"] == 0.9
+    assert updated["searchMetadataVersion"] == SEARCH_METADATA_VERSION
+
+    updated = update_class_flexible("c1", {"status": "approved"})
+    assert updated["searchMetadata"]["pricePerHour"] == 45
+
+
+def test_backfill_updates_stale_classes_and_resumes(catalog):
+    current = {"searchMetadata": {"keywords": ["sitar"]}, "searchMetadataVersion": SEARCH_METADATA_VERSION}
+    catalog.load("classes", {f"c{i}": make_class(i, **(current if i < 2 else {})) for i in range(6)})
+
+    # Interrupted run: everything up to c2 was already flushed
+    catalog.load(MIGRATIONS_COLLECTION, {MIGRATION_ID: {"version": SEARCH_METADATA_VERSION, "status": "running",
+                                                        "lastDocId": "c2", "processed": 3, "changed": 1,
+                                                        "unchanged": 2, "failed": 0}})
+    result = run_backfill(batch_size=2)
+    assert (result["processed"], result["changed"], result["unchanged"]) == (6, 4, 2)
+    assert result["completedAt"]
+
+    classes = catalog.dump("classes")
+    assert "searchMetadata" not in classes["c2"]  # Before the checkpoint - not reprocessed
+    assert all(classes[f"c{i}"]["searchMetadata"]["cultural_authenticity_score"] == 0.9 for i in range(3, 6))
+
+    # A completed version is not rerun unless asked; a rerun only touches stale documents
+    assert run_backfill(batch_size=4)["processed"] == 6
+    result = run_backfill(batch_size=4, rerun=True)
+    assert (result["processed"], result["changed"], result["unchanged"]) == (6, 1, 5)
+    assert run_backfill(dry_run=True)["changed"] == 0
@@ -0,0 +1,66 @@
+# Response serialization tests - sparse fieldsets and compression
+import pytest
+
+from app.services.response_cache import response_cache
+from app.services.serialization import parse_fields
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    response_cache.clear()
+    yield
+    response_cache.clear()
+
+
+def seed_classes(fake_firestore, count):
+    fake_firestore.load("classes", {
+        f"c{i}": {
+            "classId": f"c{i}", "title": f"Piano workshop {i}", "subject": "piano", "category": "music",
+            "type": "group", "format": "online", "status": "approved", "mentorId": "m1", "mentorName": "Asha",
+            "description": "An introduction to Carnatic rhythm and melody for beginners. " * 4,
+            "pricing": {"perSessionRate": 25, "subtotal": 200, "currency": "GBP"},
+            "createdAt": f"2025-01-{i % 28 + 1:02d}T10:00:00",
+        }
+        for i in range(count)
+    })
+
+
+def test_parse_fields_builds_include_tree():
+    assert parse_fields(None) is None
+    assert parse_fields("title, pricing.subtotal,pricing.currency") == {
+        "title": True, "pricing": {"subtotal": True, "currency": True}}
+    assert parse_fields("pricing,pricing.subtotal") == {"pricing": True}
+
+
+def test_classes_sparse_fieldset(client, fake_firestore):
+    seed_classes(fake_firestore, 3)
+    response = client.get("/classes?fields=title,pricing.subtotal")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 3
+    assert all(set(item) == {"classId", "title", "pricing"} for item in body["classes"])
+    assert all(item["pricing"] == {"subtotal": 200} for item in body["classes"])
+
+
+def test_large_responses_are_compressed_with_distinct_etags(client, fake_firestore):
+    seed_classes(fake_firestore, 20)
+    compressed = client.get("/classes", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in compressed.headers["vary"]
+
+    plain = client.get("/classes", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["etag"] != compressed.headers["etag"]
+    assert compressed.json() == plain.json()
+
+    # Cached copy is served still compressed
+    raw = client.get("/classes", headers={"Accept-Encoding": "gzip"})
+    assert raw.headers["x-cache"] == "HIT"
+    assert raw.headers["content-encoding"] == "gzip"
+    assert raw.json() == plain.json()
+
+
+def test_small_responses_are_not_compressed(client, fake_firestore):
+    seed_classes(fake_firestore, 1)
+    response = client.get("/classes?fields=title", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
@@ -0,0 +1,54 @@
+# Single-flight tests - shared in-flight calls, TTL, version invalidation, errors
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services.instrumentation import SINGLE_FLIGHT_CALLS
+from app.services.response_cache import bump_catalog_version
+from app.services.single_flight import single_flight
+
+
+def test_concurrent_identical_calls_share_one_run():
+    release, runs = threading.Event(), []
+
+    @single_flight()
+    def slow(x):
+        runs.append(x)
+        release.wait(5)
+        return [x]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(slow, 1) for _ in range(6)] + [pool.submit(slow, 2)]
+        # Hold the leaders until every follower is waiting on one
+        while SINGLE_FLIGHT_CALLS.value((slow.single_flight.name, "shared")) < 5:
+            time.sleep(0.001)
+        release.set()
+        results = [future.result() for future in futures]
+    assert sorted(runs) == [1, 2]
+    assert all(result is results[0] for result in results[:6]) and results[6] == [2]
+
+    # No TTL: the next call runs again
+    slow(1)
+    assert runs.count(1) == 2
+
+
+def test_ttl_results_follow_catalog_versions_and_errors_are_not_kept(fake_firestore):
+    runs = []
+
+    @single_flight(ttl=60, dependencies=("subjects",))
+    def subjects():
+        runs.append(1)
+        if len(runs) == 3:
+            raise RuntimeError("boom")
+        return len(runs)
+
+    assert subjects() == subjects() == 1
+    bump_catalog_version("subjects")
+    assert subjects() == 2
+
+    subjects.single_flight.clear()
+    with pytest.raises(RuntimeError):
+        subjects()
+    assert subjects() == 4
@@ -0,0 +1,221 @@
+# Stripe webhook ingestion tests - signature checks, deduplication and replay safety
+import hashlib
+import hmac
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import Mock, patch
+
+import pytest
+import stripe
+from google.api_core.exceptions import AlreadyExists
+
+from app.config import settings
+from app.models.payment_models import PaymentIntent
+from app.services import stripe_webhook_service
+from app.services.booking_service import create_booking_flexible
+from app.services.dashboard_service import DASHBOARDS_COLLECTION
+from app.services.payment_service import payment_service
+from app.services.stripe_webhook_service import plan_event_writes
+
+WEBHOOK_SECRET = "whsec_test_secret"
+
+
+def sign(payload: bytes, secret: str = WEBHOOK_SECRET) -> str:
+    timestamp = int(time.time())
+    signature = hmac.new(secret.encode(), f"{timestamp}.".encode() + payload, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+def make_event(event_id, event_type, obj, created):
+    return {"id": event_id, "object": "event", "type": event_type, "created": created,
+            "livemode": False, "data": {"object": obj}}
+
+
+def payment_events(n):
+    """Lifecycle fixtures for n payments: processing, failed attempt, success, partial and full refund"""
+    events = []
+    for i in range(n):
+        intent = {"id": f"pi_{i}", "metadata": {"payment_id": f"pay_{i}", "booking_id": f"booking_{i}"},
+                  "latest_charge": f"ch_{i}"}
+        charge = {"id": f"ch_{i}", "amount": 5000, "payment_intent": f"pi_{i}", "metadata": intent["metadata"]}
+        base = 1700000000 + i * 10
+        events += [
+            make_event(f"evt_{i}_1", "payment_intent.processing", intent, base),
+            make_event(f"evt_{i}_2", "payment_intent.payment_failed",
+                       {**intent, "last_payment_error": {"message": "Card declined"}}, base + 1),
+            make_event(f"evt_{i}_3", "payment_intent.succeeded", intent, base + 2),
+            make_event(f"evt_{i}_4", "charge.refunded", {**charge, "amount_refunded": 2000}, base + 3),
+            make_event(f"evt_{i}_5", "charge.refunded", {**charge, "amount_refunded": 5000}, base + 4),
+        ]
+    return events
+
+
+def replay(events):
+    """Apply events to in-memory payments/bookings the way the worker does"""
+    payments, bookings = {}, {}
+    for event in events:
+        metadata = event["data"]["object"]["metadata"]
+        payment = payments.setdefault(metadata["payment_id"], {"status": "pending", "amount": 5000, "refundedAmount": 0})
+        booking = bookings.setdefault(metadata["booking_id"], {"bookingStatus": "pending", "paymentStatus": "unpaid"})
+        payment_update, booking_update = plan_event_writes(event, payment, booking)
+        payment.update(payment_update or {})
+        booking.update(booking_update or {})
+    strip = lambda docs: {k: {f: v for f, v in d.items() if f != "updatedAt"} for k, d in docs.items()}
+    return strip(payments), strip(bookings)
+
+
+def test_replayed_out_of_order_events_converge():
+    events = payment_events(2000)
+    expected = replay(events)
+
+    redelivered = events * 3
+    random.Random(42).shuffle(redelivered)
+    assert replay(redelivered) == expected
+
+    payments, bookings = expected
+    assert payments["pay_7"]["status"] == "refunded"
+    assert payments["pay_7"]["stripeChargeId"] == "ch_7"
+    assert bookings["booking_7"] == {"bookingStatus": "confirmed", "paymentStatus": "refunded",
+                                     "paymentIntentId": "pi_7", "confirmedAt": bookings["booking_7"]["confirmedAt"]}
+
+
+@pytest.fixture
+def webhook_db(monkeypatch):
+    monkeypatch.setattr(settings, "stripe_webhook_secret", WEBHOOK_SECRET)
+    scheduled = []
+    with patch.object(stripe_webhook_service, "db") as mock_db, \
+            patch.object(stripe_webhook_service, "schedule_event", scheduled.append):
+        mock_db.scheduled = scheduled
+        yield mock_db
+
+
+def test_webhook_rejects_invalid_signature(client, webhook_db):
+    payload = json.dumps(make_event("evt_bad", "payment_intent.succeeded", {}, 1700000000)).encode()
+    response = client.post("/payments/webhook", content=payload,
+                           headers={"Stripe-Signature": sign(payload, "whsec_wrong")})
+    assert response.status_code == 400
+    assert webhook_db.scheduled == []
+
+
+def test_webhook_records_redelivered_event_once(client, webhook_db):
+    webhook_db.collection.return_value.document.return_value.create.side_effect = [None, AlreadyExists("exists")]
+    payload = json.dumps(make_event("evt_1", "payment_intent.succeeded", {"id": "pi_1"}, 1700000000)).encode()
+
+    first = client.post("/payments/webhook", content=payload, headers={"Stripe-Signature": sign(payload)})
+    second = client.post("/payments/webhook", content=payload, headers={"Stripe-Signature": sign(payload)})
+
+    assert first.json()["duplicate"] is False
+    assert second.json()["duplicate"] is True
+    assert webhook_db.scheduled == ["evt_1"]
+
+
+class StripeStub:
+    """Local HTTP server standing in for the Stripe API"""
+
+    def __init__(self):
+        self.idempotency_keys = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                key = self.headers.get("Idempotency-Key")
+                stub.idempotency_keys.append(key)
+                body = json.dumps({
+                    "id": f"pi_{hashlib.sha256(key.encode()).hexdigest()[:8]}",
+                    "object": "payment_intent",
+                    "amount": 5000,
+                    "currency": "gbp",
+                    "client_secret": "pi_secret",
+                    "description": "Test",
+                    "status": "requires_payment_method",
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+
+
+def test_create_payment_intent_is_idempotent(monkeypatch, fake_firestore):
+    stub = StripeStub()
+    monkeypatch.setattr(stripe, "api_base", stub.url)
+    try:
+        with patch("app.services.payment_service.get_simple_booking", return_value=Mock()):
+            request = PaymentIntent(bookingId="booking_1", amount=5000)
+            first = payment_service.create_payment_intent(request)
+            retry = payment_service.create_payment_intent(request)
+            other = payment_service.create_payment_intent(PaymentIntent(bookingId="booking_2", amount=5000))
+    finally:
+        stub.close()
+
+    assert stub.idempotency_keys[0] == stub.idempotency_keys[1] != stub.idempotency_keys[2]
+    assert first.paymentIntentId == retry.paymentIntentId != other.paymentIntentId
+    assert len(fake_firestore.collection("payments").get()) == 2
+
+
+def test_retry_after_failed_intent_creates_new_intent(monkeypatch, fake_firestore):
+    stub = StripeStub()
+    monkeypatch.setattr(stripe, "api_base", stub.url)
+    payments = fake_firestore.collection("payments")
+    try:
+        with patch("app.services.payment_service.get_simple_booking", return_value=Mock()):
+            request = PaymentIntent(bookingId="booking_1", amount=5000)
+            first = payment_service.create_payment_intent(request)
+            old_intent = payments.document(first.paymentIntentId).get().to_dict()["stripePaymentIntentId"]
+            payments.document(first.paymentIntentId).update({"status": "failed"})
+
+            retry = payment_service.create_payment_intent(request)
+            again = payment_service.create_payment_intent(request)
+    finally:
+        stub.close()
+
+    stored = payments.document(first.paymentIntentId).get().to_dict()
+    assert retry.paymentIntentId == first.paymentIntentId
+    assert stub.idempotency_keys[1] != stub.idempotency_keys[0]
+    assert stub.idempotency_keys[2] == stub.idempotency_keys[1]
+    assert stored["stripePaymentIntentId"] != old_intent
+    assert stored["status"] == "pending" and stored["attempt"] == 1
+
+    # A late event for the abandoned intent leaves the new attempt alone
+    stale = make_event("evt_old", "payment_intent.canceled", {"id": old_intent}, 1700000000)
+    assert plan_event_writes(stale, stored, None) == (None, None)
+
+
+def test_replay_dead_letters_events_that_keep_failing(fake_firestore):
+    events = fake_firestore.collection(stripe_webhook_service.STRIPE_EVENTS_COLLECTION)
+    events.document("evt_retry").set({"status": "failed", "attempts": 1})
+    events.document("evt_dead").set({"status": "failed", "attempts": stripe_webhook_service.MAX_EVENT_REPLAYS})
+    scheduled = []
+    with patch.object(stripe_webhook_service, "schedule_event", scheduled.append):
+        assert stripe_webhook_service.replay_pending_events() == 1
+
+    assert scheduled == ["evt_retry"]
+    assert events.document("evt_dead").get().to_dict()["status"] == stripe_webhook_service.DEAD_LETTER
+
+
+def test_success_page_keeps_booking_the_webhook_created(fake_firestore):
+    booking_id = stripe_webhook_service.booking_id_for_checkout_session("cs_1")
+    fields = {"bookingId": booking_id, "studentId": "s1", "classId": "c1", "mentorId": "m1",
+              "bookingStatus": "confirmed", "paymentStatus": "paid", "stripeSessionId": "cs_1"}
+    # The webhook created the booking (and counted it) after the success page checked for it
+    fake_firestore.load("bookings", {booking_id: {**fields, "source": "webhook"}})
+
+    booking = create_booking_flexible(dict(fields))
+
+    assert booking["source"] == "webhook"
+    assert fake_firestore.collection("bookings").document(booking_id).get().to_dict()["source"] == "webhook"
+    assert not fake_firestore.collection(DASHBOARDS_COLLECTION).document("s1").get().exists
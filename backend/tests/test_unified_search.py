@@ -0,0 +1,100 @@
+# Unified search pipeline tests - concurrent stages, bounded merge, debug timings
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.mentor_service import update_mentor_flexible
+from app.services import search_service
+from app.services.response_cache import response_cache
+from app.services.search_service import merge_unified_results, sort_unified_results
+from app.services.search_sessions import encode_cursor
+
+
+@pytest.fixture
+def catalog(fake_firestore):
+    response_cache.clear()
+    fake_firestore.load("mentors", {f"m{i}": {"displayName": f"Mentor {i}", "category": "music", "city": "Leeds",
+                                              "country": "UK", "stats": {"avgRating": 4 + i / 10}}
+                                    for i in range(3)})
+    fake_firestore.load("classes", {f"c{i}": {"title": f"Class {i}", "subject": "sitar", "category": "music",
+                                              "type": "group", "mentorId": "m1", "mentorName": "Mentor 1",
+                                              "mentorRating": 4.5, "createdAt": f"2025-01-0{i + 1}T10:00:00"}
+                                    for i in range(4)})
+    yield fake_firestore
+    response_cache.clear()
+
+
+def test_bounded_merge_matches_full_sort():
+    results = [{"id": i, "rating": i % 3, "price": None, "data": SimpleNamespace(createdAt=f"2025-01-{i % 4}")}
+               for i in range(30)]
+    for sort_by, order in (("rating", "desc"), ("rating", "asc"), ("price", "desc"), ("date", "asc")):
+        top, total = merge_unified_results(iter(results), sort_by, order, 7)
+        assert total == 30
+        assert [r["id"] for r in top] == [r["id"] for r in sort_unified_results(list(results), sort_by, order)[:7]]
+
+
+def test_search_runs_both_stages_and_reports_timings(catalog, client):
+    plain = client.get("/search/?sortBy=rating&pageSize=5")
+    assert plain.status_code == 200 and "debug" not in plain.json()
+    body = plain.json()
+    assert (body["total"], body["mentorCount"], body["classCount"]) == (7, 3, 4)
+    assert [r["id"] for r in body["results"]] == ["c3", "c2", "c1", "c0", "m2"]
+
+    stages = client.get("/search/?sortBy=price&pageSize=5&debug=true").json()["debug"]["stages"]
+    assert stages["mentors"]["matched"] == 3 and stages["classes"]["candidates"] == 4
+    assert stages["session"] == "miss" and stages["totalMs"] >= 0
+
+    only_mentors = client.get("/search/?type=mentor&debug=true").json()
+    assert only_mentors["classCount"] == 0 and "classes" not in only_mentors["debug"]["stages"]
+
+
+def test_later_pages_slice_the_ranked_session(catalog, client):
+    first = client.get("/search/?sortBy=rating&pageSize=3").json()
+    assert [r["id"] for r in first["results"]] == ["c3", "c2", "c1"]
+    assert first["nextCursor"]
+
+    # The cursor carries the query; the session answers it by reading only the visible documents
+    catalog.collection("classes").document("c0").update({"title": "Renamed"})
+    second = client.get(f"/search/?pageSize=3&debug=true&cursor={first['nextCursor']}").json()
+    assert [r["id"] for r in second["results"]] == ["c0", "m2", "m1"] and second["page"] == 2
+    assert second["results"][0]["title"] == "Renamed"
+    assert second["debug"]["stages"]["session"] == "hit" and second["debug"]["stages"]["hydrate"]["ids"] == 3
+    third = client.get(f"/search/?pageSize=3&cursor={second['nextCursor']}").json()
+    assert [r["id"] for r in third["results"]] == ["m0"] and third["nextCursor"] is None
+
+    # A catalog write starts a new ranking
+    update_mentor_flexible("m0", {"stats.avgRating": 5.0})
+    again = client.get("/search/?sortBy=rating&pageSize=3&debug=true").json()
+    assert again["results"][0]["id"] == "m0" and again["debug"]["stages"]["session"] == "miss"
+
+    assert client.get("/search/?cursor=not-a-cursor").status_code == 400
+
+
+def test_cursor_with_page_fields_is_rejected(catalog, client):
+    cursor = encode_cursor({"sortBy": "rating", "pageSize": 50}, 3)
+    assert client.get(f"/search/?cursor={cursor}").status_code == 400
+
+
+def test_pages_past_the_session_depth_are_ranked_again(catalog, client, monkeypatch):
+    monkeypatch.setattr(search_service, "SEARCH_SESSION_DEPTH", 3)
+    first = client.get("/search/?sortBy=rating&pageSize=3").json()
+    assert first["total"] == 7 and first["nextCursor"]
+
+    second = client.get(f"/search/?pageSize=3&debug=true&cursor={first['nextCursor']}").json()
+    assert [r["id"] for r in second["results"]] == ["c0", "m2", "m1"]
+    assert second["debug"]["stages"]["session"] == "miss"
+    deepest = client.get("/search/?sortBy=rating&pageSize=3&page=3").json()
+    assert [r["id"] for r in deepest["results"]] == ["m0"] and deepest["nextCursor"] is None
+
+
+def test_every_match_is_ranked(catalog, client):
+    # More matches than a page of either listing can hold (pageSize is at most 100)
+    catalog.load("classes", {f"x{i:03d}": {"title": f"Extra {i}", "subject": "tabla", "category": "music",
+                                           "type": "group", "mentorId": "m1", "mentorName": "Mentor 1",
+                                           "mentorRating": 1.0 if i == 0 else 3.0, "createdAt": f"2024-06-01T{i // 60:02d}:{i % 60:02d}:00"}
+                             for i in range(150)})
+    body = client.get("/search/?type=class&sortBy=rating&sortOrder=asc&pageSize=5&debug=true").json()
+    assert body["total"] == body["classCount"] == 154
+    assert body["debug"]["stages"]["classes"]["candidates"] == 154
+    # The oldest class is retrieved last and still ranks first
+    assert [r["id"] for r in body["results"]] == ["x000", "x149", "x148", "x147", "x146"]
@@ -1,6 +1,13 @@
 # Users API tests
+import asyncio
+import io
 from unittest.mock import Mock
 
+from fastapi import UploadFile
+from PIL import Image
+
+from app.services.image_upload_service import LocalStorageBackend, save_profile_image, schedule_thumbnail_update
+
 def test_create_user_endpoint_exists(client, mock_firestore):
     """Test that user creation endpoint exists"""
     user_data = {
@@ -62,3 +69,40 @@ def test_delete_user_account(client, mock_firestore):
     """Test account deletion functionality"""
     response = client.put("/users/test_user_001?delete_account=true")
     assert response.status_code in [200, 404, 401, 422]
+
+def test_update_user_rejects_oversized_image(client, mock_firestore):
+    """Test that image size limit is enforced while streaming the upload"""
+    oversized = b"\x89PNG" + b"0" * (5 * 1024 * 1024)
+    response = client.put(
+        "/users/test_user_001",
+        files={"file": ("big.png", oversized, "image/png")}
+    )
+    assert response.status_code == 413
+
+def test_update_user_rejects_invalid_image_type(client, mock_firestore):
+    """Test that non-image uploads are rejected"""
+    response = client.put(
+        "/users/test_user_001",
+        files={"file": ("notes.txt", b"hello", "text/plain")}
+    )
+    assert response.status_code == 400
+
+def test_upload_returns_before_thumbnails_and_stores_them_later(fake_firestore, tmp_path):
+    """Test that the upload answers with the original URL and the worker writes thumbnail URLs"""
+    image = io.BytesIO()
+    Image.new("RGB", (400, 300), "red").save(image, format="PNG")
+    image.seek(0)
+    backend = LocalStorageBackend(str(tmp_path))
+    upload = asyncio.run(save_profile_image(
+        "u1", UploadFile(image, filename="me.png", headers={"content-type": "image/png"}), backend=backend))
+    assert set(upload["thumbnails"].values()) == {upload["url"]}
+
+    fake_firestore.load("users", {"u1": {"photoURL": upload["url"], "photoThumbnails": upload["thumbnails"]},
+                                  "u2": {"photoURL": "/uploads/newer.png"}})
+    assert schedule_thumbnail_update(upload, "users", "u1", backend=backend).result(timeout=10)
+    thumbnails = fake_firestore.collection("users").document("u1").get().to_dict()["photoThumbnails"]
+    assert thumbnails["sm"].endswith("_sm.webp") and backend.exists(thumbnails["sm"].split("/uploads/", 1)[1])
+
+    # A newer upload owns the document - its thumbnails are left alone
+    assert not schedule_thumbnail_update(upload, "users", "u2", backend=backend).result(timeout=10)
+    assert "photoThumbnails" not in fake_firestore.collection("users").document("u2").get().to_dict()
@@ -35,7 +35,7 @@ const Homepage = () => {
 
     const fetchWorkshop = async () => {
       const response = await axios.get(
-        `${API_PREFIX}/classes?type=workshop&upcoming=true&pageSize=3`
+        `${API_PREFIX}/classes?type=workshop&upcoming=true&pageSize=3&view=card`
       );
 
       setWorkshop(response.data.classes);
@@ -57,7 +57,7 @@ const Homepage = () => {
 
     const fetchCities = async () => {
       const response = await axios.get(
-        `${API_PREFIX}/mentors/?pageSize=100`
+        `${API_PREFIX}/mentors/?pageSize=100&fields=city`
       );
       const uniqueCities = [...new Set(response.data.mentors.map(mentor => mentor.city))].sort();
       setCities(uniqueCities);